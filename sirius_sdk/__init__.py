@@ -1,22 +1,45 @@
-from sirius_sdk.agent.agent import Agent
-from sirius_sdk.hub import init, context, endpoints, ledger, dkms, subscribe, ping, send, send_to, send_batched, \
-    generate_qr_code, DID, Crypto, Microledgers, PairwiseList, AnonCreds, CoProtocolThreadedP2P, CoProtocolP2PAnon, \
-    CoProtocolP2P, AbstractP2PCoProtocol, CoProtocolThreadedTheirs, Cache, open_communication, NonSecrets, \
-    acquire, release, Config, spawn_coprotocol, prepare_response
-from sirius_sdk.encryption import P2PConnection
-from sirius_sdk.abstract.p2p import Endpoint, TheirEndpoint, Pairwise
-from sirius_sdk.agent import aries_rfc
-from sirius_sdk import recipes
-from sirius_sdk.agent import didcomm
-from sirius_sdk.agent.dkms import Schema, CredentialDefinition, AnonCredSchema, Ledger, DKMS, NYMRole
-from sirius_sdk.errors import indy_exceptions, exceptions
-from sirius_sdk.agent.pairwise import AbstractPairwiseList
-from sirius_sdk.abstract.api import APICrypto
-from sirius_sdk.abstract.batching import RoutingBatch
-from sirius_sdk.agent.wallet.abstract.non_secrets import AbstractNonSecrets, RetrieveRecordOptions as NonSecretsRetrieveRecordOptions
-from sirius_sdk.agent.wallet.abstract.cache import AbstractCache
-from sirius_sdk.agent.wallet.abstract.did import AbstractDID
-from sirius_sdk.agent.microledgers.abstract import AbstractMicroledgerList
+import importlib
+
+
+# Public names are imported on first access (PEP 562), so "import sirius_sdk" does not pay for
+# hub, aries_rfc features, aiohttp etc. until they are used: name -> (module, attribute or None for module)
+__LAZY = {
+    "Agent": ("sirius_sdk.agent.agent", "Agent"),
+    "P2PConnection": ("sirius_sdk.encryption", "P2PConnection"),
+    "Endpoint": ("sirius_sdk.abstract.p2p", "Endpoint"),
+    "TheirEndpoint": ("sirius_sdk.abstract.p2p", "TheirEndpoint"),
+    "Pairwise": ("sirius_sdk.abstract.p2p", "Pairwise"),
+    "aries_rfc": ("sirius_sdk.agent.aries_rfc", None),
+    "recipes": ("sirius_sdk.recipes", None),
+    "didcomm": ("sirius_sdk.agent.didcomm", None),
+    "Schema": ("sirius_sdk.agent.dkms", "Schema"),
+    "CredentialDefinition": ("sirius_sdk.agent.dkms", "CredentialDefinition"),
+    "AnonCredSchema": ("sirius_sdk.agent.dkms", "AnonCredSchema"),
+    "Ledger": ("sirius_sdk.agent.dkms", "Ledger"),
+    "DKMS": ("sirius_sdk.agent.dkms", "DKMS"),
+    "NYMRole": ("sirius_sdk.agent.dkms", "NYMRole"),
+    "indy_exceptions": ("sirius_sdk.errors.indy_exceptions", None),
+    "exceptions": ("sirius_sdk.errors.exceptions", None),
+    "AbstractPairwiseList": ("sirius_sdk.agent.pairwise", "AbstractPairwiseList"),
+    "APICrypto": ("sirius_sdk.abstract.api", "APICrypto"),
+    "RoutingBatch": ("sirius_sdk.abstract.batching", "RoutingBatch"),
+    "AbstractNonSecrets": ("sirius_sdk.agent.wallet.abstract.non_secrets", "AbstractNonSecrets"),
+    "NonSecretsRetrieveRecordOptions": ("sirius_sdk.agent.wallet.abstract.non_secrets", "RetrieveRecordOptions"),
+    "AbstractCache": ("sirius_sdk.agent.wallet.abstract.cache", "AbstractCache"),
+    "AbstractDID": ("sirius_sdk.agent.wallet.abstract.did", "AbstractDID"),
+    "AbstractMicroledgerList": ("sirius_sdk.agent.microledgers.abstract", "AbstractMicroledgerList"),
+}
+# Subpackages were bound by eager imports before, keep "sirius_sdk.messaging.Message" etc. working
+for __name in ["abstract", "agent", "base", "codec", "encryption", "errors", "hub", "messaging", "rpc"]:
+    __LAZY[__name] = (f"sirius_sdk.{__name}", None)
+for __name in [
+    "init", "context", "endpoints", "ledger", "dkms", "subscribe", "ping", "send", "send_to", "send_batched",
+    "generate_qr_code", "DID", "Crypto", "Microledgers", "PairwiseList", "AnonCreds", "CoProtocolThreadedP2P",
+    "CoProtocolP2PAnon", "CoProtocolP2P", "AbstractP2PCoProtocol", "CoProtocolThreadedTheirs", "Cache",
+    "open_communication", "NonSecrets", "acquire", "release", "Config", "spawn_coprotocol", "prepare_response"
+]:
+    __LAZY[__name] = ("sirius_sdk.hub", __name)
+del __name
 
 
 __all__ = [
@@ -28,3 +51,20 @@ __all__ = [
     "Config", "didcomm", "recipes", "AbstractPairwiseList", "AbstractNonSecrets", "RoutingBatch", "NYMRole",
     "AbstractCache", "AbstractDID", "AbstractMicroledgerList", "DKMS", "spawn_coprotocol", "NonSecretsRetrieveRecordOptions"
 ]
+
+
+def __getattr__(name: str):
+    try:
+        module_name, attr = __LAZY[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = importlib.import_module(module_name)
+    if attr is not None:
+        value = getattr(value, attr)
+    # Cache in module namespace: next access does not call __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional, Dict
+from typing import Any, List, Optional, Mapping
 
 
 class AbstractImmutableCollection(ABC):
@@ -36,5 +36,5 @@ class AbstractKeyValueStorage(ABC):
         raise NotImplemented
 
     @abstractmethod
-    async def items(self) -> Dict:
+    async def items(self) -> Mapping[str, Any]:
         raise NotImplemented
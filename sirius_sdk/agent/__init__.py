@@ -1,2 +1,24 @@
-from .aries_rfc import *
-from .consensus import *
+import importlib
+
+
+# Names of aries_rfc and consensus packages are resolved on first access (PEP 562),
+# so importing agent submodules does not load all protocol features
+__PACKAGES = ['.aries_rfc', '.consensus']
+
+
+def __getattr__(name: str):
+    if name == '__all__':
+        # Star-import loads all packages
+        names = []
+        for package in __PACKAGES:
+            module = importlib.import_module(package, __name__)
+            names.extend(module.__all__)
+        return names
+    if not name.startswith('__'):
+        for package in __PACKAGES:
+            module = importlib.import_module(package, __name__)
+            if hasattr(module, name):
+                value = getattr(module, name)
+                globals()[name] = value
+                return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
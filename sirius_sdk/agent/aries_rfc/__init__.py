@@ -3,16 +3,51 @@ r"""It is package that implements features and concepts of Aries RFCs
 see Aries RFC here: https://github.com/hyperledger/aries-rfcs
 """
 
-from .feature_0015_acks import *
-from .feature_0036_issue_credential import *
-from .feature_0037_present_proof import *
-from .feature_0048_trust_ping import *
-from .feature_0095_basic_message import *
-from .feature_0113_question_answer import *
-from .feature_0160_connection_protocol import *
-from .feature_0211_mediator_coordination_protocol import *
-from .feature_0482_coprotocol import *
-from .feature_0753_bus import *
-from .feature_0750_storage import *
-from .base import AttachesMixin
-from .mixins import *
+import importlib
+
+
+# Features are imported on first access of their names (PEP 562): importing single feature or
+# agent module does not load all protocols. Message classes of not loaded features are loaded
+# by sirius_sdk.messaging.restore_message_instance on demand
+__FEATURES = [
+    'feature_0015_acks', 'feature_0036_issue_credential', 'feature_0037_present_proof', 'feature_0048_trust_ping',
+    'feature_0095_basic_message', 'feature_0113_question_answer', 'feature_0160_connection_protocol',
+    'feature_0211_mediator_coordination_protocol', 'feature_0482_coprotocol', 'feature_0753_bus',
+    'feature_0750_storage', 'base', 'mixins'
+]
+# Names exported by several features, the last one was exported by star-imports
+__AMBIGUOUS = {
+    'ProposedAttrib': 'feature_0037_present_proof',
+    'AttribTranslation': 'feature_0037_present_proof',
+}
+
+
+def __getattr__(name: str):
+    if name == '__all__':
+        # Star-import loads all features
+        return __exported_names()
+    if name.startswith('__'):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if name in __AMBIGUOUS:
+        candidates = [__AMBIGUOUS[name]]
+    else:
+        candidates = __FEATURES
+    for feature in candidates:
+        module = importlib.import_module(f'.{feature}', __name__)
+        exported = getattr(module, '__all__', None)
+        if (name in exported) if exported is not None else (not name.startswith('_') and hasattr(module, name)):
+            value = getattr(module, name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __exported_names() -> list:
+    names = []
+    for feature in __FEATURES:
+        module = importlib.import_module(f'.{feature}', __name__)
+        exported = getattr(module, '__all__', None)
+        if exported is None:
+            exported = [name for name in dir(module) if not name.startswith('_')]
+        names.extend(name for name in exported if name not in names)
+    return names
@@ -1,4 +1,4 @@
-from sirius_sdk.messaging import Message, Type, validate_common_blocks, register_message_class
+from sirius_sdk.messaging import Message, Type, compiled_validator, register_message_class
 from sirius_sdk.errors.exceptions import *
 
 from .mixins import PleaseAckMixin, ThreadMixin, AttachesMixin, TimingMixin
@@ -15,6 +15,8 @@ class AriesProtocolMessage(PleaseAckMixin, ThreadMixin, AttachesMixin, TimingMix
     PROTOCOL = None
     NAME = None
     DEF_VERSION = '1.0'
+    # Checked by validate(), see MessageValidator for format
+    REQUIRED_ATTRIBUTES = ()
 
     def __init__(self, id_: str = None, version: str = None, doc_uri: str = None, *args, **kwargs):
         if self.NAME and ('@type' not in dict(*args, **kwargs)):
@@ -36,7 +38,7 @@ class AriesProtocolMessage(PleaseAckMixin, ThreadMixin, AttachesMixin, TimingMix
             raise SiriusValidationError('Unexpected name "%s"' % self.name)
 
     def validate(self):
-        validate_common_blocks(self)
+        compiled_validator(type(self))(self)
 
 
 class AriesProblemReport(AriesProtocolMessage):
@@ -1,7 +1,6 @@
 from enum import Enum
 from typing import Optional, Union
 
-from sirius_sdk.messaging import check_for_attributes
 from sirius_sdk.agent.aries_rfc.base import AriesProtocolMessage, RegisterMessage
 from sirius_sdk.agent.aries_rfc.decorators import *
 
@@ -21,6 +20,7 @@ class Ack(AriesProtocolMessage, metaclass=RegisterMessage):
 
     PROTOCOL = 'notification'
     NAME = 'ack'
+    REQUIRED_ATTRIBUTES = ({THREAD_DECORATOR: ['thid']},)
 
     def __init__(self, thread_id: str = None, status: Optional[Union[Status, str]] = None, *args, **kwargs):
         super(Ack, self).__init__(*args, **kwargs)
@@ -34,11 +34,6 @@ class Ack(AriesProtocolMessage, metaclass=RegisterMessage):
             thread['thid'] = thread_id
             self[THREAD_DECORATOR] = thread
 
-    def validate(self):
-        super().validate()
-        check_for_attributes(self, [THREAD_DECORATOR])
-        check_for_attributes(self[THREAD_DECORATOR], ['thid'])
-
     @property
     def status(self) -> Optional[Status]:
         status = self.get('status', None)
@@ -1,9 +1,10 @@
-from sirius_sdk.agent.aries_rfc.feature_0036_issue_credential.state_machines import Issuer, Holder
+from sirius_sdk.agent.aries_rfc.feature_0036_issue_credential.state_machines import Issuer, Holder, BulkIssuer, \
+    BulkIssuingReport, IssuingOutcome
 from sirius_sdk.agent.aries_rfc.feature_0036_issue_credential.messages import OfferCredentialMessage, \
     RequestCredentialMessage, IssueCredentialMessage, IssueProblemReport, ProposedAttrib, AttribTranslation
 
 
 __all__ = [
-    'Issuer', 'Holder', 'OfferCredentialMessage',
+    'Issuer', 'Holder', 'BulkIssuer', 'BulkIssuingReport', 'IssuingOutcome', 'OfferCredentialMessage',
     'RequestCredentialMessage', 'IssueCredentialMessage', 'IssueProblemReport', 'ProposedAttrib', 'AttribTranslation'
 ]
@@ -1,8 +1,12 @@
 import json
+import time
+import asyncio
 import logging
 import contextlib
 from abc import abstractmethod
-from typing import Union
+from collections import deque
+from dataclasses import dataclass
+from typing import Union, Iterable, Deque, Tuple
 from datetime import datetime, timedelta
 
 import sirius_sdk
@@ -12,7 +16,7 @@ from sirius_sdk.agent.codec import encode
 from sirius_sdk.agent.dkms import DKMS
 from sirius_sdk.agent.aries_rfc.utils import utc_to_str, terminate_state_machine_on_indy_error
 from sirius_sdk.agent.dkms import Schema, CredentialDefinition
-from sirius_sdk.errors.indy_exceptions import WalletItemNotFound
+from sirius_sdk.errors.indy_exceptions import WalletItemNotFound, WalletItemAlreadyExists
 from sirius_sdk.base import AbstractStateMachine
 from sirius_sdk.agent.aries_rfc.feature_0015_acks import Ack, Status
 from sirius_sdk.agent.aries_rfc.feature_0036_issue_credential.messages import *
@@ -118,7 +122,8 @@ class Issuer(BaseIssuingStateMachine):
     async def issue(
             self, values: dict, schema: Schema, cred_def: CredentialDefinition,
             comment: str = None, locale: str = BaseIssueCredentialMessage.DEF_LOCALE,
-            preview: List[ProposedAttrib] = None, translation: List[AttribTranslation] = None, cred_id: str = None
+            preview: List[ProposedAttrib] = None, translation: List[AttribTranslation] = None, cred_id: str = None,
+            offer: dict = None
     ) -> bool:
         """
         :param values: credential values {"attr_name": "attr_value"}
@@ -130,11 +135,13 @@ class Issuer(BaseIssuingStateMachine):
         :param translation: translation of the credential preview according to locale
         :param cred_id: credential id. Issuer may issue multiple credentials with same cred-id to give holder ability
                         to restore old credential
+        :param offer: (optional) credential offer for cred_def created in advance, every offer may be used once
         """
         async with self.coprotocol(pairwise=self.__holder):
             try:
                 # Step-1: Send offer to holder
-                offer = await sirius_sdk.AnonCreds.issuer_create_credential_offer(cred_def_id=cred_def.id)
+                if offer is None:
+                    offer = await sirius_sdk.AnonCreds.issuer_create_credential_offer(cred_def_id=cred_def.id)
                 expires_time = datetime.utcnow() + timedelta(seconds=self.time_to_live)
                 offer_msg = OfferCredentialMessage(
                     comment=comment,
@@ -207,6 +214,158 @@ class Issuer(BaseIssuingStateMachine):
         return True
 
 
+@dataclass
+class IssuingOutcome:
+    """Result of issuing credential to single holder by BulkIssuer"""
+
+    holder: Pairwise
+    success: bool
+    cred_id: Optional[str] = None
+    # Problem report if issuing was terminated by protocol error
+    problem_report: Optional[IssueProblemReport] = None
+    # Unexpected exception raised while issuing
+    error: Optional[Exception] = None
+    # Seconds
+    elapsed: float = 0
+
+
+@dataclass
+class BulkIssuingReport:
+    outcomes: List[IssuingOutcome]
+    # Seconds
+    elapsed: float = 0
+
+    @property
+    def succeeded(self) -> List[IssuingOutcome]:
+        return [outcome for outcome in self.outcomes if outcome.success]
+
+    @property
+    def failed(self) -> List[IssuingOutcome]:
+        return [outcome for outcome in self.outcomes if not outcome.success]
+
+    @property
+    def throughput(self) -> float:
+        """Issued credentials per second"""
+        return len(self.succeeded) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class BulkIssuer:
+    """Issue credentials of the same cred_def to many holders concurrently
+
+    Every holder is served by its own Issuer state machine, at most `concurrency` machines run at once,
+    so slow or unreachable holder holds one slot only (till time_to_live expires), not whole batch.
+    Schema and cred_def bodies are shared by all offers, offer for the next holder is created by worker
+    while current holder is served, so wallet calls are pipelined with holders round trips. Offer is created
+    ahead only if there is pending holder to take it, so no offer is wasted.
+    """
+
+    DEF_CONCURRENCY = 16
+
+    @dataclass
+    class Item:
+        holder: Pairwise
+        values: dict
+        preview: List[ProposedAttrib] = None
+        translation: List[AttribTranslation] = None
+        cred_id: str = None
+
+    def __init__(
+            self, schema: Schema, cred_def: CredentialDefinition, concurrency: int = DEF_CONCURRENCY,
+            time_to_live: int = 60, logger=None
+    ):
+        """
+        :param schema: credential schema
+        :param cred_def: credential definition prepared and stored in DKMS earlier
+        :param concurrency: (optional) max count of holders served at the same time
+        :param time_to_live: (optional) time to live of every Issuer state machine
+        :param logger: (optional) logger of every Issuer state machine
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency must be positive')
+        self.__schema = schema
+        self.__cred_def = cred_def
+        self.__concurrency = concurrency
+        self.__time_to_live = time_to_live
+        self.__logger = logger
+
+    @property
+    def concurrency(self) -> int:
+        return self.__concurrency
+
+    async def issue(
+            self, items: Iterable[Item], comment: str = None, locale: str = BaseIssueCredentialMessage.DEF_LOCALE
+    ) -> BulkIssuingReport:
+        """Issue credentials to holders, exceptions of single holder are reported in its outcome
+
+        :param items: holders and credential values, may be lazy iterator
+        :param comment: human readable credential comment
+        :param locale: locale, for example "en" or "ru"
+        :return: outcomes in order of items
+        """
+        stamp = time.monotonic()
+        pending = enumerate(items)
+        # Items taken from `pending` but not served yet and offers created ahead for them:
+        # there are never more offers than such items
+        lookahead: Deque[Tuple[int, BulkIssuer.Item]] = deque()
+        offers: Deque[asyncio.Future] = deque()
+        outcomes = {}
+
+        def peek(count: int) -> bool:
+            """True if at least count items are not served yet"""
+            while len(lookahead) < count:
+                taken = next(pending, None)
+                if taken is None:
+                    return False
+                lookahead.append(taken)
+            return True
+
+        async def worker():
+            while peek(1):
+                index, item = lookahead.popleft()
+                offer = offers.popleft() if offers else asyncio.ensure_future(self.__create_offer())
+                if peek(len(offers) + 1):
+                    # Offer for the next holder is created while current holder is served
+                    offers.append(asyncio.ensure_future(self.__create_offer()))
+                outcomes[index] = await self.__issue_one(item, offer, comment, locale)
+
+        try:
+            await asyncio.gather(*[worker() for _ in range(self.__concurrency)])
+        finally:
+            # Offers are left only if workers were interrupted
+            for offer in offers:
+                offer.cancel()
+                with contextlib.suppress(BaseException):
+                    await offer
+        return BulkIssuingReport(
+            outcomes=[outcomes[index] for index in sorted(outcomes)],
+            elapsed=time.monotonic() - stamp
+        )
+
+    async def __create_offer(self) -> dict:
+        return await sirius_sdk.AnonCreds.issuer_create_credential_offer(cred_def_id=self.__cred_def.id)
+
+    async def __issue_one(
+            self, item: Item, offer: asyncio.Future, comment: Optional[str], locale: str
+    ) -> IssuingOutcome:
+        stamp = time.monotonic()
+        machine = Issuer(holder=item.holder, time_to_live=self.__time_to_live, logger=self.__logger)
+        try:
+            success = await machine.issue(
+                values=item.values, schema=self.__schema, cred_def=self.__cred_def,
+                comment=comment, locale=locale, preview=item.preview, translation=item.translation,
+                cred_id=item.cred_id, offer=await offer
+            )
+        except Exception as e:
+            logging.exception(f'Error while issuing credential to {item.holder.their.did}')
+            return IssuingOutcome(
+                holder=item.holder, success=False, cred_id=item.cred_id, error=e, elapsed=time.monotonic() - stamp
+            )
+        return IssuingOutcome(
+            holder=item.holder, success=success, cred_id=item.cred_id,
+            problem_report=None if success else machine.problem_report, elapsed=time.monotonic() - stamp
+        )
+
+
 class Holder(BaseIssuingStateMachine):
     """Implementation of Holder role for Credential-issuing protocol
 
@@ -294,11 +453,9 @@ class Holder(BaseIssuingStateMachine):
                     raise StateMachineTerminatedWithError(REQUEST_NOT_ACCEPTED, e.message)
 
                 # Step-3: Store credential
-                with terminate_state_machine_on_indy_error(problem_code=OFFER_PROCESSING_ERROR):
-                    cred_id = await self._store_credential(
-                        cred_metadata, issue_msg.cred, cred_def_body, None, issue_msg.cred_id
-                    )
-                await self._store_mime_types(cred_id, offer.preview)
+                cred_id = await self._store_issued(
+                    cred_metadata, issue_msg.cred, cred_def_body, issue_msg.cred_id, offer.preview
+                )
                 ack = CredentialAck(
                     thread_id=issue_msg.ack_message_id if issue_msg.please_ack else issue_msg.id,
                     status=Status.OK,
@@ -326,35 +483,63 @@ class Holder(BaseIssuingStateMachine):
     def _is_leader(self) -> bool:
         return False
 
+    @classmethod
+    async def _store_issued(
+            cls, cred_metadata: dict, cred: dict, cred_def: dict, cred_id: Optional[str],
+            preview: Optional[List[ProposedAttrib]]
+    ) -> str:
+        # If Issuer set credential id, mime types of new credential are stored concurrently with credential.
+        # Mime types of re-issued credential are replaced only after credential, older one keeps them on failure
+        mime_types_created = None
+        if cred_id:
+            mime_types_created = asyncio.ensure_future(cls._store_mime_types(cred_id, preview, overwrite=False))
+        try:
+            with terminate_state_machine_on_indy_error(problem_code=OFFER_PROCESSING_ERROR):
+                cred_id = await cls._store_credential(cred_metadata, cred, cred_def, None, cred_id)
+        except BaseException:
+            if mime_types_created is not None:
+                # Credential was not stored, so mime types record created for it is dropped too
+                with contextlib.suppress(Exception):
+                    if await mime_types_created:
+                        await sirius_sdk.NonSecrets.delete_wallet_record("mime-types", cred_id)
+            raise
+        if mime_types_created is None or not await mime_types_created:
+            await cls._store_mime_types(cred_id, preview)
+        return cred_id
+
     @staticmethod
     async def _store_credential(
             cred_metadata: dict, cred: dict, cred_def: dict, rev_reg_def: Optional[dict], cred_id: Optional[str]
     ) -> str:
-        try:
-            cred_older = await sirius_sdk.AnonCreds.prover_get_credential(cred_id)
-        except WalletItemNotFound:
-            cred_older = None
-        if cred_older:
-            # Delete older credential
-            await sirius_sdk.AnonCreds.prover_delete_credential(cred_id)
-        cred_id = await sirius_sdk.AnonCreds.prover_store_credential(
+        params = dict(
             cred_req_metadata=cred_metadata,
             cred=cred,
             cred_def=cred_def,
             rev_reg_def=rev_reg_def,
             cred_id=cred_id
         )
-        return cred_id
+        try:
+            return await sirius_sdk.AnonCreds.prover_store_credential(**params)
+        except WalletItemAlreadyExists:
+            # Issuer re-issued credential with the same id: replace older credential
+            await sirius_sdk.AnonCreds.prover_delete_credential(cred_id)
+            return await sirius_sdk.AnonCreds.prover_store_credential(**params)
 
     @staticmethod
-    async def _store_mime_types(cred_id: str, preview: List[ProposedAttrib]):
+    async def _store_mime_types(cred_id: str, preview: List[ProposedAttrib], overwrite: bool = True) -> bool:
+        """Return True if record was created, existing record is updated only if overwrite is set"""
         if preview is not None:
             mime_types = {prop_attrib["name"]: prop_attrib["mime-type"] for prop_attrib in preview if "mime-type" in prop_attrib.keys()}
             if len(mime_types) > 0:
-                record = await Holder.get_mime_types(cred_id)
-                if record:
-                    await sirius_sdk.NonSecrets.delete_wallet_record("mime-types", cred_id)
-                await sirius_sdk.NonSecrets.add_wallet_record("mime-types", cred_id, base64.b64encode(json.dumps(mime_types).encode()).decode())
+                value = base64.b64encode(json.dumps(mime_types).encode()).decode()
+                try:
+                    await sirius_sdk.NonSecrets.add_wallet_record("mime-types", cred_id, value)
+                except WalletItemAlreadyExists:
+                    if overwrite:
+                        await sirius_sdk.NonSecrets.update_wallet_record_value("mime-types", cred_id, value)
+                    return False
+                return True
+        return False
 
     @staticmethod
     async def get_mime_types(cred_id: str) -> dict:
@@ -225,6 +225,7 @@ class Invitation(ConnProtocolMessage, metaclass=RegisterMessage):
 class ConnRequest(ConnProtocolMessage, metaclass=RegisterMessage):
 
     NAME = 'request'
+    REQUIRED_ATTRIBUTES = ('label', 'connection')
 
     def __init__(
             self, label: Optional[str] = None, did: Optional[str] = None, verkey: Optional[str] = None,
@@ -246,17 +247,11 @@ class ConnRequest(ConnProtocolMessage, metaclass=RegisterMessage):
     def label(self) -> Optional[str]:
         return self.get('label', None)
 
-    def validate(self):
-        super().validate()
-        check_for_attributes(
-            self,
-            ['label', 'connection']
-        )
-
 
 class ConnResponse(ConnProtocolMessage, metaclass=RegisterMessage):
 
     NAME = 'response'
+    REQUIRED_ATTRIBUTES = ('connection~sig',)
 
     def __init__(
             self, did: Optional[str] = None, verkey: Optional[str] = None,
@@ -270,13 +265,6 @@ class ConnResponse(ConnProtocolMessage, metaclass=RegisterMessage):
                 'DIDDoc': self.build_did_doc(did, verkey, endpoint, **extra)
             }
 
-    def validate(self):
-        super().validate()
-        check_for_attributes(
-            self,
-            ['connection~sig']
-        )
-
     async def sign_connection(self, crypto: APICrypto, key: str):
         self['connection~sig'] = \
             await self.sign_field(
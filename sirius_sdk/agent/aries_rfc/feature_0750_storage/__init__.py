@@ -1,8 +1,8 @@
 from .documents import Document, EncryptedDocument
 from .streams import AbstractReadOnlyStream, AbstractWriteOnlyStream, BaseStreamEncryption, StreamEncryption, \
-  StreamDecryption, ReadOnlyStreamDecodingWrapper, WriteOnlyStreamEncodingWrapper
+  StreamDecryption, ReadOnlyStreamDecodingWrapper, WriteOnlyStreamEncodingWrapper, StreamCompression
 
-from .encoding import ConfidentialStorageEncType, JWE, KeyPair
+from .encoding import ConfidentialStorageEncType, ConfidentialStorageCompressionType, JWE, KeyPair
 from .errors import BaseConfidentialStorageError, StreamEOF, EncryptionError, StreamInitializationError, StreamSeekableError, \
     StreamFormatError, ConfidentialStorageTimeoutOccurred
 from .components import ConfidentialStorageAuthProvider, EncryptedDataVault, ConfidentialStorageRawByteStorage, \
@@ -10,6 +10,10 @@ from .components import ConfidentialStorageAuthProvider, EncryptedDataVault, Con
 from .messages import StructuredDocumentAttach, DataVaultQueryList, DataVaultResponseList, BaseConfidentialStorageMessage
 from .documents import Document, EncryptedDocument
 from .impl.file_system import FileSystemReadOnlyStream, FileSystemWriteOnlyStream, FileSystemRawByteStorage
+from .impl.dedup import FileSystemChunkStore, FileSystemDedupReadOnlyStream, FileSystemDedupWriteOnlyStream, \
+    FileSystemDedupRawByteStorage
+from .impl.memory import InMemoryReadOnlyStream, InMemoryWriteOnlyStream, InMemoryRawByteStorage
+from .impl.sqlite import SQLiteDatabase, SQLiteReadOnlyStream, SQLiteWriteOnlyStream, SQLiteRawByteStorage
 from .state_machines import CalledReadOnlyStreamProtocol, CallerReadOnlyStreamProtocol, \
     CallerWriteOnlyStreamProtocol, CalledWriteOnlyStreamProtocol, CallerEncryptedDataVault, CalledEncryptedDataVault
 
@@ -21,8 +25,11 @@ __all__ = [
     "StreamSeekableError", "StreamFormatError", "ConfidentialStorageTimeoutOccurred", "ConfidentialStorageEncType",
     "FileSystemReadOnlyStream", "FileSystemWriteOnlyStream", "DataVaultStreamWrapper", "BaseConfidentialStorageMessage",
     "ConfidentialStorageAuthProvider", "EncryptedDataVault", "FileSystemRawByteStorage",
+    "FileSystemChunkStore", "FileSystemDedupReadOnlyStream", "FileSystemDedupWriteOnlyStream", "FileSystemDedupRawByteStorage",
+    "InMemoryReadOnlyStream", "InMemoryWriteOnlyStream", "InMemoryRawByteStorage",
+    "SQLiteDatabase", "SQLiteReadOnlyStream", "SQLiteWriteOnlyStream", "SQLiteRawByteStorage",
     "Document", "EncryptedDocument", "VaultConfig", "ConfidentialStorageRawByteStorage", "StructuredDocument",
     "StructuredDocumentAttach", "ReadOnlyStreamDecodingWrapper", "WriteOnlyStreamEncodingWrapper",
     "JWE", "KeyPair", "CallerEncryptedDataVault", "CalledEncryptedDataVault", "DataVaultQueryList",
-    "DataVaultResponseList", "DocumentMeta", "StreamMeta"
+    "DataVaultResponseList", "DocumentMeta", "StreamMeta", "StreamCompression", "ConfidentialStorageCompressionType"
 ]
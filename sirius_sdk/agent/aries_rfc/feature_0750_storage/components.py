@@ -7,10 +7,11 @@ from typing import List, Union, Optional, Set
 from sirius_sdk.abstract.p2p import Pairwise
 from sirius_sdk.encryption.ed25519 import ensure_is_bytes
 from .streams import AbstractReadOnlyStream, AbstractWriteOnlyStream, BaseStreamEncryption, \
-    ReadOnlyStreamDecodingWrapper, WriteOnlyStreamEncodingWrapper, StreamEncryption, StreamDecryption
+    ReadOnlyStreamDecodingWrapper, WriteOnlyStreamEncodingWrapper, StreamEncryption, StreamDecryption, \
+    StreamCompression
 from .documents import EncryptedDocument
 from .errors import ConfidentialStoragePermissionDenied
-from .encoding import JWE, KeyPair
+from .encoding import JWE, KeyPair, ConfidentialStorageEncType
 from .utils import datetime_to_utc_str
 
 
@@ -49,6 +50,7 @@ class StreamMeta(DocumentMeta):
             self, created: Union[str, datetime.datetime] = None,
             chunks: int = None,
             content_type: str = None,  # "video/mpeg", "image/png"
+            compression: StreamCompression = None,
             *args, **kwargs
     ):
         super().__init__(created, *args, **kwargs)
@@ -56,30 +58,59 @@ class StreamMeta(DocumentMeta):
             self['chunks'] = chunks
         if content_type is not None:
             self['contentType'] = content_type
+        if compression is not None:
+            self['compression'] = compression.as_json()
 
 
 class DataVaultStreamWrapper:
 
-    def __init__(self, readable: AbstractReadOnlyStream = None, writable: AbstractWriteOnlyStream = None):
+    def __init__(
+            self, readable: AbstractReadOnlyStream = None, writable: AbstractWriteOnlyStream = None,
+            compression: StreamCompression = None
+    ):
+        """
+        :param readable: raw stream for reading
+        :param writable: raw stream for writing
+        :param compression: (optional) chunks compression, applied to the plaintext on the encoding layer
+           (see StreamMeta: compression settings are stored in stream metadata)
+        """
         self._readable = readable
         self._writable = writable
+        self.compression = compression
 
     async def readable(self, jwe: Union[JWE, dict] = None, keys: KeyPair = None) -> AbstractReadOnlyStream:
+        return self._wrap_readable(self._readable, jwe, keys)
+
+    async def writable(self, jwe: Union[JWE, dict] = None, cek: Union[bytes, str] = None) -> AbstractWriteOnlyStream:
+        return self._wrap_writable(self._writable, jwe, cek)
+
+    def _wrap_readable(
+            self, stream: AbstractReadOnlyStream, jwe: Union[JWE, dict] = None, keys: KeyPair = None
+    ) -> AbstractReadOnlyStream:
         if jwe is None:
-            return self._readable
+            if self.compression is None:
+                return stream
+            # Compressed chunks are framed even if they are not encrypted
+            enc = StreamDecryption(type_=ConfidentialStorageEncType.UNKNOWN)
         else:
             enc = StreamDecryption.from_jwe(jwe)
             if keys is not None:
                 enc.setup(vk=keys.pk, sk=keys.sk)
-            return ReadOnlyStreamDecodingWrapper(src=self._readable, enc=enc)
+        return ReadOnlyStreamDecodingWrapper(src=stream, enc=enc, compression=self.compression)
 
-    async def writable(self, jwe: Union[JWE, dict] = None, cek: Union[bytes, str] = None) -> AbstractWriteOnlyStream:
+    def _wrap_writable(
+            self, stream: AbstractWriteOnlyStream, jwe: Union[JWE, dict] = None, cek: Union[bytes, str] = None
+    ) -> AbstractWriteOnlyStream:
         if jwe is None:
-            return self._writable
+            if self.compression is None:
+                return stream
+            # Compressed chunks are framed even if they are not encrypted
+            enc = StreamEncryption(type_=ConfidentialStorageEncType.UNKNOWN)
         else:
             if isinstance(cek, str):
                 cek = ensure_is_bytes(cek)
-            return WriteOnlyStreamEncodingWrapper(dest=self._writable, enc=StreamEncryption.from_jwe(jwe, cek))
+            enc = StreamEncryption.from_jwe(jwe, cek)
+        return WriteOnlyStreamEncodingWrapper(dest=stream, enc=enc, compression=self.compression)
 
 
 class StructuredDocument:
@@ -106,8 +137,9 @@ class StructuredDocument:
         if isinstance(content, AbstractReadOnlyStream):
             self.__meta['chunks'] = content.chunks_num
         self.__content = content
-        self.__stream = stream
+        self.__stream = None
         self.__indexed: List[StructuredDocument.Index] = indexed or []
+        self.stream = stream
 
     @property
     def id(self) -> str:
@@ -139,6 +171,9 @@ class StructuredDocument:
 
     @stream.setter
     def stream(self, value: Optional[DataVaultStreamWrapper]):
+        if value is not None and value.compression is None:
+            # Readers decode stream transparently with compression settings stored in metadata
+            value.compression = StreamCompression.from_meta(self.__meta)
         self.__stream = value
 
     @property
@@ -345,13 +380,18 @@ class ConfidentialStorageRawByteStorage(ABC):
     see details: https://identity.foundation/confidential-storage/#ecosystem-overview
     """
 
-    def __init__(self, encryption: BaseStreamEncryption = None):
+    def __init__(self, encryption: BaseStreamEncryption = None, compression: StreamCompression = None):
         self.__encryption = encryption
+        self.__compression = compression
 
     @property
     def encryption(self) -> Optional[BaseStreamEncryption]:
         return self.__encryption
 
+    @property
+    def compression(self) -> Optional[StreamCompression]:
+        return self.__compression
+
     @abstractmethod
     async def create(self, uri: str):
         raise NotImplementedError
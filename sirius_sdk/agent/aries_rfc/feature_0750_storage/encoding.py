@@ -16,6 +16,15 @@ class ConfidentialStorageEncType(Enum):
     X25519KeyAgreementKey2019 = 'X25519KeyAgreementKey2019'
 
 
+class ConfidentialStorageCompressionType(Enum):
+    # Chunks are stored as is
+    NONE = 'none'
+    # stdlib zlib (deflate)
+    ZLIB = 'zlib'
+    # stdlib lzma (better ratio, slower)
+    LZMA = 'lzma'
+
+
 @dataclass
 class KeyPair:
     # Public Key
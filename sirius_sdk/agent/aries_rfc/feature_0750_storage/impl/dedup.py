@@ -0,0 +1,523 @@
+import io
+import os
+import hmac
+import time
+import uuid
+import struct
+import hashlib
+import os.path
+import contextlib
+from typing import Optional, List, Coroutine, Dict
+from urllib.parse import urlparse
+
+import aiofiles
+try:
+    import fcntl
+except ImportError:
+    # Not POSIX: stores on the same directory are not synchronized across processes
+    fcntl = None
+
+from sirius_sdk.agent.aries_rfc.feature_0750_storage import AbstractReadOnlyStream, StreamInitializationError, \
+    StreamEOF, StreamFormatError, AbstractWriteOnlyStream, BaseStreamEncryption, StreamCompression
+from sirius_sdk.agent.aries_rfc.feature_0750_storage.components import ConfidentialStorageRawByteStorage
+
+
+class FileSystemChunkStore:
+    """Content-addressed chunks shared between streams of the same storage
+
+    Chunks are addressed with keyed hash (HMAC-SHA256) of the plaintext, so identical chunks
+    of different streams (or versions of the same document) are stored and encrypted once.
+    Every chunk has reference counter, chunk is removed when last reference is released.
+    Reference counters are persisted in append-only journal, journal is compacted when it grows over
+    JOURNAL_LIMIT and by gc(). Counters are re-read from journal tail before every use, so stores on the
+    same directory don't drift apart. Journal changes and chunks removal are serialized with file lock
+    """
+
+    DIGEST_SIZE = hashlib.sha256().digest_size
+    JOURNAL_FILE = 'refs.journal'
+    LOCK_FILE = 'refs.lock'
+    JOURNAL_RECORD = struct.Struct(f'{hashlib.sha256().digest_size}si')
+    JOURNAL_LIMIT = 1024 * 1024
+    READ_BLOCK_SIZE = 1024 * 64
+    # Tmp files of put() are removed by gc() only if they are abandoned
+    TMP_FILE_TTL = 60 * 60
+
+    def __init__(self, path: str, hmac_key: bytes):
+        """
+        :param path: directory for chunks
+        :param hmac_key: key for chunks addressing (see VaultConfig.hmac)
+        """
+        if not hmac_key:
+            raise StreamInitializationError('HMAC key is empty')
+        self.__path = path
+        self.__hmac_key = hmac_key
+        self.__journal_path = os.path.join(path, self.JOURNAL_FILE)
+        self.__lock_path = os.path.join(path, self.LOCK_FILE)
+        self.__lock: Optional[int] = None
+        self.__refs: Dict[bytes, int] = {}
+        # Journal reader fd positioned after last replayed record and inode of journal it reads
+        self.__reader: Optional[int] = None
+        self.__reader_ino: Optional[int] = None
+        self.__journal = None
+        self.__journal_ino: Optional[int] = None
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def digest(self, chunk: bytes) -> bytes:
+        return hmac.new(self.__hmac_key, chunk, hashlib.sha256).digest()
+
+    async def exists(self, digest: bytes) -> bool:
+        return os.path.isfile(self.__chunk_path(digest))
+
+    async def put(self, digest: bytes, payload: bytes):
+        path = self.__chunk_path(digest)
+        dirname = os.path.dirname(path)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname, exist_ok=True)
+        # Write to tmp file to make chunk visible atomically, concurrent writers of the same chunk
+        # use own tmp files
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        async with aiofiles.open(tmp_path, 'wb') as fd:
+            await fd.write(payload)
+        os.replace(tmp_path, path)
+
+    async def get(self, digest: bytes) -> bytes:
+        path = self.__chunk_path(digest)
+        if not os.path.isfile(path):
+            raise StreamFormatError(f'Missing chunk "{digest.hex()}"')
+        async with aiofiles.open(path, 'rb') as fd:
+            return await fd.read()
+
+    async def refs(self, digest: bytes) -> int:
+        return self.__load_refs().get(digest, 0)
+
+    async def incref(self, digest: bytes) -> int:
+        with self.__exclusive():
+            return self.__change_refs(digest, 1)
+
+    async def decref(self, digest: bytes) -> int:
+        with self.__exclusive():
+            refs = self.__change_refs(digest, -1)
+            if refs == 0:
+                # Garbage collect chunk: concurrent incref waits for lock and then writes chunk again
+                path = self.__chunk_path(digest)
+                if os.path.isfile(path):
+                    os.remove(path)
+        return refs
+
+    async def gc(self) -> int:
+        """Remove chunks that have no references (stay after crashes, etc.) and compact journal
+
+        :return: count of removed chunks
+        """
+        removed = 0
+        if not os.path.isdir(self.__path):
+            return removed
+        with self.__exclusive():
+            refs = self.__load_refs()
+            expired = time.time() - self.TMP_FILE_TTL
+            for dirpath, _, filenames in os.walk(self.__path):
+                if dirpath == self.__path:
+                    continue
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    if filename.endswith('.tmp'):
+                        if os.path.getmtime(path) >= expired:
+                            continue
+                    else:
+                        try:
+                            digest = bytes.fromhex(filename)
+                        except ValueError:
+                            # Not a chunk
+                            continue
+                        if refs.get(digest, 0) > 0:
+                            continue
+                    os.remove(path)
+                    removed += 1
+            self.__compact()
+        return removed
+
+    async def close(self):
+        """Compact journal if it is too large and release file descriptors"""
+        stat = self.__stat_journal()
+        if stat is not None and stat.st_size > self.JOURNAL_LIMIT:
+            with self.__exclusive():
+                self.__load_refs()
+                stat = self.__stat_journal()
+                if stat is not None and self.__need_compaction(stat):
+                    self.__compact()
+        self.__close_journal()
+        self.__close_reader()
+        if self.__lock is not None:
+            os.close(self.__lock)
+            self.__lock = None
+
+    def __load_refs(self, stat: os.stat_result = None) -> Dict[bytes, int]:
+        """Replay journal records appended since last call (by this or other store instances)"""
+        if stat is None:
+            stat = self.__stat_journal()
+        if stat is None:
+            self.__close_reader()
+            self.__refs = {}
+            return self.__refs
+        if stat.st_ino != self.__reader_ino:
+            # Journal was created or compacted
+            self.__close_reader()
+            self.__reader = os.open(self.__journal_path, os.O_RDONLY)
+            self.__reader_ino = stat.st_ino
+            self.__refs = {}
+        raw = b''
+        while True:
+            block = os.read(self.__reader, self.READ_BLOCK_SIZE)
+            raw += block
+            if len(block) < self.READ_BLOCK_SIZE:
+                break
+        if raw:
+            # Partially written tail record is replayed next time
+            tail = len(raw) - len(raw) % self.JOURNAL_RECORD.size
+            if tail < len(raw):
+                os.lseek(self.__reader, tail - len(raw), os.SEEK_CUR)
+            refs = self.__refs
+            for digest, delta in self.JOURNAL_RECORD.iter_unpack(raw[:tail]):
+                count = refs.get(digest, 0) + delta
+                if count > 0:
+                    refs[digest] = count
+                else:
+                    refs.pop(digest, None)
+        return self.__refs
+
+    def __change_refs(self, digest: bytes, delta: int) -> int:
+        """Append record to journal, caller holds the lock"""
+        stat = self.__stat_journal()
+        if self.__journal is not None and (stat is None or stat.st_ino != self.__journal_ino):
+            # Compacted by other store instance
+            self.__close_journal()
+        if self.__journal is None:
+            os.makedirs(self.__path, exist_ok=True)
+            self.__journal = open(self.__journal_path, 'ab', buffering=0)
+            self.__journal_ino = os.fstat(self.__journal.fileno()).st_ino
+        self.__journal.write(self.JOURNAL_RECORD.pack(digest, delta))
+        stat = os.fstat(self.__journal.fileno())
+        refs = self.__load_refs(stat).get(digest, 0)
+        if self.__need_compaction(stat):
+            self.__compact()
+        return refs
+
+    def __need_compaction(self, stat: os.stat_result) -> bool:
+        # Compaction pays off only if most of journal records are outdated
+        return stat.st_size > max(self.JOURNAL_LIMIT, 2 * len(self.__refs) * self.JOURNAL_RECORD.size)
+
+    def __compact(self):
+        """Rewrite journal with actual counters, caller holds the lock so no records are appended meanwhile"""
+        refs = self.__load_refs()
+        self.__close_journal()
+        with open(self.__journal_path + '.tmp', 'wb') as f:
+            for digest, count in refs.items():
+                f.write(self.JOURNAL_RECORD.pack(digest, count))
+        os.replace(self.__journal_path + '.tmp', self.__journal_path)
+
+    @contextlib.contextmanager
+    def __exclusive(self):
+        """Lock journal and chunks against other stores on the same directory (in this or other processes)
+
+        Lock is not held across awaits, so stores of the same event loop don't block each other forever
+        """
+        if self.__lock is None:
+            os.makedirs(self.__path, exist_ok=True)
+            self.__lock = os.open(self.__lock_path, os.O_RDWR | os.O_CREAT)
+        if fcntl is not None:
+            fcntl.flock(self.__lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self.__lock, fcntl.LOCK_UN)
+
+    def __stat_journal(self) -> Optional[os.stat_result]:
+        try:
+            return os.stat(self.__journal_path)
+        except FileNotFoundError:
+            return None
+
+    def __close_reader(self):
+        if self.__reader is not None:
+            os.close(self.__reader)
+            self.__reader = None
+            self.__reader_ino = None
+
+    def __close_journal(self):
+        if self.__journal is not None:
+            self.__journal.close()
+            self.__journal = None
+
+    def __chunk_path(self, digest: bytes) -> str:
+        hex_ = digest.hex()
+        return os.path.join(self.__path, hex_[:2], hex_)
+
+
+class FileSystemDedupReadOnlyStream(AbstractReadOnlyStream):
+    """Reads stream stored as manifest of chunk references"""
+
+    def __init__(
+            self, path: str, store: FileSystemChunkStore, enc: Optional[BaseStreamEncryption] = None,
+            compression: Optional[StreamCompression] = None
+    ):
+        super().__init__(path, 0, enc, compression)
+        self.__store = store
+        self.__manifest: List[bytes] = []
+
+    async def open(self):
+        self.__manifest = await load_manifest(self.path, self.__store.DIGEST_SIZE)
+        self._chunks_num = len(self.__manifest)
+        self._current_chunk = 0
+        self._seekable = True
+        self._is_open = True
+
+    async def close(self):
+        self.__manifest = []
+        self._seekable = None
+        self._is_open = False
+
+    async def seek_to_chunk(self, no: int) -> int:
+        self.__assert_is_open()
+        if no > self._chunks_num:
+            raise StreamEOF('EOF')
+        self._current_chunk = no
+        return self._current_chunk
+
+    async def read_chunk(self, no: int = None) -> (int, bytes):
+        self.__assert_is_open()
+        if no is not None:
+            await self.seek_to_chunk(no)
+        if self._current_chunk >= self._chunks_num:
+            raise StreamEOF('EOF')
+        payload = await self.__store.get(self.__manifest[self._current_chunk])
+        if self.enc:
+            payload = await self.decrypt(payload)
+        chunk = self.decompress(payload)
+        self._current_chunk += 1
+        return self._current_chunk, chunk
+
+    async def eof(self) -> bool:
+        self.__assert_is_open()
+        return self._current_chunk >= self._chunks_num
+
+    def __assert_is_open(self):
+        if not self._is_open:
+            raise StreamInitializationError('Stream is not Opened!')
+
+
+class FileSystemDedupWriteOnlyStream(AbstractWriteOnlyStream):
+    """Writes stream as manifest of chunk references: manifest is file of fixed size chunk digests"""
+
+    DEF_CHUNK_SIZE = 1024 * 64
+
+    def __init__(
+            self, path: str, store: FileSystemChunkStore, chunk_size: int = DEF_CHUNK_SIZE,
+            enc: Optional[BaseStreamEncryption] = None, compression: Optional[StreamCompression] = None
+    ):
+        super().__init__(path, chunk_size, enc, compression)
+        self.__store = store
+        self.__manifest: List[bytes] = []
+        self.__fd = None
+        self.__on_closed: Optional[Coroutine] = None
+
+    @property
+    def on_closed(self) -> Optional[Coroutine]:
+        return self.__on_closed
+
+    @on_closed.setter
+    def on_closed(self, cb: Coroutine):
+        self.__on_closed = cb
+
+    async def create(self, truncate: bool = False):
+        if truncate and os.path.isfile(self.path):
+            # Release chunks of the existing manifest, otherwise they are never collected
+            manifest = await load_manifest(self.path, self.__store.DIGEST_SIZE)
+            async with aiofiles.open(self.path, 'wb'):
+                pass
+            for digest in manifest:
+                await self.__store.decref(digest)
+        else:
+            # Append mode creates missing manifest and keeps existing one
+            async with aiofiles.open(self.path, 'ab'):
+                pass
+
+    async def open(self):
+        self.__manifest = await load_manifest(self.path, self.__store.DIGEST_SIZE)
+        self.__fd = await aiofiles.open(self.path, 'r+b', buffering=0)
+        self._chunks_num = len(self.__manifest)
+        self._current_chunk = self._chunks_num
+        self._seekable = True
+        self._is_open = True
+
+    async def close(self):
+        if self.__fd:
+            await self.__fd.close()
+            self.__fd = None
+            self.__manifest = []
+            self._seekable = None
+            self._is_open = False
+            if self.__on_closed:
+                await self.__on_closed
+                self.__on_closed = None
+
+    async def seek_to_chunk(self, no: int) -> int:
+        self.__assert_is_open()
+        if no > self._chunks_num:
+            raise StreamEOF('EOF')
+        self._current_chunk = no
+        return self._current_chunk
+
+    async def write_chunk(self, chunk: bytes, no: int = None) -> (int, int):
+        self.__assert_is_open()
+        if no is not None:
+            await self.seek_to_chunk(no)
+        digest = self.__store.digest(chunk)
+        # Reference chunk before check: concurrent decref of the last reference does not remove it under us
+        await self.__store.incref(digest)
+        if not await self.__store.exists(digest):
+            # Chunk is encoded only once for all streams that refer to it
+            try:
+                payload = self.compress(chunk)
+                if self.enc:
+                    payload = await self.encrypt(payload)
+                await self.__store.put(digest, payload)
+            except Exception:
+                await self.__store.decref(digest)
+                raise
+        if self._current_chunk < len(self.__manifest):
+            old_digest = self.__manifest[self._current_chunk]
+            self.__manifest[self._current_chunk] = digest
+            await self.__store.decref(old_digest)
+        else:
+            self.__manifest.append(digest)
+        await self.__fd.seek(self._current_chunk * self.__store.DIGEST_SIZE, io.SEEK_SET)
+        await self.__fd.write(digest)
+        self._current_chunk += 1
+        self._chunks_num = len(self.__manifest)
+        return self._current_chunk, len(chunk)
+
+    async def truncate(self, no: int = 0):
+        self.__assert_is_open()
+        if no >= len(self.__manifest):
+            return
+        released = self.__manifest[no:]
+        self.__manifest = self.__manifest[:no]
+        await self.__fd.truncate(no * self.__store.DIGEST_SIZE)
+        await self.__fd.flush()
+        for digest in released:
+            await self.__store.decref(digest)
+        self._chunks_num = len(self.__manifest)
+        if self._current_chunk > no:
+            self._current_chunk = no
+
+    def __assert_is_open(self):
+        if not self.__fd:
+            raise StreamInitializationError('Stream is not Opened')
+
+
+class FileSystemDedupRawByteStorage(ConfidentialStorageRawByteStorage):
+    """File-system storage with content-addressed chunks deduplication
+
+    Every stream is manifest of references to chunks in shared chunk store
+    """
+
+    CHUNKS_DIR = '.chunks'
+
+    def __init__(
+            self, hmac_key: bytes, encryption: BaseStreamEncryption = None, compression: StreamCompression = None
+    ):
+        """
+        :param hmac_key: key to address chunks, chunks are addressed with HMAC of its plaintext
+        :param encryption: (optional) storage encryption
+        :param compression: (optional) chunks compression
+        """
+        super().__init__(encryption, compression)
+        self.__hmac_key = hmac_key
+        self.__mount_dir: Optional[str] = None
+        self.__store: Optional[FileSystemChunkStore] = None
+
+    @property
+    def store(self) -> Optional[FileSystemChunkStore]:
+        return self.__store
+
+    async def mount(self, path: str):
+        if self.__store is not None:
+            await self.__store.close()
+        self.__mount_dir = path
+        self.__store = FileSystemChunkStore(os.path.join(path, self.CHUNKS_DIR), self.__hmac_key)
+
+    async def unmount(self):
+        if self.__store is not None:
+            await self.__store.close()
+            self.__store = None
+
+    async def create(self, uri: str):
+        self.__assert_is_mounted()
+        path = self.__uri_to_path(uri)
+        if os.path.isfile(path):
+            raise StreamInitializationError(f'Stream with URI: {uri} already exists!')
+        else:
+            dirname = os.path.dirname(path)
+            if not os.path.isdir(dirname):
+                try:
+                    os.makedirs(dirname, exist_ok=True)
+                except OSError as e:
+                    raise StreamInitializationError(*e.args)
+            stream = FileSystemDedupWriteOnlyStream(path, self.__store)
+            await stream.create()
+
+    async def remove(self, uri: str):
+        self.__assert_is_mounted()
+        path = self.__uri_to_path(uri)
+        if os.path.isfile(path):
+            manifest = await load_manifest(path, self.__store.DIGEST_SIZE)
+            os.remove(path)
+            for digest in manifest:
+                await self.__store.decref(digest)
+
+    async def readable(self, uri: str, chunks_num: int) -> AbstractReadOnlyStream:
+        self.__assert_is_mounted()
+        path = self.__uri_to_path(uri)
+        if not os.path.isfile(path):
+            raise StreamInitializationError(f'Stream with URI: {uri} doe not exists!')
+        return FileSystemDedupReadOnlyStream(
+            path=path, store=self.__store, enc=self.encryption, compression=self.compression
+        )
+
+    async def writeable(self, uri: str) -> AbstractWriteOnlyStream:
+        self.__assert_is_mounted()
+        path = self.__uri_to_path(uri)
+        if not os.path.isfile(path):
+            raise StreamInitializationError(f'Stream with URI: {uri} doe not exists!')
+        return FileSystemDedupWriteOnlyStream(
+            path=path, store=self.__store, enc=self.encryption, compression=self.compression
+        )
+
+    async def exists(self, uri: str) -> bool:
+        path = self.__uri_to_path(uri)
+        return os.path.isfile(path)
+
+    def __assert_is_mounted(self):
+        if self.__store is None:
+            raise StreamInitializationError('Storage is not mounted')
+
+    def __uri_to_path(self, uri: str) -> str:
+        p = urlparse(uri)
+        path = os.path.join(p.netloc, p.path)
+        while path.startswith('/'):
+            path = path[1:]
+        if self.__mount_dir is not None:
+            path = os.path.realpath(os.path.join(self.__mount_dir, path))
+        return path
+
+
+async def load_manifest(path: str, digest_size: int) -> List[bytes]:
+    async with aiofiles.open(path, 'rb') as fd:
+        raw = await fd.read()
+    if len(raw) % digest_size != 0:
+        raise StreamFormatError('Unexpected manifest structure')
+    return [raw[offset:offset+digest_size] for offset in range(0, len(raw), digest_size)]
@@ -10,7 +10,7 @@ import aiofiles
 
 from sirius_sdk.agent.aries_rfc.feature_0750_storage import AbstractReadOnlyStream, StreamDecryption, \
     StreamInitializationError, ConfidentialStorageEncType, EncryptionError, StreamSeekableError, StreamEOF, \
-    StreamFormatError, AbstractWriteOnlyStream, StreamEncryption, BaseStreamEncryption
+    StreamFormatError, AbstractWriteOnlyStream, StreamEncryption, BaseStreamEncryption, StreamCompression
 from sirius_sdk.agent.aries_rfc.feature_0750_storage.components import ConfidentialStorageRawByteStorage, ConfidentialStorageAuthProvider
 from sirius_sdk.errors.exceptions import SiriusInitializationError
 from sirius_sdk.hub import _current_hub
@@ -18,10 +18,16 @@ from sirius_sdk.hub import _current_hub
 
 class FileSystemReadOnlyStream(AbstractReadOnlyStream):
 
-    def __init__(self, path: str, chunks_num: int, enc: Optional[StreamDecryption] = None):
+    def __init__(
+            self, path: str, chunks_num: int, enc: Optional[StreamDecryption] = None,
+            compression: Optional[StreamCompression] = None
+    ):
         if chunks_num < 0:
             raise StreamInitializationError('Chunks Num must be greater or equal to 0')
-        super().__init__(path, chunks_num, enc)
+        if compression and not enc:
+            # Compressed chunks have variable size, so they are framed as chunks of plain data encoding
+            enc = StreamDecryption(type_=ConfidentialStorageEncType.UNKNOWN)
+        super().__init__(path, chunks_num, enc, compression)
         self.__fd = None
         self.__size = 0
         self.__chunk_size = 0
@@ -53,6 +59,7 @@ class FileSystemReadOnlyStream(AbstractReadOnlyStream):
     async def open(self):
         if self.__fd:
             return
+        self.__assert_compression_is_framed()
         self.__fd = await aiofiles.open(self.path, 'rb')
         self.__size = await self.__fd.seek(0, io.SEEK_END)
         await self.__fd.seek(0, io.SEEK_SET)
@@ -116,7 +123,7 @@ class FileSystemReadOnlyStream(AbstractReadOnlyStream):
                 raise StreamFormatError('Unexpected encoded file structure')
             # Decode bytes stream
             encrypted = self.unpack_chunk(chunk)
-            decrypted = await self.decrypt(encrypted)
+            decrypted = self.decompress(await self.decrypt(encrypted))
             file_pos += len(chunk)
             self._current_chunk += 1
             return self._current_chunk, decrypted
@@ -148,13 +155,23 @@ class FileSystemReadOnlyStream(AbstractReadOnlyStream):
         if not self.__fd:
             raise StreamInitializationError('FileStream is not Opened!')
 
+    def __assert_compression_is_framed(self):
+        if self.compression and not self.enc:
+            raise StreamInitializationError('Compressed chunks expect encoding, use UNKNOWN enc-type for plain data')
+
 
 class FileSystemWriteOnlyStream(AbstractWriteOnlyStream):
 
     DEF_CHUNK_SIZE = 1024  # 1KB
 
-    def __init__(self, path: str, chunk_size: int = DEF_CHUNK_SIZE, enc: Optional[StreamEncryption] = None):
-        super().__init__(path, chunk_size, enc)
+    def __init__(
+            self, path: str, chunk_size: int = DEF_CHUNK_SIZE, enc: Optional[StreamEncryption] = None,
+            compression: Optional[StreamCompression] = None
+    ):
+        if compression and not enc:
+            # Compressed chunks have variable size, so they are framed as chunks of plain data encoding
+            enc = StreamEncryption(type_=ConfidentialStorageEncType.UNKNOWN)
+        super().__init__(path, chunk_size, enc, compression)
         self.__cek = None
         self.__file_size = 0
         self.__file_pos = 0
@@ -182,6 +199,7 @@ class FileSystemWriteOnlyStream(AbstractWriteOnlyStream):
                 await fd.truncate(0)
 
     async def open(self):
+        self.__assert_compression_is_framed()
         self.__fd = await aiofiles.open(self.path, 'a+b', buffering=0)
         file_is_seekable = await self.__fd.seekable()
         self._seekable = file_is_seekable
@@ -242,7 +260,7 @@ class FileSystemWriteOnlyStream(AbstractWriteOnlyStream):
             await self.seek_to_chunk(no)
         if self.enc:
             # encode
-            encoded = await self.encrypt(chunk)
+            encoded = await self.encrypt(self.compress(chunk))
             chunk = self.pack_chunk(encoded)
             # Write Chunk Header with actual encoded bytes size
             sz = len(chunk)
@@ -309,11 +327,15 @@ class FileSystemWriteOnlyStream(AbstractWriteOnlyStream):
         if not self.__fd:
             raise StreamInitializationError('FileStream is not Opened')
 
+    def __assert_compression_is_framed(self):
+        if self.compression and not self.enc:
+            raise StreamInitializationError('Compressed chunks expect encoding, use UNKNOWN enc-type for plain data')
+
 
 class FileSystemRawByteStorage(ConfidentialStorageRawByteStorage):
 
-    def __init__(self, encryption: BaseStreamEncryption = None):
-        super().__init__(encryption)
+    def __init__(self, encryption: BaseStreamEncryption = None, compression: StreamCompression = None):
+        super().__init__(encryption, compression)
         self.__mount_dir: Optional[str] = None
 
     async def mount(self, path: str):
@@ -343,13 +365,15 @@ class FileSystemRawByteStorage(ConfidentialStorageRawByteStorage):
         path = self.__uri_to_path(uri)
         if not os.path.isfile(path):
             raise StreamInitializationError(f'Stream with URI: {uri} doe not exists!')
-        return FileSystemReadOnlyStream(path=path, chunks_num=chunks_num, enc=self.encryption)
+        return FileSystemReadOnlyStream(
+            path=path, chunks_num=chunks_num, enc=self.encryption, compression=self.compression
+        )
 
     async def writeable(self, uri: str) -> AbstractWriteOnlyStream:
         path = self.__uri_to_path(uri)
         if not os.path.isfile(path):
             raise StreamInitializationError(f'Stream with URI: {uri} doe not exists!')
-        return FileSystemWriteOnlyStream(path=path, enc=self.encryption)
+        return FileSystemWriteOnlyStream(path=path, enc=self.encryption, compression=self.compression)
 
     async def exists(self, uri: str) -> bool:
         path = self.__uri_to_path(uri)
@@ -0,0 +1,204 @@
+from typing import Optional, List, Coroutine, Dict
+from urllib.parse import urlparse
+
+from sirius_sdk.agent.aries_rfc.feature_0750_storage import AbstractReadOnlyStream, StreamInitializationError, \
+    StreamEOF, AbstractWriteOnlyStream, BaseStreamEncryption, StreamCompression
+from sirius_sdk.agent.aries_rfc.feature_0750_storage.components import ConfidentialStorageRawByteStorage
+
+
+# Volumes are shared between storages mounted to the same path in the bounds of the process
+_volumes: Dict[str, Dict[str, List[bytes]]] = {}
+
+
+class InMemoryReadOnlyStream(AbstractReadOnlyStream):
+    """Reads stream from list of chunks: every chunk is kept as separate item, so
+    chunks boundaries are preserved without framing"""
+
+    def __init__(
+            self, path: str, chunks: List[bytes], chunks_num: int, enc: Optional[BaseStreamEncryption] = None,
+            compression: Optional[StreamCompression] = None
+    ):
+        if chunks_num < 0:
+            raise StreamInitializationError('Chunks Num must be greater or equal to 0')
+        super().__init__(path, chunks_num, enc, compression)
+        self.__chunks = chunks
+        self.__on_closed: Optional[Coroutine] = None
+
+    @property
+    def on_closed(self) -> Optional[Coroutine]:
+        return self.__on_closed
+
+    @on_closed.setter
+    def on_closed(self, cb: Coroutine):
+        self.__on_closed = cb
+
+    async def open(self):
+        self._current_chunk = 0
+        self._seekable = True
+        self._is_open = True
+
+    async def close(self):
+        if self._is_open:
+            self._seekable = None
+            self._is_open = False
+            if self.__on_closed:
+                await self.__on_closed
+                self.__on_closed = None
+
+    async def seek_to_chunk(self, no: int) -> int:
+        self.__assert_is_open()
+        if no > self.chunks_num:
+            raise StreamEOF('EOF')
+        self._current_chunk = no
+        return self._current_chunk
+
+    async def read_chunk(self, no: int = None) -> (int, bytes):
+        self.__assert_is_open()
+        if no is not None:
+            await self.seek_to_chunk(no)
+        if self._current_chunk >= min(self.chunks_num, len(self.__chunks)):
+            raise StreamEOF('EOF')
+        raw = self.__chunks[self._current_chunk]
+        if self.enc:
+            decrypted = self.decompress(await self.decrypt(self.unpack_chunk(raw)))
+        else:
+            decrypted = self.decompress(raw)
+        self._current_chunk += 1
+        return self._current_chunk, decrypted
+
+    async def eof(self) -> bool:
+        self.__assert_is_open()
+        return self._current_chunk >= min(self.chunks_num, len(self.__chunks))
+
+    def __assert_is_open(self):
+        if not self._is_open:
+            raise StreamInitializationError('MemoryStream is not Opened!')
+
+
+class InMemoryWriteOnlyStream(AbstractWriteOnlyStream):
+    """Writes stream chunks to list: chunk write is atomic by design"""
+
+    DEF_CHUNK_SIZE = 1024  # 1KB
+
+    def __init__(
+            self, path: str, chunks: List[bytes], chunk_size: int = DEF_CHUNK_SIZE,
+            enc: Optional[BaseStreamEncryption] = None, compression: Optional[StreamCompression] = None
+    ):
+        super().__init__(path, chunk_size, enc, compression)
+        self.__chunks = chunks
+        self.__on_closed: Optional[Coroutine] = None
+
+    @property
+    def on_closed(self) -> Optional[Coroutine]:
+        return self.__on_closed
+
+    @on_closed.setter
+    def on_closed(self, cb: Coroutine):
+        self.__on_closed = cb
+
+    async def create(self, truncate: bool = False):
+        if truncate:
+            self.__chunks.clear()
+
+    async def open(self):
+        self._chunks_num = len(self.__chunks)
+        self._current_chunk = self._chunks_num
+        self._seekable = True
+        self._is_open = True
+
+    async def close(self):
+        if self._is_open:
+            self._seekable = None
+            self._is_open = False
+            if self.__on_closed:
+                await self.__on_closed
+                self.__on_closed = None
+
+    async def seek_to_chunk(self, no: int) -> int:
+        self.__assert_is_open()
+        if no > self._chunks_num:
+            raise StreamEOF('EOF')
+        self._current_chunk = no
+        return self._current_chunk
+
+    async def write_chunk(self, chunk: bytes, no: int = None) -> (int, int):
+        self.__assert_is_open()
+        if no is not None:
+            await self.seek_to_chunk(no)
+        if self.enc:
+            chunk = self.pack_chunk(await self.encrypt(self.compress(chunk)))
+        else:
+            chunk = self.compress(chunk)
+        if self._current_chunk < len(self.__chunks):
+            self.__chunks[self._current_chunk] = chunk
+        else:
+            self.__chunks.append(chunk)
+        self._chunks_num = len(self.__chunks)
+        self._current_chunk += 1
+        return self._current_chunk, len(chunk)
+
+    async def truncate(self, no: int = 0):
+        self.__assert_is_open()
+        if no >= len(self.__chunks):
+            return
+        del self.__chunks[no:]
+        self._chunks_num = len(self.__chunks)
+        if self._current_chunk > no:
+            self._current_chunk = no
+
+    def __assert_is_open(self):
+        if not self._is_open:
+            raise StreamInitializationError('MemoryStream is not Opened')
+
+
+class InMemoryRawByteStorage(ConfidentialStorageRawByteStorage):
+    """Keeps streams in process memory: suitable for tests and caches
+
+    Storages mounted to the same path share streams while process is alive
+    """
+
+    def __init__(self, encryption: BaseStreamEncryption = None, compression: StreamCompression = None):
+        super().__init__(encryption, compression)
+        self.__volume: Dict[str, List[bytes]] = {}
+
+    async def mount(self, path: str):
+        self.__volume = _volumes.setdefault(path, {})
+
+    @staticmethod
+    def release(path: str):
+        """Drop volume mounted to the path and free memory"""
+        _volumes.pop(path, None)
+
+    async def create(self, uri: str):
+        key = self.__uri_to_key(uri)
+        if key in self.__volume:
+            raise StreamInitializationError(f'Stream with URI: {uri} already exists!')
+        self.__volume[key] = []
+
+    async def remove(self, uri: str):
+        self.__volume.pop(self.__uri_to_key(uri), None)
+
+    async def readable(self, uri: str, chunks_num: int) -> AbstractReadOnlyStream:
+        chunks = self.__volume.get(self.__uri_to_key(uri), None)
+        if chunks is None:
+            raise StreamInitializationError(f'Stream with URI: {uri} doe not exists!')
+        return InMemoryReadOnlyStream(
+            path=uri, chunks=chunks, chunks_num=chunks_num, enc=self.encryption, compression=self.compression
+        )
+
+    async def writeable(self, uri: str) -> AbstractWriteOnlyStream:
+        chunks = self.__volume.get(self.__uri_to_key(uri), None)
+        if chunks is None:
+            raise StreamInitializationError(f'Stream with URI: {uri} doe not exists!')
+        return InMemoryWriteOnlyStream(path=uri, chunks=chunks, enc=self.encryption, compression=self.compression)
+
+    async def exists(self, uri: str) -> bool:
+        return self.__uri_to_key(uri) in self.__volume
+
+    @staticmethod
+    def __uri_to_key(uri: str) -> str:
+        p = urlparse(uri)
+        key = p.netloc + p.path
+        while key.startswith('/'):
+            key = key[1:]
+        return key
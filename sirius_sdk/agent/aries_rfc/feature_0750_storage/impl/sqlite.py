@@ -0,0 +1,326 @@
+import os
+import os.path
+import sqlite3
+from typing import Optional, Coroutine
+from urllib.parse import urlparse
+
+from sirius_sdk.agent.aries_rfc.feature_0750_storage import AbstractReadOnlyStream, StreamInitializationError, \
+    StreamEOF, StreamFormatError, AbstractWriteOnlyStream, BaseStreamEncryption, StreamCompression
+from sirius_sdk.agent.aries_rfc.feature_0750_storage.components import ConfidentialStorageRawByteStorage
+
+
+class SQLiteDatabase:
+    """Single-file database of streams: every chunk is row keyed by (uri, chunk_no)
+
+    Database operates in WAL mode, writes are committed in batches: on stream close or
+    every `commit_every` written chunks, whatever comes first.
+
+    All streams of the database share one connection and so one transaction: commit of any writer
+    also commits chunks written so far by other open writers. Chunk is written by single statement,
+    so other readers may see a prefix of a stream that is being written, never a part of a chunk,
+    the same as with files. Connection per writer is not an option: SQLite allows single write
+    transaction at a time, interleaved writers would block the event loop on the database lock
+    """
+
+    DEF_COMMIT_EVERY = 256
+
+    SCHEMA = [
+        'CREATE TABLE IF NOT EXISTS streams (uri TEXT PRIMARY KEY) WITHOUT ROWID',
+        'CREATE TABLE IF NOT EXISTS chunks ('
+        'uri TEXT NOT NULL, no INTEGER NOT NULL, data BLOB NOT NULL, PRIMARY KEY (uri, no)'
+        ') WITHOUT ROWID'
+    ]
+
+    def __init__(self, path: str, commit_every: int = DEF_COMMIT_EVERY):
+        """
+        :param path: path to database file
+        :param commit_every: (optional) max count of uncommitted chunks
+        """
+        self.__path = path
+        self.__commit_every = commit_every
+        self.__pending = 0
+        self.__conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.__conn.execute('PRAGMA journal_mode=WAL')
+        self.__conn.execute('PRAGMA synchronous=NORMAL')
+        for stmt in self.SCHEMA:
+            self.__conn.execute(stmt)
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self.__conn
+
+    def create_stream(self, uri: str) -> bool:
+        try:
+            self.__execute('INSERT INTO streams (uri) VALUES (?)', (uri,))
+        except sqlite3.IntegrityError:
+            return False
+        self.commit()
+        return True
+
+    def remove_stream(self, uri: str):
+        self.__execute('DELETE FROM chunks WHERE uri = ?', (uri,))
+        self.__execute('DELETE FROM streams WHERE uri = ?', (uri,))
+        self.commit()
+
+    def stream_exists(self, uri: str) -> bool:
+        row = self.__conn.execute('SELECT 1 FROM streams WHERE uri = ?', (uri,)).fetchone()
+        return row is not None
+
+    def chunks_count(self, uri: str) -> int:
+        row = self.__conn.execute('SELECT MAX(no) FROM chunks WHERE uri = ?', (uri,)).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def read_chunk(self, uri: str, no: int) -> Optional[bytes]:
+        row = self.__conn.execute('SELECT data FROM chunks WHERE uri = ? AND no = ?', (uri, no)).fetchone()
+        return None if row is None else row[0]
+
+    def write_chunk(self, uri: str, no: int, data: bytes):
+        self.__execute('INSERT OR REPLACE INTO chunks (uri, no, data) VALUES (?, ?, ?)', (uri, no, data))
+        self.__pending += 1
+        if self.__pending >= self.__commit_every:
+            self.commit()
+
+    def truncate(self, uri: str, no: int):
+        self.__execute('DELETE FROM chunks WHERE uri = ? AND no >= ?', (uri, no))
+
+    def commit(self):
+        if self.__conn.in_transaction:
+            self.__conn.execute('COMMIT')
+        self.__pending = 0
+
+    def close(self):
+        self.commit()
+        self.__conn.close()
+
+    def __execute(self, sql: str, params: tuple):
+        if not self.__conn.in_transaction:
+            self.__conn.execute('BEGIN')
+        self.__conn.execute(sql, params)
+
+
+class SQLiteReadOnlyStream(AbstractReadOnlyStream):
+
+    def __init__(
+            self, path: str, db: SQLiteDatabase, chunks_num: int, enc: Optional[BaseStreamEncryption] = None,
+            compression: Optional[StreamCompression] = None
+    ):
+        if chunks_num < 0:
+            raise StreamInitializationError('Chunks Num must be greater or equal to 0')
+        super().__init__(path, chunks_num, enc, compression)
+        self.__db = db
+        self.__stored_chunks = 0
+        self.__on_closed: Optional[Coroutine] = None
+
+    @property
+    def on_closed(self) -> Optional[Coroutine]:
+        return self.__on_closed
+
+    @on_closed.setter
+    def on_closed(self, cb: Coroutine):
+        self.__on_closed = cb
+
+    async def open(self):
+        self.__stored_chunks = self.__db.chunks_count(self.path)
+        self._current_chunk = 0
+        self._seekable = True
+        self._is_open = True
+
+    async def close(self):
+        if self._is_open:
+            self._seekable = None
+            self._is_open = False
+            if self.__on_closed:
+                await self.__on_closed
+                self.__on_closed = None
+
+    async def seek_to_chunk(self, no: int) -> int:
+        self.__assert_is_open()
+        if no > self.chunks_num:
+            raise StreamEOF('EOF')
+        self._current_chunk = no
+        return self._current_chunk
+
+    async def read_chunk(self, no: int = None) -> (int, bytes):
+        self.__assert_is_open()
+        if no is not None:
+            await self.seek_to_chunk(no)
+        if await self.eof():
+            raise StreamEOF('EOF')
+        raw = self.__db.read_chunk(self.path, self._current_chunk)
+        if raw is None:
+            raise StreamFormatError(f'Missing chunk {self._current_chunk}')
+        if self.enc:
+            decrypted = self.decompress(await self.decrypt(self.unpack_chunk(raw)))
+        else:
+            decrypted = self.decompress(raw)
+        self._current_chunk += 1
+        return self._current_chunk, decrypted
+
+    async def eof(self) -> bool:
+        self.__assert_is_open()
+        return self._current_chunk >= min(self.chunks_num, self.__stored_chunks)
+
+    def __assert_is_open(self):
+        if not self._is_open:
+            raise StreamInitializationError('SQLiteStream is not Opened!')
+
+
+class SQLiteWriteOnlyStream(AbstractWriteOnlyStream):
+
+    DEF_CHUNK_SIZE = 1024  # 1KB
+
+    def __init__(
+            self, path: str, db: SQLiteDatabase, chunk_size: int = DEF_CHUNK_SIZE,
+            enc: Optional[BaseStreamEncryption] = None, compression: Optional[StreamCompression] = None
+    ):
+        super().__init__(path, chunk_size, enc, compression)
+        self.__db = db
+        self.__on_closed: Optional[Coroutine] = None
+
+    @property
+    def on_closed(self) -> Optional[Coroutine]:
+        return self.__on_closed
+
+    @on_closed.setter
+    def on_closed(self, cb: Coroutine):
+        self.__on_closed = cb
+
+    async def create(self, truncate: bool = False):
+        self.__db.create_stream(self.path)
+        if truncate:
+            self.__db.truncate(self.path, 0)
+            self.__db.commit()
+
+    async def open(self):
+        self._chunks_num = self.__db.chunks_count(self.path)
+        self._current_chunk = self._chunks_num
+        self._seekable = True
+        self._is_open = True
+
+    async def close(self):
+        if self._is_open:
+            self.__db.commit()
+            self._seekable = None
+            self._is_open = False
+            if self.__on_closed:
+                await self.__on_closed
+                self.__on_closed = None
+
+    async def seek_to_chunk(self, no: int) -> int:
+        self.__assert_is_open()
+        if no > self._chunks_num:
+            raise StreamEOF('EOF')
+        self._current_chunk = no
+        return self._current_chunk
+
+    async def write_chunk(self, chunk: bytes, no: int = None) -> (int, int):
+        self.__assert_is_open()
+        if no is not None:
+            await self.seek_to_chunk(no)
+        if self.enc:
+            chunk = self.pack_chunk(await self.encrypt(self.compress(chunk)))
+        else:
+            chunk = self.compress(chunk)
+        self.__db.write_chunk(self.path, self._current_chunk, chunk)
+        self._current_chunk += 1
+        if self._current_chunk > self._chunks_num:
+            self._chunks_num = self._current_chunk
+        return self._current_chunk, len(chunk)
+
+    async def truncate(self, no: int = 0):
+        self.__assert_is_open()
+        if no >= self._chunks_num:
+            return
+        self.__db.truncate(self.path, no)
+        self.__db.commit()
+        self._chunks_num = no
+        if self._current_chunk > no:
+            self._current_chunk = no
+
+    def __assert_is_open(self):
+        if not self._is_open:
+            raise StreamInitializationError('SQLiteStream is not Opened')
+
+
+class SQLiteRawByteStorage(ConfidentialStorageRawByteStorage):
+    """Keeps all streams of the mounted directory in single SQLite file
+
+    Scales to huge amount of small documents better than file per stream
+    """
+
+    DB_FILE = 'streams.sqlite'
+
+    def __init__(
+            self, encryption: BaseStreamEncryption = None, compression: StreamCompression = None,
+            commit_every: int = SQLiteDatabase.DEF_COMMIT_EVERY
+    ):
+        """
+        :param encryption: (optional) streams encryption
+        :param compression: (optional) streams compression
+        :param commit_every: (optional) max count of chunks written in the same transaction
+        """
+        super().__init__(encryption, compression)
+        self.__commit_every = commit_every
+        self.__db: Optional[SQLiteDatabase] = None
+
+    @property
+    def db(self) -> Optional[SQLiteDatabase]:
+        return self.__db
+
+    async def mount(self, path: str):
+        if self.__db is not None:
+            self.__db.close()
+        if os.path.isdir(path):
+            path = os.path.join(path, self.DB_FILE)
+        try:
+            self.__db = SQLiteDatabase(path, commit_every=self.__commit_every)
+        except sqlite3.Error as e:
+            raise StreamInitializationError(*e.args)
+
+    async def unmount(self):
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+
+    async def create(self, uri: str):
+        if not self.__assert_mounted().create_stream(self.__uri_to_key(uri)):
+            raise StreamInitializationError(f'Stream with URI: {uri} already exists!')
+
+    async def remove(self, uri: str):
+        self.__assert_mounted().remove_stream(self.__uri_to_key(uri))
+
+    async def readable(self, uri: str, chunks_num: int) -> AbstractReadOnlyStream:
+        key = self.__uri_to_key(uri)
+        db = self.__assert_mounted()
+        if not db.stream_exists(key):
+            raise StreamInitializationError(f'Stream with URI: {uri} doe not exists!')
+        return SQLiteReadOnlyStream(
+            path=key, db=db, chunks_num=chunks_num, enc=self.encryption, compression=self.compression
+        )
+
+    async def writeable(self, uri: str) -> AbstractWriteOnlyStream:
+        key = self.__uri_to_key(uri)
+        db = self.__assert_mounted()
+        if not db.stream_exists(key):
+            raise StreamInitializationError(f'Stream with URI: {uri} doe not exists!')
+        return SQLiteWriteOnlyStream(path=key, db=db, enc=self.encryption, compression=self.compression)
+
+    async def exists(self, uri: str) -> bool:
+        return self.__assert_mounted().stream_exists(self.__uri_to_key(uri))
+
+    def __assert_mounted(self) -> SQLiteDatabase:
+        if self.__db is None:
+            raise StreamInitializationError('Storage is not mounted')
+        return self.__db
+
+    @staticmethod
+    def __uri_to_key(uri: str) -> str:
+        p = urlparse(uri)
+        key = p.netloc + p.path
+        while key.startswith('/'):
+            key = key[1:]
+        return key
@@ -880,23 +880,12 @@ class CallerEncryptedDataVault(AbstractStateMachine, EncryptedDataVault, Encrypt
         async def readable(self, jwe: Union[JWE, dict] = None, keys: KeyPair = None) -> AbstractReadOnlyStream:
             if self._readable is None:
                 self._readable = await self.__api.readable(self.__id)
-            if jwe is None:
-                return self._readable
-            else:
-                enc = StreamDecryption.from_jwe(jwe)
-                if keys is not None:
-                    enc.setup(vk=keys.pk, sk=keys.sk)
-                return ReadOnlyStreamDecodingWrapper(src=self._readable, enc=enc)
+            return self._wrap_readable(self._readable, jwe, keys)
 
         async def writable(self, jwe: Union[JWE, dict] = None, cek: Union[bytes, str] = None) -> AbstractWriteOnlyStream:
             if self._writable is None:
                 self._writable = await self.__api.writable(self.__id)
-            if jwe is None:
-                return self._writable
-            else:
-                if isinstance(cek, str):
-                    cek = ensure_is_bytes(cek)
-                return WriteOnlyStreamEncodingWrapper(dest=self._writable, enc=StreamEncryption.from_jwe(jwe, cek))
+            return self._wrap_writable(self._writable, jwe, cek)
 
     def __init__(
             self, called: Pairwise, read_timeout: int = 30,
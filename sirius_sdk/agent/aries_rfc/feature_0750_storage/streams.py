@@ -3,7 +3,9 @@ import collections
 import hashlib
 import io
 import json
+import lzma
 import struct
+import zlib
 from abc import ABC, abstractmethod
 from collections import OrderedDict
 from typing import List, Optional, Dict, Union
@@ -16,8 +18,8 @@ from sirius_sdk.errors.indy_exceptions import IndyError
 from sirius_sdk.encryption import b58_to_bytes, bytes_to_b58, bytes_to_b64
 from sirius_sdk.encryption.ed25519 import prepare_pack_recipient_keys, locate_pack_recipient_key
 
-from .encoding import ConfidentialStorageEncType, JWE, EncRecipient, EncHeader
-from .errors import EncryptionError, StreamInitializationError
+from .encoding import ConfidentialStorageEncType, ConfidentialStorageCompressionType, JWE, EncRecipient, EncHeader
+from .errors import EncryptionError, StreamInitializationError, StreamFormatError
 
 
 class DecryptionChunkTooSmall(RuntimeError):
@@ -162,16 +164,139 @@ class StreamDecryption(BaseStreamEncryption):
         return inst
 
 
+class StreamCompression:
+    """Per-chunk compression settings for Streams
+
+    Compression is applied to plaintext chunk before encryption. Every compressed chunk is prefixed
+    with 1-byte header that describes codec was applied to chunk, so chunks that are not compressible
+    (already compressed media, encrypted data, etc.) are stored as is.
+    Decompressed chunk size is limited, so malformed or hostile chunk can not exhaust memory.
+    """
+
+    HEADER_STORED = 0
+    HEADER_ZLIB = 1
+    HEADER_LZMA = 2
+    DEF_MAX_CHUNK_SIZE = 16 * 1024 * 1024  # 16MB
+
+    def __init__(
+            self, type_: ConfidentialStorageCompressionType = ConfidentialStorageCompressionType.ZLIB,
+            level: int = None, min_ratio: float = 0.95, max_chunk_size: int = DEF_MAX_CHUNK_SIZE
+    ):
+        """
+        :param type_: compression algorithm
+        :param level: (optional) compression level [0..9], default level of algorithm if None
+        :param min_ratio: chunk is stored uncompressed if compressed-size/chunk-size ratio is greater
+        :param max_chunk_size: (optional) max size of chunk, larger chunks are not compressed and decompressed
+        """
+        if level is not None and not (0 <= level <= 9):
+            raise StreamInitializationError('Compression level must be in range [0..9]')
+        if not (0 < min_ratio <= 1):
+            raise StreamInitializationError('Compression min ratio must be in range (0..1]')
+        if max_chunk_size <= 0:
+            raise StreamInitializationError('Compression max chunk size must be greater than 0')
+        self.__type = type_
+        self.__level = level
+        self.__min_ratio = min_ratio
+        self.__max_chunk_size = max_chunk_size
+
+    @property
+    def type(self) -> ConfidentialStorageCompressionType:
+        return self.__type
+
+    @property
+    def level(self) -> Optional[int]:
+        return self.__level
+
+    @property
+    def min_ratio(self) -> float:
+        return self.__min_ratio
+
+    @property
+    def max_chunk_size(self) -> int:
+        return self.__max_chunk_size
+
+    def compress(self, chunk: bytes) -> bytes:
+        if len(chunk) > self.__max_chunk_size:
+            raise StreamFormatError(f'Chunk size exceeds {self.__max_chunk_size} bytes')
+        if self.__type == ConfidentialStorageCompressionType.ZLIB:
+            header = self.HEADER_ZLIB
+            compressed = zlib.compress(chunk, -1 if self.__level is None else self.__level)
+        elif self.__type == ConfidentialStorageCompressionType.LZMA:
+            header = self.HEADER_LZMA
+            compressed = lzma.compress(
+                chunk, format=lzma.FORMAT_ALONE,
+                preset=lzma.PRESET_DEFAULT if self.__level is None else self.__level
+            )
+        else:
+            header, compressed = self.HEADER_STORED, None
+        if compressed is None or len(compressed) > len(chunk) * self.__min_ratio:
+            # Incompressible chunk
+            return bytes([self.HEADER_STORED]) + chunk
+        else:
+            return bytes([header]) + compressed
+
+    def decompress(self, payload: bytes) -> bytes:
+        if len(payload) < 1:
+            raise StreamFormatError('Expected compression header')
+        header = payload[0]
+        body = payload[1:]
+        try:
+            if header == self.HEADER_STORED:
+                return body
+            elif header == self.HEADER_ZLIB:
+                decompressor = zlib.decompressobj()
+            elif header == self.HEADER_LZMA:
+                decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_ALONE)
+            else:
+                raise StreamFormatError(f'Unknown compression header: {header}')
+            chunk = decompressor.decompress(body, self.__max_chunk_size)
+        except (zlib.error, lzma.LZMAError) as e:
+            raise StreamFormatError(f'Chunk decompression error: {e}')
+        if not decompressor.eof:
+            raise StreamFormatError(f'Compressed chunk is truncated or exceeds {self.__max_chunk_size} bytes')
+        return chunk
+
+    def as_json(self) -> dict:
+        js = {'type': self.__type.value, 'minRatio': self.__min_ratio}
+        if self.__level is not None:
+            js['level'] = self.__level
+        if self.__max_chunk_size != self.DEF_MAX_CHUNK_SIZE:
+            js['maxChunkSize'] = self.__max_chunk_size
+        return js
+
+    @classmethod
+    def from_json(cls, js: dict) -> "StreamCompression":
+        try:
+            type_ = ConfidentialStorageCompressionType(js['type'])
+        except (LookupError, ValueError) as e:
+            raise StreamInitializationError(f'Unexpected compression settings: {e}')
+        return StreamCompression(
+            type_=type_, level=js.get('level', None), min_ratio=js.get('minRatio', 0.95),
+            max_chunk_size=js.get('maxChunkSize', cls.DEF_MAX_CHUNK_SIZE)
+        )
+
+    @classmethod
+    def from_meta(cls, meta: Optional[dict]) -> Optional["StreamCompression"]:
+        """Extract compression settings from stream metadata (see StreamMeta)"""
+        js = (meta or {}).get('compression', None)
+        if js:
+            return cls.from_json(js)
+        else:
+            return None
+
+
 class AbstractStream(ABC):
 
-    def __init__(self, path: str, enc: Optional[BaseStreamEncryption] = None):
+    def __init__(self, path: str, enc: Optional[BaseStreamEncryption] = None, compression: Optional[StreamCompression] = None):
         """Interface for Low-level layers of Vault Storage
 
         :param path: path to resource
         :param enc: (optional) encoding config
+        :param compression: (optional) chunks compression config, is applied for encoded (framed) chunks only
         """
         self.__path = path
         self.__enc = enc
+        self.__compression = compression
         self._current_chunk = 0
         self._seekable = None
         self._chunks_num: int = 0
@@ -193,6 +318,14 @@ class AbstractStream(ABC):
     def enc(self, value: BaseStreamEncryption):
         self.__enc = value
 
+    @property
+    def compression(self) -> Optional[StreamCompression]:
+        return self.__compression
+
+    @compression.setter
+    def compression(self, value: Optional[StreamCompression]):
+        self.__compression = value
+
     @property
     def seekable(self) -> Optional[bool]:
         return self._seekable
@@ -294,6 +427,18 @@ class AbstractStream(ABC):
         else:
             return payload
 
+    def compress(self, chunk: bytes) -> bytes:
+        if self.compression:
+            return self.compression.compress(chunk)
+        else:
+            return chunk
+
+    def decompress(self, payload: bytes) -> bytes:
+        if self.compression:
+            return self.compression.decompress(payload)
+        else:
+            return payload
+
     def pack_chunk(self, chunk: bytes) -> bytes:
         if self.enc is None:
             return chunk
@@ -350,7 +495,10 @@ class AbstractReadOnlyStream(AbstractStream):
       - etc
     """
 
-    def __init__(self, path: str, chunks_num: int, enc: Optional[BaseStreamEncryption] = None):
+    def __init__(
+            self, path: str, chunks_num: int, enc: Optional[BaseStreamEncryption] = None,
+            compression: Optional[StreamCompression] = None
+    ):
         """
         :param path: path to stream on local infrastructure (device, cloud provider ...)
         :param chunks_num: count of chunks that stream was splitted to
@@ -360,8 +508,9 @@ class AbstractReadOnlyStream(AbstractStream):
             - encrypt/decrypt big data partially
             - adv. services like upload/download with pause/resume (for cloud providers for example)
         :param enc: allow decrypt stream chunks
+        :param compression: allow decompress stream chunks
         """
-        super().__init__(path, enc)
+        super().__init__(path, enc, compression)
         self._chunks_num = chunks_num
 
     @abstractmethod
@@ -395,7 +544,7 @@ class AbstractReadOnlyStream(AbstractStream):
             await src.seek_to_chunk(0)
             while not await src.eof():
                 _, chunk = await src.read_chunk()
-                raw = await self.decrypt(chunk)
+                raw = self.decompress(await self.decrypt(chunk))
                 yield raw
 
 
@@ -412,7 +561,10 @@ class AbstractWriteOnlyStream(AbstractStream):
       - etc
     """
 
-    def __init__(self, path: str, chunk_size: int = 1024, enc: Optional[BaseStreamEncryption] = None):
+    def __init__(
+            self, path: str, chunk_size: int = 1024, enc: Optional[BaseStreamEncryption] = None,
+            compression: Optional[StreamCompression] = None
+    ):
         """
         :param chunk_size: size (in bytes) of chunks that stream was splitted to
           !!! actual chunks-sizes may be different (when stream is encoded for example) !!!
@@ -421,8 +573,9 @@ class AbstractWriteOnlyStream(AbstractStream):
             - encrypt/decrypt big data partially
             - adv. services like upload/download with pause/resume (for cloud providers for example)
         :param enc: allow encrypt stream chunks
+        :param compression: allow compress stream chunks before encryption
         """
-        super().__init__(path, enc)
+        super().__init__(path, enc, compression)
         self.chunk_size = chunk_size
 
     @property
@@ -477,10 +630,10 @@ class AbstractWriteOnlyStream(AbstractStream):
 
 class ReadOnlyStreamDecodingWrapper(AbstractReadOnlyStream):
 
-    def __init__(self, src: AbstractReadOnlyStream, enc: BaseStreamEncryption):
+    def __init__(self, src: AbstractReadOnlyStream, enc: BaseStreamEncryption, compression: StreamCompression = None):
         if enc is None:
             raise RuntimeError('You should setup encoding')
-        super().__init__(path=src.path, chunks_num=src.chunks_num, enc=enc)
+        super().__init__(path=src.path, chunks_num=src.chunks_num, enc=enc, compression=compression)
         self.__src = src
         self.__buffer = b''
         self.__queue = collections.deque()
@@ -575,7 +728,7 @@ class ReadOnlyStreamDecodingWrapper(AbstractReadOnlyStream):
             # Body
             while (self.__expected_bytes is not None) and (self.__expected_bytes <= len(self.__buffer)):
                 encrypted = self.__buffer[:self.__expected_bytes]
-                decrypted = await self.decrypt(encrypted)
+                decrypted = self.decompress(await self.decrypt(encrypted))
                 self.__queue.append(decrypted)
                 self.__buffer = self.__buffer[self.__expected_bytes:]
                 if len(self.__buffer) >= 4:
@@ -594,10 +747,10 @@ class ReadOnlyStreamDecodingWrapper(AbstractReadOnlyStream):
 
 class WriteOnlyStreamEncodingWrapper(AbstractWriteOnlyStream):
 
-    def __init__(self, dest: AbstractWriteOnlyStream, enc: BaseStreamEncryption):
+    def __init__(self, dest: AbstractWriteOnlyStream, enc: BaseStreamEncryption, compression: StreamCompression = None):
         if enc is None:
             raise RuntimeError('You should setup encoding')
-        super().__init__(path=dest.path, chunk_size=dest.chunk_size, enc=enc)
+        super().__init__(path=dest.path, chunk_size=dest.chunk_size, enc=enc, compression=compression)
         self.__src = dest
 
     @property
@@ -618,7 +771,7 @@ class WriteOnlyStreamEncodingWrapper(AbstractWriteOnlyStream):
 
     async def write_chunk(self, chunk: bytes, no: int = None) -> (int, int):
         if self.enc is not None:
-            encoded = self.pack_chunk(await self.encrypt(chunk))
+            encoded = self.pack_chunk(await self.encrypt(self.compress(chunk)))
         else:
             encoded = chunk
         no, sz = await self.__src.write_chunk(encoded, no)
@@ -1,21 +1,30 @@
+import copy
 import base64
+import hashlib
+import binascii
 import dataclasses
 import datetime
 import logging
 from enum import Enum
+from functools import lru_cache
 from dataclasses import dataclass
-from typing import Optional, List, Any, Union
+from typing import Optional, List, Any, Union, Dict, Tuple, BinaryIO
 
 from pytime import pytime
 from sirius_sdk.base import Message
+from sirius_sdk.messaging.fields import parse_strict_iso_datetime
 from .decorators import *
 
 
+@lru_cache(maxsize=4096)
 def parse_datetime(val: str) -> Optional[datetime.datetime]:
     orig_val = val
     if val:
         if val[-1] == 'Z' and len(val.split(' ')) == 2:
             val = val[:-1].replace(' ', 'T')
+        ret = parse_strict_iso_datetime(val)
+        if ret is not None:
+            return ret
         for func in [pytime.parse, datetime.datetime.fromisoformat]:
             try:
                 return func(val)
@@ -27,6 +36,11 @@ def parse_datetime(val: str) -> Optional[datetime.datetime]:
         return None
 
 
+@lru_cache(maxsize=None)
+def _dataclass_field_types(cls: type) -> Dict[str, Any]:
+    return {f.name: f.type for f in dataclasses.fields(cls)}
+
+
 class PleaseAckMixin:
     """Explains how one party can request an acknowledgment to and clarify the status of processes.
        - RFC Aries: https://github.com/hyperledger/aries-rfcs/tree/main/features/0317-please-ack
@@ -136,9 +150,22 @@ class ThreadMixin:
 
 
 class Attach(dict):
+    """Attachment descriptor: https://github.com/hyperledger/aries-rfcs/tree/main/concepts/0017-attachments
+
+    Data is base64-encoded into descriptor once, decoded data is cached, so it is not decoded on every access.
+    Large data may be encoded/decoded in chunks from/to file-like objects (see from_stream, write_to)
+    or stored outside of message and referenced by links with sha256 hash.
+    """
+
+    # Multiple of 3, so base64 chunks are concatenated without padding
+    STREAM_CHUNK_SIZE = 3 * 256 * 1024
+
+    # (base64 value, decoded bytes)
+    __decoded: Optional[Tuple[str, bytes]] = None
 
     def __init__(self, id: str = None, mime_type: str = None, filename: str = None, lastmod_time: str = None,
-                 description: str = None, data: bytes = None, *args, **kwargs):
+                 description: str = None, data: Union[bytes, bytearray, memoryview] = None,
+                 links: List[str] = None, sha256: str = None, byte_count: int = None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if id is not None:
             self["@id"] = id
@@ -150,10 +177,56 @@ class Attach(dict):
             self["lastmod_time"] = lastmod_time
         if description is not None:
             self["description"] = description
+        if byte_count is not None:
+            self["byte_count"] = byte_count
         if data is not None:
+            # Buffers are encoded without copying
             self["data"] = {
-                "base64": base64.b64encode(data).decode()
+                "base64": binascii.b2a_base64(data, newline=False).decode('ascii')
             }
+            if isinstance(data, bytes):
+                self.__decoded = (self["data"]["base64"], data)
+        if links is not None or sha256 is not None:
+            block = self.setdefault("data", {})
+            if links is not None:
+                block["links"] = links
+            if sha256 is not None:
+                block["sha256"] = sha256
+
+    @classmethod
+    def from_json(cls, js: dict) -> 'Attach':
+        inst = cls()
+        inst.update(js)
+        return inst
+
+    @classmethod
+    def from_stream(cls, stream: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE, **kwargs) -> 'Attach':
+        """Read data from file-like object chunk by chunk, so whole raw data is never kept in memory
+
+        :param stream: file-like object opened in binary mode
+        :param chunk_size: (optional) read chunk size
+        :param kwargs: descriptor fields, see __init__
+        """
+        chunk_size = max(3, chunk_size - chunk_size % 3)
+        pieces = []
+        byte_count = 0
+        tail = b''
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            byte_count += len(chunk)
+            if tail:
+                chunk = tail + chunk
+            cut = len(chunk) - len(chunk) % 3
+            pieces.append(binascii.b2a_base64(memoryview(chunk)[:cut], newline=False).decode('ascii'))
+            tail = chunk[cut:]
+        if tail:
+            pieces.append(binascii.b2a_base64(tail, newline=False).decode('ascii'))
+        kwargs.setdefault('byte_count', byte_count)
+        inst = cls(**kwargs)
+        inst.setdefault("data", {})["base64"] = ''.join(pieces)
+        return inst
 
     @property
     def id(self) -> Optional[str]:
@@ -175,9 +248,67 @@ class Attach(dict):
     def description(self) -> Optional[str]:
         return self['description']
 
+    @property
+    def byte_count(self) -> Optional[int]:
+        return self.get('byte_count', None)
+
+    @property
+    def links(self) -> List[str]:
+        return self.get('data', {}).get('links', [])
+
+    @property
+    def sha256(self) -> Optional[str]:
+        return self.get('data', {}).get('sha256', None)
+
     @property
     def data(self) -> Optional[bytes]:
-        return base64.b64decode(self['data']["base64"])
+        b64 = self.get('data', {}).get('base64', None)
+        if b64 is None:
+            return None
+        decoded = self.__decoded
+        if decoded is None or decoded[0] is not b64:
+            decoded = (b64, base64.b64decode(b64))
+            self.__decoded = decoded
+        return decoded[1]
+
+    @property
+    def data_view(self) -> Optional[memoryview]:
+        """Decoded data without copying, slice it to read parts of data"""
+        data = self.data
+        return memoryview(data) if data is not None else None
+
+    def write_to(self, stream: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+        """Write decoded data to file-like object chunk by chunk
+
+        :return: written bytes count
+        """
+        b64 = self.get('data', {}).get('base64', None)
+        if b64 is None:
+            return 0
+        decoded = self.__decoded
+        if (decoded is not None and decoded[0] is b64) or any(c in b64 for c in '\n\r \t'):
+            # Already decoded, or line breaks shift chunk boundaries
+            data = self.data
+            stream.write(data)
+            return len(data)
+        step = max(1, chunk_size // 3) * 4
+        written = 0
+        for offset in range(0, len(b64), step):
+            chunk = binascii.a2b_base64(b64[offset:offset+step])
+            stream.write(chunk)
+            written += len(chunk)
+        return written
+
+    def check_sha256(self, content: Union[bytes, memoryview] = None) -> bool:
+        """Check content loaded by links (or embedded data if content is None) against sha256 of descriptor"""
+        expected = self.sha256
+        if expected is None:
+            return False
+        if content is None:
+            content = self.data
+            if content is None:
+                return False
+        return hashlib.sha256(content).hexdigest() == expected.lower()
 
 
 class AttachesMixin:
@@ -188,7 +319,13 @@ class AttachesMixin:
     @property
     def attaches(self) -> List[Attach]:
         if "~attach" in self:
-            return self["~attach"]
+            attaches = self["~attach"]
+            if isinstance(attaches, list):
+                # Received attaches are plain dicts, replace them in place so decoded data is cached with message
+                for i, att in enumerate(attaches):
+                    if isinstance(att, dict) and not isinstance(att, Attach):
+                        attaches[i] = Attach.from_json(att)
+            return attaches
         else:
             return []
 
@@ -286,8 +423,10 @@ class TimingMixin:
             )
 
         def to_json(self) -> dict:
-            obj = dataclasses.asdict(self)
-            return {key: obj[key] for key, value in obj.items() if value is not None}
+            return {
+                name: getattr(self, name)
+                for name in _dataclass_field_types(type(self)) if getattr(self, name) is not None
+            }
 
         def create_from_json(self, js: dict) -> 'TimingMixin.Timing':
             upd_kwargs = {}
@@ -297,19 +436,17 @@ class TimingMixin:
             return dataclasses.replace(self, **upd_kwargs)
 
         def __read_value_safe(self, name: str, value: Any) -> Any:
-            fields = dataclasses.fields(self)
-            actual_fields = list(filter(lambda f: f.name == name, fields))
-            if actual_fields:
-                field = actual_fields[0]
-                if field.type == type(value):
+            field_type = _dataclass_field_types(type(self)).get(name)
+            if field_type is not None:
+                if field_type == type(value):
                     return value
                 else:
-                    if field.type == int:
+                    if field_type == int:
                         if isinstance(value, str) and value.isdigit():
                             return int(value)
                         else:
                             return None
-                    elif field.type == datetime.datetime:
+                    elif field_type == datetime.datetime:
                         if isinstance(value, str):
                             return parse_datetime(value)
                         else:
@@ -331,8 +468,19 @@ class TimingMixin:
     def get_timing(cls, message: Message) -> Optional[Timing]:
         js = message.get(TIMING_DECORATOR, {})
         if js:
-            value = TimingMixin.Timing(**js)
-            return value if value.is_filled else None
+            # Parsed value is memoized while ~timing is not changed
+            cached = getattr(message, '_timing_cache', None)
+            if cached is not None and cached[0] == js:
+                value = cached[1]
+            else:
+                value = TimingMixin.Timing(**js)
+                value = value if value.is_filled else None
+                try:
+                    message._timing_cache = (dict(js), value)
+                except AttributeError:
+                    # Message instance without __dict__
+                    pass
+            return copy.copy(value)
         else:
             return None
 
@@ -1,7 +1,9 @@
-import datetime
 import json
+import asyncio
+import datetime
 import math
-from typing import Dict
+from collections import deque
+from typing import Dict, Deque
 
 from sirius_sdk.messaging import Message, Type as MsgType
 from sirius_sdk.abstract.bus import AbstractBus
@@ -11,18 +13,110 @@ from sirius_sdk.errors.exceptions import SiriusRPCError, SiriusTimeoutIO, Operat
 from sirius_sdk.messaging import restore_message_instance
 
 from .aries_rfc.feature_0753_bus.messages import *
-from .aries_rfc.feature_0212_pickup.messages import PickUpNoop, PickUpProblemReport
+from .aries_rfc.feature_0212_pickup.messages import PickUpNoop, PickUpProblemReport, PickUpBatchRequest, \
+    PickUpBatchResponse, BasePickUpMessage
+
+
+class PickUpPrefetch:
+    """Local buffer of bus events retrieved with 0212 pickup batches
+
+    Batch size follows observed queue depth: it is doubled while batches come full and shrinks
+    to the received count otherwise. If server rejects batch requests, events are retrieved
+    one per round trip with PickUpNoop
+    """
+
+    DEF_MAX_BATCH_SIZE = 100
+    # Long polling delay if events are awaited without timeout
+    DEF_POLL_DELAY = 5 * 60  # seconds
+    # Pause before next request if server answered with empty batch: server may ignore polling delay
+    REPOLL_PAUSE = 0.1  # seconds
+
+    def __init__(self, max_batch_size: int = DEF_MAX_BATCH_SIZE):
+        """
+        :param max_batch_size: (optional) max count of events requested per round trip, 1 disables batching
+        """
+        self.__events: Deque[AbstractBus.BytesEvent] = deque()
+        self.__max_batch_size = max(1, max_batch_size)
+        self.__batch_size = 1
+        self.__batching = self.__max_batch_size > 1
+
+    @property
+    def batch_size(self) -> int:
+        return self.__batch_size
+
+    @property
+    def batching(self) -> bool:
+        return self.__batching
+
+    def __len__(self):
+        return len(self.__events)
+
+    def pop(self) -> Optional[AbstractBus.BytesEvent]:
+        if self.__events:
+            return self.__events.popleft()
+        else:
+            return None
+
+    def discard(self, thread_ids: List[str]):
+        """Drop prefetched events of unsubscribed threads"""
+        if self.__events:
+            thread_ids = set(thread_ids)
+            self.__events = deque(event for event in self.__events if event.thread_id not in thread_ids)
+
+    def make_request(self, delay_milli: Optional[int] = None) -> BasePickUpMessage:
+        if self.__batching:
+            request = PickUpBatchRequest(batch_size=self.__batch_size)
+        else:
+            request = PickUpNoop()
+        request.please_ack = True
+        if delay_milli is not None:
+            request.timing = BasePickUpMessage.Timing(delay_milli=delay_milli)
+        return request
+
+    def disable_batching(self):
+        self.__batching = False
+        self.__batch_size = 1
+
+    def put_batch(self, batch: PickUpBatchResponse) -> int:
+        """Put events of the batch to buffer
+
+        :return: count of bus events in the batch
+        """
+        messages = batch.messages
+        count = 0
+        for batched in messages:
+            message = batched.message
+            if isinstance(message, str):
+                message = json.loads(message)
+            ok, event = restore_message_instance(message)
+            if ok and isinstance(event, BusEvent):
+                self.__events.append(AbstractBus.BytesEvent(thread_id=event.thread_id, payload=event.payload))
+                count += 1
+        if len(messages) >= self.__batch_size:
+            self.__batch_size = min(2 * self.__batch_size, self.__max_batch_size)
+        else:
+            self.__batch_size = max(1, len(messages))
+        return count
 
 
 class RpcBus(AbstractBus):
 
     IO_TIMEOUT = 15
 
-    def __init__(self, connector: WebSocketConnector, p2p: P2PConnection):
+    def __init__(
+            self, connector: WebSocketConnector, p2p: P2PConnection,
+            max_batch_size: int = PickUpPrefetch.DEF_MAX_BATCH_SIZE
+    ):
+        """
+        :param connector: RPC connector
+        :param p2p: P2P connection with agent
+        :param max_batch_size: (optional) max count of events retrieved per round trip
+        """
         self.__connector: WebSocketConnector = connector
         self.__binding_ids: Dict[str, str] = {}
         self.__p2p = p2p
         self.__client_id = str(id(self))
+        self.__prefetch = PickUpPrefetch(max_batch_size)
 
     async def subscribe(self, thid: str) -> bool:
         request = BusSubscribeRequest(cast=BusSubscribeRequest.Cast(thid=thid), parent_thread_id=self.__client_id)
@@ -53,6 +147,7 @@ class RpcBus(AbstractBus):
 
     async def unsubscribe(self, thid: str):
         binding_id = self.__pop_binding_id(thid) or thid
+        self.__prefetch.discard([thid, binding_id])
         request = BusUnsubscribeRequest(thread_id=binding_id, need_answer=False)
         await self.__rfc(request, wait_response=False)
 
@@ -61,6 +156,7 @@ class RpcBus(AbstractBus):
         for thid in thids:
             actual_thid = self.__pop_binding_id(thid) or thid
             actual_binding_ids.append(actual_thid)
+        self.__prefetch.discard(thids + actual_binding_ids)
         request = BusUnsubscribeRequest(
             thread_id=actual_binding_ids,
             need_answer=False  # don't wait response
@@ -77,33 +173,49 @@ class RpcBus(AbstractBus):
 
     async def get_event(self, timeout: int = None) -> AbstractBus.BytesEvent:
 
+        event = self.__prefetch.pop()
+        if event is not None:
+            return event
+
         if timeout is not None:
-            wait_timeout = math.ceil(timeout)
-            cut_stamp = datetime.datetime.now() + datetime.timedelta(seconds=wait_timeout)
+            cut_stamp = datetime.datetime.now() + datetime.timedelta(seconds=timeout)
         else:
-            wait_timeout = INFINITE_TIMEOUT
             cut_stamp = None
 
-        noop = PickUpNoop()
-        noop.please_ack = True
-        if timeout is not None:
-            noop.timing = PickUpNoop.Timing(delay_milli=timeout*1000)
-        await self.__connector.write(noop)
+        def __remaining__() -> Optional[float]:
+            if cut_stamp is None:
+                return None
+            remaining = (cut_stamp - datetime.datetime.now()).total_seconds()
+            if remaining <= 0:
+                raise SiriusTimeoutIO
+            return remaining
+
+        request = await self.__request_events(__remaining__())
 
         while True:
             # Don't set timeout on websocket layer cause of message holder operate with timings on its side
-            if timeout is None:
+            remaining = __remaining__()
+            if remaining is None:
                 read_timeout = None
             else:
-                read_timeout = 1.1*timeout   # Increase if pickup protocol not raise response
+                read_timeout = 1.1*remaining   # Increase if pickup protocol not raise response
             payload = await self.__connector.read(read_timeout)
 
             ok, resp = restore_message_instance(json.loads(payload.decode()))
             if ok and isinstance(resp, Message):
                 thread = ThreadMixin.get_thread(resp)
-                if thread and ((thread.pthid == self.__client_id) or (thread.thid == noop.id)):
+                if thread and ((thread.pthid == self.__client_id) or (thread.thid == request.id)):
                     if isinstance(resp, BusEvent):
                         return AbstractBus.BytesEvent(thread_id=resp.thread_id, payload=resp.payload)
+                    elif isinstance(resp, PickUpBatchResponse):
+                        self.__prefetch.put_batch(resp)
+                        event = self.__prefetch.pop()
+                        if event is not None:
+                            return event
+                        # Server may answer with empty batch without waiting, don't poll it in tight loop
+                        pause = PickUpPrefetch.REPOLL_PAUSE
+                        await asyncio.sleep(min(pause, __remaining__() or pause))
+                        request = await self.__request_events(__remaining__())
                     elif isinstance(resp, BusBindResponse):
                         if resp.aborted is True and resp.parent_thread_id == self.__client_id:
                             raise OperationAbortedManually('Bus events awaiting was aborted by user')
@@ -111,14 +223,17 @@ class RpcBus(AbstractBus):
                         raise SiriusRPCError(resp.explain)
                     elif isinstance(resp, PickUpProblemReport):
                         if resp.problem_code == PickUpProblemReport.PROBLEM_CODE_TIMEOUT_OCCURRED:
-                            raise SiriusTimeoutIO(resp.explain)
+                            if cut_stamp is not None:
+                                raise SiriusTimeoutIO(resp.explain)
+                            # Poll delay is over but caller waits infinitely
+                            request = await self.__request_events(None)
+                        elif resp.problem_code == PickUpProblemReport.PROBLEM_CODE_INVALID_REQ and \
+                                isinstance(request, PickUpBatchRequest):
+                            # Server does not support batches
+                            self.__prefetch.disable_batching()
+                            request = await self.__request_events(__remaining__())
                         else:
-                            SiriusRPCError(resp.explain)
-            if wait_timeout != INFINITE_TIMEOUT:
-                _ = (cut_stamp - datetime.datetime.now()).total_seconds()
-                wait_timeout = math.ceil(_)
-                if wait_timeout <= 0:
-                    raise SiriusTimeoutIO
+                            raise SiriusRPCError(resp.explain)
 
     async def get_message(self, timeout: float = None) -> AbstractBus.MessageEvent:
         event = await self.get_event(timeout)
@@ -143,6 +258,13 @@ class RpcBus(AbstractBus):
         request = BusUnsubscribeRequest(parent_thread_id=self.__client_id, aborted=True)
         await self.__rfc(request, wait_response=False)
 
+    async def __request_events(self, timeout: Optional[float]) -> BasePickUpMessage:
+        if timeout is None:
+            timeout = PickUpPrefetch.DEF_POLL_DELAY
+        request = self.__prefetch.make_request(delay_milli=math.ceil(timeout*1000))
+        await self.__connector.write(request)
+        return request
+
     async def __rfc(self, request: BusOperation, wait_response: bool = True) -> Optional[BusOperation]:
         await self.__connector.write(request)
         if wait_response:
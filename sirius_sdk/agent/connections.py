@@ -11,7 +11,7 @@ from sirius_sdk.abstract.api import APICrypto
 from sirius_sdk.base import WebSocketConnector
 from sirius_sdk.encryption import P2PConnection
 from sirius_sdk.rpc import AddressedTunnel, build_request, Future
-from sirius_sdk.messaging import Message, Type as MessageType
+from sirius_sdk.messaging import Message, LazyMessage, Type as MessageType, scan_envelope
 from sirius_sdk.errors.exceptions import *
 from sirius_sdk.messaging.transport import http_send
 
@@ -429,7 +429,13 @@ class AgentEvents(BaseAgentConnection):
     def balancing_group(self) -> str:
         return self.__balancing_group
 
-    async def pull(self, timeout: int = None) -> Message:
+    async def pull(self, timeout: int = None, lazy: bool = False) -> Message:
+        """Read event
+
+        :param timeout: (optional) timeout in seconds
+        :param lazy: (optional) return LazyMessage: event body is decoded on first access,
+                     so events may be filtered by @type or ~thread cheaply
+        """
         if not self._connector.is_open:
             raise SiriusConnectionClosed('Open agent connection at first')
         data = None
@@ -441,6 +447,16 @@ class AgentEvents(BaseAgentConnection):
                 await self._reopen()
         if data is None:
             SiriusConnectionClosed('agent unreachable')
+        if lazy:
+            try:
+                text = data.decode(self._connector.ENC)
+                envelope = scan_envelope(text, LazyMessage.ENVELOPE + ('protected',))
+            except (SiriusInvalidMessage, UnicodeDecodeError):
+                raise SiriusInvalidPayloadStructure()
+            if 'protected' in envelope:
+                return LazyMessage(self._p2p.decrypt(data))
+            else:
+                return LazyMessage(text, envelope)
         try:
             payload = json.loads(data.decode(self._connector.ENC))
         except json.JSONDecodeError:
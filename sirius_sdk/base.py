@@ -5,8 +5,6 @@ from typing import Any, Union, List, Optional
 from urllib.parse import urljoin
 from inspect import iscoroutinefunction
 
-import aiohttp
-
 from sirius_sdk.messaging import Message
 from sirius_sdk.errors.exceptions import *
 
@@ -90,6 +88,8 @@ class WebSocketConnector(BaseConnector):
         }
         if extra:
             headers['extra'] = json.dumps(extra)
+        # aiohttp is imported on demand: modules that share base classes should not pay for its import
+        import aiohttp
         self.__session = aiohttp.ClientSession(
             loop=loop,
             timeout=aiohttp.ClientTimeout(total=timeout),
@@ -128,6 +128,7 @@ class WebSocketConnector(BaseConnector):
             msg = await self._ws.receive(timeout=_timeout)
         except asyncio.TimeoutError as e:
             raise SiriusTimeoutIO() from e
+        import aiohttp
         if msg.type in [aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED]:
             raise SiriusConnectionClosed()
         elif msg.type == aiohttp.WSMsgType.TEXT:
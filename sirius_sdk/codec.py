@@ -0,0 +1,174 @@
+"""JSON codec shared by messaging, encryption and transport layers
+
+Codec is process-wide, stdlib json is used by default. Faster backends are selected at runtime:
+
+    sirius_sdk.codec.set_codec('orjson')  # or 'ujson', 'json', 'auto'
+
+or with environment variable SIRIUS_SDK_JSON_CODEC before sirius_sdk is imported.
+All backends produce compact UTF-8 JSON that any other backend decodes, while exact text may differ
+(spaces, escaping of non-ASCII chars), so don't compare or sign serialized text.
+
+Call functions via module attribute (codec.dumps(...)), so selected codec is applied.
+"""
+import os
+import json
+import logging
+from typing import Any, Union, Optional
+
+
+class JSONCodec:
+    """Standard library json"""
+
+    name = 'json'
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj)
+
+    def dumpb(self, obj: Any) -> bytes:
+        """Serialize to UTF-8 bytes"""
+        return json.dumps(obj).encode('utf-8')
+
+    def loads(self, data: Union[str, bytes, bytearray]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """orjson backend, dumpb() does not copy data to intermediate str
+
+    Subclasses of dict, str etc. (Message for example) are serialized as regular dict and str.
+    Payloads orjson rejects (integers over 64 bit etc.) are decoded by stdlib json.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self.__orjson = orjson
+        self.__options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_SUBCLASS
+
+    def dumps(self, obj: Any) -> str:
+        return self.dumpb(obj).decode('utf-8')
+
+    def dumpb(self, obj: Any) -> bytes:
+        try:
+            return self.__orjson.dumps(obj, default=_default, option=self.__options)
+        except TypeError:
+            # Integers over 64 bit etc.
+            return json.dumps(obj).encode('utf-8')
+
+    def loads(self, data: Union[str, bytes, bytearray]) -> Any:
+        try:
+            return self.__orjson.loads(data)
+        except self.__orjson.JSONDecodeError:
+            # Raises json.JSONDecodeError for malformed data
+            return json.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    """ujson backend
+
+    ujson serializes dict subclasses from their storage: LazyMessage must be materialized
+    before it is nested into other objects.
+    """
+
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self.__ujson = ujson
+
+    def dumps(self, obj: Any) -> str:
+        try:
+            return self.__ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+        except (TypeError, OverflowError):
+            return json.dumps(obj)
+
+    def dumpb(self, obj: Any) -> bytes:
+        return self.dumps(obj).encode('utf-8')
+
+    def loads(self, data: Union[str, bytes, bytearray]) -> Any:
+        try:
+            return self.__ujson.loads(data)
+        except ValueError:
+            # Raises json.JSONDecodeError for malformed data
+            return json.loads(data)
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        # items() is overridden by LazyMessage
+        return dict(obj.items())
+    if isinstance(obj, str):
+        return str.__str__(obj)
+    if isinstance(obj, int):
+        return int.__int__(obj)
+    if isinstance(obj, float):
+        return float.__float__(obj)
+    if isinstance(obj, (list, tuple)):
+        return list(obj)
+    raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
+
+
+BACKENDS = {
+    'json': JSONCodec,
+    'orjson': OrjsonCodec,
+    'ujson': UjsonCodec,
+}
+ENV_VAR = 'SIRIUS_SDK_JSON_CODEC'
+
+__codec: JSONCodec = JSONCodec()
+
+
+def set_codec(codec: Union[str, JSONCodec]) -> JSONCodec:
+    """Select codec
+
+    :param codec: backend name, 'auto' - fastest installed one, or JSONCodec instance
+    :return: selected codec
+    """
+    global __codec
+    if isinstance(codec, JSONCodec):
+        __codec = codec
+        return codec
+    if codec == 'auto':
+        for name in ('orjson', 'ujson'):
+            try:
+                __codec = BACKENDS[name]()
+                return __codec
+            except ImportError:
+                continue
+        __codec = JSONCodec()
+        return __codec
+    cls = BACKENDS.get(codec)
+    if cls is None:
+        raise ValueError(f'Unknown JSON codec "{codec}", expected one of: {", ".join(BACKENDS)}, auto')
+    __codec = cls()
+    return __codec
+
+
+def get_codec() -> JSONCodec:
+    return __codec
+
+
+def dumps(obj: Any) -> str:
+    return __codec.dumps(obj)
+
+
+def dumpb(obj: Any) -> bytes:
+    """Serialize to UTF-8 bytes"""
+    return __codec.dumpb(obj)
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    return __codec.loads(data)
+
+
+def __select_from_env(value: Optional[str]):
+    if not value:
+        return
+    try:
+        set_codec(value)
+    except (ImportError, ValueError) as e:
+        logging.warning(f'{ENV_VAR}: JSON codec "{value}" is not available, stdlib json is used: {e}')
+
+
+__select_from_env(os.environ.get(ENV_VAR))
@@ -1,9 +1,9 @@
-import json
 from typing import Sequence
 from collections import OrderedDict
 
 import nacl.bindings
 
+from sirius_sdk import codec
 from sirius_sdk.errors.exceptions import SiriusCryptoError
 from sirius_sdk.encryption.custom import *
 
@@ -91,7 +91,7 @@ def prepare_pack_recipient_keys(
             ("recipients", recips),
         ]
     )
-    return json.dumps(data), cek
+    return codec.dumps(data), cek
 
 
 def locate_pack_recipient_key(
@@ -161,7 +161,7 @@ def locate_pack_recipient_key(
 
 
 def encrypt_plaintext(
-        message: str, add_data: bytes, key: bytes
+        message: Union[str, bytes], add_data: bytes, key: bytes
 ) -> (bytes, bytes, bytes):
     """
     Encrypt the payload of a packed message.
@@ -174,11 +174,11 @@ def encrypt_plaintext(
     nonce = nacl.utils.random(
         nacl.bindings.crypto_aead_chacha20poly1305_ietf_NPUBBYTES
     )
-    message_bin = message.encode()
+    message_bin = message.encode() if isinstance(message, str) else message
     output = nacl.bindings.crypto_aead_chacha20poly1305_ietf_encrypt(
         message_bin, add_data, nonce, key
     )
-    mlen = len(message)
+    mlen = len(message_bin)
     ciphertext = output[:mlen]
     tag = output[mlen:]
     return ciphertext, nonce, tag
@@ -203,7 +203,7 @@ def decrypt_plaintext(
 
 
 def pack_message(
-        message: str,
+        message: Union[str, bytes],
         to_verkeys: Sequence[Union[bytes, str]],
         from_verkey: Union[bytes, str] = None,
         from_sigkey: Union[bytes, str] = None
@@ -212,7 +212,7 @@ def pack_message(
     Assemble a packed message for a set of recipients, optionally including
     the sender.
 
-    :param message: The message to pack
+    :param message: The message to pack, JSON string or UTF-8 bytes
     :param to_verkeys: (Sequence of bytes or base58 string) The verkeys to pack the message for
     :param from_verkey: (bytes or base58 string) The sender verkey
     :param from_sigkey: (bytes or base58 string) The sender sigkey
@@ -236,15 +236,13 @@ def pack_message(
         cek
     )
 
-    data = OrderedDict(
-        [
-            ("protected", recips_b64),
-            ("iv", bytes_to_b64(nonce, urlsafe=True)),
-            ("ciphertext", bytes_to_b64(ciphertext, urlsafe=True)),
-            ("tag", bytes_to_b64(tag, urlsafe=True)),
-        ]
-    )
-    return json.dumps(data).encode("ascii")
+    data = {
+        "protected": recips_b64,
+        "iv": bytes_to_b64(nonce, urlsafe=True),
+        "ciphertext": bytes_to_b64(ciphertext, urlsafe=True),
+        "tag": bytes_to_b64(tag, urlsafe=True),
+    }
+    return codec.dumpb(data)
 
 
 def unpack_message(
@@ -267,6 +265,18 @@ def unpack_message(
         ValueError: If the pack algorithm is unsupported
         ValueError: If the sender's public key was not provided
 
+    """
+    message, sender_vk, recip_vk = unpack_message_bytes(enc_message, my_verkey, my_sigkey)
+    return message.decode(), sender_vk, recip_vk
+
+
+def unpack_message_bytes(
+        enc_message: Union[bytes, dict], my_verkey: Union[bytes, str], my_sigkey: Union[bytes, str]
+) -> (bytes, Optional[str], str):
+    """
+    Decode a packed message, see unpack_message
+
+    :return A tuple of (message UTF-8 bytes, sender_vk, recip_vk)
     """
     my_verkey = ensure_is_bytes(my_verkey)
     my_sigkey = ensure_is_bytes(my_sigkey)
@@ -278,16 +288,16 @@ def unpack_message(
         )
     if isinstance(enc_message, bytes):
         try:
-            enc_message = json.loads(enc_message)
+            enc_message = codec.loads(enc_message)
         except Exception as err:
             raise ValueError("Invalid packed message") from err
 
     protected_bin = enc_message["protected"].encode("ascii")
     recips_json = b64_to_bytes(
         enc_message["protected"], urlsafe=True
-    ).decode("ascii")
+    )
     try:
-        recips_outer = json.loads(recips_json)
+        recips_outer = codec.loads(recips_json)
     except Exception as err:
         raise ValueError("Invalid packed message recipients") from err
 
@@ -308,7 +318,9 @@ def unpack_message(
     tag = b64_to_bytes(enc_message["tag"], urlsafe=True)
 
     payload_bin = ciphertext + tag
-    message = decrypt_plaintext(payload_bin, protected_bin, nonce, cek)
+    message = nacl.bindings.crypto_aead_chacha20poly1305_ietf_decrypt(
+        payload_bin, protected_bin, nonce, cek
+    )
 
     return message, sender_vk, recip_vk
 
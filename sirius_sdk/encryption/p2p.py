@@ -1,8 +1,8 @@
-import json
 from typing import Tuple, Union
 
+from sirius_sdk import codec
 from sirius_sdk.errors.exceptions import SiriusCryptoError
-from sirius_sdk.encryption import pack_message, unpack_message
+from sirius_sdk.encryption.ed25519 import pack_message, unpack_message_bytes
 
 
 class P2PConnection:
@@ -34,7 +34,7 @@ class P2PConnection:
         :return: encrypted message
         """
         packed = pack_message(
-            message=json.dumps(message),
+            message=codec.dumpb(message),
             to_verkeys=[self.__their_verkey],
             from_verkey=self.__my_keys[0],
             from_sigkey=self.__my_keys[1]
@@ -48,8 +48,20 @@ class P2PConnection:
         :param enc_message: encoded message
         :return: decrypted message
         """
+        return codec.loads(self.__decrypt(enc_message))
+
+    def decrypt(self, enc_message: Union[bytes, dict]) -> str:
+        """
+        Decrypt message without decoding of JSON
+
+        :param enc_message: encoded message
+        :return: decrypted message text
+        """
+        return self.__decrypt(enc_message).decode()
+
+    def __decrypt(self, enc_message: Union[bytes, dict]) -> bytes:
         try:
-            message, sender_vk, recip_vk = unpack_message(
+            message, sender_vk, recip_vk = unpack_message_bytes(
                 enc_message=enc_message,
                 my_verkey=self.__my_keys[0],
                 my_sigkey=self.__my_keys[1]
@@ -59,4 +71,4 @@ class P2PConnection:
         except KeyError as e:
             raise SiriusCryptoError(str(e))
         else:
-            return json.loads(message)
+            return message
@@ -1,27 +1,106 @@
 import asyncio
+import logging
 import queue
 import threading
-from typing import Optional, Coroutine
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Coroutine, Dict
+
+
+@dataclass
+class TaskStats:
+    task_hash: Optional[str]
+    # Count of schedule() calls for the task_hash not compensated with unschedule()
+    counter: int = 1
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    cancelled: bool = False
+    exception: Optional[BaseException] = None
+
+    @property
+    def runtime(self) -> Optional[float]:
+        """Seconds task is running (or was running if finished)"""
+        if self.started is None:
+            return None
+        return (self.finished or time.monotonic()) - self.started
 
 
 class BackgroundScheduler:
+    """Runs coroutines on the event loop of singleton background thread
+
+    Tasks scheduled with the same task_hash are deduplicated: the first one is running and
+    others are counted, the task is cancelled when unschedule() is called the same number of times.
+    Tasks are indexed by hash, so schedule/unschedule cost does not depend on count of live tasks.
+    """
+
+    MAX_FINISHED_STATS = 1000
+    DEF_DRAIN_TIMEOUT = 5  # seconds
 
     __thread_singleton: Optional[threading.Thread] = None
     __thread_queue: Optional[queue.Queue] = None
     __thread_event_loop: Optional[asyncio.AbstractEventLoop] = None
     __lock_singleton = threading.Lock()
+    # Registry is accessed from background loop thread only
+    __tasks: Dict[str, asyncio.Task] = {}
+    __stats: Dict[asyncio.Task, TaskStats] = {}
+    __finished_stats: 'OrderedDict[str, TaskStats]' = OrderedDict()
+    __max_concurrency: Optional[int] = None
+    __semaphore: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def configure(cls, max_concurrency: Optional[int] = None):
+        """
+        :param max_concurrency: (optional) max count of concurrently running tasks, not limited if None,
+          tasks above the limit wait for free slot. Takes effect for tasks scheduled after the call
+        """
+        cls.__max_concurrency = max_concurrency
+        cls.__semaphore = None
 
     @classmethod
     def schedule(cls, coro: Coroutine, task_hash: str = None):
         event_loop = cls.__get_event_loop()
-        coro_broker = cls.__schedule_coroutine(coro, task_hash)
-        asyncio.run_coroutine_threadsafe(coro_broker, loop=event_loop)
+        event_loop.call_soon_threadsafe(cls.__schedule_task, coro, task_hash)
 
     @classmethod
     def unschedule(cls, task_hash: str):
         event_loop = cls.__get_event_loop()
-        coro_broker = cls.__unschedule_coroutine(task_hash)
-        asyncio.run_coroutine_threadsafe(coro_broker, loop=event_loop)
+        event_loop.call_soon_threadsafe(cls.__unschedule_task, task_hash)
+
+    @classmethod
+    def stats(cls, task_hash: str) -> Optional[TaskStats]:
+        """Stats of the running task with task_hash or of the recently finished one"""
+        tsk = cls.__tasks.get(task_hash)
+        if tsk is not None:
+            stat = cls.__stats.get(tsk)
+            if stat is not None:
+                return stat
+        return cls.__finished_stats.get(task_hash)
+
+    @classmethod
+    def active_count(cls) -> int:
+        return len(cls.__stats)
+
+    @classmethod
+    def shutdown(cls, timeout: float = DEF_DRAIN_TIMEOUT):
+        """Wait for scheduled tasks to finish, cancel tasks still running after timeout and stop background thread
+
+        :param timeout: (optional) seconds to wait for tasks, cancel immediately if 0
+        """
+        with cls.__lock_singleton:
+            thread, event_loop = cls.__thread_singleton, cls.__thread_event_loop
+            if thread is None or event_loop is None:
+                return
+            if threading.current_thread() is thread:
+                raise RuntimeError('BackgroundScheduler can not be shut down from background thread')
+            if thread.is_alive():
+                asyncio.run_coroutine_threadsafe(cls.__drain(timeout), loop=event_loop).result()
+                event_loop.call_soon_threadsafe(event_loop.stop)
+                thread.join()
+            event_loop.close()
+            cls.__thread_singleton = None
+            cls.__thread_event_loop = None
+            cls.__semaphore = None
 
     @classmethod
     def __thread_routine(cls):
@@ -47,26 +126,75 @@ class BackgroundScheduler:
             cls.__lock_singleton.release()
 
     @classmethod
-    async def __schedule_coroutine(cls, coro: Coroutine, task_hash: str = None):
-        if task_hash is None:
-            tasks = []
-        else:
-            tasks_with_hash = [task for task in asyncio.all_tasks(cls.__thread_event_loop) if not task.done() and hasattr(task, 'hash')]
-            tasks = [task for task in tasks_with_hash if task.hash == task_hash]
-        if tasks:
-            tsk = tasks[0]
-            tsk.counter += 1
-        else:
-            tsk = asyncio.create_task(coro)
-            tsk.hash = task_hash
-            tsk.counter = 1
+    def __schedule_task(cls, coro: Coroutine, task_hash: str = None):
+        tsk = None if task_hash is None else cls.__tasks.get(task_hash)
+        if tsk is not None:
+            cls.__stats[tsk].counter += 1
+            # Task with the same hash is running already
+            coro.close()
+            return
+        stat = TaskStats(task_hash=task_hash)
+        tsk = cls.__thread_event_loop.create_task(cls.__run(coro, stat))
+        # Stats keep references to running tasks
+        cls.__stats[tsk] = stat
+        if task_hash is not None:
+            cls.__tasks[task_hash] = tsk
+        tsk.add_done_callback(cls.__on_task_done)
 
     @classmethod
-    async def __unschedule_coroutine(cls, task_hash: str):
-        tasks_with_hash = [task for task in asyncio.all_tasks(cls.__thread_event_loop) if not task.done() and hasattr(task, 'hash')]
-        tasks = [task for task in tasks_with_hash if task.hash == task_hash]
-        if tasks:
-            tsk = tasks[0]
-            tsk.counter -= 1
-            if tsk.counter < 1:
+    def __unschedule_task(cls, task_hash: str):
+        tsk = cls.__tasks.get(task_hash)
+        if tsk is not None:
+            stat = cls.__stats[tsk]
+            stat.counter -= 1
+            if stat.counter < 1:
                 tsk.cancel()
+
+    @classmethod
+    async def __run(cls, coro: Coroutine, stat: TaskStats):
+        try:
+            if cls.__max_concurrency is None:
+                stat.started = time.monotonic()
+                return await coro
+            if cls.__semaphore is None:
+                cls.__semaphore = asyncio.Semaphore(cls.__max_concurrency)
+            async with cls.__semaphore:
+                stat.started = time.monotonic()
+                return await coro
+        finally:
+            # Task may be cancelled before coroutine started
+            coro.close()
+
+    @classmethod
+    def __on_task_done(cls, tsk: asyncio.Task):
+        stat = cls.__stats.pop(tsk, None)
+        if stat is None:
+            return
+        stat.finished = time.monotonic()
+        if tsk.cancelled():
+            stat.cancelled = True
+        else:
+            stat.exception = tsk.exception()
+            if stat.exception is not None:
+                logging.warning(f'Background task {stat.task_hash} raised: {repr(stat.exception)}')
+        if stat.task_hash is not None:
+            if cls.__tasks.get(stat.task_hash) is tsk:
+                del cls.__tasks[stat.task_hash]
+            cls.__finished_stats[stat.task_hash] = stat
+            cls.__finished_stats.move_to_end(stat.task_hash)
+            while len(cls.__finished_stats) > cls.MAX_FINISHED_STATS:
+                cls.__finished_stats.popitem(last=False)
+
+    @classmethod
+    async def __drain(cls, timeout: float):
+        tasks = list(cls.__stats.keys())
+        if not tasks:
+            return
+        if timeout:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+        else:
+            pending = tasks
+        for tsk in pending:
+            tsk.cancel()
+        if pending:
+            await asyncio.wait(pending)
@@ -1,5 +1,6 @@
+import weakref
 from dataclasses import dataclass
-from typing import Union, Dict, Any, Optional
+from typing import Union, Dict, Any, Optional, Callable, List
 
 from sirius_sdk.encryption.p2p import P2PConnection
 from sirius_sdk.errors.exceptions import SiriusInitializationError
@@ -33,6 +34,13 @@ class Config:
         router: APIRouter = None
         networks: APINetworks = None
 
+        def __setattr__(self, name: str, value: Any):
+            object.__setattr__(self, name, value)
+            # Overrides may be replaced in place: config.overrides.crypto = ...
+            on_changed = self.__dict__.get('_on_changed')
+            if on_changed is not None:
+                on_changed()
+
     @dataclass
     class CloudOpts:
         server_uri: str = None
@@ -55,10 +63,24 @@ class Config:
             return self.uri is not None and self.my_verkey is not None and self.mediator_verkey is not None
 
     def __init__(self):
+        self.__version = 0
+        self.__listeners: List[weakref.WeakMethod] = []
         self.__overrides = self.Overrides()
+        object.__setattr__(self.__overrides, '_on_changed', self.__changed)
         self.__cloud_opts = self.CloudOpts()
         self.__mediator_opts = self.MediatorOpts()
 
+    @property
+    def version(self) -> int:
+        """Incremented on every configuration change, allow consumers to invalidate caches"""
+        return self.__version
+
+    def add_listener(self, callback: Callable[[], None]):
+        """Call bound method callback on every configuration change, config keeps weak reference to its owner"""
+        # Hub is copied per task, so owners of dead references are dropped here too, not only on change
+        self.__listeners = [ref for ref in self.__listeners if ref() is not None]
+        self.__listeners.append(weakref.WeakMethod(callback))
+
     @property
     def overrides(self) -> Overrides:
         return self.__overrides
@@ -120,10 +142,12 @@ class Config:
             raise SiriusInitializationError('Unexpected p2p type')
         if io_timeout:
             self.__cloud_opts.io_timeout = io_timeout
+        self.__changed()
         return self
 
     def setup_mediator(self, uri: str, my_verkey: str, mediator_verkey: str) -> "Config":
         self.__mediator_opts = self.MediatorOpts(uri=uri, my_verkey=my_verkey, mediator_verkey=mediator_verkey)
+        self.__changed()
         return self
 
     def override(
@@ -147,7 +171,7 @@ class Config:
         if non_secrets:
             self.__overrides.non_secrets = non_secrets
         if anon_cred:
-            self.__overrides.anon_cred = anon_cred
+            self.__overrides.anoncreds = anon_cred
         if coprotocols:
             self.__overrides.coprotocols = coprotocols
         if transport:
@@ -187,7 +211,7 @@ class Config:
         return self
 
     def override_anon_cred(self, dependency: AbstractAnonCreds) -> "Config":
-        self.__overrides.anon_cred = dependency
+        self.__overrides.anoncreds = dependency
         return self
 
     def override_coprotocols(self, dependency: APICoProtocols) -> "Config":
@@ -213,3 +237,13 @@ class Config:
     def override_networks(self, dependency: APINetworks) -> "Config":
         self.__overrides.networks = dependency
         return self
+
+    def __changed(self):
+        self.__version += 1
+        alive = []
+        for ref in self.__listeners:
+            callback = ref()
+            if callback is not None:
+                callback()
+                alive.append(ref)
+        self.__listeners = alive
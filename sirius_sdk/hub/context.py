@@ -1,94 +1,64 @@
 import asyncio
-import logging
-import sys
-from collections import ChainMap
-from copy import deepcopy
+import contextvars
 from functools import partial
+from typing import Any, Optional
 
-PY37 = sys.version_info >= (3, 7)
 
-if PY37:
-    def asyncio_current_task(loop=None):
-        """Return the current task or None."""
-        try:
-            return asyncio.current_task(loop)
-        except RuntimeError:
-            # simulate old behaviour
-            return None
-else:
-    asyncio_current_task = asyncio.Task.current_task
-
-
-NO_LOOP_EXCEPTION_MSG = "No event loop found, key {} couldn't be set"
-
-
-def dict_context_factory(parent_context=None, copy_context=False):
-    """A traditional ``dict`` context to keep things simple"""
-    if parent_context is None:
-        # initial context
-        return {}
-    else:
-        # inherit context
-        new_context = parent_context
-        if copy_context:
-            new_context = deepcopy(new_context)
-        return new_context
-
-
-def ensure_context_exists(task):
-    try:
-        context = task.context
-    except AttributeError:
-        context = None
-
-    task.context = dict_context_factory(context)
+# Context is immutable dict: every change makes a copy, so tasks spawned with asyncio.create_task/gather
+# (and code called via run_in_executor of this module) inherit snapshot of the parent context and changes
+# made by child are not visible to the parent
+__CONTEXT: contextvars.ContextVar = contextvars.ContextVar('sirius_sdk.context', default={})
 
 
 def get(key, default=None):
     """
-    Retrieves the value stored in key from the Task.context dict. If key does not exist,
-    or there is no event loop running, default will be returned
+    Retrieves the value stored in key from the current context. If key does not exist
+    default will be returned
 
     :param key: identifier for accessing the context dict.
     :param default: None by default, returned in case key is not found.
     :return: Value stored inside the dict[key].
     """
-    current_task = asyncio_current_task()
-    if not current_task:
-        raise ValueError(NO_LOOP_EXCEPTION_MSG.format(key))
-
-    ensure_context_exists(current_task)
+    return __CONTEXT.get().get(key, default)
 
-    return current_task.context.get(key, default)
 
-
-def set(key, value):
+def set(key, value) -> contextvars.Token:
     """
-    Sets the given value inside Task.context[key]. If the key does not exist it creates it.
+    Sets the given value inside context[key]. If the key does not exist it creates it.
 
     :param key: identifier for accessing the context dict.
     :param value: value to store inside context[key].
-    :raises
+    :return: token to restore previous context with reset()
     """
-    current_task = asyncio_current_task()
-    if not current_task:
-        raise ValueError(NO_LOOP_EXCEPTION_MSG.format(key))
+    context = dict(__CONTEXT.get())
+    context[key] = value
+    return __CONTEXT.set(context)
+
 
-    ensure_context_exists(current_task)
+def reset(token: contextvars.Token):
+    """
+    Restore context that was actual before set() call that returned token.
 
-    current_task.context[key] = value
+    :param token: value returned by set()
+    """
+    __CONTEXT.reset(token)
 
 
 def clear():
     """
-    Clear the Task.context.
-
-    :raises ValueError: if no current task.
+    Clear the current context.
     """
-    current_task = asyncio_current_task()
-    if not current_task:
-        raise ValueError("No event loop found")
+    __CONTEXT.set({})
+
 
-    ensure_context_exists(current_task)
+async def run_in_executor(func, *args, executor: Optional[Any] = None):
+    """Run func in executor with the current context, so SDK calls made by func in
+    executor thread are served by the same Hub
 
-    current_task.context.clear()
+    :param func: callable
+    :param args: func args
+    :param executor: (optional) concurrent.futures.Executor, loop default executor if None
+    """
+    loop = asyncio.get_event_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(executor, partial(ctx.run, func, *args))
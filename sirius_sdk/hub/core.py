@@ -3,8 +3,7 @@ import hashlib
 import json
 import logging
 import warnings
-import threading
-from typing import Optional
+from typing import Optional, Dict, Any
 from contextlib import asynccontextmanager
 
 from sirius_sdk.errors.exceptions import SiriusInitializationError
@@ -18,18 +17,21 @@ from sirius_sdk.agent.wallet.abstract.non_secrets import AbstractNonSecrets
 from sirius_sdk.abstract.storage import AbstractKeyValueStorage
 from sirius_sdk.agent.microledgers.abstract import AbstractMicroledgerList
 from sirius_sdk.agent.agent import Agent, SpawnStrategy
+from sirius_sdk.messaging.spool import OutboundSpool
 
 from .defaults.default_apis import APIDefault
 from .defaults.default_crypto import DefaultCryptoService as DefaultCryptoService
 from .defaults.default_storage import InMemoryKeyValueStorage
+from .defaults.sqlite_storage import SQLiteKeyValueStorage
 from .defaults.default_non_secrets import DefaultNonSecretsStorage
-from .context import get as context_get, set as context_set, clear as context_clear
+from .context import get as context_get, set as context_set, reset as context_reset
 from .config import Config
 from .mediator import Mediator
 from .backgrounds import BackgroundScheduler
 
 __ROOT_HUB = None
-__THREAD_LOCAL_HUB = threading.local()
+# Marker of service missing in resolved-services table (resolved service may be None)
+_UNRESOLVED = object()
 
 
 class Hub:
@@ -60,10 +62,13 @@ class Hub:
         else:
             logging.warning('You should configure cloud-agent or mediator options')
         # Crypto and default services
-        self.__crypto: Optional[APICrypto] = config.overrides.crypto
         self.__default_api: APIDefault = APIDefault()
         self.__default_crypto: APICrypto = DefaultCryptoService(storage=self.__storage)
         self.__default_non_secrets = DefaultNonSecretsStorage(storage=self.__storage)
+        # Resolved services, table is dropped on config change and when hub (re)opens connection
+        self.__services: Dict[str, Any] = {}
+        self.__global_id: Any = _UNRESOLVED
+        config.add_listener(self.__on_config_changed)
 
     def __del__(self):
         if self.__loop and self.__loop.is_running():
@@ -74,17 +79,9 @@ class Hub:
 
     @property
     def global_id(self) -> Optional[str]:
-        if self.__config.cloud_opts.is_filled:
-            if isinstance(self.__config.cloud_opts.credentials, str):
-                cred = self.__config.cloud_opts.credentials.encode()
-            else:
-                cred = self.__config.cloud_opts.credentials
-            return hashlib.md5(cred).hexdigest()
-        elif self.__config.mediator_opts.is_filled:
-            cred = f'{self.__config.mediator_opts.my_verkey}:{self.__config.mediator_opts.mediator_verkey}'
-            return hashlib.md5(cred).hexdigest()
-        else:
-            return None
+        if self.__global_id is _UNRESOLVED:
+            self.__global_id = self.__calc_global_id()
+        return self.__global_id
 
     def copy(self):
         inst = Hub(config=self.__config)
@@ -97,6 +94,7 @@ class Hub:
             if self.__loop == asyncio.get_event_loop():
                 old_agent = self.__agent
                 self.__create_agent_instance(external_crypto=self.__config.overrides.crypto)
+                self.__services.clear()
                 if old_agent.is_open:
                     await old_agent.close()
             else:
@@ -111,35 +109,61 @@ class Hub:
     async def get_agent_connection_lazy(self):
         if self.__allocate_agent:
             if not self.__agent.is_open:
+                self.__services.clear()
                 await self.__agent.open()
             yield self.__agent
         elif self.__allocate_mediator:
             if not self.__mediator.is_connected:
+                self.__services.clear()
                 await self.__mediator.connect()
             yield self.__mediator
         else:
             yield None
 
     async def open(self):
+        spool = self.__spool()
+        if spool is not None:
+            # Resume delivery of messages restored from spool file
+            await spool.start()
         if not (self.__allocate_agent or self.__allocate_mediator):
             return
         async with self.get_agent_connection_lazy():
             pass
 
     async def close(self):
+        self.__services.clear()
         if self.__allocate_agent and self.__agent and self.__agent.is_open:
             await self.__agent.close()
         if self.__allocate_mediator and self.__mediator and self.__mediator.is_connected:
             await self.__mediator.disconnect()
+        if isinstance(self.__storage, SQLiteKeyValueStorage):
+            # Database is reopened on next use if storage is shared with other hubs
+            self.__storage.close()
+        spool = self.__spool()
+        if spool is not None:
+            # Spool is reopened on next use as well, not delivered messages are kept in spool file
+            await spool.close()
 
     async def get_crypto(self) -> APICrypto:
+        try:
+            return self.__services['crypto']
+        except KeyError:
+            return self.__store('crypto', await self.__resolve_crypto())
+
+    async def __resolve_crypto(self) -> APICrypto:
         if self.__allocate_agent:
             async with self.get_agent_connection_lazy() as agent:
-                return self.__crypto or agent.wallet.crypto or self.__default_crypto
+                return self.__config.overrides.crypto or agent.wallet.crypto or self.__default_crypto
         else:
-            return self.__crypto or self.__default_crypto
+            return self.__config.overrides.crypto or self.__default_crypto
 
     async def get_microledgers(self) -> Optional[AbstractMicroledgerList]:
+        try:
+            return self.__services['microledgers']
+        except KeyError:
+            return self.__store('microledgers', await self.__resolve_microledgers())
+
+    async def __resolve_microledgers(self) -> Optional[AbstractMicroledgerList]:
         if self.__allocate_agent:
             async with self.get_agent_connection_lazy() as agent:
                 return self.__config.overrides.microledgers or agent.microledgers
@@ -147,6 +171,12 @@ class Hub:
             return self.__config.overrides.microledgers
 
     async def get_pairwise_list(self) -> Optional[AbstractPairwiseList]:
+        try:
+            return self.__services['pairwise_list']
+        except KeyError:
+            return self.__store('pairwise_list', await self.__resolve_pairwise_list())
+
+    async def __resolve_pairwise_list(self) -> Optional[AbstractPairwiseList]:
         if self.__allocate_agent:
             async with self.get_agent_connection_lazy() as agent:
                 return self.__config.overrides.pairwise_storage or agent.pairwise_list
@@ -154,6 +184,12 @@ class Hub:
             return self.__config.overrides.pairwise_storage
 
     async def get_did(self) -> Optional[AbstractDID]:
+        try:
+            return self.__services['did']
+        except KeyError:
+            return self.__store('did', await self.__resolve_did())
+
+    async def __resolve_did(self) -> Optional[AbstractDID]:
         if self.__allocate_agent:
             async with self.get_agent_connection_lazy() as agent:
                 return self.__config.overrides.did or agent.wallet.did
@@ -161,6 +197,12 @@ class Hub:
             return self.__config.overrides.did
 
     async def get_anoncreds(self) -> Optional[AbstractAnonCreds]:
+        try:
+            return self.__services['anoncreds']
+        except KeyError:
+            return self.__store('anoncreds', await self.__resolve_anoncreds())
+
+    async def __resolve_anoncreds(self) -> Optional[AbstractAnonCreds]:
         if self.__allocate_agent:
             async with self.get_agent_connection_lazy() as agent:
                 return self.__config.overrides.anoncreds or agent.wallet.anoncreds
@@ -168,6 +210,12 @@ class Hub:
             return self.__config.overrides.anoncreds
 
     async def get_cache(self) -> Optional[AbstractCache]:
+        try:
+            return self.__services['cache']
+        except KeyError:
+            return self.__store('cache', await self.__resolve_cache())
+
+    async def __resolve_cache(self) -> Optional[AbstractCache]:
         if self.__allocate_agent:
             async with self.get_agent_connection_lazy() as agent:
                 return self.__config.overrides.cache or agent.wallet.cache
@@ -175,6 +223,12 @@ class Hub:
             return self.__config.overrides.cache
 
     async def get_non_secrets(self) -> Optional[AbstractNonSecrets]:
+        try:
+            return self.__services['non_secrets']
+        except KeyError:
+            return self.__store('non_secrets', await self.__resolve_non_secrets())
+
+    async def __resolve_non_secrets(self) -> Optional[AbstractNonSecrets]:
         if self.__allocate_agent:
             async with self.get_agent_connection_lazy() as agent:
                 return self.__config.overrides.non_secrets or agent.wallet.non_secrets
@@ -182,6 +236,12 @@ class Hub:
             return self.__config.overrides.non_secrets or self.__default_non_secrets
 
     async def get_coprotocols(self) -> Optional[APICoProtocols]:
+        try:
+            return self.__services['coprotocols']
+        except KeyError:
+            return self.__store('coprotocols', await self.__resolve_coprotocols())
+
+    async def __resolve_coprotocols(self) -> Optional[APICoProtocols]:
         api: Optional[APICoProtocols] = None
         if self.__allocate_agent or self.__allocate_mediator:
             async with self.get_agent_connection_lazy() as conn:
@@ -190,14 +250,26 @@ class Hub:
         return self.__config.overrides.coprotocols or api or self.__default_api
 
     async def get_transport(self) -> Optional[APITransport]:
+        try:
+            return self.__services['transport']
+        except KeyError:
+            return self.__store('transport', await self.__resolve_transport())
+
+    async def __resolve_transport(self) -> Optional[APITransport]:
         api: Optional[APITransport] = None
         if self.__allocate_agent or self.__allocate_mediator:
             async with self.get_agent_connection_lazy() as conn:
                 if isinstance(conn, APITransport):
                     api = conn
-        return self.__config.overrides.coprotocols or api or self.__default_api
+        return self.__config.overrides.transport or api or self.__default_api
 
     async def get_contents(self) -> Optional[APIContents]:
+        try:
+            return self.__services['contents']
+        except KeyError:
+            return self.__store('contents', await self.__resolve_contents())
+
+    async def __resolve_contents(self) -> Optional[APIContents]:
         api: Optional[APIContents] = None
         if self.__allocate_agent or self.__allocate_mediator:
             async with self.get_agent_connection_lazy() as conn:
@@ -206,6 +278,12 @@ class Hub:
         return self.__config.overrides.contents or api or self.__default_api
 
     async def get_distr_locks(self) -> Optional[APIDistributedLocks]:
+        try:
+            return self.__services['distr_locks']
+        except KeyError:
+            return self.__store('distr_locks', await self.__resolve_distr_locks())
+
+    async def __resolve_distr_locks(self) -> Optional[APIDistributedLocks]:
         api: Optional[APIDistributedLocks] = None
         if self.__allocate_agent or self.__allocate_mediator:
             async with self.get_agent_connection_lazy() as conn:
@@ -214,6 +292,12 @@ class Hub:
         return self.__config.overrides.distr_locks or api or self.__default_api
 
     async def get_router(self) -> Optional[APIRouter]:
+        try:
+            return self.__services['router']
+        except KeyError:
+            return self.__store('router', await self.__resolve_router())
+
+    async def __resolve_router(self) -> Optional[APIRouter]:
         api: Optional[APIRouter] = None
         if self.__allocate_agent or self.__allocate_mediator:
             async with self.get_agent_connection_lazy() as conn:
@@ -222,6 +306,12 @@ class Hub:
         return self.__config.overrides.router or api
 
     async def get_networks(self) -> Optional[APINetworks]:
+        try:
+            return self.__services['networks']
+        except KeyError:
+            return self.__store('networks', await self.__resolve_networks())
+
+    async def __resolve_networks(self) -> Optional[APINetworks]:
         api: Optional[APINetworks] = None
         if self.__allocate_agent or self.__allocate_mediator:
             async with self.get_agent_connection_lazy() as conn:
@@ -239,6 +329,38 @@ class Hub:
                     success = agent.is_connected
         return success
 
+    def lookup(self, name: str) -> Optional[Any]:
+        """Resolved service by name ('crypto', 'did', ...) without awaiting, None if it is not resolved yet
+
+        Agent RPC reconnects by itself, so resolved services stay valid until hub reopens connection
+        """
+        return self.__services.get(name)
+
+    def __store(self, name: str, service: Any) -> Any:
+        self.__services[name] = service
+        return service
+
+    def __spool(self) -> Optional[OutboundSpool]:
+        transport = self.__config.overrides.transport
+        return transport.spool if isinstance(transport, APIDefault) else None
+
+    def __on_config_changed(self):
+        self.__services.clear()
+        self.__global_id = _UNRESOLVED
+
+    def __calc_global_id(self) -> Optional[str]:
+        if self.__config.cloud_opts.is_filled:
+            if isinstance(self.__config.cloud_opts.credentials, str):
+                cred = self.__config.cloud_opts.credentials.encode()
+            else:
+                cred = self.__config.cloud_opts.credentials
+            return hashlib.md5(cred).hexdigest()
+        elif self.__config.mediator_opts.is_filled:
+            cred = f'{self.__config.mediator_opts.my_verkey}:{self.__config.mediator_opts.mediator_verkey}'
+            return hashlib.md5(cred.encode()).hexdigest()
+        else:
+            return None
+
     def __create_agent_instance(self, external_crypto: APICrypto):
         if self.__allocate_agent:
             self.__agent = Agent(
@@ -324,39 +446,24 @@ async def context(cfg: Config = None, *args, **kwargs):
         cfg = __restore_config_from_kwargs(*args, **kwargs)
 
     hub = Hub(cfg)
-    old_hub = __get_thread_local_gub()
-    __THREAD_LOCAL_HUB.instance = hub
+    # Tasks spawned inside context inherit hub, on exit outer context is restored
+    token = context_set('hub', hub)
     try:
-        old_hub_coro = context_get('hub')
-        context_set('hub', hub)
         await hub.open()
-        try:
-            yield
-        finally:
-            context_clear()
-            await hub.close()
-            context_set('hub', old_hub_coro)
+        yield
     finally:
-        __THREAD_LOCAL_HUB.instance = old_hub
+        await hub.close()
+        context_reset(token)
 
 
 def __get_root_hub() -> Optional[Hub]:
     return __ROOT_HUB
 
 
-def __get_thread_local_gub() -> Optional[Hub]:
-    # For now thread local context not used but code prepared for future purposes
-    try:
-        inst = __THREAD_LOCAL_HUB.instance
-    except AttributeError:
-        inst = None
-    return inst
-
-
 def _current_hub() -> Hub:
     inst = context_get('hub')
     if inst is None:
-        root_hub = __get_thread_local_gub() or __get_root_hub()
+        root_hub = __get_root_hub()
         if root_hub is None:
             raise SiriusInitializationError('Non initialized Sirius Agent connection')
         inst = root_hub.copy()
@@ -1,16 +1,15 @@
 import asyncio
 
 import uuid
-import json
 import os.path
 import pathlib
 
-import pyqrcode
-
 import sirius_sdk
+from sirius_sdk import codec
 from sirius_sdk.abstract.api import *
 from sirius_sdk.errors.exceptions import SiriusTransportError
 from sirius_sdk.messaging.transport import EndpointTransport
+from sirius_sdk.messaging.spool import OutboundSpool
 from sirius_sdk.messaging.forwarding import forward_wired
 
 from .inmemory_bus import InMemoryBus
@@ -20,9 +19,19 @@ class APIDefault(APIContents, APITransport, APICoProtocols):
 
     DEF_TIMEOUT = 30
 
-    def __init__(self, crypto: APICrypto = None):
+    def __init__(self, crypto: APICrypto = None, spool: OutboundSpool = None):
+        """
+        :param crypto: (optional) crypto to pack messages, hub crypto if None
+        :param spool: (optional) outbound queue: send() returns when message is queued,
+                      delivery is retried in background
+        """
         self.__transport = EndpointTransport(keepalive_timeout=self.DEF_TIMEOUT)
         self.__crypto = crypto or sirius_sdk.Crypto
+        self.__spool = spool
+
+    @property
+    def spool(self) -> Optional[OutboundSpool]:
+        return self.__spool
 
     async def send(
             self, message: Message, their_vk: Union[List[str], str],
@@ -34,13 +43,13 @@ class APIDefault(APIContents, APITransport, APICoProtocols):
             their_vk = [their_vk]
         if their_vk:
             payload = await self.__crypto.pack_message(
-                message=json.dumps(message),
+                message=codec.dumps(message),
                 recipient_verkeys=their_vk,
                 sender_verkey=my_vk
             )
             their_vk = their_vk[0] if isinstance(their_vk, list) else their_vk
         else:
-            payload = json.dumps(message).encode()
+            payload = codec.dumpb(message)
             their_vk = None
 
         if routing_keys:
@@ -53,6 +62,9 @@ class APIDefault(APIContents, APITransport, APICoProtocols):
         else:
             content_type = 'application/json'
 
+        if self.__spool is not None:
+            await self.__spool.put(payload, endpoint, content_type)
+            return
         ok, body = await self.__transport.send(
             msg=payload, endpoint=endpoint, timeout=self.DEF_TIMEOUT, content_type=content_type
         )
@@ -80,7 +92,7 @@ class APIDefault(APIContents, APITransport, APICoProtocols):
             else:
                 content_type = 'application/json'
             payload = await self.__crypto.pack_message(
-                message=json.dumps(message),
+                message=codec.dumps(message),
                 recipient_verkeys=recipient_verkeys,
                 sender_verkey=sender_verkey
             )
@@ -93,13 +105,24 @@ class APIDefault(APIContents, APITransport, APICoProtocols):
                 else:
                     payload = await forward_wired(payload, their_vk, routing_keys)
 
+            if self.__spool is not None:
+                # Message is accepted by queue
+                await self.__spool.put(payload, endpoint_address, content_type)
+                jobs.append(self.__accepted())
+                continue
             async_routine = self.__transport.send(payload, endpoint_address, self.DEF_TIMEOUT, content_type)
             jobs.append(async_routine)
         # Run simultaneously
         results = await asyncio.gather(*jobs)
         return list(results)
 
+    @staticmethod
+    async def __accepted() -> Tuple[bool, str]:
+        return True, ''
+
     async def generate_qr_code(self, value: str) -> str:
+        # pyqrcode is imported on demand to keep SDK import time low
+        import pyqrcode
         qr = pyqrcode.create(content=value)
         base_dir = os.path.abspath(os.curdir)
         path = os.path.join(base_dir, f'qr_code_{uuid.uuid4().hex}.svg')
@@ -2,6 +2,7 @@ import json
 import base64
 from typing import Any, Optional
 
+from sirius_sdk import codec
 from sirius_sdk.abstract.api import APICrypto
 from sirius_sdk.abstract.storage import AbstractKeyValueStorage
 from sirius_sdk.encryption import ed25519
@@ -83,7 +84,7 @@ class DefaultCryptoService(APICrypto):
 
     async def unpack_message(self, jwe: bytes) -> dict:
         try:
-            msg = json.loads(jwe.decode())
+            msg = codec.loads(jwe)
         except Exception as e:
             if isinstance(e, json.JSONDecodeError) or isinstance(e, UnicodeError):
                 raise SiriusCryptoError('Unexpected packed message format')
@@ -92,7 +93,7 @@ class DefaultCryptoService(APICrypto):
         if 'protected' in msg:
             try:
                 recip = base64.b64decode(msg['protected'])
-                recip_json = json.loads(recip.decode())
+                recip_json = codec.loads(recip)
                 recipients = recip_json.get('recipients', [])
                 my_vk, my_sk = None, None
                 await self.storage.select_db(self.DB_KEYS)
@@ -108,8 +109,9 @@ class DefaultCryptoService(APICrypto):
 
                 if not my_sk:
                     raise SiriusCryptoError('Unknown key in recipient list')
+                # Envelope is already decoded
                 unpacked = ed25519.unpack_message(
-                    enc_message=jwe, my_verkey=my_vk, my_sigkey=my_sk
+                    enc_message=msg, my_verkey=my_vk, my_sigkey=my_sk
                 )
                 return {
                     'message': unpacked[0],
@@ -1,5 +1,8 @@
+import bisect
 import threading
-from typing import Any, List, Optional, Dict
+import itertools
+from types import MappingProxyType
+from typing import Any, List, Optional, Dict, Tuple, Set, Sequence, Mapping
 
 from sirius_sdk.abstract.storage import AbstractImmutableCollection, AbstractKeyValueStorage
 from sirius_sdk.hub.context import get as context_get, set as context_set
@@ -13,158 +16,271 @@ def _get_current_hub_id() -> str:
         return '*'
 
 
+class _IndexedCollection:
+    """Append-only list of (value, tags) items with inverted index per (tag-name, tag-value)
+
+    Posting lists keep items positions in ascending order, positions are stable since items
+    are never removed. Readers do not take locks: they ignore positions that are beyond
+    items count observed at the start of the fetch
+    """
+
+    def __init__(self):
+        self.__items: List[Tuple[Any, dict]] = []
+        self.__index: Dict[Tuple[str, Any], List[int]] = {}
+        # Tag names with unhashable values, they are checked on items directly
+        self.__unindexed: Set[str] = set()
+        self.__lock = threading.Lock()
+
+    def add(self, value: Any, tags: dict):
+        with self.__lock:
+            pos = len(self.__items)
+            self.__items.append((value, tags))
+            for key, val in tags.items():
+                try:
+                    posting = self.__index.setdefault((key, val), [])
+                except TypeError:
+                    self.__unindexed.add(key)
+                else:
+                    posting.append(pos)
+
+    def fetch(
+            self, tags: dict, limit: int = None, cursor: int = 0, count_total: bool = True
+    ) -> (List[Any], Optional[int], Optional[int]):
+        """Fetch values which tags contain all of requested tags
+
+        :param tags: requested tags
+        :param limit: (optional) max count of values
+        :param cursor: position to continue fetch from
+        :param count_total: count all matched items, else fetch stops as soon as limit is reached
+        :return: values, total count of matched items (None if not counted), cursor of the next page
+          (None if there are no more items)
+        """
+        items = self.__items
+        candidates, need_check = self.__candidates(tags, len(items))
+        # Posting lists are sorted: skip candidates before cursor and items added after fetch started
+        start = bisect.bisect_left(candidates, cursor)
+        end = bisect.bisect_left(candidates, len(items))
+        if not need_check:
+            # Every candidate matches, total count is known from the index
+            stop = end if limit is None else min(end, start + limit)
+            values = [items[pos][0] for pos in candidates[start:stop]]
+            next_cursor = candidates[stop] if stop < end else None
+            return values, end if count_total else None, next_cursor
+        values = []
+        total = 0
+        next_cursor = None
+        for i in range(0, end):
+            pos = candidates[i]
+            if i < start and not count_total:
+                continue
+            if not tags.items() <= items[pos][1].items():
+                continue
+            total += 1
+            if i < start:
+                continue
+            if limit is not None and len(values) >= limit:
+                if next_cursor is None:
+                    next_cursor = pos
+                if not count_total:
+                    break
+                continue
+            values.append(items[pos][0])
+        return values, total if count_total else None, next_cursor
+
+    def __candidates(self, tags: dict, count: int) -> (Sequence[int], bool):
+        """Smallest posting list of requested tags and flag whether candidates need direct tags check"""
+        if not tags:
+            return range(count), False
+        postings = []
+        for key, val in tags.items():
+            if key in self.__unindexed:
+                continue
+            try:
+                posting = self.__index.get((key, val), None)
+            except TypeError:
+                continue
+            if posting is None:
+                return [], False
+            postings.append(posting)
+        if not postings:
+            return range(count), True
+        postings.sort(key=len)
+        return postings[0], len(postings) < len(tags) or len(postings) > 1
+
+
 class InMemoryImmutableCollection(AbstractImmutableCollection):
+    """Process-wide in-memory collection: values are indexed by tags on add
+
+    Besides fetch(), pagination is available with fetch_page(): collection is append-only,
+    so cursor (position of the next item) stays valid while new items are added
+    """
 
     __lock_singleton = threading.Lock()
     __selected_db_thread_safe = threading.local()
-    __database_singleton = {}
+    __database_singleton: Dict[str, _IndexedCollection] = {}
 
     async def select_db(self, db_name: str):
         mangled_db_name = f'{_get_current_hub_id()}/{db_name}'
-        self.__acquire()
-        try:
-            if mangled_db_name not in self.__database_singleton:
-                self.__database_singleton[mangled_db_name] = []
-            self.__set_current_db(mangled_db_name)
-        finally:
-            self.__release()
+        collection = self.__database_singleton.get(mangled_db_name, None)
+        if collection is None:
+            with self.__lock_singleton:
+                collection = self.__database_singleton.get(mangled_db_name, None)
+                if collection is None:
+                    collection = _IndexedCollection()
+                    self.__database_singleton[mangled_db_name] = collection
+        self.__set_current_db(collection)
 
     async def add(self, value: Any, tags: dict):
-        cur_db_name = self.__get_current_db()
-        if cur_db_name is None:
-            raise RuntimeError('Select working database at first!')
-        else:
-            self.__acquire()
-            try:
-                item = (value, tags)
-                selected_db = self.__database_singleton[cur_db_name]
-                selected_db.append(item)
-            finally:
-                self.__release()
+        self.__get_current_db().add(value, tags)
 
     async def fetch(self, tags: dict, limit: int = None) -> (List[Any], int):
-        cur_db_name = self.__get_current_db()
-        if cur_db_name is None:
-            raise RuntimeError('Select working database at first!')
-        else:
-            self.__acquire()
-            try:
-                result = []
-                selected_db = self.__database_singleton[cur_db_name]
-                for item in selected_db:
-                    value_ = item[0]
-                    tags_ = item[1]
-                    if tags.items() <= tags_.items():
-                        result.append(value_)
-                return result
-            finally:
-                self.__release()
+        values, total, _ = self.__get_current_db().fetch(tags, limit)
+        return values, total
 
-    @classmethod
-    def __acquire(cls):
-        cls.__lock_singleton.acquire(blocking=True)
+    async def fetch_page(self, tags: dict, limit: int, cursor: int = None) -> (List[Any], Optional[int]):
+        """Fetch next page of values
 
-    @classmethod
-    def __release(cls):
-        cls.__lock_singleton.release()
+        :param tags: requested tags
+        :param limit: page size
+        :param cursor: (optional) cursor returned with previous page, None for the first page
+        :return: values, cursor of the next page (None if there are no more values)
+        """
+        values, _, next_cursor = self.__get_current_db().fetch(tags, limit, cursor or 0, count_total=False)
+        return values, next_cursor
 
     @classmethod
-    def __set_current_db(cls, db_name: str):
-        cls.__selected_db_thread_safe.value = db_name
+    def __set_current_db(cls, collection: _IndexedCollection):
+        cls.__selected_db_thread_safe.value = collection
 
     @classmethod
-    def __get_current_db(cls) -> Optional[str]:
-        try:
-            db = cls.__selected_db_thread_safe.value
-        except AttributeError:
-            return None
+    def __get_current_db(cls) -> _IndexedCollection:
+        collection = getattr(cls.__selected_db_thread_safe, 'value', None)
+        if collection is None:
+            raise RuntimeError('Select working database at first!')
+        return collection
+
+
+class _KeyValueShard:
+    """Single database of InMemoryKeyValueStorage
+
+    Shard is owned by the thread that created it: while it is used by the owner thread only
+    (single event loop) operations do not take any locks. On first access from other thread
+    shard switches to shared mode and serializes operations with own lock, so different
+    databases never contend with each other.
+
+    Scans operate with read-only snapshot that is reused until shard is modified. Owner thread may still
+    write without lock while other thread switches shard to shared mode, so every write bumps version and
+    snapshot taken meanwhile is dropped
+    """
+
+    def __init__(self):
+        self.__data = {}
+        self.__snapshot: Optional[MappingProxyType] = None
+        # next() of counter is atomic, so concurrent writers never set the same version
+        self.__versions = itertools.count(1)
+        self.__version = 0
+        self.__owner = threading.get_ident()
+        self.__shared = False
+        self.__lock = threading.Lock()
+
+    @property
+    def shared(self) -> bool:
+        return self.__shared
+
+    def get(self, key: str) -> Optional[Any]:
+        # dict lookup is atomic, readers never block
+        return self.__data.get(key, None)
+
+    def set(self, key: str, value: Any):
+        if self.__is_shared():
+            with self.__lock:
+                self.__set(key, value)
         else:
-            return db
+            self.__set(key, value)
+
+    def delete(self, key: str):
+        if self.__is_shared():
+            with self.__lock:
+                self.__delete(key)
+        else:
+            self.__delete(key)
+
+    def snapshot(self) -> MappingProxyType:
+        snapshot = self.__snapshot
+        if snapshot is None:
+            if self.__is_shared():
+                with self.__lock:
+                    snapshot = self.__take_snapshot()
+            else:
+                snapshot = self.__take_snapshot()
+        return snapshot
+
+    def __set(self, key: str, value: Any):
+        self.__data[key] = value
+        self.__version = next(self.__versions)
+        self.__snapshot = None
+
+    def __delete(self, key: str):
+        if key in self.__data:
+            del self.__data[key]
+            self.__version = next(self.__versions)
+            self.__snapshot = None
+
+    def __take_snapshot(self) -> MappingProxyType:
+        snapshot = self.__snapshot
+        if snapshot is None:
+            version = self.__version
+            snapshot = MappingProxyType(self.__data.copy())
+            self.__snapshot = snapshot
+            if self.__version != version:
+                # Concurrent write: published snapshot may be stale, it is dropped but still returned
+                # as consistent state of the moment it was taken
+                self.__snapshot = None
+        return snapshot
+
+    def __is_shared(self) -> bool:
+        if not self.__shared and threading.get_ident() != self.__owner:
+            self.__shared = True
+        return self.__shared
 
 
 class InMemoryKeyValueStorage(AbstractKeyValueStorage):
+    """Process-wide in-memory storage: every hub/database pair is separate shard
 
-    __lock_singleton = threading.Lock()
+    Selected shard is kept in the task context, so operations do not look up databases
+    """
+
+    __shards_lock = threading.Lock()
     __selected_db_context_key = 'inmemory.storage.db'
-    __database_singleton = {}
+    __shards: Dict[str, _KeyValueShard] = {}
 
     async def select_db(self, db_name: str):
         mangled_db_name = f'{_get_current_hub_id()}/{db_name}'
-        self.__acquire()
-        try:
-            if mangled_db_name not in self.__database_singleton:
-                self.__database_singleton[mangled_db_name] = {}
-            self.__set_current_db(mangled_db_name)
-        finally:
-            self.__release()
+        shard = self.__shards.get(mangled_db_name, None)
+        if shard is None:
+            with self.__shards_lock:
+                shard = self.__shards.get(mangled_db_name, None)
+                if shard is None:
+                    shard = _KeyValueShard()
+                    self.__shards[mangled_db_name] = shard
+        context_set(self.__selected_db_context_key, shard)
 
     async def set(self, key: str, value: Any):
-        cur_db_name = self.__get_current_db()
-        if cur_db_name is None:
-            raise RuntimeError('Select working database at first!')
-        else:
-            self.__acquire()
-            try:
-                selected_db = self.__database_singleton[cur_db_name]
-                selected_db[key] = value
-            finally:
-                self.__release()
+        self.__get_current_db().set(key, value)
 
     async def get(self, key: str) -> Optional[Any]:
-        cur_db_name = self.__get_current_db()
-        if cur_db_name is None:
-            raise RuntimeError('Select working database at first!')
-        else:
-            self.__acquire()
-            try:
-                selected_db = self.__database_singleton[cur_db_name]
-                return selected_db.get(key, None)
-            finally:
-                self.__release()
+        return self.__get_current_db().get(key)
 
     async def delete(self, key: str):
-        cur_db_name = self.__get_current_db()
-        if cur_db_name is None:
-            raise RuntimeError('Select working database at first!')
-        else:
-            self.__acquire()
-            try:
-                selected_db = self.__database_singleton[cur_db_name]
-                if key in selected_db:
-                    del selected_db[key]
-            finally:
-                self.__release()
-
-    async def items(self) -> Dict:
-        cur_db_name = self.__get_current_db()
-        if cur_db_name is None:
-            raise RuntimeError('Select working database at first!')
-        else:
-            self.__acquire()
-            try:
-                selected_db = self.__database_singleton[cur_db_name]
-                copied = dict(**selected_db)
-                return copied
-            finally:
-                self.__release()
+        self.__get_current_db().delete(key)
 
-    @classmethod
-    def __acquire(cls):
-        cls.__lock_singleton.acquire(blocking=True)
+    async def items(self) -> Mapping[str, Any]:
+        """Read-only snapshot of the selected database, it is not affected by later modifications"""
+        return self.__get_current_db().snapshot()
 
     @classmethod
-    def __release(cls):
-        cls.__lock_singleton.release()
-
-    @classmethod
-    def __set_current_db(cls, db_name: str):
-        context_set(cls.__selected_db_context_key, db_name)
-
-    @classmethod
-    def __get_current_db(cls) -> Optional[str]:
-        try:
-            db = context_get(cls.__selected_db_context_key)
-        except AttributeError:
-            return None
-        else:
-            return db
+    def __get_current_db(cls) -> _KeyValueShard:
+        shard = context_get(cls.__selected_db_context_key)
+        if shard is None:
+            raise RuntimeError('Select working database at first!')
+        return shard
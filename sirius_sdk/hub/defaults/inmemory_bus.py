@@ -1,7 +1,10 @@
 import asyncio
+import logging
+import weakref
+from enum import Enum
 from dataclasses import dataclass
-from asyncio.queues import Queue as AsyncQueue
-from typing import Dict
+from asyncio.queues import Queue as AsyncQueue, QueueFull
+from typing import Dict, Set, Tuple
 from threading import Lock
 
 import sirius_sdk
@@ -20,102 +23,232 @@ class Event:
 
 class Observer:
 
-    def __init__(self, client_id: str, queue: AsyncQueue, loop: asyncio.AbstractEventLoop):
+    class Overflow(Enum):
+        # Policy for events published to full queue
+        DROP_OLDEST = 'drop_oldest'
+        DROP_NEWEST = 'drop_newest'
+
+    def __init__(
+            self, client_id: str, queue: AsyncQueue, loop: asyncio.AbstractEventLoop,
+            overflow: 'Observer.Overflow' = Overflow.DROP_OLDEST
+    ):
         self.__queue = queue
         self.__loop = loop
         self.__client_id = client_id
+        self.__overflow = overflow
+        self.__dropped = 0
 
     @property
     def client_id(self) -> str:
         return self.__client_id
 
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self.__loop
+
+    @property
+    def dropped(self) -> int:
+        """Count of events dropped cause of queue overflow"""
+        return self.__dropped
+
     def notify(self, event: Any):
-        coro = self.__queue.put(event)
         # Thread-Safe!!!
-        asyncio.run_coroutine_threadsafe(coro, loop=self.__loop)
+        if _get_running_loop() is self.__loop:
+            self.put(event)
+        else:
+            self.__loop.call_soon_threadsafe(self.put, event)
+
+    def put(self, event: Event):
+        """Put event to queue, must be called in observer loop"""
+        try:
+            self.__queue.put_nowait(event)
+            return
+        except QueueFull:
+            pass
+        self.__dropped += 1
+        if self.__overflow == Observer.Overflow.DROP_NEWEST and not event.abort:
+            logging.warning(f'InMemoryBus: queue of client {self.__client_id} is full, event was dropped')
+            return
+        # Abort must be delivered whatever policy is
+        self.__queue.get_nowait()
+        logging.warning(f'InMemoryBus: queue of client {self.__client_id} is full, oldest event was dropped')
+        self.__queue.put_nowait(event)
+
+
+class LoopShard:
+    """Subscriptions of observers running on the same event loop
+
+    Publisher running on the shard loop puts events to queues directly, publishers of other threads
+    post events in batches: single loop wake-up for all events posted until the loop handles them.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.lock = Lock()
+        # Map topic to observers: client_id -> Observer
+        self.topics: Dict[str, Dict[str, Observer]] = {}
+        # Reverse index: client_id -> topics
+        self.clients: Dict[str, Set[str]] = {}
+        self.removed = False
+        self.__pending: List[Tuple[Tuple[Observer, ...], Event]] = []
+        self.__pending_lock = Lock()
+
+    def observers(self, topic: str) -> Tuple[Observer, ...]:
+        with self.lock:
+            observers = self.topics.get(topic)
+            return tuple(observers.values()) if observers else ()
+
+    def post(self, observers: Tuple[Observer, ...], event: Event):
+        """Deliver event from other thread"""
+        with self.__pending_lock:
+            self.__pending.append((observers, event))
+            wake_up = len(self.__pending) == 1
+        if wake_up:
+            try:
+                self.loop.call_soon_threadsafe(self.__flush)
+            except RuntimeError:
+                # Loop is closed, nobody will read events
+                with self.__pending_lock:
+                    self.__pending.clear()
+
+    def __flush(self):
+        with self.__pending_lock:
+            pending, self.__pending = self.__pending, []
+        for observers, event in pending:
+            for o in observers:
+                o.put(event)
 
 
 class Subscriptions:
+    """Registry of topic observers sharded by observer event loop
+
+    Subscriptions are indexed by topic and by client, so unsubscribe cost depends on
+    count of client topics only
+    """
 
     def __init__(self):
         self.__lock = Lock()
-        # Map topic to observers-list
-        self.__subscriptions_singleton: Dict[str, List[Observer]] = {}
+        self.__shards: Dict[asyncio.AbstractEventLoop, LoopShard] = {}
+        # Immutable snapshot of shards: publishers iterate it without lock
+        self.__shards_snapshot: Tuple[LoopShard, ...] = ()
+        self.__client_shards: Dict[str, LoopShard] = {}
 
     def subscribe(self, topic: str, o: Observer):
-        self.__acquire()
-        try:
-            observers = self.__subscriptions_singleton.get(topic, [])
-            if not list(filter(lambda x: x.client_id == o.client_id, observers)):
-                observers.append(o)
-                self.__subscriptions_singleton[topic] = observers
-        finally:
-            self.__release()
+        while True:
+            shard = self.__get_shard(o.loop)
+            with shard.lock:
+                if shard.removed:
+                    # Shard was removed concurrently
+                    continue
+                observers = shard.topics.setdefault(topic, {})
+                if o.client_id not in observers:
+                    observers[o.client_id] = o
+                    shard.clients.setdefault(o.client_id, set()).add(topic)
+                    self.__client_shards[o.client_id] = shard
+                return
 
     def unsubscribe(self, client_id: str, topics: List[str] = None):
-        self.__acquire()
-        try:
-            if topics is not None:
-                topics_to_process = topics or []
-            else:
-                # unsubscribe all topics for specified client_id
-                topics_to_process = []
-                for topic in self.__subscriptions_singleton.keys():
-                    observers = self.__subscriptions_singleton.get(topic, [])
-                    if list(filter(lambda x: x.client_id == client_id, observers)):
-                        topics_to_process.append(topic)
-            # Process
-            for topic in topics_to_process:
-                observers = self.__subscriptions_singleton.get(topic, [])
-                self.__subscriptions_singleton[topic] = [o for o in observers if o.client_id != client_id]
-        finally:
-            self.__release()
+        shard = self.__client_shards.get(client_id)
+        if shard is None:
+            return
+        with shard.lock:
+            client_topics = shard.clients.get(client_id)
+            if client_topics is None:
+                return
+            # unsubscribe all topics for specified client_id if topics is None
+            for topic in list(client_topics) if topics is None else topics:
+                observers = shard.topics.get(topic)
+                if observers is not None and observers.pop(client_id, None) is not None:
+                    client_topics.discard(topic)
+                    if not observers:
+                        del shard.topics[topic]
+            if not client_topics:
+                del shard.clients[client_id]
+                self.__client_shards.pop(client_id, None)
+            is_empty = not shard.clients
+        if is_empty:
+            self.__remove_shard_if_empty(shard)
 
     def notify(self, topic: str, payload: bytes) -> int:
-        self.__acquire()
-        try:
-            observers = self.__subscriptions_singleton.get(topic, [])
-        finally:
-            self.__release()
-        # Notify all
-        for o in observers:
-            o.notify(event=Event(topic, payload))
-        return len(observers)
+        event = Event(topic, payload)
+        current_loop = _get_running_loop()
+        count = 0
+        for shard in self.__shards_snapshot:
+            observers = shard.observers(topic)
+            if not observers:
+                continue
+            count += len(observers)
+            if shard.loop is current_loop:
+                for o in observers:
+                    o.put(event)
+            else:
+                shard.post(observers, event)
+        return count
 
     def notify_abort(self, client_id: str):
-        o: Optional[Observer] = None
-        self.__acquire()
-        try:
-            for topic in self.__subscriptions_singleton.keys():
-                observers = self.__subscriptions_singleton.get(topic, [])
-                found = list(filter(lambda x: x.client_id == client_id, observers))
-                if found:
-                    o = found[0]
-                    break
-        finally:
-            self.__release()
+        shard = self.__client_shards.get(client_id)
+        if shard is None:
+            return
+        with shard.lock:
+            topics = shard.clients.get(client_id)
+            topic = next(iter(topics)) if topics else None
+            o = shard.topics[topic].get(client_id) if topic is not None else None
         # Fire!!!
         if o is not None:
             o.notify(event=Event(topic='*', payload=b'', abort=True))
 
-    def __acquire(self):
-        self.__lock.acquire(blocking=True)
+    def __get_shard(self, loop: asyncio.AbstractEventLoop) -> LoopShard:
+        shard = self.__shards.get(loop)
+        if shard is None or shard.removed:
+            with self.__lock:
+                shard = self.__shards.get(loop)
+                if shard is None or shard.removed:
+                    shard = LoopShard(loop)
+                    self.__shards[loop] = shard
+                    self.__shards_snapshot = tuple(self.__shards.values())
+        return shard
 
-    def __release(self):
-        self.__lock.release()
+    def __remove_shard_if_empty(self, shard: LoopShard):
+        # Shards of finished loops are dropped, so closed loops are not referenced
+        with self.__lock:
+            with shard.lock:
+                if shard.clients or shard.removed:
+                    return
+                shard.removed = True
+            if self.__shards.get(shard.loop) is shard:
+                del self.__shards[shard.loop]
+                self.__shards_snapshot = tuple(self.__shards.values())
+
+
+def _get_running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
 
 
 class InMemoryBus(AbstractBus):
 
     __subscriptions_singleton = Subscriptions()
 
-    def __init__(self, crypto: APICrypto = None, loop: asyncio.AbstractEventLoop = None):
+    def __init__(
+            self, crypto: APICrypto = None, loop: asyncio.AbstractEventLoop = None,
+            max_queue_size: int = 0, overflow: Observer.Overflow = Observer.Overflow.DROP_OLDEST
+    ):
+        """
+        :param crypto: (optional) crypto to unpack messages, hub crypto if None
+        :param loop: (optional) loop of events consumer
+        :param max_queue_size: (optional) max count of not consumed events, unlimited if 0
+        :param overflow: (optional) policy for events published to full queue
+        """
         self.__crypto = crypto or sirius_sdk.Crypto
-        self.__queue = AsyncQueue()
+        self.__queue = AsyncQueue(maxsize=max_queue_size)
         self.__client_id = str(id(self))
         if loop is None:
             loop = asyncio.get_event_loop()
-        self.__observer = Observer(client_id=self.__client_id, queue=self.__queue, loop=loop)
+        self.__observer = Observer(client_id=self.__client_id, queue=self.__queue, loop=loop, overflow=overflow)
+        # Drop subscriptions of collected bus
+        weakref.finalize(self, self.__subscriptions_singleton.unsubscribe, self.__client_id)
 
     async def subscribe(self, thid: str) -> bool:
         self.__subscriptions_singleton.subscribe(thid, self.__observer)
@@ -140,11 +273,9 @@ class InMemoryBus(AbstractBus):
         if timeout is None:
             event: Event = await self.__queue.get()
         else:
-            coro = self.__queue.get()
-            done, pending = await asyncio.wait([coro], timeout=timeout)
-            if done:
-                event: Event = list(done)[0].result()
-            else:
+            try:
+                event: Event = await asyncio.wait_for(self.__queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
                 raise SiriusTimeoutIO
         #
         if event.abort:
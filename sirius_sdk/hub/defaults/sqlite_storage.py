@@ -0,0 +1,219 @@
+import base64
+import sqlite3
+import threading
+import weakref
+from typing import Any, Optional, Dict
+
+from sirius_sdk import codec
+from sirius_sdk.abstract.storage import AbstractKeyValueStorage
+from sirius_sdk.hub.context import get as context_get, set as context_set
+from sirius_sdk.hub.defaults.default_storage import _get_current_hub_id
+
+
+class SQLiteKeyValueStorage(AbstractKeyValueStorage):
+    """Persistent key-value storage on embedded SQLite database
+
+    Plug it to hub with Config overrides, so default crypto and non-secrets services
+    keep keys and records between restarts:
+
+        cfg = sirius_sdk.Config().override_storage(SQLiteKeyValueStorage('/var/lib/agent/storage.db'))
+
+    Writes are committed in batches: when `commit_every` writes are pending or
+    `commit_interval` seconds passed since first pending write (timer thread does not depend on event loop),
+    call flush() to commit immediately. close() commits and closes database, it is reopened on next call.
+
+    Values are serialized to JSON, bytes are stored as BLOB (nested into JSON as {"$b64": "..."}),
+    tuples are restored as lists.
+    """
+
+    DEF_COMMIT_EVERY = 1000
+    DEF_COMMIT_INTERVAL = 0.1  # seconds
+
+    SCHEMA = 'CREATE TABLE IF NOT EXISTS kv (' \
+             'db TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, PRIMARY KEY (db, key)' \
+             ') WITHOUT ROWID'
+    # Statements text is constant, so sqlite3 module reuses prepared statements from connection cache
+    SQL_SET = 'INSERT OR REPLACE INTO kv (db, key, value) VALUES (?, ?, ?)'
+    SQL_GET = 'SELECT value FROM kv WHERE db = ? AND key = ?'
+    SQL_DELETE = 'DELETE FROM kv WHERE db = ? AND key = ?'
+    SQL_ITEMS = 'SELECT key, value FROM kv WHERE db = ?'
+    BYTES_MARKER = '$b64'
+
+    __selected_db_context_key = 'sqlite.storage.db'
+
+    def __init__(
+            self, path: str, commit_every: int = DEF_COMMIT_EVERY, commit_interval: float = DEF_COMMIT_INTERVAL,
+            mmap_size: int = None, statements_cache_size: int = 128
+    ):
+        """
+        :param path: database file path
+        :param commit_every: (optional) max count of uncommitted writes, 1 to commit every write
+        :param commit_interval: (optional) max delay (in seconds) of pending writes commit
+        :param mmap_size: (optional) size of memory-mapped I/O region in bytes, mmap is disabled by default
+        :param statements_cache_size: (optional) size of prepared statements cache
+        """
+        self.__path = path
+        self.__commit_every = commit_every
+        self.__commit_interval = commit_interval
+        self.__mmap_size = mmap_size
+        self.__statements_cache_size = statements_cache_size
+        self.__pending = 0
+        self.__commit_timer: Optional[threading.Timer] = None
+        self.__lock = threading.RLock()
+        self.__conn: Optional[sqlite3.Connection] = None
+        self.__finalizer: Optional[weakref.finalize] = None
+        self.__connect()
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    async def select_db(self, db_name: str):
+        context_set(self.__selected_db_context_key, f'{_get_current_hub_id()}/{db_name}')
+
+    async def set(self, key: str, value: Any):
+        db = self.__get_current_db()
+        payload = self.__serialize(value)
+        with self.__lock:
+            self.__begin()
+            self.__conn.execute(self.SQL_SET, (db, key, payload))
+            self.__written()
+
+    async def get(self, key: str) -> Optional[Any]:
+        db = self.__get_current_db()
+        with self.__lock:
+            row = self.__connect().execute(self.SQL_GET, (db, key)).fetchone()
+        return None if row is None else self.__deserialize(row[0])
+
+    async def delete(self, key: str):
+        db = self.__get_current_db()
+        with self.__lock:
+            self.__begin()
+            self.__conn.execute(self.SQL_DELETE, (db, key))
+            self.__written()
+
+    async def items(self) -> Dict:
+        db = self.__get_current_db()
+        with self.__lock:
+            rows = self.__connect().execute(self.SQL_ITEMS, (db,)).fetchall()
+        return {key: self.__deserialize(value) for key, value in rows}
+
+    async def flush(self):
+        """Commit pending writes"""
+        with self.__lock:
+            self.__commit()
+
+    def close(self):
+        """Commit pending writes and close database"""
+        with self.__lock:
+            self.__cancel_commit_timer()
+            self.__pending = 0
+            if self.__finalizer is not None:
+                self.__finalizer()
+                self.__finalizer = None
+            self.__conn = None
+
+    def __get_current_db(self) -> str:
+        db = context_get(self.__selected_db_context_key)
+        if db is None:
+            raise RuntimeError('Select working database at first!')
+        return db
+
+    def __connect(self) -> sqlite3.Connection:
+        if self.__conn is None:
+            conn = sqlite3.connect(
+                self.__path, isolation_level=None, check_same_thread=False,
+                cached_statements=self.__statements_cache_size
+            )
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            if self.__mmap_size:
+                conn.execute(f'PRAGMA mmap_size={int(self.__mmap_size)}')
+            conn.execute(self.SCHEMA)
+            self.__conn = conn
+            # Commit pending writes when storage is collected or interpreter exits
+            self.__finalizer = weakref.finalize(self, self.__shutdown, conn, self.__lock)
+        return self.__conn
+
+    def __begin(self):
+        conn = self.__connect()
+        if not conn.in_transaction:
+            conn.execute('BEGIN')
+
+    def __written(self):
+        self.__pending += 1
+        if self.__pending >= self.__commit_every:
+            self.__commit()
+        elif self.__commit_timer is None:
+            timer = threading.Timer(self.__commit_interval, self.__on_commit_timer)
+            timer.daemon = True
+            self.__commit_timer = timer
+            timer.start()
+
+    def __on_commit_timer(self):
+        with self.__lock:
+            # Timer may be cancelled or replaced while it was waiting for the lock
+            if self.__commit_timer is threading.current_thread():
+                self.__commit_timer = None
+                self.__commit()
+
+    def __cancel_commit_timer(self):
+        if self.__commit_timer is not None:
+            self.__commit_timer.cancel()
+            self.__commit_timer = None
+
+    def __commit(self):
+        self.__cancel_commit_timer()
+        if self.__conn is not None and self.__conn.in_transaction:
+            self.__conn.execute('COMMIT')
+        self.__pending = 0
+
+    @classmethod
+    def __serialize(cls, value: Any) -> Any:
+        if isinstance(value, (bytes, bytearray)):
+            return bytes(value)
+        try:
+            return codec.dumps(value)
+        except TypeError:
+            # Nested bytes
+            return codec.dumps(cls.__encode(value))
+
+    @classmethod
+    def __deserialize(cls, payload: Any) -> Any:
+        if isinstance(payload, bytes):
+            return payload
+        value = codec.loads(payload)
+        if cls.BYTES_MARKER in payload:
+            value = cls.__decode(value)
+        return value
+
+    @classmethod
+    def __encode(cls, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {key: cls.__encode(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [cls.__encode(item) for item in value]
+        if isinstance(value, (bytes, bytearray)):
+            return {cls.BYTES_MARKER: base64.b64encode(value).decode('ascii')}
+        return value
+
+    @classmethod
+    def __decode(cls, value: Any) -> Any:
+        if isinstance(value, dict):
+            if len(value) == 1 and cls.BYTES_MARKER in value:
+                return base64.b64decode(value[cls.BYTES_MARKER])
+            return {key: cls.__decode(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [cls.__decode(item) for item in value]
+        return value
+
+    @staticmethod
+    def __shutdown(conn: sqlite3.Connection, lock: threading.RLock):
+        with lock:
+            try:
+                if conn.in_transaction:
+                    conn.execute('COMMIT')
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Already closed
+                pass
@@ -0,0 +1,510 @@
+import os
+import sys
+import time
+import signal
+import struct
+import asyncio
+import weakref
+import functools
+import logging
+import itertools
+import multiprocessing
+from collections import deque
+from typing import Dict, Set, Deque, Callable
+
+import sirius_sdk
+from sirius_sdk.errors.exceptions import SiriusTimeoutIO, OperationAbortedManually, SiriusConnectionClosed
+from sirius_sdk.abstract.api import *
+from sirius_sdk.messaging import restore_message_instance
+from sirius_sdk.abstract.bus import AbstractBus
+
+
+# Bus shared by processes of the same host: broker process keeps subscriptions and routes events
+# between clients connected to Unix domain socket.
+#
+# Frame: header (body length: uint32, operation: uint8, fields count: uint8) followed by fields,
+# every field is prefixed with its length (uint32). All numbers are big-endian.
+OP_SUBSCRIBE = 1      # client -> broker, fields: topics, answered with OP_ACK
+OP_UNSUBSCRIBE = 2    # client -> broker, fields: topics, answered with OP_ACK
+OP_PUBLISH = 3        # client -> broker, fields: topic, payload, answered with OP_ACK(count of recipients)
+OP_EVENT = 4          # broker -> client, fields: topic, payload
+OP_ACK = 5            # broker -> client, fields: uint32 value
+
+_HEADER = struct.Struct('!IBB')
+_FIELD_LEN = struct.Struct('!I')
+_UINT32 = struct.Struct('!I')
+
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+
+def pack_frame(op: int, *fields: bytes) -> bytes:
+    body = b''.join(_FIELD_LEN.pack(len(field)) + field for field in fields)
+    return _HEADER.pack(len(body), op, len(fields)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> (int, List[bytes]):
+    """Read frame from stream
+
+    :return: operation, fields
+    """
+    header = await reader.readexactly(_HEADER.size)
+    body_len, op, fields_count = _HEADER.unpack(header)
+    if body_len > MAX_FRAME_SIZE:
+        raise SiriusConnectionClosed(f'Frame size {body_len} exceeds limit')
+    body = await reader.readexactly(body_len)
+    fields = []
+    offset = 0
+    for _ in range(fields_count):
+        field_len, = _FIELD_LEN.unpack_from(body, offset)
+        offset += _FIELD_LEN.size
+        fields.append(body[offset:offset+field_len])
+        offset += field_len
+    return op, fields
+
+
+class UnixSocketBroker:
+    """Routes events between UnixSocketBus clients
+
+    Run it inside event loop of any process with start() or in dedicated process with spawn()
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Unix domain socket path
+        """
+        self.__path = path
+        self.__server: Optional[asyncio.AbstractServer] = None
+        # Map topic to connections of subscribers
+        self.__topics: Dict[str, Set[asyncio.StreamWriter]] = {}
+        # Reverse index: connection -> topics
+        self.__clients: Dict[asyncio.StreamWriter, Set[str]] = {}
+        self.__handlers: Set[asyncio.Task] = set()
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def is_running(self) -> bool:
+        return self.__server is not None
+
+    async def start(self):
+        if self.__server is not None:
+            return
+        if os.path.exists(self.__path):
+            # Stale socket of the broker that was not stopped
+            os.unlink(self.__path)
+        self.__server = await asyncio.start_unix_server(self.__on_client, path=self.__path)
+
+    async def stop(self):
+        if self.__server is None:
+            return
+        self.__server.close()
+        # Handlers exit on closed connections
+        for writer in list(self.__clients.keys()):
+            writer.close()
+        if self.__handlers:
+            await asyncio.wait(list(self.__handlers))
+        await self.__server.wait_closed()
+        self.__server = None
+        if os.path.exists(self.__path):
+            os.unlink(self.__path)
+
+    async def serve_forever(self):
+        await self.start()
+        await self.__server.serve_forever()
+
+    @classmethod
+    def spawn(cls, path: str, timeout: float = 5) -> multiprocessing.Process:
+        """Run broker in dedicated process, returns when socket is ready
+
+        :param path: Unix domain socket path
+        :param timeout: (optional) seconds to wait for broker start
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        process = multiprocessing.Process(target=run_broker, args=(path,), daemon=True)
+        process.start()
+        expire_at = time.monotonic() + timeout
+        while not os.path.exists(path):
+            if not process.is_alive() or time.monotonic() > expire_at:
+                process.terminate()
+                raise SiriusTimeoutIO(f'Broker was not started on {path}')
+            time.sleep(0.01)
+        return process
+
+    async def __on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        topics = self.__clients.setdefault(writer, set())
+        handler = asyncio.current_task()
+        self.__handlers.add(handler)
+        try:
+            while True:
+                op, fields = await read_frame(reader)
+                if op == OP_SUBSCRIBE:
+                    for topic in fields:
+                        topic = topic.decode()
+                        self.__topics.setdefault(topic, set()).add(writer)
+                        topics.add(topic)
+                    writer.write(pack_frame(OP_ACK, _UINT32.pack(len(fields))))
+                elif op == OP_UNSUBSCRIBE:
+                    for topic in fields:
+                        self.__unsubscribe(writer, topic.decode())
+                    writer.write(pack_frame(OP_ACK, _UINT32.pack(len(fields))))
+                elif op == OP_PUBLISH:
+                    topic, payload = fields
+                    subscribers = self.__topics.get(topic.decode(), ())
+                    if subscribers:
+                        event = pack_frame(OP_EVENT, topic, payload)
+                        for subscriber in subscribers:
+                            subscriber.write(event)
+                    writer.write(pack_frame(OP_ACK, _UINT32.pack(len(subscribers))))
+                else:
+                    logging.warning(f'UnixSocketBroker: unexpected operation {op}')
+                    break
+                # Back-pressure for client that does not read replies
+                if writer.transport.get_write_buffer_size() > MAX_FRAME_SIZE:
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, SiriusConnectionClosed):
+            pass
+        finally:
+            for topic in list(topics):
+                self.__unsubscribe(writer, topic)
+            self.__clients.pop(writer, None)
+            self.__handlers.discard(handler)
+            writer.close()
+
+    def __unsubscribe(self, writer: asyncio.StreamWriter, topic: str):
+        subscribers = self.__topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(writer)
+            if not subscribers:
+                del self.__topics[topic]
+        topics = self.__clients.get(writer)
+        if topics is not None:
+            topics.discard(topic)
+
+
+def run_broker(path: str):
+    """Entry point of broker process"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    broker = UnixSocketBroker(path)
+    serving = loop.create_task(broker.serve_forever())
+    # Remove socket file on terminate()
+    loop.add_signal_handler(signal.SIGTERM, serving.cancel)
+    try:
+        loop.run_until_complete(serving)
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        loop.run_until_complete(broker.stop())
+        loop.close()
+
+
+class _SharedConnection:
+    """Connection to broker shared by UnixSocketBus instances of the same event loop
+
+    Broker subscriptions of the connection are union of buses subscriptions, events are routed
+    to bus queues by topic. Connection is closed when last bus is detached.
+    """
+
+    def __init__(self, path: str, on_closed: Callable[['_SharedConnection'], None]):
+        self.__path = path
+        self.__on_closed = on_closed
+        self.__reader_task: Optional[asyncio.Task] = None
+        self.__writer: Optional[asyncio.StreamWriter] = None
+        self.__connect_lock: Optional[asyncio.Lock] = None
+        self.__closed = False
+        # Broker answers in requests order
+        self.__acks: Deque[asyncio.Future] = deque()
+        self.__queues: Dict[int, asyncio.Queue] = {}
+        # Map topic to keys of subscribed buses
+        self.__topics: Dict[str, Set[int]] = {}
+
+    @property
+    def is_closed(self) -> bool:
+        return self.__closed
+
+    def attach(self, key: int, queue: asyncio.Queue):
+        self.__queues[key] = queue
+
+    def detach(self, key: int):
+        """Release subscriptions of the bus without waiting for broker answer"""
+        if self.__queues.pop(key, None) is None:
+            return
+        orphans = self.__release(key, [topic for topic, keys in self.__topics.items() if key in keys])
+        if not self.__queues:
+            self.close()
+        elif orphans and self.__writer is not None:
+            self.__acks.append(asyncio.get_event_loop().create_future())
+            self.__writer.write(pack_frame(OP_UNSUBSCRIBE, *[topic.encode() for topic in orphans]))
+
+    async def connect(self):
+        if self.__writer is not None:
+            return
+        if self.__closed:
+            raise SiriusConnectionClosed('Bus broker closed connection')
+        if self.__connect_lock is None:
+            self.__connect_lock = asyncio.Lock()
+        async with self.__connect_lock:
+            if self.__writer is None:
+                try:
+                    reader, writer = await asyncio.open_unix_connection(path=self.__path)
+                except (OSError, ConnectionError) as e:
+                    raise SiriusConnectionClosed(f'Bus broker is not available on {self.__path}') from e
+                self.__writer = writer
+                self.__reader_task = asyncio.ensure_future(self.__read_loop(reader))
+
+    async def subscribe(self, key: int, topics: List[str]):
+        # Register before broker answer, so events that follow answer are routed
+        for topic in topics:
+            self.__topics.setdefault(topic, set()).add(key)
+        await self.__request(OP_SUBSCRIBE, *[topic.encode() for topic in topics])
+
+    async def unsubscribe(self, key: int, topics: List[str]):
+        orphans = self.__release(key, topics)
+        if orphans:
+            await self.__request(OP_UNSUBSCRIBE, *[topic.encode() for topic in orphans])
+
+    async def publish(self, topic: str, payload: bytes) -> int:
+        count = await self.__request(OP_PUBLISH, topic.encode(), payload)
+        # Broker counts connections, every subscribed bus of this connection is recipient
+        local = self.__topics.get(topic)
+        if local:
+            count += len(local) - 1
+        return count
+
+    def close(self):
+        if self.__closed:
+            return
+        self.__closed = True
+        self.__on_closed(self)
+        if self.__reader_task is not None:
+            self.__reader_task.cancel()
+            self.__reader_task = None
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
+        self.__fail_acks(SiriusConnectionClosed())
+
+    def __release(self, key: int, topics: List[str]) -> List[str]:
+        """Unregister bus topics, return topics that have no subscribers"""
+        orphans = []
+        for topic in topics:
+            keys = self.__topics.get(topic)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.__topics[topic]
+                    orphans.append(topic)
+        return orphans
+
+    async def __request(self, op: int, *fields: bytes) -> int:
+        await self.connect()
+        fut = asyncio.get_event_loop().create_future()
+        # Enqueue and write without switching context to keep requests order
+        self.__acks.append(fut)
+        self.__writer.write(pack_frame(op, *fields))
+        await self.__writer.drain()
+        return await fut
+
+    async def __read_loop(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                op, fields = await read_frame(reader)
+                if op == OP_EVENT:
+                    topic, payload = fields
+                    thread_id = topic.decode()
+                    keys = self.__topics.get(thread_id)
+                    if keys:
+                        event = AbstractBus.BytesEvent(thread_id=thread_id, payload=payload)
+                        for key in keys:
+                            self.__queues[key].put_nowait(event)
+                elif op == OP_ACK:
+                    value, = _UINT32.unpack(fields[0])
+                    fut = self.__acks.popleft()
+                    if not fut.done():
+                        fut.set_result(value)
+        except asyncio.CancelledError:
+            raise
+        except (asyncio.IncompleteReadError, ConnectionError, SiriusConnectionClosed):
+            self.__reader_task = None
+            for queue in self.__queues.values():
+                queue.put_nowait(SiriusConnectionClosed('Bus broker closed connection'))
+            self.close()
+
+    def __fail_acks(self, e: BaseException):
+        while self.__acks:
+            fut = self.__acks.popleft()
+            if not fut.done():
+                fut.set_exception(e)
+
+
+def _detach_bus(loop: asyncio.AbstractEventLoop, connection: _SharedConnection, key: int):
+    """Finalizer of UnixSocketBus, may be called by GC in any thread"""
+    if loop.is_closed():
+        return
+    try:
+        running = asyncio.get_event_loop() is loop and loop.is_running()
+    except RuntimeError:
+        running = False
+    if running:
+        connection.detach(key)
+    else:
+        loop.call_soon_threadsafe(connection.detach, key)
+
+
+class UnixSocketBus(AbstractBus):
+    """Bus shared by processes of the host over UnixSocketBroker, works without cloud agent
+
+    Plug it to hub to run co-protocols of the same agent in worker processes:
+
+        cfg = sirius_sdk.Config().override_coprotocols(UnixSocketCoProtocols('/run/agent/bus.sock'))
+
+    Buses of the same event loop share single broker connection, bus subscriptions are released
+    on close() or when bus is collected.
+    """
+
+    __keys = itertools.count()
+    # Shared connections: event loop -> socket path -> connection
+    __connections: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _SharedConnection]]' = \
+        weakref.WeakKeyDictionary()
+
+    def __init__(self, path: str, crypto: APICrypto = None):
+        """
+        :param path: Unix domain socket path of the broker
+        :param crypto: (optional) crypto to unpack messages, hub crypto if None
+        """
+        self.__path = path
+        self.__crypto = crypto
+        self.__key = next(self.__keys)
+        self.__queue = asyncio.Queue()
+        self.__connection: Optional[_SharedConnection] = None
+        self.__finalizer: Optional[weakref.finalize] = None
+        # Connection loss is reported to every following call
+        self.__error: Optional[BaseException] = None
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    async def subscribe(self, thid: str) -> bool:
+        connection = await self.__attach()
+        await connection.subscribe(self.__key, [thid])
+        return True
+
+    async def subscribe_ext(
+            self, sender_vk: List[str], recipient_vk: List[str], protocols: List[str]
+    ) -> (bool, List[str]):
+        binding_ids = []
+        for _sender_vk in sender_vk:
+            for _recipient_vk in recipient_vk:
+                for protocol in protocols:
+                    binding_id = self.binding_id_from_attrs(_sender_vk, _recipient_vk, protocol)
+                    if binding_id not in binding_ids:
+                        binding_ids.append(binding_id)
+        if binding_ids:
+            connection = await self.__attach()
+            await connection.subscribe(self.__key, binding_ids)
+        return len(binding_ids) > 0, binding_ids
+
+    async def unsubscribe(self, thid: str):
+        connection = await self.__attach()
+        await connection.unsubscribe(self.__key, [thid])
+
+    async def unsubscribe_ext(self, thids: List[str]):
+        if thids:
+            connection = await self.__attach()
+            await connection.unsubscribe(self.__key, thids)
+
+    async def publish(self, thid: str, payload: bytes) -> int:
+        connection = await self.__attach()
+        return await connection.publish(thid, payload)
+
+    async def get_event(self, timeout: float = None) -> AbstractBus.BytesEvent:
+        await self.__attach()
+        try:
+            event = await asyncio.wait_for(self.__queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise SiriusTimeoutIO
+        if isinstance(event, OperationAbortedManually):
+            # Abort interrupts single awaiting
+            raise event
+        if isinstance(event, BaseException):
+            self.__error = event
+            raise event
+        return event
+
+    async def get_message(self, timeout: float = None) -> AbstractBus.MessageEvent:
+        event = await self.get_event(timeout)
+        crypto = self.__crypto or sirius_sdk.Crypto
+        decrypted = await crypto.unpack_message(event.payload)
+        ok, msg = restore_message_instance(decrypted['message'])
+        if not ok:
+            msg = Message(**decrypted['message'])
+        return AbstractBus.MessageEvent(
+            thread_id=event.thread_id,
+            message=msg,
+            sender_verkey=decrypted.get('sender_verkey', None),
+            recipient_verkey=decrypted.get('recipient_verkey', None)
+        )
+
+    async def abort(self):
+        self.__queue.put_nowait(OperationAbortedManually('Bus events awaiting was aborted by user'))
+
+    async def close(self):
+        """Release subscriptions, shared connection is closed with its last bus"""
+        if self.__finalizer is not None:
+            self.__finalizer.detach()
+            self.__finalizer = None
+        if self.__connection is not None:
+            self.__connection.detach(self.__key)
+            self.__connection = None
+
+    @staticmethod
+    def binding_id_from_attrs(sender_vk: Optional[str], recipient_vk: Optional[str], protocol: str) -> str:
+        return f'protocol:{sender_vk}/{recipient_vk}/{protocol}'
+
+    async def __attach(self) -> _SharedConnection:
+        if self.__error is not None:
+            raise self.__error
+        if self.__connection is None:
+            loop = asyncio.get_event_loop()
+            connections = self.__connections.setdefault(loop, {})
+            connection = connections.get(self.__path)
+            if connection is None:
+                # Connection must not refer to bus, otherwise bus is never collected
+                connection = _SharedConnection(
+                    self.__path, on_closed=functools.partial(self.__forget, connections, self.__path)
+                )
+                connections[self.__path] = connection
+            connection.attach(self.__key, self.__queue)
+            self.__connection = connection
+            self.__finalizer = weakref.finalize(self, _detach_bus, loop, connection, self.__key)
+        try:
+            await self.__connection.connect()
+        except SiriusConnectionClosed as e:
+            self.__error = e
+            raise
+        return self.__connection
+
+    @staticmethod
+    def __forget(connections: Dict[str, _SharedConnection], path: str, connection: _SharedConnection):
+        if connections.get(path) is connection:
+            del connections[path]
+
+
+class UnixSocketCoProtocols(APICoProtocols):
+
+    def __init__(self, path: str):
+        """
+        :param path: Unix domain socket path of UnixSocketBroker
+        """
+        self.__path = path
+
+    async def spawn_coprotocol(self) -> AbstractBus:
+        return UnixSocketBus(self.__path)
+
+
+if __name__ == '__main__':
+    run_broker(sys.argv[1])
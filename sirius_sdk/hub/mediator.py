@@ -3,7 +3,10 @@ import asyncio
 import logging
 import math
 import hashlib
-from typing import Union, Optional, List, Dict
+import weakref
+import itertools
+from dataclasses import dataclass
+from typing import Union, Optional, List, Dict, Tuple
 
 import aiohttp
 
@@ -23,6 +26,7 @@ from sirius_sdk.agent.aries_rfc.did_doc import DIDDoc
 from sirius_sdk.agent.aries_rfc.mixins import ThreadMixin as AriesThreadMixin
 from sirius_sdk.agent.aries_rfc.feature_0753_bus.messages import *
 from sirius_sdk.agent.aries_rfc.feature_0212_pickup.messages import *
+from sirius_sdk.agent.bus import PickUpPrefetch
 
 
 def qualify_key(key: str) -> str:
@@ -129,17 +133,360 @@ class TunnelMixin:
                 return Message(**payload), sender_vk, recip_vk
 
 
+class MediatorDispatcher(TunnelMixin):
+    """Single reader of mediator connection
+
+    Frames are read and unpacked once by background task and routed to consumers:
+      - replies with ~thread.thid registered via expect() go to queue of the client that expects them
+      - bus replies (bind, publish, problem-report) resolve request() calls, reply is matched to request
+        by ~thread.thid: request @id or thread id the request is about (subscribed or published thread)
+      - messages with ~thread.pthid of registered client (bus events) go to the client queue
+      - the rest (downstream messages) go to queue of every inbox consumer, see register_inbox()
+
+    So bus operations, pickup of events, co-protocols and listener may overlap on the same connection.
+    """
+
+    DEF_INBOX_SIZE = 1000
+
+    @dataclass(eq=False)
+    class PendingRequest:
+        seq: int
+        future: asyncio.Future
+        request: Message
+
+    def __init__(
+            self, connector: BaseConnector, my_verkey: Optional[str], mediator_verkey: Optional[str],
+            timeout: float = MediatorConnector.IO_TIMEOUT, inbox_size: int = DEF_INBOX_SIZE
+    ):
+        """
+        :param connector: mediator connection
+        :param my_verkey: verkey of the agent
+        :param mediator_verkey: verkey of the mediator
+        :param timeout: (optional) default timeout of request() and read() in seconds
+        :param inbox_size: (optional) max count of not read messages of inbox consumer,
+          connection is not read while inbox of some consumer is full
+        """
+        self.__connector = connector
+        self._my_verkey = my_verkey
+        self._mediator_verkey = mediator_verkey
+        self.__timeout = timeout
+        self.__inbox_size = inbox_size
+        self.__reader: Optional[asyncio.Task] = None
+        self.__error: Optional[BaseException] = None
+        self.__write_lock: Optional[asyncio.Lock] = None
+        # Downstream messages are kept here until first inbox consumer is registered
+        self.__inbox: Optional[asyncio.Queue] = None
+        # Inbox consumers: consumer_id -> queue, every consumer gets own copy of downstream messages
+        self.__inboxes: 'weakref.WeakValueDictionary[str, asyncio.Queue]' = weakref.WeakValueDictionary()
+        # Bus clients: client_id -> queue, queue is owned by client, so entry is dropped with client
+        self.__clients: 'weakref.WeakValueDictionary[str, asyncio.Queue]' = weakref.WeakValueDictionary()
+        # Replies routed by thread id: thid -> client_id
+        self.__expected: Dict[str, str] = {}
+        # Requests waiting for reply: ~thread.thid of expected reply -> requests in the order they were written
+        self.__pending: Dict[str, List[MediatorDispatcher.PendingRequest]] = {}
+        self.__seq = itertools.count()
+
+    @property
+    def connector(self) -> BaseConnector:
+        return self.__connector
+
+    @property
+    def mediator_verkey(self) -> str:
+        return self._mediator_verkey
+
+    @property
+    def my_verkey(self) -> str:
+        return self._my_verkey
+
+    @property
+    def is_running(self) -> bool:
+        return self.__reader is not None and not self.__reader.done()
+
+    def register(self, client_id: str) -> asyncio.Queue:
+        """Allocate queue for messages of the client, caller should keep reference to the queue
+
+        :param client_id: ~thread.pthid of messages routed to the client
+        """
+        q = self.__clients.get(client_id)
+        if q is None:
+            q = asyncio.Queue()
+            self.__clients[client_id] = q
+        return q
+
+    def register_inbox(self, consumer_id: str) -> asyncio.Queue:
+        """Allocate queue for downstream messages, caller should keep reference to the queue
+
+        First consumer takes messages received before it was registered
+
+        :param consumer_id: id of consumer, it is used to read() the queue
+        """
+        if self.__inbox is None:
+            self.__inbox = asyncio.Queue(maxsize=self.__inbox_size)
+        q = self.__inboxes.get(consumer_id)
+        if q is None:
+            if self.__inboxes:
+                q = asyncio.Queue(maxsize=self.__inbox_size)
+            else:
+                q, self.__inbox = self.__inbox, asyncio.Queue(maxsize=self.__inbox_size)
+            self.__inboxes[consumer_id] = q
+        return q
+
+    def unregister(self, client_id: str):
+        self.__clients.pop(client_id, None)
+        self.__inboxes.pop(client_id, None)
+        for thid in [thid for thid, owner in self.__expected.items() if owner == client_id]:
+            del self.__expected[thid]
+
+    def expect(self, thid: str, client_id: str):
+        """Route reply with ~thread.thid to the client queue
+
+        :param thid: id of request message
+        :param client_id: registered client
+        """
+        self.__expected[thid] = client_id
+
+    async def send(self, payload: bytes):
+        """Write packed message, reply is not expected or is routed by expect()"""
+        self.__ensure_reader()
+        async with self.__write_lock:
+            await self.__connector.write(payload)
+
+    async def request(self, *requests: Tuple[bytes, Message], timeout: float = None) -> List[Message]:
+        """Write packed requests at once and wait for replies, N requests take single round trip
+
+        :param requests: (packed request, request) pairs, request is used to match reply by ~thread.thid
+        :param timeout: (optional) timeout in seconds
+        :return: replies in requests order
+        """
+        self.__ensure_reader()
+        loop = asyncio.get_event_loop()
+        entries = []
+        async with self.__write_lock:
+            for payload, request in requests:
+                entry = self.PendingRequest(seq=next(self.__seq), future=loop.create_future(), request=request)
+                for thid in self.__reply_thids(request):
+                    self.__pending.setdefault(thid, []).append(entry)
+                entries.append(entry)
+                await self.__connector.write(payload)
+        futures = [entry.future for entry in entries]
+        try:
+            done, pending = await asyncio.wait(futures, timeout=timeout or self.__timeout)
+        finally:
+            for entry in entries:
+                if not entry.future.done():
+                    entry.future.cancel()
+                    self.__forget(entry)
+        if pending:
+            raise SiriusTimeoutIO()
+        errors = [fut.exception() for fut in futures if fut.exception() is not None]
+        if errors:
+            raise errors[0]
+        return [fut.result() for fut in futures]
+
+    async def read(
+            self, client_id: str, timeout: float = None
+    ) -> (Optional[Union[Message, bytes]], Optional[str], Optional[str], bytes):
+        """Read message routed to the client
+
+        :param client_id: registered client or inbox consumer
+        :param timeout: (optional) timeout in seconds, INFINITE_TIMEOUT to wait forever
+        :return: message, sender_verkey, recipient_verkey, jwe
+        """
+        self.__ensure_reader()
+        q = self.__clients.get(client_id)
+        if q is None:
+            q = self.__inboxes.get(client_id)
+        if q is None:
+            raise SiriusInvalidMessage(f'Client "{client_id}" is not registered')
+        if timeout == INFINITE_TIMEOUT:
+            timeout = None
+        else:
+            timeout = timeout or self.__timeout
+        try:
+            item = await asyncio.wait_for(q.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise SiriusTimeoutIO()
+        if isinstance(item, BaseException):
+            # Keep error for other readers of the queue
+            q.put_nowait(item)
+            raise item
+        return item
+
+    async def close(self):
+        """Stop reader, pending requests and readers get SiriusConnectionClosed"""
+        if self.__reader is not None:
+            self.__reader.cancel()
+            try:
+                await self.__reader
+            except asyncio.CancelledError:
+                pass
+            self.__reader = None
+        self.__fail(SiriusConnectionClosed())
+        self.__error = None
+        self.__inbox = None
+        # Consumers keep the error in their queues and register again to read new connection
+        self.__inboxes.clear()
+        for q in list(self.__clients.values()):
+            while not q.empty():
+                q.get_nowait()
+
+    def __ensure_reader(self):
+        if self.__error is not None:
+            raise self.__error
+        if self.__write_lock is None:
+            self.__write_lock = asyncio.Lock()
+        if self.__inbox is None:
+            self.__inbox = asyncio.Queue(maxsize=self.__inbox_size)
+        if self.__reader is None or self.__reader.done():
+            self.__reader = asyncio.ensure_future(self.__read_loop())
+
+    async def __read_loop(self):
+        try:
+            while True:
+                try:
+                    jwe = await self.__connector.read(timeout=INFINITE_TIMEOUT)
+                except SiriusTimeoutIO:
+                    continue
+                try:
+                    message, sender_vk, recip_vk = await self.unpack(jwe)
+                except (BaseSiriusException, ValueError) as e:
+                    logging.warning(f'Mediator dispatcher: frame was ignored: {repr(e)}')
+                    continue
+                await self.__route((message, sender_vk, recip_vk, jwe))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.__fail(e)
+
+    async def __route(self, item: tuple):
+        message = item[0]
+        if isinstance(message, Message):
+            thread = AriesThreadMixin.get_thread(message)
+            thid = thread.thid if thread else None
+            if isinstance(thid, str) and thid in self.__expected:
+                q = self.__clients.get(self.__expected.pop(thid))
+                if q is not None:
+                    q.put_nowait(item)
+                    return
+            if self.__is_request_reply(message):
+                self.__resolve(message, thread)
+                return
+            pthid = thread.pthid if thread else None
+            if pthid is not None:
+                q = self.__clients.get(pthid)
+                if q is not None:
+                    q.put_nowait(item)
+                    return
+        # Connection is not read while inbox is full, so slow consumer holds back mediator instead of losing messages
+        for q in list(self.__inboxes.values()) or [self.__inbox]:
+            await q.put(item)
+
+    def __resolve(self, reply: Message, thread: Optional[AriesThreadMixin.Thread]):
+        thid = thread.thid if thread else None
+        pthid = thread.pthid if thread else None
+        entries = self.__pending.get(thid, []) if isinstance(thid, str) else []
+        if not entries:
+            # Mediator may allocate own binding id: reply is paired with the earliest request it may answer,
+            # mediator answers requests of the connection in the order they were received
+            entries = [entry for entry in self.__pending_entries() if self.__may_reply(entry.request, reply)]
+            if not entries:
+                logging.warning(f'Mediator dispatcher: reply does not match pending requests, dropped: {repr(reply)}')
+                return
+        # Requests with the same thread id are told apart by parent thread id (bus client)
+        entry = next((entry for entry in entries if self.__pthid(entry.request) == pthid), entries[0])
+        self.__forget(entry)
+        entry.future.set_result(reply)
+
+    def __pending_entries(self) -> List["MediatorDispatcher.PendingRequest"]:
+        unique = {}
+        for entries in self.__pending.values():
+            for entry in entries:
+                unique[entry.seq] = entry
+        return [unique[seq] for seq in sorted(unique)]
+
+    def __forget(self, entry: "MediatorDispatcher.PendingRequest"):
+        for thid in self.__reply_thids(entry.request):
+            entries = self.__pending.get(thid, [])
+            if entry in entries:
+                entries.remove(entry)
+            if not entries:
+                self.__pending.pop(thid, None)
+
+    @staticmethod
+    def __reply_thids(request: Message) -> List[str]:
+        thids = [request.id]
+        if isinstance(request, BusSubscribeRequest):
+            thid = request.cast.thid
+        elif isinstance(request, BusBindResponse):
+            # publish request
+            thid = request.thread_id
+        else:
+            thid = None
+        if isinstance(thid, str) and thid != request.id:
+            thids.append(thid)
+        return thids
+
+    @staticmethod
+    def __pthid(message: Message) -> Optional[str]:
+        thread = AriesThreadMixin.get_thread(message)
+        return thread.pthid if thread else None
+
+    @classmethod
+    def __may_reply(cls, request: Message, reply: Message) -> bool:
+        if isinstance(reply, BusProblemReport):
+            return True
+        elif isinstance(reply, BusPublishResponse):
+            return isinstance(request, BusPublishRequest)
+        else:
+            return isinstance(request, BusSubscribeRequest) and cls.__pthid(request) == cls.__pthid(reply)
+
+    @staticmethod
+    def __is_request_reply(message: Message) -> bool:
+        if isinstance(message, BusProblemReport):
+            return True
+        # BusEvent, publish and unsubscribe requests share base class with replies
+        if isinstance(message, BusBindResponse) and not isinstance(message, (BusPublishRequest, BusUnsubscribeRequest)):
+            return message.aborted is not True
+        return False
+
+    def __fail(self, e: BaseException):
+        self.__error = e
+        for entry in self.__pending_entries():
+            if not entry.future.done():
+                entry.future.set_exception(e)
+        self.__pending.clear()
+        self.__expected.clear()
+        for q in list(self.__clients.values()):
+            q.put_nowait(e)
+        for q in list(self.__inboxes.values()) + ([self.__inbox] if self.__inbox is not None else []):
+            if q.full():
+                # Error follows messages that are not read yet
+                asyncio.ensure_future(q.put(e))
+            else:
+                q.put_nowait(e)
+
+
 class MediatorCoProtocol(TunnelMixin, AbstractP2PCoProtocol):
 
     def __init__(
             self,
             connector: MediatorConnector, my_verkey: str, mediator_verkey: str,
-            time_to_live: int = None
+            time_to_live: int = None, dispatcher: MediatorDispatcher = None
     ):
+        """
+        :param dispatcher: (optional) reader of connector shared with buses, allocated if None
+        """
         super().__init__(time_to_live)
         self.__connector: MediatorConnector = connector
+        self.__dispatcher = dispatcher or MediatorDispatcher(connector, my_verkey, mediator_verkey)
         self._mediator_verkey = mediator_verkey
         self._my_verkey = my_verkey
+        self.__client_id = str(id(self))
+        # Replies of switch() are routed here, so they are not mixed with downstream messages of inbox
+        self.__queue = self.__dispatcher.register(self.__client_id)
+        # Inbox is registered with first get_one(), so co-protocol that does not read it does not hold back others
+        self.__inbox_id = f'{self.__client_id}/inbox'
+        self.__inbox: Optional[asyncio.Queue] = None
 
     @property
     def connector(self) -> MediatorConnector:
@@ -159,16 +506,17 @@ class MediatorCoProtocol(TunnelMixin, AbstractP2PCoProtocol):
         transport['return_route'] = 'all'
         message['~transport'] = transport
         payload = await self.pack(message)
-        await self.connector.write(payload)
+        await self.__dispatcher.send(payload)
 
     async def get_one(self, timeout: int = None) -> (Optional[Message], str, Optional[str]):
-        payload = await self.connector.read(timeout)
-        message, sender_vk, recip_vk = await self.unpack(payload)
+        self.__inbox = self.__dispatcher.register_inbox(self.__inbox_id)
+        message, sender_vk, recip_vk, _ = await self.__dispatcher.read(self.__inbox_id, timeout=timeout)
         return message, sender_vk, recip_vk
 
     async def switch(self, message: Message) -> (bool, Message):
+        self.__dispatcher.expect(message.id, self.__client_id)
         await self.send(message)
-        msg, _, _ = await self.get_one()
+        msg, _, _, _ = await self.__dispatcher.read(self.__client_id)
         return True, msg
 
 
@@ -176,17 +524,32 @@ class MediatorBus(AbstractBus, TunnelMixin):
 
     BINDINGS_CTX_ID = 'binding.id'
 
-    def __init__(self, connector: MediatorConnector, my_verkey: str, mediator_verkey: str):
+    def __init__(
+            self, connector: MediatorConnector, my_verkey: str, mediator_verkey: str,
+            max_batch_size: int = PickUpPrefetch.DEF_MAX_BATCH_SIZE, dispatcher: MediatorDispatcher = None
+    ):
+        """
+        :param max_batch_size: (optional) max count of events retrieved per pickup round trip
+        :param dispatcher: (optional) reader of connector shared with other buses and co-protocols, allocated if None
+        """
         self.__connector: MediatorConnector = connector
+        self.__dispatcher = dispatcher or MediatorDispatcher(connector, my_verkey, mediator_verkey)
         self._mediator_verkey = mediator_verkey
         self._my_verkey = my_verkey
         self.__client_id = str(id(self))
         self.__binding_ids: Dict[str, str] = {}
+        self.__prefetch = PickUpPrefetch(max_batch_size)
+        # Dispatcher keeps weak reference to the queue
+        self.__queue = self.__dispatcher.register(self.__client_id)
 
     @property
     def connector(self) -> MediatorConnector:
         return self.__connector
 
+    @property
+    def dispatcher(self) -> MediatorDispatcher:
+        return self.__dispatcher
+
     @property
     def mediator_verkey(self) -> str:
         return self._mediator_verkey
@@ -196,14 +559,7 @@ class MediatorBus(AbstractBus, TunnelMixin):
         return self._my_verkey
 
     async def subscribe(self, thid: str) -> bool:
-        request = BusSubscribeRequest(cast=BusSubscribeRequest.Cast(thid=thid), parent_thread_id=self.__client_id)
-        payload = await self.pack(request)
-        await self.connector.write(payload)
-        jwe = await self.connector.read()
-        resp, _, _ = await self.unpack(jwe)
-        self.__validate(resp, expected_class=BusBindResponse)
-        if resp.thread_id != thid:
-            self.__set_binding_id(thid, resp.binding_id)
+        await self.__subscribe_pipelined([thid])
         return True
 
     async def subscribe_ext(self, sender_vk: List[str], recipient_vk: List[str], protocols: List[str]) -> (bool, List[str]):
@@ -212,40 +568,48 @@ class MediatorBus(AbstractBus, TunnelMixin):
             for _recipient_vk in recipient_vk:
                 for protocol in protocols:
                     thid = self.__binding_id_from_attrs(_sender_vk, _recipient_vk, protocol)
-                    success = await self.subscribe(thid)
-                    if success:
+                    if thid not in binding_id:
                         binding_id.append(thid)
+        if binding_id:
+            await self.__subscribe_pipelined(binding_id)
         return len(binding_id) > 0, binding_id
 
     async def unsubscribe(self, thid: str):
         binding_id = self.__pop_binding_id(thid)
+        self.__prefetch.discard([thid, binding_id or thid])
         request = BusUnsubscribeRequest(
             thread_id=binding_id or thid,
             need_answer=False,  # don't wait response
         )
         payload = await self.pack(request)
-        await self.connector.write(payload)
+        await self.__dispatcher.send(payload)
 
     async def unsubscribe_ext(self, thids: List[str]):
+        actual_binding_ids = []
+        for thid in thids:
+            actual_thid = self.__pop_binding_id(thid) or thid
+            actual_binding_ids.append(actual_thid)
+        self.__prefetch.discard(thids + actual_binding_ids)
         request = BusUnsubscribeRequest(
-            thread_id=thids,
+            thread_id=actual_binding_ids,
             need_answer=False,  # don't wait response
             parent_thread_id=self.__client_id
         )
         payload = await self.pack(request)
-        await self.connector.write(payload)
+        await self.__dispatcher.send(payload)
 
     async def publish(self, thid: str, payload: bytes) -> int:
         binding_id = self.__get_binding_id(thid)
         request = BusPublishRequest(thread_id=binding_id or thid, payload=payload)
         payload = await self.pack(request)
-        await self.connector.write(payload)
-        jwe = await self.connector.read()
-        resp, _, _ = await self.unpack(jwe)
+        resp, = await self.__dispatcher.request((payload, request))
         self.__validate(resp, expected_class=BusPublishResponse)
         return resp.recipients_num
 
     async def get_event(self, timeout: float = None) -> AbstractBus.BytesEvent:
+        event = self.__prefetch.pop()
+        if event is not None:
+            return event
         expire_at = datetime.datetime.now() + datetime.timedelta(seconds=timeout) if timeout is not None else None
 
         def __in_loop__() -> bool:
@@ -261,27 +625,32 @@ class MediatorBus(AbstractBus, TunnelMixin):
                 dt_diff = expire_at - datetime.datetime.now()
                 wait_timeout = dt_diff.total_seconds()
 
-            request = PickUpNoop()
             if wait_timeout is not None:
-                request.timing = PickUpNoop.Timing(delay_milli=math.ceil(wait_timeout * 1000))
+                request = self.__prefetch.make_request(delay_milli=math.ceil(wait_timeout * 1000))
             else:
-                request.timing = PickUpNoop.Timing(delay_milli=5*60 * 1000)  # wait for 5 min by default
+                request = self.__prefetch.make_request(delay_milli=PickUpPrefetch.DEF_POLL_DELAY * 1000)
 
-            request.please_ack = True
             payload = await self.pack(request)
-            await self.connector.write(payload)
-            if timeout is None:
-                read_timeout = None
+            self.__dispatcher.expect(request.id, self.__client_id)
+            await self.__dispatcher.send(payload)
+            if wait_timeout is None:
+                read_timeout = INFINITE_TIMEOUT
             else:
-                read_timeout = 1.1*timeout   # Increase if pickup protocol not raise response
-            jwe = await self.connector.read(read_timeout)
-
-            resp, sender_vk, recip_vk = await self.unpack(jwe)
+                read_timeout = 1.1*wait_timeout   # Increase if pickup protocol not raise response
+            resp, sender_vk, recip_vk, _ = await self.__dispatcher.read(self.__client_id, read_timeout)
             if isinstance(resp, Message):
                 thread = ThreadMixin.get_thread(resp)
                 if thread and ((thread.pthid == self.__client_id) or (thread.thid == request.id)):
                     if isinstance(resp, BusEvent):
                         return AbstractBus.BytesEvent(thread_id=resp.thread_id, payload=resp.payload)
+                    elif isinstance(resp, PickUpBatchResponse):
+                        self.__prefetch.put_batch(resp)
+                        event = self.__prefetch.pop()
+                        if event is not None:
+                            return event
+                        # Server may answer with empty batch without waiting, don't poll it in tight loop
+                        pause = PickUpPrefetch.REPOLL_PAUSE
+                        await asyncio.sleep(pause if wait_timeout is None else min(pause, wait_timeout))
                     elif isinstance(resp, BusBindResponse):
                         if resp.aborted is True and resp.parent_thread_id == self.__client_id:
                             raise OperationAbortedManually('Bus events awaiting was aborted by user')
@@ -293,6 +662,10 @@ class MediatorBus(AbstractBus, TunnelMixin):
                                 raise SiriusTimeoutIO
                             else:
                                 continue
+                        elif resp.problem_code == PickUpProblemReport.PROBLEM_CODE_INVALID_REQ and \
+                                isinstance(request, PickUpBatchRequest):
+                            # Mediator does not support batches
+                            self.__prefetch.disable_batching()
                         else:
                             raise SiriusRPCError(resp.explain)
                 else:
@@ -305,6 +678,7 @@ class MediatorBus(AbstractBus, TunnelMixin):
                 logging.critical('Unexpected bytes received')
                 # fwd, fwd_sender_vk, fwd_recip_vk = await self.unpack(resp)
                 # await self.__raise_bus_message(fwd, resp, fwd_sender_vk, fwd_recip_vk)
+        raise SiriusTimeoutIO
 
     async def get_message(self, timeout: float = None) -> AbstractBus.MessageEvent:
         event = await self.get_event(timeout)
@@ -328,7 +702,44 @@ class MediatorBus(AbstractBus, TunnelMixin):
     async def abort(self):
         request = BusUnsubscribeRequest(parent_thread_id=self.__client_id, aborted=True)
         payload = await self.pack(request)
-        await self.connector.write(payload)
+        await self.__dispatcher.send(payload)
+
+    async def __subscribe_pipelined(self, thids: List[str]):
+        """Write all subscribe requests at once and then read responses, so N subscriptions take single round trip.
+
+        Responses come in order of requests. Bind response echoes subscribed thread id in ~thread.thid,
+        other thread id is binding id allocated by mediator. If pairing is ambiguous (response carries
+        thread id of other request or binding id is shared) requests are repeated one by one
+        """
+        requests = []
+        for thid in thids:
+            request = BusSubscribeRequest(cast=BusSubscribeRequest.Cast(thid=thid), parent_thread_id=self.__client_id)
+            requests.append((await self.pack(request), request))
+        responses = await self.__dispatcher.request(*requests)
+        error = None
+        renamed = {}
+        ambiguous = []
+        for thid, resp in zip(thids, responses):
+            try:
+                self.__validate(resp, expected_class=BusBindResponse)
+            except SiriusRPCError as e:
+                error = error or e
+                continue
+            if resp.thread_id == thid:
+                continue
+            elif resp.thread_id in thids or resp.thread_id in renamed.values():
+                ambiguous.append(thid)
+            else:
+                renamed[thid] = resp.thread_id
+        if error is not None:
+            raise error
+        if len(thids) == 1 or not ambiguous:
+            for thid, binding_id in renamed.items():
+                self.__set_binding_id(thid, binding_id)
+        else:
+            # Sequential subscribe: the only response of the request is its own
+            for thid in thids:
+                await self.__subscribe_pipelined([thid])
 
     @staticmethod
     def __validate(msg: BusOperation, expected_class) -> BusOperation:
@@ -367,12 +778,20 @@ class MediatorListener(TunnelMixin, AbstractListener):
 
     def __init__(
             self, connector: MediatorConnector, my_verkey: Optional[str],
-            mediator_verkey: Optional[str], pairwise_resolver: AbstractPairwiseList = None
+            mediator_verkey: Optional[str], pairwise_resolver: AbstractPairwiseList = None,
+            dispatcher: MediatorDispatcher = None
     ):
+        """
+        :param dispatcher: (optional) reader of connector, listener reads its inbox, allocated if None
+        """
         self.__connector: MediatorConnector = connector
+        self.__dispatcher = dispatcher or MediatorDispatcher(connector, my_verkey, mediator_verkey)
         self.__pairwise_resolver = pairwise_resolver
         self._mediator_verkey = mediator_verkey
         self._my_verkey = my_verkey
+        self.__client_id = str(id(self))
+        # Listener gets own copy of downstream messages, they are not shared with co-protocols
+        self.__inbox = self.__dispatcher.register_inbox(self.__client_id)
 
     @property
     def connector(self) -> MediatorConnector:
@@ -394,8 +813,8 @@ class MediatorListener(TunnelMixin, AbstractListener):
             wait_timeout = INFINITE_TIMEOUT
         else:
             wait_timeout = timeout
-        payload = await self.connector.read(timeout=wait_timeout)
-        message, sender_vk, recip_vk = await self.unpack(payload)
+        self.__inbox = self.__dispatcher.register_inbox(self.__client_id)
+        message, sender_vk, recip_vk, payload = await self.__dispatcher.read(self.__client_id, timeout=wait_timeout)
         if sender_vk is not None and self.__pairwise_resolver is not None:
             p2p = await self.__pairwise_resolver.load_for_verkey(sender_vk)
         else:
@@ -438,11 +857,19 @@ class Mediator(APIRouter, APICoProtocols):
         self.__my_verkey = my_verkey
         self.__mediator_verkey = mediator_verkey
         self.__mediator_label = mediator_label
+        # Connection is read by single dispatcher: buses, co-protocols and listener may work concurrently
+        self._dispatcher = MediatorDispatcher(
+            connector=self._connector,
+            my_verkey=self.__my_verkey,
+            mediator_verkey=self.__mediator_verkey,
+            timeout=self.__timeout
+        )
         self._coprotocol = MediatorCoProtocol(
             connector=self._connector,
             my_verkey=self.__my_verkey,
             mediator_verkey=self.__mediator_verkey,
-            time_to_live=self.__timeout
+            time_to_live=self.__timeout,
+            dispatcher=self._dispatcher
         )
         my_did_bytes = sirius_sdk.encryption.did_from_verkey(
             sirius_sdk.encryption.b58_to_bytes(my_verkey)
@@ -468,6 +895,8 @@ class Mediator(APIRouter, APICoProtocols):
         self.__routing_keys = [qualify_key(key) for key in routing_keys]
         self.__endpoints: List[sirius_sdk.abstract.p2p.Endpoint] = []
         self.__bus: Optional[AbstractBus] = None
+        # Dispatchers of listeners connected to other endpoint than the mediator uri
+        self.__listener_dispatchers: List[MediatorDispatcher] = []
 
     def copy(self) -> "Mediator":
         inst = Mediator(
@@ -498,6 +927,8 @@ class Mediator(APIRouter, APICoProtocols):
             return
         # Run P2P connection establishment according Aries-RFC0160
         if not self._connector.is_open:
+            # Reset dispatcher failed with closed connection
+            await self._dispatcher.close()
             await self._connector.open()
         try:
             self.__is_connected = True
@@ -543,7 +974,8 @@ class Mediator(APIRouter, APICoProtocols):
                     self.__bus = MediatorBus(
                         connector=self._connector,
                         my_verkey=self._coprotocol.my_verkey,
-                        mediator_verkey=self._coprotocol.mediator_verkey
+                        mediator_verkey=self._coprotocol.mediator_verkey,
+                        dispatcher=self._dispatcher
                     )
                 else:
                     raise SiriusRPCError('Error while granting mediate endpoint')
@@ -554,7 +986,12 @@ class Mediator(APIRouter, APICoProtocols):
             raise
 
     async def disconnect(self):
+        for dispatcher in self.__listener_dispatchers:
+            await dispatcher.close()
+            await dispatcher.connector.close()
+        self.__listener_dispatchers.clear()
         if self.__is_connected:
+            await self._dispatcher.close()
             await self._connector.close()
             self.__is_connected = False
             self.__did_doc = None
@@ -564,10 +1001,12 @@ class Mediator(APIRouter, APICoProtocols):
         return self.__endpoints
 
     async def subscribe(self, group_id: str = None) -> AbstractListener:
-        # Re-Open RPC
-        await self._connector.close()
-        await self._connector.open()
-        # Redeclare Group-ID in DIDDoc to re-schedule downstream
+        # Connection is shared with buses via dispatcher, so it is not re-opened:
+        # redeclare Group-ID in DIDDoc to re-schedule downstream
+        if not self._connector.is_open:
+            # Reset dispatcher failed with closed connection
+            await self._dispatcher.close()
+            await self._connector.open()
         success, diddoc = await self.__connect_to_mediator(
             endpoint='ws://',
             group_id=group_id or self.DEFAULT_GROUP_ID
@@ -576,12 +1015,21 @@ class Mediator(APIRouter, APICoProtocols):
             diddoc = DIDDoc(diddoc)
             mediator_services = diddoc.extract_service(high_priority=True, type_='MediatorService')
             uri = mediator_services['serviceEndpoint']
-            conn = MediatorConnector(uri)
-            await conn.open()
+            if uri in [self.__uri, 'ws://']:
+                # Downstream comes over the shared connection, listener reads inbox of the dispatcher
+                dispatcher = self._dispatcher
+            else:
+                conn = MediatorConnector(uri, timeout=self.__timeout)
+                await conn.open()
+                dispatcher = MediatorDispatcher(
+                    connector=conn, my_verkey=None, mediator_verkey=None, timeout=self.__timeout
+                )
+                self.__listener_dispatchers.append(dispatcher)
             listener = MediatorListener(
-                connector=conn,
+                connector=dispatcher.connector,
                 my_verkey=None,
-                mediator_verkey=None
+                mediator_verkey=None,
+                dispatcher=dispatcher
             )
             return listener
         else:
@@ -591,7 +1039,8 @@ class Mediator(APIRouter, APICoProtocols):
         bus = MediatorBus(
             connector=self._connector,
             my_verkey=self._coprotocol.my_verkey,
-            mediator_verkey=self._coprotocol.mediator_verkey
+            mediator_verkey=self._coprotocol.mediator_verkey,
+            dispatcher=self._dispatcher
         )
         return bus
 
@@ -1,9 +1,12 @@
-from sirius_sdk.messaging.message import Message, register_message_class, restore_message_instance
+from sirius_sdk.messaging.message import Message, LazyMessage, register_message_class, restore_message_instance, \
+    register_protocol_module, scan_envelope
 from sirius_sdk.messaging.type import Type
-from sirius_sdk.messaging.validators import validate_common_blocks, check_for_attributes
+from sirius_sdk.messaging.validators import validate_common_blocks, check_for_attributes, MessageValidator, \
+    compiled_validator
 
 
 __all__ = [
-    "Message", "Type", "validate_common_blocks", "check_for_attributes",
-    "register_message_class", "restore_message_instance"
+    "Message", "LazyMessage", "scan_envelope", "Type", "validate_common_blocks", "check_for_attributes",
+    "MessageValidator", "compiled_validator",
+    "register_message_class", "restore_message_instance", "register_protocol_module"
 ]
@@ -1,5 +1,8 @@
-import ipaddress
+import re
 import json
+import datetime
+import ipaddress
+from functools import lru_cache
 from abc import ABCMeta, abstractmethod
 from typing import Optional, Iterable
 
@@ -70,9 +73,8 @@ class FieldBase(FieldValidator, metaclass=ABCMeta):
     def __type_check(self, val):
         if self._base_types is None:
             return  # type check is disabled
-        for t in self._base_types:
-            if isinstance(val, t):
-                return
+        if isinstance(val, self._base_types):
+            return
         return self._wrong_type_msg(val)
 
     def _wrong_type_msg(self, val):
@@ -305,16 +307,26 @@ class MessageField(FieldBase):
                 .format(val, self._message_type.typename, ex)
 
 
+@lru_cache(maxsize=4096)
+def _b58_decoded_length(val: str) -> int:
+    # DIDs and verkeys are repeated from message to message
+    return len(base58.b58decode(val))
+
+
 class Base58Field(FieldBase):
     _base_types = (str,)
     _alphabet = set(base58.alphabet.decode("utf-8"))
+    _invalid_chars_re = re.compile('[^' + re.escape(base58.alphabet.decode("utf-8")) + ']')
 
     def __init__(self, byte_lengths: Optional[Iterable] = None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.byte_lengths = byte_lengths
 
     def _specific_validation(self, val):
-        invalid_chars = set(val) - self._alphabet
+        if self._invalid_chars_re.search(val) is None:
+            invalid_chars = None
+        else:
+            invalid_chars = set(val) - self._alphabet
         if invalid_chars:
             # only 10 chars to shorten the output
             # TODO: Why does it need to be sorted
@@ -323,7 +335,7 @@ class Base58Field(FieldBase):
                 to_print, ' (truncated)' if len(to_print) < len(invalid_chars) else '')
         if self.byte_lengths is not None:
             # TODO could impact performance, need to check
-            b58len = len(base58.b58decode(val))
+            b58len = _b58_decoded_length(val)
             if b58len not in self.byte_lengths:
                 return 'b58 decoded value length {} should be one of {}' \
                     .format(b58len, list(self.byte_lengths))
@@ -397,9 +409,36 @@ class TimestampField(FieldBase):
                 format(self._oldest_time, val)
 
 
+# Common ISO-8601 formats datetime.fromisoformat() parses on all supported Python versions
+_STRICT_ISO_DATETIME = re.compile(
+    r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d{3}(\d{3})?)?)?(Z|[+-]\d{2}:\d{2})?'
+)
+
+
+def parse_strict_iso_datetime(val: str) -> Optional[datetime.datetime]:
+    """Fast parser of common ISO-8601 datetime formats
+
+    :return: None if value has other format or out of range, use flexible parser then
+    """
+    if _STRICT_ISO_DATETIME.fullmatch(val):
+        if val[-1] == 'Z':
+            val = val[:-1] + '+00:00'
+        try:
+            return datetime.datetime.fromisoformat(val)
+        except ValueError:
+            return None
+    return None
+
+
+@lru_cache(maxsize=4096)
+def isoparse(val: str) -> datetime.datetime:
+    """dateutil.parser.isoparse with fast path for common formats, parsed values are cached"""
+    return parse_strict_iso_datetime(val) or dateutil.parser.isoparse(val)
+
+
 class ISODatetimeStringField(FieldBase):
     _base_types = (str,)
-    parse_func = dateutil.parser.isoparse
+    parse_func = staticmethod(isoparse)
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -487,11 +526,11 @@ class DIDField(FieldBase):
 
     _base_types = (str,)
     _valid_domains = ['sov', 'peer']
+    _validator = Base58Field(byte_lengths=(16,))
 
     def _specific_validation(self, val):
         did_parts = val.split(':')
         if len(did_parts) == 3 and did_parts[0] == 'did' and did_parts[1] in self._valid_domains:
-            validator = Base58Field(byte_lengths=(16,))
-            if not validator.validate(did_parts[2]):
+            if not self._validator.validate(did_parts[2]):
                 return None
         return 'Invalid DID {}'.format(val)
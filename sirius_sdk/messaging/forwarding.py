@@ -1,7 +1,7 @@
-import json
 import uuid
 from typing import Optional
 
+from sirius_sdk import codec
 from sirius_sdk.abstract.api import APICrypto
 from sirius_sdk.encryption import pack_message as default_pack_message_util, b58_to_bytes
 
@@ -31,17 +31,17 @@ async def forward_wired(
             '@id': uuid.uuid4().hex,
             '@type': FORWARD,
             'to': inner_key,
-            'msg': json.loads(payload.decode(ENCODING))
+            'msg': codec.loads(payload)
         }
         if my_vk:
             payload = await crypto.pack_message(
-                json.dumps(forwarded),
+                codec.dumps(forwarded),
                 recipient_verkeys=[outer_key],
                 sender_verkey=my_vk
             )
         else:
             payload = default_pack_message_util(
-                message=json.dumps(forwarded),
+                message=codec.dumpb(forwarded),
                 to_verkeys=[outer_key_bytes]
             )
     return payload
@@ -3,15 +3,37 @@
 https://github.com/hyperledger/aries-rfcs/tree/master/concepts/0020-message-types
 https://github.com/hyperledger/aries-rfcs/tree/master/concepts/0008-message-id-and-threading
 """
+import re
 import json
 import uuid
+import importlib
+from json.decoder import scanstring
+from typing import Iterable, Union
 
+from sirius_sdk import codec
 from sirius_sdk.errors.exceptions import *
 from sirius_sdk.messaging.type import Type, Semver
 
 
 # Registry for restoring message instance from payload
 MSG_REGISTRY = {}
+# Modules that register message classes of the protocol, imported by restore_message_instance
+# when protocol is not in MSG_REGISTRY yet
+PROTOCOL_MODULES = {
+    'notification': 'sirius_sdk.agent.aries_rfc.feature_0015_acks',
+    'issue-credential': 'sirius_sdk.agent.aries_rfc.feature_0036_issue_credential',
+    'present-proof': 'sirius_sdk.agent.aries_rfc.feature_0037_present_proof',
+    'trust_ping': 'sirius_sdk.agent.aries_rfc.feature_0048_trust_ping',
+    'basicmessage': 'sirius_sdk.agent.aries_rfc.feature_0095_basic_message',
+    'questionanswer': 'sirius_sdk.agent.aries_rfc.feature_0113_question_answer',
+    'connections': 'sirius_sdk.agent.aries_rfc.feature_0160_connection_protocol',
+    'coordinate-mediation': 'sirius_sdk.agent.aries_rfc.feature_0211_mediator_coordination_protocol',
+    'messagepickup': 'sirius_sdk.agent.aries_rfc.feature_0212_pickup',
+    'coprotocol': 'sirius_sdk.agent.aries_rfc.feature_0482_coprotocol',
+    'storage': 'sirius_sdk.agent.aries_rfc.feature_0750_storage',
+    'bus': 'sirius_sdk.agent.aries_rfc.feature_0753_bus',
+    'simple-consensus': 'sirius_sdk.agent.consensus.simple.messages',
+}
 
 
 def generate_id():
@@ -87,16 +109,20 @@ class Message(dict):
 
     # Serialization
     @classmethod
-    def deserialize(cls, serialized: str):
-        """ Deserialize a message from a json string. """
+    def deserialize(cls, serialized: Union[str, bytes]):
+        """ Deserialize a message from a json string or UTF-8 bytes. """
         try:
-            return cls(json.loads(serialized))
+            return cls(codec.loads(serialized))
         except json.decoder.JSONDecodeError as err:
             raise SiriusInvalidMessage('Could not deserialize message') from err
 
-    def serialize(self):
+    def serialize(self) -> str:
         """ Serialize a message into a json string. """
-        return json.dumps(self)
+        return codec.dumps(self)
+
+    def serialize_bytes(self) -> bytes:
+        """ Serialize a message into UTF-8 encoded json. """
+        return codec.dumpb(self)
 
     def pretty_print(self):
         """ return a 'pretty print' representation of this message. """
@@ -112,6 +138,227 @@ class Message(dict):
         return hash(self.id)
 
 
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_SCALAR_END = re.compile(r'[,}\]\s]')
+_DECODER = json.JSONDecoder()
+
+
+def _skip_value(raw: str, pos: int) -> int:
+    ch = raw[pos:pos + 1]
+    if ch == '"':
+        _, pos = scanstring(raw, pos + 1)
+        return pos
+    if ch in ('{', '['):
+        depth = 0
+        while True:
+            m = _STRUCTURE.search(raw, pos)
+            if m is None:
+                raise SiriusInvalidMessage('Unexpected end of message')
+            token = m.group()
+            if token == '"':
+                _, pos = scanstring(raw, m.end())
+                continue
+            pos = m.end()
+            depth += 1 if token in ('{', '[') else -1
+            if depth == 0:
+                return pos
+    m = _SCALAR_END.search(raw, pos)
+    return m.start() if m else len(raw)
+
+
+def scan_envelope(raw: str, fields: Iterable[str]) -> dict:
+    """Decode values of top-level fields only, other values are skipped without decoding
+
+    Scan stops as soon as all fields are found, so structure of the rest of message is not checked
+
+    :param raw: JSON object
+    :param fields: names of top-level fields
+    :return: field name -> value for fields that are present
+    """
+    fields = set(fields)
+    found = {}
+    try:
+        pos = _WHITESPACE.match(raw, 0).end()
+        if raw[pos:pos + 1] != '{':
+            raise SiriusInvalidMessage('Message must be JSON object')
+        pos = _WHITESPACE.match(raw, pos + 1).end()
+        if raw[pos:pos + 1] == '}':
+            return found
+        while True:
+            if raw[pos:pos + 1] != '"':
+                raise SiriusInvalidMessage('Expected field name')
+            key, pos = scanstring(raw, pos + 1)
+            pos = _WHITESPACE.match(raw, pos).end()
+            if raw[pos:pos + 1] != ':':
+                raise SiriusInvalidMessage('Expected ":" delimiter')
+            pos = _WHITESPACE.match(raw, pos + 1).end()
+            if key in fields:
+                found[key], pos = _DECODER.raw_decode(raw, pos)
+                if len(found) == len(fields):
+                    return found
+            else:
+                pos = _skip_value(raw, pos)
+            pos = _WHITESPACE.match(raw, pos).end()
+            ch = raw[pos:pos + 1]
+            if ch == '}':
+                return found
+            if ch != ',':
+                raise SiriusInvalidMessage('Expected "," delimiter')
+            pos = _WHITESPACE.match(raw, pos + 1).end()
+    except (json.JSONDecodeError, ValueError) as err:
+        raise SiriusInvalidMessage('Could not deserialize message') from err
+
+
+class LazyMessage(Message):
+    """ Message view that decodes envelope fields only: @type, @id and ~thread.
+        Message body is decoded on first access to any other field, so routing and filtering
+        by type or thread does not pay for decoding of large bodies (attachments etc.)
+
+        Malformed body raises SiriusInvalidMessage on first access to body.
+    """
+    __slots__ = (
+        '_raw',
+        '_raw_has_id'
+    )
+
+    ENVELOPE = ('@type', '@id', '~thread')
+
+    def __init__(self, raw: Union[str, bytes], envelope: dict = None):
+        """
+        :param raw: serialized message
+        :param envelope: (optional) top-level fields already extracted with scan_envelope
+        """
+        if isinstance(raw, (bytes, bytearray)):
+            raw = raw.decode('utf-8')
+        if envelope is None:
+            envelope = scan_envelope(raw, self.ENVELOPE)
+        envelope = {k: v for k, v in envelope.items() if k in self.ENVELOPE}
+        self._raw = raw
+        self._raw_has_id = '@id' in envelope
+        if not self._raw_has_id:
+            envelope['@id'] = generate_id()
+        super().__init__(envelope)
+
+    @property
+    def is_materialized(self) -> bool:
+        return self._raw is None
+
+    def materialize(self) -> 'LazyMessage':
+        """ Decode message body """
+        raw = self._raw
+        if raw is not None:
+            try:
+                body = codec.loads(raw)
+            except json.decoder.JSONDecodeError as err:
+                raise SiriusInvalidMessage('Could not deserialize message') from err
+            msg_id = dict.__getitem__(self, '@id')
+            self._raw = None
+            dict.clear(self)
+            dict.update(self, body)
+            if not self._raw_has_id:
+                dict.__setitem__(self, '@id', msg_id)
+        return self
+
+    def serialize(self) -> str:
+        if self._raw is not None and self._raw_has_id:
+            # Message was not changed
+            return self._raw
+        self.materialize()
+        return super().serialize()
+
+    def serialize_bytes(self) -> bytes:
+        if self._raw is not None and self._raw_has_id:
+            return self._raw.encode('utf-8')
+        self.materialize()
+        return super().serialize_bytes()
+
+    def __getitem__(self, key):
+        if key not in self.ENVELOPE:
+            self.materialize()
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        if key not in self.ENVELOPE:
+            self.materialize()
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        if key not in self.ENVELOPE:
+            self.materialize()
+        return super().__contains__(key)
+
+    def __setitem__(self, key, value):
+        self.materialize()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.materialize()
+        super().__delitem__(key)
+
+    def __iter__(self):
+        self.materialize()
+        return super().__iter__()
+
+    def __len__(self):
+        self.materialize()
+        return super().__len__()
+
+    def __repr__(self):
+        self.materialize()
+        return super().__repr__()
+
+    def __eq__(self, other):
+        self.materialize()
+        if isinstance(other, LazyMessage):
+            other.materialize()
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __reduce__(self):
+        # Restored as regular message
+        self.materialize()
+        return Message, (dict(super().items()),)
+
+    def keys(self):
+        self.materialize()
+        return super().keys()
+
+    def values(self):
+        self.materialize()
+        return super().values()
+
+    def items(self):
+        self.materialize()
+        return super().items()
+
+    def copy(self):
+        self.materialize()
+        return super().copy()
+
+    def pop(self, *args):
+        self.materialize()
+        return super().pop(*args)
+
+    def popitem(self):
+        self.materialize()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self.materialize()
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self.materialize()
+        return super().update(*args, **kwargs)
+
+    def clear(self):
+        self._raw = None
+        super().clear()
+
+
 def register_message_class(cls, protocol: str, name: str=None):
     if issubclass(cls, Message):
         descriptor = MSG_REGISTRY.get(protocol, {})
@@ -124,10 +371,18 @@ def register_message_class(cls, protocol: str, name: str=None):
         raise SiriusInvalidMessageClass()
 
 
+def register_protocol_module(protocol: str, module: str):
+    """Declare module that registers message classes of the protocol, so it is imported on demand"""
+    PROTOCOL_MODULES[protocol] = module
+
+
 def restore_message_instance(payload: dict) -> (bool, Message):
     if '@type' in payload:
         typ = Type.from_str(payload['@type'])
         descriptor = MSG_REGISTRY.get(typ.protocol, None)
+        if descriptor is None and typ.protocol in PROTOCOL_MODULES:
+            importlib.import_module(PROTOCOL_MODULES[typ.protocol])
+            descriptor = MSG_REGISTRY.get(typ.protocol, None)
         if descriptor:
             if typ.name in descriptor:
                 cls = descriptor[typ.name]
@@ -0,0 +1,414 @@
+import time
+import heapq
+import random
+import sqlite3
+import asyncio
+import logging
+import itertools
+from enum import Enum
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from sirius_sdk.messaging.transport import EndpointTransport
+
+
+class CircuitBreaker:
+    """Stops delivery attempts to endpoint that fails continuously
+
+    Breaker opens after failure_threshold consecutive failures, while it is open nothing is sent.
+    When reset_timeout expires breaker is half-open: single trial delivery is allowed,
+    it closes breaker on success and opens it again on failure.
+    """
+
+    class State(Enum):
+        CLOSED = 'closed'
+        OPEN = 'open'
+        HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        """
+        :param failure_threshold: (optional) count of consecutive failures to open breaker
+        :param reset_timeout: (optional) seconds to wait before trial delivery
+        """
+        self.__failure_threshold = failure_threshold
+        self.__reset_timeout = reset_timeout
+        self.__failures = 0
+        self.__opened_at: Optional[float] = None
+        self.__trial = False
+
+    @property
+    def state(self) -> 'CircuitBreaker.State':
+        if self.__opened_at is None:
+            return CircuitBreaker.State.CLOSED
+        if self.__trial or time.monotonic() - self.__opened_at >= self.__reset_timeout:
+            return CircuitBreaker.State.HALF_OPEN
+        return CircuitBreaker.State.OPEN
+
+    @property
+    def retry_after(self) -> Optional[float]:
+        """Seconds to wait until delivery is allowed, None if it is waiting for trial result"""
+        state = self.state
+        if state == CircuitBreaker.State.CLOSED:
+            return 0
+        if self.__trial:
+            return None
+        return max(0.0, self.__opened_at + self.__reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Check delivery is allowed, in half-open state the call acquires trial"""
+        state = self.state
+        if state == CircuitBreaker.State.CLOSED:
+            return True
+        if state == CircuitBreaker.State.HALF_OPEN and not self.__trial:
+            self.__trial = True
+            return True
+        return False
+
+    def success(self):
+        self.__failures = 0
+        self.__opened_at = None
+        self.__trial = False
+
+    def failure(self):
+        self.__failures += 1
+        if self.__trial or self.__failures >= self.__failure_threshold:
+            self.__opened_at = time.monotonic()
+        self.__trial = False
+
+
+@dataclass
+class OutboundItem:
+    id: int
+    endpoint: str
+    payload: bytes
+    content_type: str
+    priority: int = 0
+    attempts: int = 0
+    last_error: Optional[str] = None
+
+
+@dataclass
+class SpoolStats:
+    queued: int = 0
+    in_flight: int = 0
+    retrying: int = 0
+    delivered: int = 0
+    failed: int = 0  # failed attempts
+    dead: int = 0
+    breaker: CircuitBreaker.State = CircuitBreaker.State.CLOSED
+
+
+class _EndpointLane:
+
+    def __init__(self, breaker: CircuitBreaker):
+        # Heap of (-priority, id, item): higher priority first, FIFO for equal priorities
+        self.heap: List[Tuple[int, int, OutboundItem]] = []
+        self.breaker = breaker
+        self.stats = SpoolStats()
+        self.wake_up: Optional[asyncio.TimerHandle] = None
+
+    def push(self, item: OutboundItem):
+        heapq.heappush(self.heap, (-item.priority, item.id, item))
+        self.stats.queued = len(self.heap)
+
+    def pop(self) -> OutboundItem:
+        _, _, item = heapq.heappop(self.heap)
+        self.stats.queued = len(self.heap)
+        return item
+
+
+class OutboundSpool:
+    """Outbound messages queue with retries
+
+    - put() returns as soon as message is queued (and written to spool file if path is set),
+      delivery runs in background
+    - failed delivery is retried with exponential backoff, message is moved to dead letters
+      after max_attempts failures, see dead_letters()
+    - every endpoint has own queue, concurrency cap and circuit breaker, so dead or slow
+      endpoint does not affect delivery to healthy ones
+    - messages of higher priority are sent first
+
+    Spool file is SQLite database, messages not delivered before close() or process crash
+    are restored on next start, so delivery is at-least-once. Closed spool is reopened by start() and put().
+    Plug spool to hub, hub starts it on open and closes it on close:
+
+        spool = OutboundSpool(path='/var/lib/agent/outbound.db')
+        cfg = sirius_sdk.Config().override_transport(APIDefault(spool=spool))
+    """
+
+    DEF_MAX_ATTEMPTS = 8
+    DEF_BACKOFF_BASE = 0.5  # seconds
+    DEF_BACKOFF_MAX = 60  # seconds
+    DEF_CONCURRENCY_PER_ENDPOINT = 8
+    DEF_TIMEOUT = 30  # seconds
+
+    SCHEMA = 'CREATE TABLE IF NOT EXISTS outbound (' \
+             'id INTEGER PRIMARY KEY AUTOINCREMENT, endpoint TEXT NOT NULL, content_type TEXT NOT NULL, ' \
+             'priority INTEGER NOT NULL, attempts INTEGER NOT NULL, payload BLOB NOT NULL, ' \
+             'dead INTEGER NOT NULL DEFAULT 0, last_error TEXT' \
+             ')'
+    SQL_INSERT = 'INSERT INTO outbound (endpoint, content_type, priority, attempts, payload) VALUES (?, ?, ?, 0, ?)'
+    SQL_DELETE = 'DELETE FROM outbound WHERE id = ?'
+    SQL_UPDATE = 'UPDATE outbound SET attempts = ?, last_error = ?, dead = ? WHERE id = ?'
+    SQL_ITEMS = 'SELECT id, endpoint, payload, content_type, priority, attempts, last_error ' \
+                'FROM outbound WHERE dead = ? ORDER BY id'
+    SQL_PURGE_DEAD = 'DELETE FROM outbound WHERE dead = 1'
+
+    def __init__(
+            self, transport: EndpointTransport = None, path: str = None,
+            max_attempts: int = DEF_MAX_ATTEMPTS, backoff_base: float = DEF_BACKOFF_BASE,
+            backoff_max: float = DEF_BACKOFF_MAX, concurrency_per_endpoint: int = DEF_CONCURRENCY_PER_ENDPOINT,
+            failure_threshold: int = 5, reset_timeout: float = 30, timeout: float = DEF_TIMEOUT
+    ):
+        """
+        :param transport: (optional) transport to deliver messages
+        :param path: (optional) spool database file path, messages are kept in memory only if None
+        :param max_attempts: (optional) count of delivery attempts before message is moved to dead letters
+        :param backoff_base: (optional) delay (in seconds) before first retry, it is doubled for every next one
+        :param backoff_max: (optional) max delay (in seconds) between retries
+        :param concurrency_per_endpoint: (optional) max count of simultaneous deliveries to endpoint
+        :param failure_threshold: (optional) count of consecutive endpoint failures to open circuit breaker
+        :param reset_timeout: (optional) seconds to wait before trial delivery to endpoint with open breaker
+        :param timeout: (optional) delivery attempt timeout in seconds
+        """
+        self.__transport = transport or EndpointTransport()
+        self.__own_transport = transport is None
+        self.__max_attempts = max_attempts
+        self.__backoff_base = backoff_base
+        self.__backoff_max = backoff_max
+        self.__concurrency = concurrency_per_endpoint
+        self.__failure_threshold = failure_threshold
+        self.__reset_timeout = reset_timeout
+        self.__timeout = timeout
+        self.__lanes: Dict[str, _EndpointLane] = {}
+        self.__tasks: Set[asyncio.Future] = set()
+        self.__retries: Set[asyncio.TimerHandle] = set()
+        self.__dead: List[OutboundItem] = []
+        self.__pending = 0
+        self.__idle: Optional[asyncio.Event] = None
+        self.__started = False
+        self.__ids = itertools.count(1)
+        self.__path = path
+        self.__conn: Optional[sqlite3.Connection] = None
+        self.__open()
+
+    @property
+    def pending(self) -> int:
+        """Count of messages not delivered yet: queued, in flight and waiting for retry"""
+        return self.__pending
+
+    def stats(self, endpoint: str = None) -> Dict[str, SpoolStats]:
+        """Delivery stats per endpoint
+
+        :param endpoint: (optional) stats of specific endpoint only
+        """
+        if endpoint is None:
+            lanes = list(self.__lanes.items())
+        else:
+            lanes = [(endpoint, self.__lanes[endpoint])] if endpoint in self.__lanes else []
+        result = {}
+        for address, lane in lanes:
+            lane.stats.breaker = lane.breaker.state
+            result[address] = lane.stats
+        return result
+
+    def dead_letters(self) -> List[OutboundItem]:
+        """Messages not delivered in max_attempts attempts"""
+        if self.__conn is not None:
+            return self.__load(dead=True)
+        return list(self.__dead)
+
+    def purge_dead(self):
+        self.__dead.clear()
+        if self.__conn is not None:
+            self.__conn.execute(self.SQL_PURGE_DEAD)
+
+    async def start(self):
+        """Resume delivery of messages restored from spool file, put() and join() call it implicitly"""
+        if self.__started:
+            return
+        self.__open()
+        self.__started = True
+        for lane in list(self.__lanes.values()):
+            self.__pump(lane)
+
+    async def put(
+            self, payload: bytes, endpoint: str, content_type: str = 'application/ssi-agent-wire', priority: int = 0
+    ) -> int:
+        """Queue message for delivery
+
+        :param payload: message bytes
+        :param endpoint: endpoint address
+        :param content_type: (optional) HTTP content type
+        :param priority: (optional) messages of higher priority are sent first
+        :return: message id
+        """
+        if '://' not in endpoint:
+            raise ValueError('Expected scheme in address: %s' % endpoint)
+        # Messages restored from spool file go first
+        await self.start()
+        if self.__conn is not None:
+            cursor = self.__conn.execute(self.SQL_INSERT, (endpoint, content_type, priority, payload))
+            msg_id = cursor.lastrowid
+        else:
+            msg_id = next(self.__ids)
+        item = OutboundItem(id=msg_id, endpoint=endpoint, payload=payload, content_type=content_type, priority=priority)
+        lane = self.__get_lane(endpoint)
+        lane.push(item)
+        self.__pending += 1
+        if self.__idle is not None:
+            self.__idle.clear()
+        self.__pump(lane)
+        return msg_id
+
+    async def join(self, timeout: float = None) -> bool:
+        """Wait until all queued messages are delivered or moved to dead letters
+
+        :param timeout: (optional) seconds to wait
+        :return: False if timeout expired
+        """
+        await self.start()
+        if self.__idle is None:
+            self.__idle = asyncio.Event()
+        if self.__pending == 0:
+            self.__idle.set()
+        try:
+            await asyncio.wait_for(self.__idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def close(self):
+        """Stop delivery, not delivered messages stay in spool file and are restored when spool is reopened"""
+        self.__started = False
+        for handle in self.__retries:
+            handle.cancel()
+        self.__retries.clear()
+        for lane in self.__lanes.values():
+            if lane.wake_up is not None:
+                lane.wake_up.cancel()
+                lane.wake_up = None
+        tasks = list(self.__tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self.__own_transport:
+            await self.__transport.close()
+        if self.__conn is not None:
+            self.__conn.close()
+            self.__conn = None
+            # Queues are restored from spool file on reopen
+            for lane in self.__lanes.values():
+                lane.heap.clear()
+                lane.stats.queued = lane.stats.in_flight = lane.stats.retrying = 0
+            self.__pending = 0
+
+    def __open(self):
+        if self.__path is None or self.__conn is not None:
+            return
+        self.__conn = sqlite3.connect(self.__path, isolation_level=None, check_same_thread=False)
+        self.__conn.execute('PRAGMA journal_mode=WAL')
+        self.__conn.execute('PRAGMA synchronous=NORMAL')
+        self.__conn.execute(self.SCHEMA)
+        for item in self.__load(dead=False):
+            self.__get_lane(item.endpoint).push(item)
+            self.__pending += 1
+        if self.__pending and self.__idle is not None:
+            self.__idle.clear()
+
+    def __get_lane(self, endpoint: str) -> _EndpointLane:
+        lane = self.__lanes.get(endpoint)
+        if lane is None:
+            lane = _EndpointLane(CircuitBreaker(self.__failure_threshold, self.__reset_timeout))
+            self.__lanes[endpoint] = lane
+        return lane
+
+    def __pump(self, lane: _EndpointLane):
+        while lane.heap and lane.stats.in_flight < self.__concurrency:
+            if not lane.breaker.allow():
+                retry_after = lane.breaker.retry_after
+                # None: trial delivery is running, its completion pumps lane again
+                if retry_after is not None and lane.wake_up is None:
+                    lane.wake_up = asyncio.get_event_loop().call_later(retry_after, self.__wake_up, lane)
+                return
+            item = lane.pop()
+            lane.stats.in_flight += 1
+            task = asyncio.ensure_future(self.__deliver(lane, item))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+    def __wake_up(self, lane: _EndpointLane):
+        lane.wake_up = None
+        if self.__started:
+            self.__pump(lane)
+
+    async def __deliver(self, lane: _EndpointLane, item: OutboundItem):
+        error = None
+        try:
+            ok, body = await self.__transport.send(item.payload, item.endpoint, self.__timeout, item.content_type)
+            if not ok:
+                error = body or 'delivery failed'
+        except asyncio.CancelledError:
+            # Spool is closing, message stays in spool file
+            raise
+        except Exception as e:
+            error = repr(e) or e.__class__.__name__
+        lane.stats.in_flight -= 1
+        if error is None:
+            lane.breaker.success()
+            lane.stats.delivered += 1
+            if self.__conn is not None:
+                self.__conn.execute(self.SQL_DELETE, (item.id,))
+            self.__done()
+        else:
+            lane.breaker.failure()
+            lane.stats.failed += 1
+            item.attempts += 1
+            item.last_error = error
+            if item.attempts >= self.__max_attempts:
+                logging.warning(f'OutboundSpool: message to {item.endpoint} was not delivered: {error}')
+                lane.stats.dead += 1
+                if self.__conn is not None:
+                    self.__conn.execute(self.SQL_UPDATE, (item.attempts, error, 1, item.id))
+                else:
+                    self.__dead.append(item)
+                self.__done()
+            else:
+                if self.__conn is not None:
+                    self.__conn.execute(self.SQL_UPDATE, (item.attempts, error, 0, item.id))
+                lane.stats.retrying += 1
+                self.__schedule_retry(lane, item)
+        self.__pump(lane)
+
+    def __schedule_retry(self, lane: _EndpointLane, item: OutboundItem):
+        delay = min(self.__backoff_max, self.__backoff_base * 2 ** (item.attempts - 1))
+        # Jitter: retries of messages failed at the same moment are spread in time
+        delay *= random.uniform(0.5, 1.0)
+        handle: Optional[asyncio.TimerHandle] = None
+
+        def retry():
+            self.__retries.discard(handle)
+            lane.stats.retrying -= 1
+            lane.push(item)
+            self.__pump(lane)
+
+        handle = asyncio.get_event_loop().call_later(delay, retry)
+        self.__retries.add(handle)
+
+    def __done(self):
+        self.__pending -= 1
+        if self.__pending == 0 and self.__idle is not None:
+            self.__idle.set()
+
+    def __load(self, dead: bool) -> List[OutboundItem]:
+        items = []
+        for row in self.__conn.execute(self.SQL_ITEMS, (1 if dead else 0,)):
+            msg_id, endpoint, payload, content_type, priority, attempts, last_error = row
+            items.append(
+                OutboundItem(
+                    id=msg_id, endpoint=endpoint, payload=bytes(payload), content_type=content_type,
+                    priority=priority, attempts=attempts, last_error=last_error
+                )
+            )
+        return items
@@ -1,27 +1,176 @@
+import time
 import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional
 
 import aiohttp
 
 
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    errors: int = 0
+    total_latency: float = 0.0  # seconds
+    max_latency: float = 0.0  # seconds
+    last_error: Optional[str] = None
+
+    @property
+    def avg_latency(self) -> Optional[float]:
+        if self.requests == 0:
+            return None
+        return self.total_latency / self.requests
+
+    def register(self, latency: float, error: str = None):
+        self.requests += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        if error is not None:
+            self.errors += 1
+            self.last_error = error
+
+
+class WebSocketLink:
+    """Single WebSocket connection to endpoint shared by concurrent senders
+
+    Messages are queued and written by single writer task, connection is (re)established
+    by writer only, so concurrent senders never open duplicate connections.
+    Writer closes connection and exits when link is idle for idle_timeout seconds.
+    """
+
+    def __init__(self, endpoint: str, session: aiohttp.ClientSession, idle_timeout: float):
+        self.__endpoint = endpoint
+        self.__session = session
+        self.__idle_timeout = idle_timeout
+        self.__ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self.__queue: asyncio.Queue = asyncio.Queue()
+        self.__writer: Optional[asyncio.Task] = None
+
+    @property
+    def endpoint(self) -> str:
+        return self.__endpoint
+
+    @property
+    def is_alive(self) -> bool:
+        """Writer is running or link has messages to send"""
+        return (self.__writer is not None and not self.__writer.done()) or not self.__queue.empty()
+
+    @property
+    def is_connected(self) -> bool:
+        return self.__ws is not None and not self.__ws.closed
+
+    async def send(self, msg: bytes, timeout: float):
+        fut = asyncio.get_event_loop().create_future()
+        self.__queue.put_nowait((msg, timeout, fut))
+        if self.__writer is None or self.__writer.done():
+            self.__writer = asyncio.ensure_future(self.__write_loop())
+        await asyncio.wait_for(fut, timeout=timeout)
+
+    async def close(self):
+        if self.__writer is not None:
+            self.__writer.cancel()
+            try:
+                await self.__writer
+            except asyncio.CancelledError:
+                pass
+            self.__writer = None
+        await self.__disconnect()
+        while not self.__queue.empty():
+            _, _, fut = self.__queue.get_nowait()
+            if not fut.done():
+                fut.set_exception(aiohttp.ClientConnectionError('Link was closed'))
+
+    async def __write_loop(self):
+        while True:
+            try:
+                if self.__queue.empty():
+                    msg, timeout, fut = await asyncio.wait_for(self.__queue.get(), timeout=self.__idle_timeout)
+                else:
+                    # Burst of messages: don't pay for idle timer per message
+                    msg, timeout, fut = self.__queue.get_nowait()
+            except asyncio.TimeoutError:
+                # Idle eviction
+                await self.__disconnect()
+                if self.__queue.empty():
+                    return
+                continue
+            if fut.done():
+                # Sender timed out
+                continue
+            try:
+                if not self.is_connected:
+                    self.__ws = await asyncio.wait_for(self.__session.ws_connect(url=self.__endpoint), timeout=timeout)
+                await self.__ws.send_bytes(msg)
+            except asyncio.CancelledError:
+                fut.cancel()
+                raise
+            except Exception as e:
+                await self.__disconnect()
+                if not fut.done():
+                    fut.set_exception(e)
+            else:
+                if not fut.done():
+                    fut.set_result(True)
+
+    async def __disconnect(self):
+        ws, self.__ws = self.__ws, None
+        if ws is not None and not ws.closed:
+            await ws.close()
+
+
 class EndpointTransport:
+    """Outbound connections manager
 
-    def __init__(self, keepalive_timeout: float = 15):
-        self.__keep_alive_connector = aiohttp.TCPConnector(
-            ssl=False,  # Do not verify SSL due to all messages encrypted
-            use_dns_cache=False,
-            limit=0,  # No connections limit
-            keepalive_timeout=keepalive_timeout
-        )
-        self.__websockets = {}
+    - HTTP requests share keep-alive connections pool, connections count per host is limited
+      and resolved addresses are cached for dns_ttl seconds
+    - WebSocket endpoint is served by single shared connection, see WebSocketLink
+    - latency and errors are counted per endpoint, see stats()
+    """
+
+    DEF_LIMIT_PER_HOST = 32
+    DEF_DNS_TTL = 60  # seconds
+    DEF_WS_IDLE_TIMEOUT = 60  # seconds
+
+    def __init__(
+            self, keepalive_timeout: float = 15, limit_per_host: int = DEF_LIMIT_PER_HOST,
+            dns_ttl: Optional[float] = DEF_DNS_TTL, ws_idle_timeout: float = DEF_WS_IDLE_TIMEOUT
+    ):
+        """
+        :param keepalive_timeout: (optional) seconds to keep idle HTTP connection
+        :param limit_per_host: (optional) max count of simultaneous HTTP connections to the same host, 0 - no limit
+        :param dns_ttl: (optional) seconds to cache resolved addresses, None - cache forever
+        :param ws_idle_timeout: (optional) seconds to keep idle WebSocket connection
+        """
+        self.__keepalive_timeout = keepalive_timeout
+        self.__limit_per_host = limit_per_host
+        self.__dns_ttl = dns_ttl
+        self.__ws_idle_timeout = ws_idle_timeout
+        # Session is bound to event loop, so it is allocated on first request
+        self.__session: Optional[aiohttp.ClientSession] = None
+        self.__websockets: Dict[str, WebSocketLink] = {}
+        self.__stats: Dict[str, EndpointStats] = {}
 
     def __del__(self):
-        loop = asyncio.get_event_loop()
-        if self.__websockets:
-            if loop:
-                if loop.is_running():
-                    loop.create_task(self.close())
-                else:
-                    loop.run_until_complete(self.close())
+        session = self.__session
+        if session is not None and not session.closed:
+            try:
+                loop = asyncio.get_event_loop()
+            except RuntimeError:
+                return
+            if loop.is_running():
+                loop.create_task(self.close())
+            elif not loop.is_closed():
+                loop.run_until_complete(self.close())
+
+    def stats(self, endpoint: str = None) -> Dict[str, EndpointStats]:
+        """Latency and errors per endpoint
+
+        :param endpoint: (optional) stats of specific endpoint only
+        """
+        if endpoint is not None:
+            stat = self.__stats.get(endpoint)
+            return {endpoint: stat} if stat is not None else {}
+        return dict(self.__stats)
 
     async def send(
             self, msg: bytes, endpoint: str, timeout: float, content_type='application/ssi-agent-wire'
@@ -42,35 +191,69 @@ class EndpointTransport:
     ) -> (bool, bytes):
         tm = aiohttp.ClientTimeout(total=timeout)
         headers = {'content-type': content_type}
-        request = aiohttp.request(
-            'post', endpoint, data=msg, headers=headers, connector=self.__keep_alive_connector, timeout=tm
-        )
-        async with request as resp:
-            body = await resp.read()
-            if resp.status in [200, 202]:
-                return True, body
-            else:
-                return False, body
+        session = self.__get_session()
+        stamp = time.monotonic()
+        error = None
+        try:
+            async with session.post(endpoint, data=msg, headers=headers, timeout=tm) as resp:
+                body = await resp.read()
+                if resp.status in [200, 202]:
+                    return True, body
+                else:
+                    error = f'HTTP status {resp.status}'
+                    return False, body
+        except Exception as e:
+            error = repr(e)
+            raise
+        finally:
+            self.__register(endpoint, stamp, error)
 
     async def ws_send(self, msg: bytes, endpoint: str, timeout: float):
-        tup = self.__websockets.pop(endpoint, None)
-        if tup is None:
-            tm = aiohttp.ClientTimeout(total=timeout)
-            session = aiohttp.ClientSession(timeout=tm)
-            ws = await session.ws_connect(url=endpoint)
-            self.__websockets[endpoint] = (ws, session)
-        else:
-            ws, session = tup
-            if ws.closed:
-                ws = session.ws_connect(url=endpoint)
-        await ws.send_bytes(msg)
-        self.__websockets[endpoint] = (ws, session)
+        link = self.__websockets.get(endpoint)
+        if link is None or not link.is_alive:
+            link = WebSocketLink(endpoint, self.__get_session(), self.__ws_idle_timeout)
+            self.__websockets[endpoint] = link
+        stamp = time.monotonic()
+        error = None
+        try:
+            await link.send(msg, timeout)
+        except Exception as e:
+            error = repr(e)
+            raise
+        finally:
+            self.__register(endpoint, stamp, error)
 
     async def close(self):
-        for ws, session in self.__websockets.values():
-            await ws.close()
+        links = list(self.__websockets.values())
+        self.__websockets.clear()
+        for link in links:
+            await link.close()
+        session, self.__session = self.__session, None
+        if session is not None:
             await session.close()
 
+    def __get_session(self) -> aiohttp.ClientSession:
+        if self.__session is None or self.__session.closed:
+            connector = aiohttp.TCPConnector(
+                ssl=False,  # Do not verify SSL due to all messages encrypted
+                use_dns_cache=True,
+                ttl_dns_cache=self.__dns_ttl,
+                limit=0,  # Connections are limited per host
+                limit_per_host=self.__limit_per_host,
+                keepalive_timeout=self.__keepalive_timeout
+            )
+            self.__session = aiohttp.ClientSession(connector=connector)
+        return self.__session
+
+    def __register(self, endpoint: str, stamp: float, error: Optional[str]):
+        stat = self.__stats.get(endpoint)
+        if stat is None:
+            stat = EndpointStats()
+            self.__stats[endpoint] = stat
+        stat.register(time.monotonic() - stamp, error)
+        if error is not None:
+            logging.debug(f'Send to {endpoint} failed: {error}')
+
 
 async def http_send(
         msg: bytes, endpoint: str, timeout: float,
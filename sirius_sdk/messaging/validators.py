@@ -1,3 +1,5 @@
+from typing import Any, Callable, Dict, List, Tuple
+
 from sirius_sdk.errors.exceptions import SiriusValidationError
 from sirius_sdk.messaging.message import Message
 from sirius_sdk.messaging.fields import *
@@ -37,14 +39,119 @@ def check_for_attributes(partial: dict, expected_attributes: Iterable):
 def validate_common_blocks(partial: dict):
     """Validate blocks of message like threading, timing, etc
     """
-    _validate_thread_block(partial)
-    _validate_timing_block(partial)
+    if THREAD_DECORATOR in partial:
+        _validate_thread_block(partial)
+    if TIMING_DECORATOR in partial:
+        _validate_timing_block(partial)
+
+
+class MessageValidator:
+    """Message checks compiled to single function
+
+    Expected attributes have the same format as check_for_attributes() accepts, plus
+    dict {attribute: [nested expected attributes]} to check nested blocks.
+    Common blocks (threading, timing) are checked first if message contains them.
+    """
+
+    def __init__(self, expected_attributes: Iterable = (), common_blocks: bool = True):
+        presence = []
+        equality = []
+        nested = []
+        for attribute in expected_attributes:
+            if isinstance(attribute, tuple):
+                presence.append(attribute[0])
+                equality.append(attribute)
+            elif isinstance(attribute, dict):
+                for name, nested_attributes in attribute.items():
+                    presence.append(name)
+                    nested.append((name, MessageValidator(nested_attributes, common_blocks=False)))
+            else:
+                presence.append(attribute)
+        checks: List[Callable[[dict], None]] = []
+        if common_blocks:
+            checks.append(validate_common_blocks)
+        if presence:
+            # Keep declaration order to report the same missing attribute as check_for_attributes
+            checks.append(_presence_check(tuple(dict.fromkeys(presence))))
+        if equality:
+            checks.append(_equality_check(tuple(equality)))
+        for name, validator in nested:
+            checks.append(_nested_check(name, validator.check))
+        self.__check = _sequence(tuple(checks))
+
+    @property
+    def check(self) -> Callable[[dict], None]:
+        """Compiled function: raises SiriusValidationError if message is invalid"""
+        return self.__check
+
+    def __call__(self, partial: dict):
+        self.__check(partial)
+
+
+def _sequence(checks: Tuple[Callable[[dict], None], ...]) -> Callable[[dict], None]:
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(partial: dict):
+        for c in checks:
+            c(partial)
+    return check
+
+
+def _presence_check(names: Tuple[str, ...]) -> Callable[[dict], None]:
+    def check(partial: dict):
+        for name in names:
+            if name not in partial:
+                check_for_attributes(partial, names)
+    return check
+
+
+def _equality_check(expected: Tuple[Tuple[str, Any], ...]) -> Callable[[dict], None]:
+    def check(partial: dict):
+        for name, value in expected:
+            if partial[name] != value:
+                raise SiriusValidationError('Message.{}: {} != {}'.format(name, partial[name], value))
+    return check
+
+
+def _nested_check(name: str, nested: Callable[[dict], None]) -> Callable[[dict], None]:
+    def check(partial: dict):
+        nested(partial[name])
+    return check
+
+
+# Validators compiled per message class
+__compiled: Dict[type, Callable[[dict], None]] = {}
+
+
+def compiled_validator(cls: type) -> Callable[[dict], None]:
+    """Validation function of message class, compiled on first call
+
+    Expected attributes are collected from REQUIRED_ATTRIBUTES of class and its bases,
+    checks of base classes go first
+    """
+    check = __compiled.get(cls)
+    if check is None:
+        expected = []
+        for klass in reversed(cls.__mro__):
+            expected.extend(klass.__dict__.get('REQUIRED_ATTRIBUTES', ()))
+        check = MessageValidator(expected).check
+        __compiled[cls] = check
+    return check
+
+
+# Field validators are stateless, so they are shared by all messages
+_NON_NEG_NUM = NonNegativeNumberField()
+_RECEIVED_ORDERS = MapField(DIDField(), _NON_NEG_NUM)
+_ISO_DATA = ISODatetimeStringField()
+_EXPECTED_ISO_FIELDS = (IN_TIME, OUT_TIME, STALE_TIME, EXPIRES_TIME, WAIT_UNTIL_TIME)
 
 
 def _validate_thread_block(partial: dict):
     if THREAD_DECORATOR in partial:
         thread = partial[THREAD_DECORATOR]
-        check_for_attributes(thread, [THREAD_ID])
+        if THREAD_ID not in thread:
+            check_for_attributes(thread, [THREAD_ID])
 
         thread_id = thread[THREAD_ID]
         if partial.get(ID) and thread_id == partial[ID]:
@@ -54,12 +161,11 @@ def _validate_thread_block(partial: dict):
                 thread[PARENT_THREAD_ID]))
 
         if thread.get(SENDER_ORDER):
-            non_neg_num = NonNegativeNumberField()
-            err = non_neg_num.validate(thread[SENDER_ORDER])
+            err = _NON_NEG_NUM.validate(thread[SENDER_ORDER])
             if not err:
                 if RECEIVED_ORDERS in thread and thread[RECEIVED_ORDERS]:
                     recv_ords = thread[RECEIVED_ORDERS]
-                    err = MapField(DIDField(), non_neg_num).validate(recv_ords)
+                    err = _RECEIVED_ORDERS.validate(recv_ords)
             if err:
                 raise ValueError(err)
 
@@ -67,31 +173,28 @@ def _validate_thread_block(partial: dict):
 def _validate_timing_block(partial: dict):
     if TIMING_DECORATOR in partial:
         timing = partial[TIMING_DECORATOR]
-        non_neg_num = NonNegativeNumberField()
-        iso_data = ISODatetimeStringField()
-        expected_iso_fields = [IN_TIME, OUT_TIME, STALE_TIME, EXPIRES_TIME, WAIT_UNTIL_TIME]
-        for f in expected_iso_fields:
+        for f in _EXPECTED_ISO_FIELDS:
             if f in timing:
-                err = iso_data.validate(timing[f])
+                err = _ISO_DATA.validate(timing[f])
                 if err:
                     raise SiriusValidationError(err)
         if DELAY_MILLI in timing:
-            err = non_neg_num.validate(timing[DELAY_MILLI])
+            err = _NON_NEG_NUM.validate(timing[DELAY_MILLI])
             if err:
                 raise SiriusValidationError(err)
 
         # In time cannot be greater than out time
         if IN_TIME in timing and OUT_TIME in timing:
-            t_in = iso_data.parse_func(timing[IN_TIME])
-            t_out = iso_data.parse_func(timing[OUT_TIME])
+            t_in = _ISO_DATA.parse_func(timing[IN_TIME])
+            t_out = _ISO_DATA.parse_func(timing[OUT_TIME])
 
             if t_in > t_out:
                 raise SiriusValidationError('{} cannot be greater than {}'.format(IN_TIME, OUT_TIME))
 
         # Stale time cannot be greater than expires time
         if STALE_TIME in timing and EXPIRES_TIME in timing:
-            t_stale = iso_data.parse_func(timing[STALE_TIME])
-            t_exp = iso_data.parse_func(timing[EXPIRES_TIME])
+            t_stale = _ISO_DATA.parse_func(timing[STALE_TIME])
+            t_exp = _ISO_DATA.parse_func(timing[EXPIRES_TIME])
 
             if t_stale > t_exp:
                 raise SiriusValidationError('{} cannot be greater than {}'.format(STALE_TIME, EXPIRES_TIME))
@@ -2,8 +2,10 @@ from .question_answer import ask_and_wait_answer, make_answer
 from .coprotocols import as_called, as_caller
 from .confidential_storage import SimpleDataVault, schedule_vaults
 from .connections import accept_invitation, InvitationManager
+from .key_pool import KeyPool
 
 __all__ = [
     "ask_and_wait_answer", "make_answer", "as_called", "as_caller",
-    "schedule_vaults", "SimpleDataVault", "accept_invitation", "InvitationManager"
+    "schedule_vaults", "SimpleDataVault", "accept_invitation", "InvitationManager",
+    "KeyPool"
 ]
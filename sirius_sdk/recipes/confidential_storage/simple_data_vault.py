@@ -11,7 +11,9 @@ import sirius_sdk
 from sirius_sdk.agent.aries_rfc.feature_0750_storage import EncryptedDataVault, StructuredDocument, \
     ConfidentialStorageAuthProvider, VaultConfig, ConfidentialStorageRawByteStorage, FileSystemRawByteStorage, \
     StreamEncryption, AbstractWriteOnlyStream, AbstractReadOnlyStream, EncryptedDocument, DataVaultStreamWrapper, \
-    StreamDecryption, StreamMeta, DocumentMeta
+    StreamDecryption, StreamMeta, DocumentMeta, FileSystemDedupRawByteStorage, FileSystemDedupWriteOnlyStream, \
+    InMemoryRawByteStorage, InMemoryWriteOnlyStream, SQLiteRawByteStorage, SQLiteWriteOnlyStream, StreamCompression
+from sirius_sdk.agent.aries_rfc.feature_0750_storage.components import HMAC
 from sirius_sdk.agent.aries_rfc.feature_0750_storage.errors import *
 from sirius_sdk.agent.aries_rfc.feature_0750_storage.encoding import ConfidentialStorageEncType
 from sirius_sdk.agent.aries_rfc.feature_0750_storage.impl.file_system import FileSystemWriteOnlyStream
@@ -25,7 +27,8 @@ class SimpleDataVault(EncryptedDataVault, EncryptedDataVault.Indexes):
     META_CREATED_ATTR = 'created'
     META_CONTENT_TYPE_ATTR = 'contentType'
     META_CREATED_CHUNKS_ATTR = 'chunks'
-    RESERVED_META_ATTRS = [META_CREATED_ATTR, META_CONTENT_TYPE_ATTR, META_CREATED_CHUNKS_ATTR]
+    META_COMPRESSION_ATTR = 'compression'
+    RESERVED_META_ATTRS = [META_CREATED_ATTR, META_CONTENT_TYPE_ATTR, META_CREATED_CHUNKS_ATTR, META_COMPRESSION_ATTR]
 
     # Attributes
     ATTR_IS_STREAM = '__is_stream'
@@ -34,9 +37,39 @@ class SimpleDataVault(EncryptedDataVault, EncryptedDataVault.Indexes):
     ATTR_URN = '__urn'
     RESERVED_ATTRIBS = [ATTR_IS_STREAM, ATTR_CHUNKS_NUM, ATTR_CHUNK_SIZE, ATTR_URN]
 
-    def __init__(self, mounted_dir: str, auth: ConfidentialStorageAuthProvider, cfg: VaultConfig = None):
+    # HMAC
+    HMAC_KEY_TYPE = 'Sha256HmacKey2019'
+
+    # Raw bytes storage backends
+    BACKEND_FILE_SYSTEM = 'fs'
+    BACKEND_MEMORY = 'memory'
+    BACKEND_SQLITE = 'sqlite'
+    BACKENDS = [BACKEND_FILE_SYSTEM, BACKEND_MEMORY, BACKEND_SQLITE]
+
+    def __init__(
+            self, mounted_dir: str, auth: ConfidentialStorageAuthProvider, cfg: VaultConfig = None, dedupe: bool = False,
+            backend: str = BACKEND_FILE_SYSTEM, compression: StreamCompression = None
+    ):
+        """
+        :param mounted_dir: directory where vault files are located
+        :param auth: authorization provider
+        :param cfg: (optional) vault configuration
+        :param dedupe: (optional) store streams as manifests of content-addressed chunks,
+           identical chunks are shared between all streams of the vault. Chunks are addressed
+           with keyed hash, key is identified by cfg.hmac
+        :param backend: (optional) raw bytes storage for streams:
+           - fs: file per stream
+           - memory: streams are kept in process memory (tests, caches)
+           - sqlite: all streams of the vault in single SQLite file (huge amount of small documents)
+        :param compression: (optional) compress chunks of streams created by the vault, settings are stored
+           in stream metadata, so stream is read with settings it was written with
+        """
         if not os.path.isdir(mounted_dir):
             raise RuntimeError(f'Directory "{mounted_dir}" does not exists')
+        if backend not in self.BACKENDS:
+            raise RuntimeError(f'Unknown backend "{backend}"')
+        if dedupe and backend != self.BACKEND_FILE_SYSTEM:
+            raise RuntimeError(f'Deduplication is not supported by "{backend}" backend')
         super().__init__(auth, cfg)
         self.__mounted_dir = os.path.join(mounted_dir, f'vault_{auth.entity.their.did}')
         if not os.path.isdir(self.__mounted_dir):
@@ -44,11 +77,26 @@ class SimpleDataVault(EncryptedDataVault, EncryptedDataVault.Indexes):
         self.__storage: Optional[ConfidentialStorageRawByteStorage] = None
         self.__cached_info: Tuple[str, dict] = ('', {})
         self.__is_open: bool = False
+        self.__dedupe = dedupe
+        self.__backend = backend
+        self.__compression = compression
 
     @property
     def mounted_dir(self) -> str:
         return self.__mounted_dir
 
+    @property
+    def dedupe(self) -> bool:
+        return self.__dedupe
+
+    @property
+    def backend(self) -> str:
+        return self.__backend
+
+    @property
+    def compression(self) -> Optional[StreamCompression]:
+        return self.__compression
+
     @property
     def is_open(self) -> bool:
         return self.__is_open
@@ -61,6 +109,9 @@ class SimpleDataVault(EncryptedDataVault, EncryptedDataVault.Indexes):
     async def close(self):
         if self.__is_open:
             if self.__storage is not None:
+                if isinstance(self.__storage, (SQLiteRawByteStorage, FileSystemDedupRawByteStorage)):
+                    # Release connection of SQLite database, compact reference journal of chunks
+                    await self.__storage.unmount()
                 self.__storage = None
             self.__is_open = False
 
@@ -71,6 +122,9 @@ class SimpleDataVault(EncryptedDataVault, EncryptedDataVault.Indexes):
     async def create_stream(self, uri: str, meta:  Union[dict, StreamMeta] = None, chunk_size: int = None, **attributes) -> StructuredDocument:
         self.__check_is_open()
         uri = self.__normalize_uri(uri)
+        if self.__compression is not None:
+            meta = dict(meta or {})
+            meta.setdefault(self.META_COMPRESSION_ATTR, self.__compression.as_json())
         await self.__create_resource(uri, is_stream=True, meta=meta, chunk_size=chunk_size, **attributes)
         info = await self.__load_resource_info(uri)
         meta = self.__extract_meta_from_info(info)
@@ -224,7 +278,10 @@ class SimpleDataVault(EncryptedDataVault, EncryptedDataVault.Indexes):
         stored_chunk_size = info['tags'].get(self.ATTR_CHUNK_SIZE, 'null')
         if stored_chunk_size != 'null':
             stream.chunk_size = int(stored_chunk_size)
-        if isinstance(stream, FileSystemWriteOnlyStream):
+        if isinstance(
+                stream,
+                (FileSystemWriteOnlyStream, FileSystemDedupWriteOnlyStream, InMemoryWriteOnlyStream, SQLiteWriteOnlyStream)
+        ):
 
             async def __on_close__(uri_: str, tags_: dict, s_: AbstractWriteOnlyStream):
                 # Update stream metadata on close
@@ -262,6 +319,7 @@ class SimpleDataVault(EncryptedDataVault, EncryptedDataVault.Indexes):
 
     async def _mounted(self) -> ConfidentialStorageRawByteStorage:
         if self.__storage is None:
+            storage_id = hashlib.md5(self.__mounted_dir.encode()).hexdigest()
             if self.cfg.key_agreement is None:
                 encryption = None
             else:
@@ -270,7 +328,6 @@ class SimpleDataVault(EncryptedDataVault, EncryptedDataVault.Indexes):
                 else:
                     if not self.cfg.key_agreement.type.startswith('X25519'):
                         raise EncryptionError(f'Unsupported key agreement type: "{self.cfg.key_agreement.type}"')
-                    storage_id = hashlib.md5(self.__mounted_dir.encode()).hexdigest()
                     # Try to load encryption settings
                     encryption = await self.__load_storage_encryption(storage_id)
                     if encryption is None:
@@ -284,7 +341,15 @@ class SimpleDataVault(EncryptedDataVault, EncryptedDataVault.Indexes):
                         await self.__init_storage_encryption(storage_id, encryption)
                 pass
             #
-            self.__storage = FileSystemRawByteStorage(encryption=encryption)
+            if self.__dedupe:
+                hmac_key = await self.__ensure_storage_hmac_key(storage_id)
+                self.__storage = FileSystemDedupRawByteStorage(hmac_key=hmac_key, encryption=encryption)
+            elif self.__backend == self.BACKEND_MEMORY:
+                self.__storage = InMemoryRawByteStorage(encryption=encryption)
+            elif self.__backend == self.BACKEND_SQLITE:
+                self.__storage = SQLiteRawByteStorage(encryption=encryption)
+            else:
+                self.__storage = FileSystemRawByteStorage(encryption=encryption)
             await self.__storage.mount(self.__mounted_dir)
         return self.__storage
 
@@ -371,6 +436,31 @@ class SimpleDataVault(EncryptedDataVault, EncryptedDataVault.Indexes):
         except:
             raise DataVaultStateError('Error while initialize storage encryption')
 
+    async def __ensure_storage_hmac_key(self, storage_id: str) -> bytes:
+        if self.cfg.hmac is None or not self.cfg.hmac.is_filled:
+            self.cfg.hmac = HMAC(id=f'urn:hmac:{storage_id}', type=self.HMAC_KEY_TYPE)
+        storage_type = f'{self._storage_type}/hmac'
+        opts = sirius_sdk.NonSecretsRetrieveRecordOptions(retrieve_value=True)
+        try:
+            rec = await sirius_sdk.NonSecrets.get_wallet_record(
+                type_=storage_type, id_=self.cfg.hmac.id, options=opts
+            )
+        except:
+            rec = None
+        if rec:
+            js = json.loads(rec['value'])
+            return sirius_sdk.encryption.b58_to_bytes(js['key'])
+        else:
+            key = os.urandom(32)
+            try:
+                js = {'key': sirius_sdk.encryption.bytes_to_b58(key), 'type': self.cfg.hmac.type}
+                await sirius_sdk.NonSecrets.add_wallet_record(
+                    type_=storage_type, id_=self.cfg.hmac.id, value=json.dumps(js)
+                )
+            except:
+                raise DataVaultStateError('Error while initialize storage HMAC key')
+            return key
+
     async def __create_resource(self, uri: str, is_stream: bool, meta: dict = None, chunk_size: int = None, **attributes):
         self.auth.validate(can_create=True)
         storage = await self._mounted()
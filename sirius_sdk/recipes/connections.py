@@ -3,10 +3,19 @@ from typing import Union, Optional
 import sirius_sdk
 from sirius_sdk.errors.exceptions import SiriusTimeoutIO
 
+from .key_pool import KeyPool
 
-async def accept_invitation(url: str, me: sirius_sdk.Pairwise.Me, my_label: str) -> sirius_sdk.Pairwise:
+
+async def accept_invitation(
+        url: str, me: Optional[sirius_sdk.Pairwise.Me], my_label: str, key_pool: KeyPool = None
+) -> sirius_sdk.Pairwise:
     """Call this method to accept Inviter invitation that was income via URL/QR
+
+    :param me: My Identity, new pairwise DID is allocated if None
+    :param key_pool: (optional) pool to allocate new pairwise DID from
     """
+    if me is None:
+        me = await _new_me(key_pool)
     my_endpoints = await sirius_sdk.endpoints()
     default_endpoint = [e for e in my_endpoints if not e.routing_keys][0]
     inv = sirius_sdk.aries_rfc.Invitation.from_url(url)
@@ -31,21 +40,23 @@ class InvitationManager:
 
     def __init__(
             self, me: sirius_sdk.Pairwise.Me, my_label: str,
-            connection_key: str = None, endpoint: sirius_sdk.Endpoint = None
+            connection_key: str = None, endpoint: sirius_sdk.Endpoint = None, key_pool: KeyPool = None
     ):
         """
-        :param me: My Identity
+        :param me: My Identity, new pairwise DID is allocated for every connection if None
         :param my_label: My printable label
         :param connection_key: connection key to identify invitation
         :param endpoint: working end
+        :param key_pool: (optional) pool to allocate connection key and pairwise DIDs from
         """
         self.__me = me
         self.__my_label = my_label
         self.__endpoint = endpoint
         self.__connection_key = connection_key
+        self.__key_pool = key_pool
 
     @property
-    def me(self) -> sirius_sdk.Pairwise.Me:
+    def me(self) -> Optional[sirius_sdk.Pairwise.Me]:
         return self.__me
 
     @property
@@ -66,7 +77,10 @@ class InvitationManager:
           - send QR to participants
         """
         if self.__connection_key is None:
-            self.__connection_key = await sirius_sdk.Crypto.create_key()
+            if self.__key_pool is not None:
+                self.__connection_key = await self.__key_pool.create_key()
+            else:
+                self.__connection_key = await sirius_sdk.Crypto.create_key()
         if self.__endpoint is None:
             my_endpoints = await sirius_sdk.endpoints()
             default_endpoints = [e for e in my_endpoints if not e.routing_keys]
@@ -100,8 +114,9 @@ class InvitationManager:
                 event = await co.get_message(timeout)
                 if isinstance(event.message, sirius_sdk.aries_rfc.ConnRequest):
                     connection_key = event.recipient_verkey
+                    me = self.me or await _new_me(self.__key_pool)
                     proto = sirius_sdk.aries_rfc.Inviter(
-                        me=self.me, connection_key=connection_key, my_endpoint=self.__endpoint
+                        me=me, connection_key=connection_key, my_endpoint=self.__endpoint
                     )
                     success, p2p = await proto.create_connection(request=event.message)
                     if success:
@@ -110,3 +125,11 @@ class InvitationManager:
                         raise RuntimeError(proto.problem_report.explain)
         finally:
             await co.abort()
+
+
+async def _new_me(key_pool: Optional[KeyPool]) -> sirius_sdk.Pairwise.Me:
+    if key_pool is not None:
+        did, verkey = await key_pool.create_and_store_my_did()
+    else:
+        did, verkey = await sirius_sdk.DID.create_and_store_my_did()
+    return sirius_sdk.Pairwise.Me(did, verkey)
@@ -0,0 +1,159 @@
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Optional, Callable, Awaitable, Any, Tuple
+
+import sirius_sdk
+
+
+class KeyPool:
+    """Keeps fresh keys and DIDs pre-created in background, so connection setup does not wait for key generation
+
+    Pool is bound to the agent it was started in: refill works in context of start() call,
+    consume items in context of the same agent. Pool adapts to consumption rate: it keeps items enough
+    for DEF_HORIZON seconds at the rate measured over last DEF_WINDOW seconds, but not less than
+    min_size and not more than max_size. If pool is exhausted, item is created inline.
+
+    Items are regular wallet keys and DIDs, ones left unused after stop() stay in wallet.
+
+    Usage:
+
+        async with KeyPool() as pool:
+            connection_key = await pool.create_key()
+            did, verkey = await pool.create_and_store_my_did()
+    """
+
+    DEF_MIN_SIZE = 4
+    DEF_MAX_SIZE = 64
+    DEF_CONCURRENCY = 4
+    DEF_WINDOW = 60  # seconds
+    DEF_HORIZON = 10  # seconds
+
+    class Reserve:
+        """Items of single kind and background worker that refills them"""
+
+        def __init__(
+                self, factory: Callable[[], Awaitable[Any]], min_size: int, max_size: int, concurrency: int
+        ):
+            self.__factory = factory
+            self.__min_size = min_size
+            self.__max_size = max_size
+            self.__concurrency = concurrency
+            self.__items = deque()
+            self.__consumed = deque()
+            self.__wakeup: Optional[asyncio.Event] = None
+            self.__worker: Optional[asyncio.Task] = None
+
+        @property
+        def available(self) -> int:
+            return len(self.__items)
+
+        @property
+        def target(self) -> int:
+            """Count of items worker keeps ready"""
+            self.__forget_consumed(time.monotonic())
+            expected = math.ceil(len(self.__consumed) * KeyPool.DEF_HORIZON / KeyPool.DEF_WINDOW)
+            return max(self.__min_size, min(self.__max_size, expected))
+
+        def start(self):
+            if self.__worker is None:
+                self.__wakeup = asyncio.Event()
+                self.__worker = asyncio.ensure_future(self.__run())
+
+        async def stop(self):
+            if self.__worker is not None:
+                self.__worker.cancel()
+                try:
+                    await self.__worker
+                except asyncio.CancelledError:
+                    pass
+                self.__worker = None
+
+        async def take(self) -> Any:
+            stamp = time.monotonic()
+            self.__consumed.append(stamp)
+            self.__forget_consumed(stamp)
+            if self.__wakeup is not None:
+                self.__wakeup.set()
+            if self.__items:
+                return self.__items.popleft()
+            return await self.__factory()
+
+        def __forget_consumed(self, stamp: float):
+            while self.__consumed and stamp - self.__consumed[0] > KeyPool.DEF_WINDOW:
+                self.__consumed.popleft()
+
+        async def __run(self):
+            while True:
+                missing = self.target - len(self.__items)
+                if missing <= 0:
+                    self.__wakeup.clear()
+                    await self.__wakeup.wait()
+                    continue
+                results = await asyncio.gather(
+                    *[self.__factory() for _ in range(min(missing, self.__concurrency))], return_exceptions=True
+                )
+                errors = [res for res in results if isinstance(res, BaseException)]
+                self.__items.extend(res for res in results if not isinstance(res, BaseException))
+                if errors:
+                    # Consumers fall back to inline creation, retry on next consumption
+                    logging.warning(f'KeyPool: {len(errors)} item(s) were not created: {errors[0]!r}')
+                    self.__wakeup.clear()
+                    await self.__wakeup.wait()
+
+    def __init__(
+            self, min_size: int = DEF_MIN_SIZE, max_size: int = DEF_MAX_SIZE, concurrency: int = DEF_CONCURRENCY
+    ):
+        """
+        :param min_size: (optional) count of keys and of DIDs kept ready regardless of consumption rate
+        :param max_size: (optional) upper limit of keys and of DIDs kept ready
+        :param concurrency: (optional) count of concurrent wallet calls while refilling
+        """
+        if min_size < 0 or max_size < min_size:
+            raise ValueError('Expected 0 <= min_size <= max_size')
+        if concurrency < 1:
+            raise ValueError('Expected concurrency >= 1')
+        self.__keys = self.Reserve(self.__create_key, min_size, max_size, concurrency)
+        self.__dids = self.Reserve(self.__create_did, min_size, max_size, concurrency)
+
+    @property
+    def available_keys(self) -> int:
+        return self.__keys.available
+
+    @property
+    def available_dids(self) -> int:
+        return self.__dids.available
+
+    def start(self):
+        """Start background refill, call inside agent context"""
+        self.__keys.start()
+        self.__dids.start()
+
+    async def stop(self):
+        await self.__keys.stop()
+        await self.__dids.stop()
+
+    async def create_key(self) -> str:
+        """Fresh verkey, same as sirius_sdk.Crypto.create_key()"""
+        return await self.__keys.take()
+
+    async def create_and_store_my_did(self) -> Tuple[str, str]:
+        """Fresh (did, verkey), same as sirius_sdk.DID.create_and_store_my_did()"""
+        return await self.__dids.take()
+
+    async def __aenter__(self) -> "KeyPool":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    @staticmethod
+    async def __create_key() -> str:
+        return await sirius_sdk.Crypto.create_key()
+
+    @staticmethod
+    async def __create_did() -> Tuple[str, str]:
+        return await sirius_sdk.DID.create_and_store_my_did()
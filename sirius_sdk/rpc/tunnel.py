@@ -1,8 +1,7 @@
-import json
-
+from sirius_sdk import codec
 from sirius_sdk.encryption import P2PConnection
 from sirius_sdk.base import ReadOnlyChannel, WriteOnlyChannel
-from sirius_sdk.messaging import Message
+from sirius_sdk.messaging import Message, LazyMessage, scan_envelope
 from sirius_sdk.errors.exceptions import *
 
 
@@ -39,7 +38,7 @@ class AddressedTunnel:
     def context(self):
         return self.__context
 
-    async def receive(self, timeout: int=None) -> Message:
+    async def receive(self, timeout: int=None, lazy: bool=False) -> Message:
         """
         Read message.
 
@@ -47,14 +46,25 @@ class AddressedTunnel:
         via context.encrypted field
 
         :param timeout:timeout in seconds
+        :param lazy: return LazyMessage: message body is decoded on first access
         :return: received packet
         """
         payload = await self.__input.read(timeout)
         if not isinstance(payload, bytes) and not isinstance(payload, dict):
             raise TypeError('Expected bytes or dict, got {}'.format(type(payload)))
+        if lazy and isinstance(payload, bytes):
+            try:
+                envelope = scan_envelope(payload.decode(self.ENC), LazyMessage.ENVELOPE + ('protected',))
+            except (SiriusInvalidMessage, UnicodeDecodeError) as e:
+                raise SiriusInvalidPayloadStructure("Invalid packed message") from e
+            self.__context.encrypted = 'protected' in envelope
+            if self.__context.encrypted:
+                return LazyMessage(self.__p2p.decrypt(payload))
+            else:
+                return LazyMessage(payload, envelope)
         if isinstance(payload, bytes):
             try:
-                payload = json.loads(payload)
+                payload = codec.loads(payload)
             except Exception as e:
                 raise SiriusInvalidPayloadStructure("Invalid packed message") from e
         if 'protected' in payload:
@@ -75,5 +85,5 @@ class AddressedTunnel:
         if encrypt:
             payload = self.__p2p.pack(message)
         else:
-            payload = message.serialize().encode(self.ENC)
+            payload = message.serialize_bytes()
         return await self.__output.write(payload)
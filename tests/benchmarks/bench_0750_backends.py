@@ -0,0 +1,72 @@
+"""Confidential storage: small documents create/read rates for raw bytes storage backends
+
+Run from repo root:
+    python -m tests.benchmarks.bench_0750_backends
+"""
+import os
+import time
+import uuid
+import shutil
+import asyncio
+import tempfile
+
+from sirius_sdk.encryption import create_keypair, bytes_to_b58
+from sirius_sdk.agent.aries_rfc.feature_0750_storage import StreamEncryption, StreamDecryption, \
+    FileSystemRawByteStorage, InMemoryRawByteStorage, SQLiteRawByteStorage
+
+
+DOCS = 5000
+DOC_SIZE = 512
+
+
+async def measure(storage, docs: list, dec: StreamDecryption = None) -> (float, float):
+    mount_dir = os.path.join(tempfile.gettempdir(), f'bench_{uuid.uuid4().hex}')
+    os.mkdir(mount_dir)
+    try:
+        await storage.mount(mount_dir)
+        stamp = time.monotonic()
+        for n, content in enumerate(docs):
+            uri = f'documents/doc_{n}.json'
+            await storage.create(uri)
+            stream = await storage.writeable(uri)
+            await stream.open()
+            await stream.write(content)
+            await stream.close()
+        create_secs = time.monotonic() - stamp
+        stamp = time.monotonic()
+        for n, content in enumerate(docs):
+            stream = await storage.readable(f'documents/doc_{n}.json', chunks_num=1)
+            if dec is not None:
+                stream.enc = dec
+            await stream.open()
+            assert await stream.read() == content
+            await stream.close()
+        read_secs = time.monotonic() - stamp
+        return create_secs, read_secs
+    finally:
+        if isinstance(storage, SQLiteRawByteStorage):
+            await storage.unmount()
+        if isinstance(storage, InMemoryRawByteStorage):
+            InMemoryRawByteStorage.release(mount_dir)
+        shutil.rmtree(mount_dir)
+
+
+async def run():
+    vk, sk = create_keypair(b'0000000000000000000000BENCHMARKS')
+    vk, sk = bytes_to_b58(vk), bytes_to_b58(sk)
+    docs = [os.urandom(DOC_SIZE) for _ in range(DOCS)]
+    print(f'{DOCS} documents of {DOC_SIZE} bytes')
+    print(f'{"storage":<12}{"encrypted":<11}{"create/s":>10}{"read/s":>10}')
+    for encrypted in [False, True]:
+        for name, cls in [('fs', FileSystemRawByteStorage), ('memory', InMemoryRawByteStorage), ('sqlite', SQLiteRawByteStorage)]:
+            if encrypted:
+                enc = StreamEncryption().setup(target_verkeys=[vk])
+                dec = StreamDecryption(recipients=enc.recipients, nonce=enc.nonce).setup(vk, sk)
+            else:
+                enc, dec = None, None
+            create_secs, read_secs = await measure(cls(encryption=enc), docs, dec)
+            print(f'{name:<12}{str(encrypted):<11}{DOCS / create_secs:>10.0f}{DOCS / read_secs:>10.0f}')
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
@@ -0,0 +1,88 @@
+"""Confidential storage: chunk compression size/throughput trade-offs
+
+Run from repo root:
+    python -m tests.benchmarks.bench_0750_compression
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import tempfile
+
+from sirius_sdk.encryption import create_keypair, bytes_to_b58
+from sirius_sdk.agent.aries_rfc.feature_0750_storage import StreamEncryption, StreamDecryption, StreamCompression, \
+    ConfidentialStorageCompressionType, FileSystemWriteOnlyStream, FileSystemReadOnlyStream
+
+
+CHUNK_SIZE = 1024 * 8
+CASES = [
+    ('none', None),
+    ('zlib-1', StreamCompression(ConfidentialStorageCompressionType.ZLIB, level=1)),
+    ('zlib-6', StreamCompression(ConfidentialStorageCompressionType.ZLIB, level=6)),
+    ('zlib-9', StreamCompression(ConfidentialStorageCompressionType.ZLIB, level=9)),
+    ('lzma-1', StreamCompression(ConfidentialStorageCompressionType.LZMA, level=1)),
+    ('lzma-6', StreamCompression(ConfidentialStorageCompressionType.LZMA, level=6)),
+]
+
+
+def build_samples() -> dict:
+    credentials = json.dumps(
+        [
+            {
+                'schema_id': f'did:sov:{n}:2:passport:1.0', 'cred_def_id': f'did:sov:{n}:3:CL:1:TAG',
+                'values': {'first_name': {'raw': f'Name-{n}', 'encoded': str(n * 7919)}, 'age': {'raw': str(n % 90)}}
+            }
+            for n in range(3000)
+        ]
+    ).encode()
+    logs = '\n'.join(
+        f'2021-06-01 12:{n % 60:02d}:{n % 60:02d} INFO [sirius_sdk.hub] request #{n} handled in {n % 17} ms'
+        for n in range(20000)
+    ).encode()
+    csv = '\n'.join(f'{n},{n * 3},item-{n % 100},{n % 7 == 0}' for n in range(40000)).encode()
+    return {'json-credentials': credentials, 'logs': logs, 'csv': csv, 'random': os.urandom(1024 * 1024)}
+
+
+async def measure(content: bytes, compression: StreamCompression, keys: tuple) -> (int, float, float):
+    vk, sk = keys
+    path = os.path.join(tempfile.gettempdir(), f'bench_{uuid.uuid4().hex}.bin')
+    enc = StreamEncryption().setup(target_verkeys=[vk])
+    wo = FileSystemWriteOnlyStream(path, chunk_size=CHUNK_SIZE, enc=enc, compression=compression)
+    await wo.create(truncate=True)
+    try:
+        stamp = time.monotonic()
+        await wo.open()
+        await wo.write(content)
+        await wo.close()
+        write_secs = time.monotonic() - stamp
+        size = os.path.getsize(path)
+        dec = StreamDecryption(recipients=enc.recipients, nonce=enc.nonce).setup(vk, sk)
+        ro = FileSystemReadOnlyStream(path, chunks_num=wo.chunks_num, enc=dec, compression=compression)
+        stamp = time.monotonic()
+        await ro.open()
+        actual = await ro.read()
+        await ro.close()
+        read_secs = time.monotonic() - stamp
+        assert actual == content
+        return size, write_secs, read_secs
+    finally:
+        os.remove(path)
+
+
+async def run():
+    vk, sk = create_keypair(b'0000000000000000000000BENCHMARKS')
+    keys = bytes_to_b58(vk), bytes_to_b58(sk)
+    print(f'{"sample":<18}{"codec":<8}{"stored KB":>12}{"ratio":>8}{"write MB/s":>12}{"read MB/s":>12}')
+    for name, content in build_samples().items():
+        mb = len(content) / 1024 / 1024
+        for codec, compression in CASES:
+            size, write_secs, read_secs = await measure(content, compression, keys)
+            print(
+                f'{name:<18}{codec:<8}{size / 1024:>12.1f}{size / len(content):>8.2f}'
+                f'{mb / write_secs:>12.2f}{mb / read_secs:>12.2f}'
+            )
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
@@ -0,0 +1,76 @@
+"""Confidential storage: disk usage and write throughput for many versions of similar documents
+
+Run from repo root:
+    python -m tests.benchmarks.bench_0750_dedup
+"""
+import os
+import time
+import uuid
+import random
+import shutil
+import asyncio
+import tempfile
+
+from sirius_sdk.encryption import create_keypair, bytes_to_b58
+from sirius_sdk.agent.aries_rfc.feature_0750_storage import StreamEncryption, FileSystemRawByteStorage, \
+    FileSystemDedupRawByteStorage
+
+
+CHUNK_SIZE = 1024 * 4
+DOC_SIZE = 1024 * 512
+VERSIONS = 50
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def build_versions() -> list:
+    doc = bytearray(os.urandom(DOC_SIZE))
+    versions = []
+    for _ in range(VERSIONS):
+        # Every version edits few chunks of previous one
+        for _ in range(3):
+            offset = random.randrange(0, DOC_SIZE - 16)
+            doc[offset:offset+16] = os.urandom(16)
+        versions.append(bytes(doc))
+    return versions
+
+
+async def measure(storage, versions: list) -> (int, float):
+    mount_dir = os.path.join(tempfile.gettempdir(), f'bench_{uuid.uuid4().hex}')
+    os.mkdir(mount_dir)
+    try:
+        await storage.mount(mount_dir)
+        stamp = time.monotonic()
+        for n, content in enumerate(versions):
+            uri = f'document_v{n}.bin'
+            await storage.create(uri)
+            stream = await storage.writeable(uri)
+            stream.chunk_size = CHUNK_SIZE
+            await stream.open()
+            await stream.write(content)
+            await stream.close()
+        secs = time.monotonic() - stamp
+        return dir_size(mount_dir), secs
+    finally:
+        shutil.rmtree(mount_dir)
+
+
+async def run():
+    vk, _ = create_keypair(b'0000000000000000000000BENCHMARKS')
+    enc = StreamEncryption().setup(target_verkeys=[bytes_to_b58(vk)])
+    versions = build_versions()
+    total_mb = len(versions) * DOC_SIZE / 1024 / 1024
+    print(f'{VERSIONS} versions of {DOC_SIZE // 1024} KB document, chunk size: {CHUNK_SIZE // 1024} KB')
+    print(f'{"storage":<12}{"disk MB":>10}{"write MB/s":>12}')
+    for name, storage in [
+        ('plain', FileSystemRawByteStorage(encryption=enc)),
+        ('dedupe', FileSystemDedupRawByteStorage(hmac_key=os.urandom(32), encryption=enc))
+    ]:
+        size, secs = await measure(storage, versions)
+        print(f'{name:<12}{size / 1024 / 1024:>10.2f}{total_mb / secs:>12.2f}')
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
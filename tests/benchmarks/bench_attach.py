@@ -0,0 +1,66 @@
+"""Attach: repeated data access and streaming encode/decode of large attachments
+
+Run from repo root:
+    python -m tests.benchmarks.bench_attach [size_mb]
+"""
+import io
+import os
+import sys
+import time
+import base64
+import tracemalloc
+
+from sirius_sdk.agent.aries_rfc.mixins import Attach
+
+
+def measure(name: str, func, repeat: int = 1):
+    tracemalloc.start()
+    stamp = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = time.perf_counter() - stamp
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{name:>34}: {elapsed / repeat * 1000:8.2f} ms, peak {peak / 1024 / 1024:6.1f} MB')
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    path = 'bench_attach.bin'
+    with open(path, 'wb') as f:
+        f.write(os.urandom(size_mb * 1024 * 1024))
+    try:
+        def encode_eager():
+            with open(path, 'rb') as f:
+                return Attach(id='1', data=f.read())
+
+        def encode_stream():
+            with open(path, 'rb') as f:
+                return Attach.from_stream(f, id='1')
+
+        att = encode_stream()
+        received = Attach.from_json(dict(att))
+
+        def read_data():
+            return received.data
+
+        def decode_eager():
+            with open(os.devnull, 'wb') as f:
+                f.write(base64.b64decode(att['data']['base64']))
+
+        def decode_stream():
+            with open(os.devnull, 'wb') as f:
+                Attach.from_json(dict(att)).write_to(f)
+
+        print(f'attachment: {size_mb} MB')
+        measure('encode file, read at once', encode_eager)
+        measure('encode file, stream', encode_stream)
+        measure('access .data 10 times', read_data, repeat=10)
+        measure('decode to file, at once', decode_eager)
+        measure('decode to file, stream', decode_stream)
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
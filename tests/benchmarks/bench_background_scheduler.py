@@ -0,0 +1,62 @@
+"""BackgroundScheduler: cost of schedule/unschedule with many live tasks in background loop
+
+Run from repo root:
+    python -m tests.benchmarks.bench_background_scheduler
+"""
+import sys
+import time
+import uuid
+import asyncio
+import threading
+
+from sirius_sdk.hub.backgrounds import BackgroundScheduler
+
+
+OPS = 2000
+
+
+async def forever():
+    while True:
+        await asyncio.sleep(60)
+
+
+def wait_processed():
+    # Calls are processed by background loop in FIFO order, so marker task signals all previous are done
+    done = threading.Event()
+
+    async def marker():
+        done.set()
+
+    BackgroundScheduler.schedule(marker())
+    done.wait()
+
+
+def measure(live_tasks: int) -> float:
+    hashes = [f'live-{uuid.uuid4().hex}' for _ in range(live_tasks)]
+    for task_hash in hashes:
+        BackgroundScheduler.schedule(forever(), task_hash)
+    wait_processed()
+    stamp = time.perf_counter()
+    for n in range(OPS):
+        task_hash = hashes[n % live_tasks]
+        BackgroundScheduler.schedule(forever(), task_hash)
+        BackgroundScheduler.unschedule(task_hash)
+    wait_processed()
+    elapsed = time.perf_counter() - stamp
+    for task_hash in hashes:
+        BackgroundScheduler.unschedule(task_hash)
+    wait_processed()
+    return elapsed
+
+
+def main():
+    live_counts = [int(arg) for arg in sys.argv[1:]] or [10, 1000, 10000]
+    print(f'{OPS} schedule/unschedule pairs')
+    print(f'{"live tasks":>12} {"us/pair":>10}')
+    for live_tasks in live_counts:
+        elapsed = measure(live_tasks)
+        print(f'{live_tasks:>12} {elapsed / OPS * 1000000:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""RpcBus: events/s for bursty workload with emulated server round trip delay
+
+Run from repo root:
+    python -m tests.benchmarks.bench_bus_pickup [round_trip_ms]
+"""
+import sys
+import time
+import asyncio
+
+from sirius_sdk.agent.bus import RpcBus
+
+from tests.helpers import PickUpServerChannel
+
+
+BURSTS = 10
+BURST_SIZE = 500
+
+
+async def measure(max_batch_size: int, round_trip_delay: float) -> float:
+    channel = PickUpServerChannel(round_trip_delay=round_trip_delay)
+    bus = RpcBus(connector=channel, p2p=None, max_batch_size=max_batch_size)
+    await bus.subscribe('bench-thread')
+    payload = b'x' * 256
+    stamp = time.perf_counter()
+    for burst in range(BURSTS):
+        channel.put_events('bench-thread', [payload] * BURST_SIZE)
+        for n in range(BURST_SIZE):
+            await bus.get_event(timeout=5)
+    elapsed = time.perf_counter() - stamp
+    return BURSTS * BURST_SIZE / elapsed
+
+
+async def run():
+    round_trip_delay = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.001
+    print(f'{BURSTS} bursts of {BURST_SIZE} events, round trip {round_trip_delay * 1000:.1f} ms')
+    print(f'{"max batch":>10} {"events/s":>12}')
+    for max_batch_size in [1, 10, 100]:
+        rate = await measure(max_batch_size, round_trip_delay)
+        print(f'{max_batch_size:>10} {rate:>12.0f}')
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
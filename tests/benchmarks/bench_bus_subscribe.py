@@ -0,0 +1,46 @@
+"""MediatorBus.subscribe_ext: setup latency by count of sender_vk x recipient_vk x protocol combinations
+
+Run from repo root:
+    python -m tests.benchmarks.bench_bus_subscribe [round_trip_ms]
+"""
+import sys
+import json
+import time
+import asyncio
+
+from sirius_sdk.hub.mediator import MediatorBus
+
+from tests.helpers import PickUpServerChannel
+
+
+class PlainMediatorBus(MediatorBus):
+
+    async def pack(self, message) -> bytes:
+        return json.dumps(message).encode()
+
+
+async def measure(senders: int, recipients: int, protocols: int, round_trip_delay: float) -> float:
+    channel = PickUpServerChannel(round_trip_delay=round_trip_delay)
+    bus = PlainMediatorBus(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK')
+    stamp = time.perf_counter()
+    await bus.subscribe_ext(
+        sender_vk=[f'SENDER-{n}' for n in range(senders)],
+        recipient_vk=[f'RECIPIENT-{n}' for n in range(recipients)],
+        protocols=[f'protocol-{n}' for n in range(protocols)]
+    )
+    elapsed = time.perf_counter() - stamp
+    await bus.dispatcher.close()
+    return elapsed
+
+
+async def run():
+    round_trip_delay = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.005
+    print(f'round trip {round_trip_delay * 1000:.1f} ms')
+    print(f'{"combinations":>14} {"setup ms":>10}')
+    for senders, recipients, protocols in [(1, 1, 1), (2, 2, 2), (4, 4, 4), (8, 8, 4)]:
+        elapsed = await measure(senders, recipients, protocols, round_trip_delay)
+        print(f'{senders * recipients * protocols:>14} {elapsed * 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
@@ -0,0 +1,67 @@
+"""JSON codec backends: message serialization and pack -> transfer -> unpack round trip
+
+Run from repo root:
+    python -m tests.benchmarks.bench_codec [count]
+"""
+import sys
+import time
+import asyncio
+import importlib.util
+
+from sirius_sdk import codec
+from sirius_sdk.rpc import AddressedTunnel
+from sirius_sdk.messaging import Message
+from sirius_sdk.encryption import create_keypair, bytes_to_b58, P2PConnection
+
+from tests.helpers import InMemoryChannel
+
+
+def build_message() -> Message:
+    return Message({
+        '@type': 'https://didcomm.org/issue-credential/1.0/offer-credential',
+        'comment': 'Offer',
+        'credential_preview': {
+            '@type': 'https://didcomm.org/issue-credential/1.0/credential-preview',
+            'attributes': [{'name': f'attr{n}', 'value': f'value {n}'} for n in range(50)]
+        },
+        'offers~attach': [{'@id': f'offer-{n}', 'data': {'base64': 'x' * 2048}} for n in range(4)],
+        '~thread': {'thid': 'thread-id'}
+    })
+
+
+async def measure(name: str, count: int):
+    keys1 = create_keypair(b'000000000000000000000000000SEED1')
+    keys2 = create_keypair(b'000000000000000000000000000SEED2')
+    p2p1 = P2PConnection((bytes_to_b58(keys1[0]), bytes_to_b58(keys1[1])), bytes_to_b58(keys2[0]))
+    p2p2 = P2PConnection((bytes_to_b58(keys2[0]), bytes_to_b58(keys2[1])), bytes_to_b58(keys1[0]))
+    channel = InMemoryChannel()
+    sender = AddressedTunnel('memory://', channel, channel, p2p1)
+    receiver = AddressedTunnel('memory://', channel, channel, p2p2)
+    msg = build_message()
+
+    stamp = time.perf_counter()
+    for _ in range(count):
+        Message.deserialize(msg.serialize_bytes())
+    serialization = (time.perf_counter() - stamp) / count
+
+    stamp = time.perf_counter()
+    for _ in range(count):
+        await sender.post(msg)
+        await receiver.receive()
+    round_trip = (time.perf_counter() - stamp) / count
+    print(f'{name:>8}: serialize+deserialize {serialization * 1000000:8.1f} us, '
+          f'pack+send+unpack {round_trip * 1000000:8.1f} us')
+
+
+async def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for name in codec.BACKENDS:
+        if name != 'json' and importlib.util.find_spec(name) is None:
+            print(f'{name:>8}: not installed')
+            continue
+        codec.set_codec(name)
+        await measure(name, count)
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
@@ -0,0 +1,41 @@
+"""Holder: latency of storing issued credential with mime types against local stand-in agent wallet
+
+Run from repo root:
+    python -m tests.benchmarks.bench_holder_store [round_trip_ms, default 5]
+"""
+import sys
+import time
+import asyncio
+
+import sirius_sdk
+from sirius_sdk.agent.aries_rfc.feature_0036_issue_credential import Holder, ProposedAttrib
+
+from tests.helpers import InMemoryProverWallet
+
+
+PREVIEW = [
+    ProposedAttrib(name='name', value='Alice', mime_type='text/plain'),
+    ProposedAttrib(name='photo', value='base64', mime_type='image/png')
+]
+
+
+async def run():
+    round_trip = (float(sys.argv[1]) if len(sys.argv) > 1 else 5.0) / 1000
+    wallet = InMemoryProverWallet(round_trip_delay=round_trip)
+    cfg = sirius_sdk.Config().override_anon_cred(wallet).override_non_secrets(wallet)
+    async with sirius_sdk.context(cfg):
+        cases = [
+            ('new credential', 'cred-1'),
+            ('re-issued credential', 'cred-1'),
+            ('credential without id', None),
+        ]
+        for name, cred_id in cases:
+            wallet.round_trips = 0
+            stamp = time.perf_counter()
+            await Holder._store_issued({}, {'values': {}}, {}, cred_id, PREVIEW)
+            elapsed = time.perf_counter() - stamp
+            print(f'{name:>22}: {elapsed * 1000:6.1f} ms, {wallet.round_trips} wallet calls')
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
@@ -0,0 +1,75 @@
+"""Hub: per-call overhead of global proxies dispatch
+
+Run from repo root:
+    python -m tests.benchmarks.bench_hub_proxies [calls, default 1000000]
+"""
+import sys
+import time
+import asyncio
+from typing import Any, Optional
+
+import sirius_sdk
+from sirius_sdk.abstract.api import APICrypto
+from sirius_sdk.hub.core import _current_hub
+
+
+CALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+
+class NoopCrypto(APICrypto):
+    """Crypto that does nothing: measures pure dispatch cost"""
+
+    async def create_key(self, seed: str = None, crypto_type: str = None) -> str:
+        return 'KEY'
+
+    async def set_key_metadata(self, verkey: str, metadata: dict) -> None:
+        pass
+
+    async def get_key_metadata(self, verkey: str) -> Optional[dict]:
+        return None
+
+    async def crypto_sign(self, signer_vk: str, msg: bytes) -> bytes:
+        return b''
+
+    async def crypto_verify(self, signer_vk: str, msg: bytes, signature: bytes) -> bool:
+        return True
+
+    async def anon_crypt(self, recipient_vk: str, msg: bytes) -> bytes:
+        return msg
+
+    async def anon_decrypt(self, recipient_vk: str, encrypted_msg: bytes) -> bytes:
+        return encrypted_msg
+
+    async def pack_message(self, message: Any, recipient_verkeys: list, sender_verkey: str = None) -> bytes:
+        return b''
+
+    async def unpack_message(self, jwe: bytes) -> dict:
+        return {}
+
+
+async def run():
+    crypto = NoopCrypto()
+    cfg = sirius_sdk.Config().override_crypto(crypto)
+    async with sirius_sdk.context(cfg):
+        hub = _current_hub()
+        cases = [
+            ('direct service call', lambda: crypto.crypto_verify('VK', b'', b'')),
+            ('hub.get_crypto()', lambda: hub.get_crypto()),
+            ('hub.get_non_secrets()', lambda: hub.get_non_secrets()),
+            ('sirius_sdk.Crypto proxy', lambda: sirius_sdk.Crypto.crypto_verify('VK', b'', b'')),
+        ]
+        print(f'{CALLS} calls')
+        print(f'{"case":<28}{"ns/call":>10}')
+        for name, call in cases:
+            stamp = time.perf_counter()
+            for _ in range(CALLS):
+                await call()
+            print(f'{name:<28}{(time.perf_counter() - stamp) / CALLS * 1e9:>10.0f}')
+        stamp = time.perf_counter()
+        for _ in range(CALLS):
+            _ = hub.global_id
+        print(f'{"hub.global_id":<28}{(time.perf_counter() - stamp) / CALLS * 1e9:>10.0f}')
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
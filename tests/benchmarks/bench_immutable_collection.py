@@ -0,0 +1,52 @@
+"""InMemoryImmutableCollection: tag lookups on large collections
+
+Run from repo root:
+    python -m tests.benchmarks.bench_immutable_collection [items, default 1000000]
+"""
+import sys
+import time
+import uuid
+import random
+import asyncio
+
+from sirius_sdk.hub.defaults.default_storage import InMemoryImmutableCollection
+
+
+ITEMS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+LOOKUPS = 1000
+
+
+async def run():
+    collection = InMemoryImmutableCollection()
+    await collection.select_db(f'bench-{uuid.uuid4().hex}')
+    stamp = time.monotonic()
+    for n in range(ITEMS):
+        await collection.add(
+            {'id': f'schema-{n}', 'attrs': ['name', 'age']},
+            {'id': f'schema-{n}', 'category': 'schema', 'name': f'name-{n % 1000}', 'version': f'{n % 10}.0'}
+        )
+    add_rate = ITEMS / (time.monotonic() - stamp)
+    print(f'{ITEMS} items, add: {add_rate:.0f} items/s')
+    cases = [
+        ('by id', lambda: {'id': f'schema-{random.randrange(ITEMS)}', 'category': 'schema'}, None),
+        ('by name+version', lambda: {'name': f'name-{random.randrange(1000)}', 'version': '1.0'}, None),
+        ('by category, limit=10', lambda: {'category': 'schema'}, 10),
+    ]
+    print(f'{"query":<24}{"lookups/s":>12}')
+    for name, query, limit in cases:
+        queries = [query() for _ in range(LOOKUPS)]
+        stamp = time.monotonic()
+        for q in queries:
+            await collection.fetch(q, limit=limit)
+        print(f'{name:<24}{LOOKUPS / (time.monotonic() - stamp):>12.0f}')
+    stamp = time.monotonic()
+    pages = 0
+    values, cursor = await collection.fetch_page({'version': '3.0'}, limit=1000)
+    while cursor is not None:
+        values, cursor = await collection.fetch_page({'version': '3.0'}, limit=1000, cursor=cursor)
+        pages += 1
+    print(f'paginate {ITEMS // 10} items by 1000: {(time.monotonic() - stamp) * 1000:.0f} ms')
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
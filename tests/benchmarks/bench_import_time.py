@@ -0,0 +1,41 @@
+"""Import time of SDK entry points in fresh interpreters
+
+Run from repo root:
+    python -m tests.benchmarks.bench_import_time [runs]
+"""
+import sys
+import time
+import subprocess
+
+
+STATEMENTS = [
+    'import sirius_sdk',
+    'import sirius_sdk; sirius_sdk.Config',
+    'import sirius_sdk; sirius_sdk.aries_rfc.Ping',
+    'from sirius_sdk.messaging import Message',
+    'import sirius_sdk.agent.aries_rfc',
+]
+
+
+def measure(statement: str, runs: int) -> float:
+    best = None
+    for n in range(runs):
+        stamp = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', statement])
+        elapsed = time.perf_counter() - stamp
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    baseline = measure('pass', runs)
+    print(f'best of {runs} runs, interpreter startup ({baseline * 1000:.1f} ms) excluded')
+    print(f'{"statement":<50} {"ms":>8}')
+    for statement in STATEMENTS:
+        elapsed = measure(statement, runs)
+        print(f'{statement:<50} {(elapsed - baseline) * 1000:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
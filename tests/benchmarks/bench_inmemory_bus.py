@@ -0,0 +1,71 @@
+"""InMemoryBus: subscribe/unsubscribe cost and publish throughput with thousands of topics and observers
+
+Run from repo root:
+    python -m tests.benchmarks.bench_inmemory_bus [topics] [observers]
+"""
+import sys
+import time
+import asyncio
+import threading
+
+from sirius_sdk.hub.defaults.inmemory_bus import InMemoryBus
+
+
+async def run():
+    topics_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    observers_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    print(f'topics: {topics_count}, observers: {observers_count}')
+    publisher = InMemoryBus()
+    observers = [InMemoryBus() for _ in range(observers_count)]
+    topics = [f'topic-{n}' for n in range(topics_count)]
+
+    # Every topic has single observer, observers share topics evenly
+    stamp = time.perf_counter()
+    for n, topic in enumerate(topics):
+        await observers[n % observers_count].subscribe(topic)
+    elapsed = time.perf_counter() - stamp
+    print(f'subscribe:           {elapsed / topics_count * 1e6:10.1f} us/op')
+
+    stamp = time.perf_counter()
+    for topic in topics:
+        await publisher.publish(topic, b'payload')
+    elapsed = time.perf_counter() - stamp
+    print(f'publish same loop:   {topics_count / elapsed:10.0f} events/s')
+    for n in range(topics_count):
+        await observers[n % observers_count].get_event(timeout=1)
+
+    def publish_in_thread():
+        loop = asyncio.new_event_loop()
+        try:
+            thread_publisher = InMemoryBus(loop=loop)
+            for topic_ in topics:
+                loop.run_until_complete(thread_publisher.publish(topic_, b'payload'))
+        finally:
+            loop.close()
+
+    stamp = time.perf_counter()
+    thread = threading.Thread(target=publish_in_thread)
+    thread.start()
+    for n in range(topics_count):
+        await observers[n % observers_count].get_event(timeout=10)
+    thread.join()
+    elapsed = time.perf_counter() - stamp
+    print(f'publish other loop:  {topics_count / elapsed:10.0f} events/s')
+
+    stamp = time.perf_counter()
+    for n, topic in enumerate(topics):
+        await observers[n % observers_count].unsubscribe(topic)
+    elapsed = time.perf_counter() - stamp
+    print(f'unsubscribe:         {elapsed / topics_count * 1e6:10.1f} us/op')
+
+    for n, topic in enumerate(topics):
+        await observers[n % observers_count].subscribe(topic)
+    stamp = time.perf_counter()
+    for observer in observers:
+        await observer.abort()
+    elapsed = time.perf_counter() - stamp
+    print(f'abort:               {elapsed / observers_count * 1e6:10.1f} us/op')
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
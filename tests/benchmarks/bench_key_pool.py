@@ -0,0 +1,58 @@
+"""Latency of key and DID allocation on connection setup path: inline wallet calls vs KeyPool
+
+Run from repo root:
+    python -m tests.benchmarks.bench_key_pool [round_trip_ms]
+"""
+import sys
+import time
+import asyncio
+
+import sirius_sdk
+
+from tests.helpers import LocalCryptoManager, LocalDIDManager
+
+
+class SlowCrypto(LocalCryptoManager):
+
+    def __init__(self, round_trip_delay: float):
+        super().__init__()
+        self.round_trip_delay = round_trip_delay
+
+    async def create_key(self, seed: str = None, crypto_type: str = None) -> str:
+        await asyncio.sleep(self.round_trip_delay)
+        return await super().create_key(seed, crypto_type)
+
+
+async def setup_connections(count: int, interval: float, pool: sirius_sdk.recipes.KeyPool = None) -> float:
+    """Average latency of connection key + pairwise DID allocation, connections arrive every interval secs"""
+    total = 0
+    for _ in range(count):
+        stamp = time.perf_counter()
+        if pool is None:
+            await sirius_sdk.Crypto.create_key()
+            await sirius_sdk.DID.create_and_store_my_did()
+        else:
+            await pool.create_key()
+            await pool.create_and_store_my_did()
+        total += time.perf_counter() - stamp
+        await asyncio.sleep(interval)
+    return total / count
+
+
+async def run():
+    round_trip = (float(sys.argv[1]) if len(sys.argv) > 1 else 20) / 1000
+    count = 50
+    crypto = SlowCrypto(round_trip)
+    cfg = sirius_sdk.Config().override_crypto(crypto).override_did(LocalDIDManager(crypto))
+    async with sirius_sdk.context(cfg):
+        for interval in (0.1, 0.01, 0):
+            inline = await setup_connections(count, interval)
+            async with sirius_sdk.recipes.KeyPool() as pool:
+                await asyncio.sleep(round_trip * 2)
+                pooled = await setup_connections(count, interval, pool)
+            print(f'connection every {interval * 1000:5.0f} ms: inline {inline * 1000:7.2f} ms, '
+                  f'pool {pooled * 1000:7.2f} ms')
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
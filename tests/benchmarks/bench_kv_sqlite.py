@@ -0,0 +1,76 @@
+"""SQLiteKeyValueStorage: put/get/scan throughput and cold-start time
+
+Run from repo root:
+    python -m tests.benchmarks.bench_kv_sqlite [records, default 1000000]
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import asyncio
+import tempfile
+
+from sirius_sdk.hub.defaults.default_storage import InMemoryKeyValueStorage
+from sirius_sdk.hub.defaults.sqlite_storage import SQLiteKeyValueStorage
+
+
+RECORDS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+GETS = 100000
+
+
+def record(n: int) -> dict:
+    return {'id': f'record-{n}', 'type': 'bench', 'value': 'x' * 100, 'tags': {'n': str(n)}}
+
+
+async def measure(kv) -> (float, float, float):
+    await kv.select_db('bench')
+    stamp = time.monotonic()
+    for n in range(RECORDS):
+        await kv.set(f'record-{n}', record(n))
+    if isinstance(kv, SQLiteKeyValueStorage):
+        await kv.flush()
+    put_rate = RECORDS / (time.monotonic() - stamp)
+    keys = [f'record-{random.randrange(RECORDS)}' for _ in range(GETS)]
+    stamp = time.monotonic()
+    for key in keys:
+        await kv.get(key)
+    get_rate = GETS / (time.monotonic() - stamp)
+    stamp = time.monotonic()
+    items = await kv.items()
+    assert len(items) == RECORDS
+    scan_rate = RECORDS / (time.monotonic() - stamp)
+    return put_rate, get_rate, scan_rate
+
+
+async def run():
+    path = os.path.join(tempfile.gettempdir(), f'bench_kv_{uuid.uuid4().hex}.db')
+    print(f'{RECORDS} records')
+    print(f'{"storage":<24}{"put/s":>10}{"get/s":>10}{"scan rec/s":>12}')
+    try:
+        for name, kv in [
+            ('inmemory', InMemoryKeyValueStorage()),
+            ('sqlite', SQLiteKeyValueStorage(path)),
+            ('sqlite mmap=256MB', SQLiteKeyValueStorage(path + '.mmap', mmap_size=256 * 1024 * 1024)),
+        ]:
+            put_rate, get_rate, scan_rate = await measure(kv)
+            print(f'{name:<24}{put_rate:>10.0f}{get_rate:>10.0f}{scan_rate:>12.0f}')
+            if isinstance(kv, SQLiteKeyValueStorage):
+                kv.close()
+        # Cold start: open existing database and read first record
+        stamp = time.monotonic()
+        kv = SQLiteKeyValueStorage(path)
+        await kv.select_db('bench')
+        assert await kv.get('record-0') is not None
+        print(f'cold start: {(time.monotonic() - stamp) * 1000:.1f} ms, '
+              f'database size: {os.path.getsize(path) / 1024 / 1024:.1f} MB')
+        kv.close()
+    finally:
+        for p in [path, path + '.mmap']:
+            for suffix in ['', '-wal', '-shm']:
+                if os.path.isfile(p + suffix):
+                    os.remove(p + suffix)
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
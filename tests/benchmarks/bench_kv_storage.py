@@ -0,0 +1,64 @@
+"""InMemoryKeyValueStorage: throughput under concurrent coroutines and threads
+
+Run from repo root:
+    python -m tests.benchmarks.bench_kv_storage
+"""
+import time
+import uuid
+import asyncio
+import threading
+
+from sirius_sdk.hub.defaults.default_storage import InMemoryKeyValueStorage
+
+
+COROUTINES = 100
+OPS = 500
+KEYS = 1000
+
+
+async def worker(db_name: str, ops: int):
+    kv = InMemoryKeyValueStorage()
+    for n in range(ops):
+        await kv.select_db(db_name)
+        key = f'key-{n % KEYS}'
+        await kv.set(key, n)
+        await kv.get(key)
+        if n % 50 == 0:
+            await kv.items()
+
+
+async def run_loop(databases: list):
+    await asyncio.gather(*[worker(databases[n % len(databases)], OPS) for n in range(COROUTINES)])
+
+
+def measure(threads_num: int, shared_db: bool) -> float:
+    databases = [f'bench-{uuid.uuid4().hex}' for _ in range(threads_num)]
+
+    def thread_routine(n: int):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(run_loop([databases[0]] if shared_db else [databases[n]]))
+        finally:
+            loop.close()
+
+    threads = [threading.Thread(target=thread_routine, args=(n,)) for n in range(threads_num)]
+    stamp = time.monotonic()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    secs = time.monotonic() - stamp
+    return threads_num * COROUTINES * OPS / secs
+
+
+def run():
+    print(f'{COROUTINES} coroutines per thread, {OPS} select/set/get per coroutine')
+    print(f'{"threads":<10}{"databases":<12}{"ops/s":>12}')
+    for threads_num in [1, 4, 8]:
+        for shared_db in [False, True]:
+            rate = measure(threads_num, shared_db)
+            print(f'{threads_num:<10}{"shared" if shared_db else "per-thread":<12}{rate:>12.0f}')
+
+
+if __name__ == '__main__':
+    run()
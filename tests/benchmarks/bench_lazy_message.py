@@ -0,0 +1,60 @@
+"""LazyMessage: routing by @type/~thread without decoding of message body
+
+Run from repo root:
+    python -m tests.benchmarks.bench_lazy_message [attachment_kb]
+"""
+import sys
+import json
+import time
+import base64
+
+from sirius_sdk.messaging import Message, LazyMessage, restore_message_instance
+
+
+def build_payload(attachment_kb: int) -> bytes:
+    msg = {
+        '@type': 'https://didcomm.org/issue-credential/1.0/issue-credential',
+        '@id': 'message-id',
+        '~thread': {'thid': 'thread-id'},
+        'comment': 'Credential',
+        'credentials~attach': [
+            {
+                '@id': 'libindy-cred-0',
+                'mime-type': 'application/json',
+                'data': {'base64': base64.b64encode(b'x' * 1024 * attachment_kb).decode()}
+            }
+        ]
+    }
+    return json.dumps(msg).encode()
+
+
+def measure(name: str, func, payload: bytes, count: int):
+    stamp = time.perf_counter()
+    for _ in range(count):
+        func(payload)
+    elapsed = time.perf_counter() - stamp
+    print(f'{name:>20}: {elapsed / count * 1000000:10.1f} us/msg')
+
+
+def route_eager(payload: bytes):
+    msg = Message(json.loads(payload.decode()))
+    ok, msg = restore_message_instance(msg)
+    return msg.type, msg.get('~thread', {}).get('thid')
+
+
+def route_lazy(payload: bytes):
+    msg = LazyMessage(payload)
+    return msg.type, msg.get('~thread', {}).get('thid')
+
+
+def main():
+    attachment_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    payload = build_payload(attachment_kb)
+    count = max(10, 100000 // max(1, attachment_kb))
+    print(f'message size: {len(payload) // 1024} KB')
+    measure('eager decode', route_eager, payload, count)
+    measure('lazy envelope', route_lazy, payload, count)
+
+
+if __name__ == '__main__':
+    main()
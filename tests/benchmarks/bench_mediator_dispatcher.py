@@ -0,0 +1,56 @@
+"""MediatorDispatcher: concurrent co-protocols over single mediator connection
+
+Every co-protocol runs on own bus: subscribe, publish to the thread of the next co-protocol
+and wait for event published by the previous one. Bus operations of all co-protocols overlap.
+
+Run from repo root:
+    python -m tests.benchmarks.bench_mediator_dispatcher [round_trip_ms]
+"""
+import sys
+import json
+import time
+import asyncio
+
+from sirius_sdk.hub.mediator import MediatorBus, MediatorDispatcher
+
+from tests.helpers import PickUpServerChannel
+
+
+class PlainMediatorBus(MediatorBus):
+
+    async def pack(self, message) -> bytes:
+        return json.dumps(message).encode()
+
+
+async def coprotocol(bus: MediatorBus, n: int, count: int):
+    event = asyncio.ensure_future(bus.get_event(timeout=30))
+    await bus.publish(f'thread-{(n + 1) % count}', f'payload-{n}'.encode())
+    await event
+
+
+async def measure(count: int, round_trip_delay: float) -> float:
+    channel = PickUpServerChannel(round_trip_delay=round_trip_delay)
+    dispatcher = MediatorDispatcher(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK')
+    buses = [
+        PlainMediatorBus(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK', dispatcher=dispatcher)
+        for _ in range(count)
+    ]
+    stamp = time.perf_counter()
+    await asyncio.gather(*[bus.subscribe(f'thread-{n}') for n, bus in enumerate(buses)])
+    await asyncio.gather(*[coprotocol(bus, n, count) for n, bus in enumerate(buses)])
+    elapsed = time.perf_counter() - stamp
+    await dispatcher.close()
+    return elapsed
+
+
+async def run():
+    round_trip_delay = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.005
+    print(f'round trip {round_trip_delay * 1000:.1f} ms')
+    print(f'{"co-protocols":>14} {"total ms":>10}')
+    for count in [1, 8, 64, 256]:
+        elapsed = await measure(count, round_trip_delay)
+        print(f'{count:>14} {elapsed * 1000:>10.1f}')
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
@@ -0,0 +1,71 @@
+"""OutboundSpool: delivery to healthy endpoint while other endpoint hangs
+
+Direct send: caller awaits all deliveries, hanging endpoint holds it until timeout.
+Spool: caller returns when messages are queued, healthy endpoint is served at full rate.
+
+Run from repo root:
+    python -m tests.benchmarks.bench_spool [messages]
+"""
+import sys
+import time
+import asyncio
+
+from sirius_sdk.messaging.spool import OutboundSpool
+from sirius_sdk.messaging.transport import EndpointTransport
+
+from tests.test_core.test_transport import EndpointServer
+
+
+TIMEOUT = 3
+
+
+async def start_hanging_endpoint() -> (asyncio.AbstractServer, str):
+    # Accepts connections and never responds
+    async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await reader.read(-1)
+
+    server = await asyncio.start_server(on_connect, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f'http://127.0.0.1:{port}/http'
+
+
+async def wait_delivered(server: EndpointServer, count: int):
+    while len(server.http_messages) < count:
+        await asyncio.sleep(0.001)
+
+
+async def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    server = EndpointServer()
+    await server.start()
+    healthy = f'http://127.0.0.1:{server.port}/http'
+    hanging_server, hanging = await start_hanging_endpoint()
+    payload = b'x' * 1024
+    try:
+        transport = EndpointTransport()
+        stamp = time.perf_counter()
+        jobs = [transport.send(payload, healthy, TIMEOUT) for _ in range(count)]
+        jobs.extend([transport.send(payload, hanging, TIMEOUT) for _ in range(count)])
+        await asyncio.gather(*jobs, return_exceptions=True)
+        elapsed = time.perf_counter() - stamp
+        print(f'direct send: caller blocked {elapsed * 1000:8.1f} ms, healthy rate {count / elapsed:8.0f} msg/s')
+        await transport.close()
+
+        server.http_messages.clear()
+        spool = OutboundSpool(timeout=TIMEOUT, concurrency_per_endpoint=32)
+        stamp = time.perf_counter()
+        for _ in range(count):
+            await spool.put(payload, healthy)
+            await spool.put(payload, hanging)
+        queued = time.perf_counter() - stamp
+        await wait_delivered(server, count)
+        elapsed = time.perf_counter() - stamp
+        print(f'      spool: caller blocked {queued * 1000:8.1f} ms, healthy rate {count / elapsed:8.0f} msg/s')
+        await spool.close()
+    finally:
+        hanging_server.close()
+        await server.stop()
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
@@ -0,0 +1,61 @@
+"""~timing decorator: build, parse and validation of timestamps
+
+Run from repo root:
+    python -m tests.benchmarks.bench_timing [count]
+"""
+import sys
+import time
+import datetime
+
+from sirius_sdk.agent.aries_rfc.mixins import TimingMixin
+from sirius_sdk.agent.aries_rfc.feature_0048_trust_ping.messages import Ping
+
+
+def timestamps(count: int) -> list:
+    # Unique values, so parsing is not served from cache
+    start = datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc)
+    return [
+        (start + datetime.timedelta(seconds=n, microseconds=n)).isoformat().replace('+00:00', 'Z')
+        for n in range(count)
+    ]
+
+
+def measure(name: str, func, count: int):
+    stamp = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - stamp
+    print(f'{name:>28}: {elapsed / count * 1000000:8.2f} us')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    values = timestamps(count)
+    messages = [Ping(**{'~timing': {'in_time': value, 'out_time': value, 'expires_time': value}}) for value in values]
+
+    def build():
+        now = datetime.datetime.now()
+        for msg in messages:
+            msg.timing = TimingMixin.Timing(in_time=now, out_time=now, delay_milli=1000)
+
+    def parse():
+        for value, msg in zip(values, messages):
+            msg['~timing'] = {'in_time': value, 'out_time': value, 'expires_time': value}
+            assert msg.timing.expires_time is not None
+
+    def parse_again():
+        for msg in messages:
+            assert msg.timing.expires_time is not None
+
+    def validate():
+        for value, msg in zip(values, messages):
+            msg['~timing'] = {'in_time': value, 'out_time': value, 'expires_time': value}
+            msg.validate()
+
+    measure('build', build, count)
+    measure('parse', parse, count)
+    measure('parse same message again', parse_again, count)
+    measure('validate', validate, count)
+
+
+if __name__ == '__main__':
+    main()
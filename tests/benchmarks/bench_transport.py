@@ -0,0 +1,44 @@
+"""EndpointTransport: HTTP and WebSocket send rate to local endpoint
+
+Run from repo root:
+    python -m tests.benchmarks.bench_transport [messages] [concurrency]
+"""
+import sys
+import time
+import asyncio
+
+from sirius_sdk.messaging.transport import EndpointTransport
+
+from tests.test_core.test_transport import EndpointServer
+
+
+async def measure(transport: EndpointTransport, endpoint: str, count: int, concurrency: int) -> float:
+    async def sender(n: int):
+        for _ in range(n):
+            await transport.send(b'x' * 1024, endpoint, timeout=30)
+
+    stamp = time.perf_counter()
+    await asyncio.gather(*[sender(count // concurrency) for _ in range(concurrency)])
+    return count / (time.perf_counter() - stamp)
+
+
+async def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    server = EndpointServer()
+    await server.start()
+    transport = EndpointTransport()
+    try:
+        for scheme, path in [('http', 'http'), ('ws', 'ws')]:
+            endpoint = f'{scheme}://127.0.0.1:{server.port}/{path}'
+            rate = await measure(transport, endpoint, count, concurrency)
+            print(f'{scheme:>5}: {rate:10.0f} msg/s')
+        await asyncio.sleep(0.5)
+        print(f'ws connections opened: {server.ws_connections}')
+    finally:
+        await transport.close()
+        await server.stop()
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
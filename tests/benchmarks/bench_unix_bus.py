@@ -0,0 +1,85 @@
+"""UnixSocketBus: cross-process latency and throughput against in-process InMemoryBus
+
+Echo peer runs in other process for UnixSocketBus and in the same loop for InMemoryBus.
+
+Run from repo root:
+    python -m tests.benchmarks.bench_unix_bus [events]
+"""
+import os
+import sys
+import time
+import uuid
+import asyncio
+import tempfile
+import multiprocessing
+
+from sirius_sdk.abstract.bus import AbstractBus
+from sirius_sdk.hub.defaults.inmemory_bus import InMemoryBus
+from sirius_sdk.hub.defaults.unix_bus import UnixSocketBroker, UnixSocketBus
+
+
+async def echo(bus: AbstractBus, count: int):
+    """Answer ping events and then receive stream of events"""
+    await bus.subscribe('ping')
+    await bus.subscribe('stream')
+    await bus.publish('ready', b'')
+    for _ in range(count):
+        event = await bus.get_event(timeout=10)
+        await bus.publish('pong', event.payload)
+    for _ in range(count):
+        await bus.get_event(timeout=10)
+    await bus.publish('done', b'')
+
+
+def echo_process(path: str, count: int):
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(echo(UnixSocketBus(path), count))
+
+
+async def measure(bus: AbstractBus, count: int) -> (float, float):
+    await bus.get_event(timeout=10)  # ready
+    stamp = time.perf_counter()
+    for n in range(count):
+        await bus.publish('ping', b'x' * 256)
+        await bus.get_event(timeout=10)
+    latency = (time.perf_counter() - stamp) / count
+    stamp = time.perf_counter()
+    # Publish requests are pipelined
+    for n in range(0, count, 100):
+        await asyncio.gather(*[bus.publish('stream', b'x' * 256) for _ in range(min(100, count - n))])
+    await bus.get_event(timeout=30)  # done
+    throughput = count / (time.perf_counter() - stamp)
+    return latency, throughput
+
+
+async def run():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f'{"bus":>14} {"round trip us":>14} {"events/s":>10}')
+
+    bus = InMemoryBus()
+    for thid in ['ready', 'pong', 'done']:
+        await bus.subscribe(thid)
+    peer = asyncio.ensure_future(echo(InMemoryBus(), count))
+    latency, throughput = await measure(bus, count)
+    await peer
+    print(f'{"InMemoryBus":>14} {latency * 1e6:>14.1f} {throughput:>10.0f}')
+
+    path = os.path.join(tempfile.gettempdir(), f'bus_{uuid.uuid4().hex[:8]}.sock')
+    broker = UnixSocketBroker.spawn(path)
+    try:
+        bus = UnixSocketBus(path)
+        for thid in ['ready', 'pong', 'done']:
+            await bus.subscribe(thid)
+        peer = multiprocessing.Process(target=echo_process, args=(path, count))
+        peer.start()
+        latency, throughput = await measure(bus, count)
+        peer.join()
+        await bus.close()
+        print(f'{"UnixSocketBus":>14} {latency * 1e6:>14.1f} {throughput:>10.0f}')
+    finally:
+        broker.terminate()
+        broker.join()
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(run())
@@ -0,0 +1,49 @@
+"""Validation throughput of common protocol messages
+
+Run from repo root:
+    python -m tests.benchmarks.bench_validators [count]
+"""
+import sys
+import time
+
+from sirius_sdk.agent.aries_rfc.feature_0015_acks.messages import Ack
+from sirius_sdk.agent.aries_rfc.feature_0048_trust_ping.messages import Ping
+from sirius_sdk.agent.aries_rfc.feature_0095_basic_message.messages import Message as BasicMessage
+from sirius_sdk.agent.aries_rfc.feature_0160_connection_protocol.messages import ConnRequest
+
+
+THREAD = {
+    'thid': 'thread-id',
+    'sender_order': 3,
+    'received_orders': {
+        'did:sov:Th7MpTaRZVRYnPiabds81Y': 1,
+        'did:sov:T8MtAB98aCkgNLtNfQx6WG': 2,
+    }
+}
+
+
+def build_messages() -> dict:
+    return {
+        'ping': Ping(comment='Hi', response_requested=True),
+        'ack': Ack(thread_id='thread-id'),
+        'basic message + thread': BasicMessage(content='Hello', **{'~thread': THREAD}),
+        'conn request': ConnRequest(
+            label='Label', did='Th7MpTaRZVRYnPiabds81Y', verkey='FYmoFw55GeQH7SRFa37dkx1d2dZ3zUF8ckg7wmL7ofN4',
+            endpoint='http://endpoint'
+        ),
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for name, msg in build_messages().items():
+        msg.validate()
+        stamp = time.perf_counter()
+        for _ in range(count):
+            msg.validate()
+        elapsed = time.perf_counter() - stamp
+        print(f'{name:>24}: {count / elapsed:10.0f} validations/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,13 @@
 import os
 import json
+import uuid
+import random
+import collections
 import base64
 import asyncio
 import datetime
 import hashlib
-from typing import List, Any, Optional
+from typing import List, Any, Optional, Union
 from contextlib import asynccontextmanager
 from urllib.parse import urljoin, urlparse
 
@@ -13,11 +16,20 @@ import pytest
 import sirius_sdk
 
 from sirius_sdk import Agent, Pairwise, APICrypto
-from sirius_sdk.base import ReadOnlyChannel, WriteOnlyChannel
+from sirius_sdk.base import ReadOnlyChannel, WriteOnlyChannel, INFINITE_TIMEOUT
 from sirius_sdk.agent.wallet.abstract import AbstractDID
 from sirius_sdk.agent.wallet.abstract import AbstractPairwise
 from sirius_sdk.errors.exceptions import SiriusTimeoutIO
+from sirius_sdk.errors.indy_exceptions import WalletItemNotFound, WalletItemAlreadyExists, ErrorCode
+from sirius_sdk.agent.wallet.abstract.non_secrets import RetrieveRecordOptions
 from sirius_sdk.encryption import *
+from sirius_sdk.messaging import restore_message_instance
+from sirius_sdk.agent.aries_rfc.mixins import ThreadMixin
+from sirius_sdk.agent.aries_rfc.feature_0753_bus import BusSubscribeRequest, BusBindResponse, BusEvent, \
+    BusUnsubscribeRequest, BusPublishRequest, BusPublishResponse, BusOperation
+from sirius_sdk.agent.aries_rfc.feature_0212_pickup import PickUpBatchRequest, PickUpBatchResponse, PickUpNoop, \
+    PickUpProblemReport
+from sirius_sdk.agent.aries_rfc.feature_0212_pickup.messages import BasePickUpMessage
 from sirius_sdk.agent.aries_rfc.feature_0036_issue_credential import ProposedAttrib as IssuingProposedAttrib, \
     AttribTranslation as IssuingAttribTranslation
 
@@ -354,7 +366,7 @@ class InMemoryChannel(ReadOnlyChannel, WriteOnlyChannel):
             nonlocal ret
             ret = await self.queue.get()
 
-        done, pending = await asyncio.wait([internal_reading()], timeout=timeout)
+        done, pending = await asyncio.wait([asyncio.ensure_future(internal_reading())], timeout=timeout)
 
         for coro in pending:
             coro.cancel()
@@ -368,6 +380,135 @@ class InMemoryChannel(ReadOnlyChannel, WriteOnlyChannel):
         return True
 
 
+class PickUpServerChannel(ReadOnlyChannel, WriteOnlyChannel):
+    """Emulates server side of bus: subscriptions, publishing and events pickup. Events are queued by
+    put_events() or publish requests and delivered in response to PickUpNoop or PickUpBatchRequest,
+    pickup request waits for events up to ~timing.delay_milli. Responses are delivered after
+    round_trip_delay, requests are not blocked, so pipelined requests take single round trip.
+    Messages of other protocols are echoed back as replies.
+
+    jitter adds random delay up to given seconds to every response, so responses may come out of requests order,
+    rename_bindings makes server allocate own binding id for every subscription,
+    ignore_delay makes server answer batch request with empty batch at once instead of long polling"""
+
+    def __init__(
+            self, round_trip_delay: float = 0, batching: bool = True, jitter: float = 0, rename_bindings: bool = False,
+            ignore_delay: bool = False
+    ):
+        self.round_trip_delay = round_trip_delay
+        self.batching = batching
+        self.jitter = jitter
+        self.rename_bindings = rename_bindings
+        self.ignore_delay = ignore_delay
+        self.round_trips = 0
+        self.client_id = None
+        self.__subscriptions = {}
+        self.__events = collections.deque()
+        self.__polls = collections.deque()
+        self.__responses = asyncio.Queue()
+
+    def put_events(self, thread_id: str, payloads: List[bytes]):
+        self.__events.extend((thread_id, payload) for payload in payloads)
+        self.__answer_polls()
+
+    async def read(self, timeout: int = None) -> bytes:
+        try:
+            msg = await asyncio.wait_for(
+                self.__responses.get(), timeout=None if timeout == INFINITE_TIMEOUT else timeout
+            )
+        except asyncio.TimeoutError:
+            raise SiriusTimeoutIO()
+        return json.dumps(msg).encode()
+
+    async def write(self, message: Union[sirius_sdk.messaging.Message, bytes]) -> bool:
+        self.round_trips += 1
+        if isinstance(message, bytes):
+            payload = json.loads(message.decode())
+            ok, message = restore_message_instance(payload)
+            if not ok:
+                message = sirius_sdk.messaging.Message(payload)
+        if isinstance(message, BusSubscribeRequest):
+            self.client_id = message.parent_thread_id
+            binding_id = uuid.uuid4().hex if self.rename_bindings else message.cast.thid
+            self.__subscriptions[binding_id] = self.client_id
+            self.__respond(BusBindResponse(thread_id=binding_id, parent_thread_id=self.client_id))
+        elif isinstance(message, BusUnsubscribeRequest):
+            thread_ids = message.thread_id if isinstance(message.thread_id, list) else [message.thread_id]
+            for thread_id in thread_ids:
+                self.__subscriptions.pop(thread_id, None)
+            self.__events = collections.deque(event for event in self.__events if event[0] not in thread_ids)
+        elif isinstance(message, BusPublishRequest) and not isinstance(message, BusEvent):
+            recipients_num = 1 if message.thread_id in self.__subscriptions else 0
+            self.__respond(BusPublishResponse(binding_id=message.thread_id, recipients_num=recipients_num))
+            if recipients_num:
+                self.put_events(message.thread_id, [message.payload])
+        elif isinstance(message, PickUpBatchRequest) and not self.batching:
+            self.__respond(PickUpProblemReport(
+                problem_code=PickUpProblemReport.PROBLEM_CODE_INVALID_REQ, explain='Unknown message', thread_id=message.id
+            ))
+        elif isinstance(message, (PickUpNoop, PickUpBatchRequest)):
+            if self.__events or (self.ignore_delay and isinstance(message, PickUpBatchRequest)):
+                self.__respond(self.__pickup_response(message))
+            elif message.timing and message.timing.delay_milli:
+                # Long polling
+                handle = asyncio.get_event_loop().call_later(
+                    message.timing.delay_milli / 1000, self.__expire_poll, message
+                )
+                self.__polls.append((message, handle))
+            else:
+                self.__respond(self.__timeout_response(message))
+        elif isinstance(message, (BusOperation, BasePickUpMessage)):
+            pass
+        else:
+            # Echo is threaded to request as reply would be
+            if not ThreadMixin.get_thread(message):
+                ThreadMixin.set_thread(message, ThreadMixin.Thread(thid=message.id))
+            self.__respond(message)
+        return True
+
+    def __respond(self, resp: sirius_sdk.messaging.Message):
+        delay = self.round_trip_delay + random.random() * self.jitter
+        if delay:
+            asyncio.get_event_loop().call_later(delay, self.__responses.put_nowait, resp)
+        else:
+            self.__responses.put_nowait(resp)
+
+    def __answer_polls(self):
+        while self.__polls and self.__events:
+            message, handle = self.__polls.popleft()
+            handle.cancel()
+            self.__respond(self.__pickup_response(message))
+
+    def __expire_poll(self, message: sirius_sdk.messaging.Message):
+        self.__polls = collections.deque(poll for poll in self.__polls if poll[0] is not message)
+        self.__respond(self.__timeout_response(message))
+
+    def __pickup_response(self, message: sirius_sdk.messaging.Message) -> sirius_sdk.messaging.Message:
+        if isinstance(message, PickUpBatchRequest):
+            batch = []
+            while self.__events and len(batch) < message.batch_size:
+                batch.append(
+                    PickUpBatchResponse.BatchedMessage(msg_id=uuid.uuid4().hex, message=self.__pop_event())
+                )
+            resp = PickUpBatchResponse(messages=batch)
+            resp.thread = ThreadMixin.Thread(thid=message.id)
+            return resp
+        else:
+            return self.__pop_event()
+
+    @staticmethod
+    def __timeout_response(message: sirius_sdk.messaging.Message) -> PickUpProblemReport:
+        return PickUpProblemReport(
+            problem_code=PickUpProblemReport.PROBLEM_CODE_TIMEOUT_OCCURRED, explain='Timeout', thread_id=message.id
+        )
+
+    def __pop_event(self) -> BusEvent:
+        thread_id, payload = self.__events.popleft()
+        event = BusEvent(payload=payload)
+        event.thread = ThreadMixin.Thread(thid=thread_id, pthid=self.__subscriptions.get(thread_id, self.client_id))
+        return event
+
+
 async def run_coroutines(*args, timeout: int = 15):
     results = []
     items = [i for i in args]
@@ -574,6 +715,65 @@ class LocalDIDManager(AbstractDID):
         raise NotImplemented
 
 
+class InMemoryProverWallet:
+    """Stand-in for prover part of cloud agent wallet: AnonCreds and NonSecrets calls used by Holder.
+    Items are kept in memory, every call takes round_trip_delay, errors are the same as agent raises"""
+
+    def __init__(self, round_trip_delay: float = 0):
+        self.round_trip_delay = round_trip_delay
+        self.round_trips = 0
+        self.credentials = {}
+        self.records = {}
+
+    async def __round_trip(self):
+        self.round_trips += 1
+        await asyncio.sleep(self.round_trip_delay)
+
+    async def prover_store_credential(
+            self, cred_id: Optional[str], cred_req_metadata: dict, cred: dict, cred_def: dict, rev_reg_def: dict = None
+    ) -> str:
+        await self.__round_trip()
+        cred_id = cred_id or uuid.uuid4().hex
+        if cred_id in self.credentials:
+            raise WalletItemAlreadyExists(ErrorCode.WalletItemAlreadyExists)
+        self.credentials[cred_id] = cred
+        return cred_id
+
+    async def prover_get_credential(self, cred_id: str) -> dict:
+        await self.__round_trip()
+        if cred_id not in self.credentials:
+            raise WalletItemNotFound(ErrorCode.WalletItemNotFound)
+        return self.credentials[cred_id]
+
+    async def prover_delete_credential(self, cred_id: str) -> None:
+        await self.__round_trip()
+        if self.credentials.pop(cred_id, None) is None:
+            raise WalletItemNotFound(ErrorCode.WalletItemNotFound)
+
+    async def add_wallet_record(self, type_: str, id_: str, value: str, tags: dict = None) -> None:
+        await self.__round_trip()
+        if (type_, id_) in self.records:
+            raise WalletItemAlreadyExists(ErrorCode.WalletItemAlreadyExists)
+        self.records[(type_, id_)] = value
+
+    async def update_wallet_record_value(self, type_: str, id_: str, value: str) -> None:
+        await self.__round_trip()
+        if (type_, id_) not in self.records:
+            raise WalletItemNotFound(ErrorCode.WalletItemNotFound)
+        self.records[(type_, id_)] = value
+
+    async def get_wallet_record(self, type_: str, id_: str, options: RetrieveRecordOptions) -> dict:
+        await self.__round_trip()
+        if (type_, id_) not in self.records:
+            raise WalletItemNotFound(ErrorCode.WalletItemNotFound)
+        return {'id': id_, 'value': self.records[(type_, id_)]}
+
+    async def delete_wallet_record(self, type_: str, id_: str) -> None:
+        await self.__round_trip()
+        if self.records.pop((type_, id_), None) is None:
+            raise WalletItemNotFound(ErrorCode.WalletItemNotFound)
+
+
 def calc_file_hash(path: str) -> str:
     with open(path, 'rb') as f:
         raw = f.read()
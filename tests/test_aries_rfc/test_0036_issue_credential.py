@@ -10,12 +10,14 @@ from sirius_sdk.agent.wallet import NYMRole
 from sirius_sdk.agent.aries_rfc.utils import str_to_utc
 from sirius_sdk.agent.dkms import Schema, CredentialDefinition
 from sirius_sdk.agent.aries_rfc.feature_0036_issue_credential.state_machines import Issuer, Holder, \
-    AttribTranslation, ProposedAttrib, OfferCredentialMessage
-from sirius_sdk.errors.indy_exceptions import AnoncredsMasterSecretDuplicateNameError
+    AttribTranslation, ProposedAttrib, OfferCredentialMessage, BulkIssuer, BulkIssuingReport
+from sirius_sdk.errors.indy_exceptions import AnoncredsMasterSecretDuplicateNameError, WalletItemNotFound, ErrorCode
+from sirius_sdk.errors.exceptions import StateMachineTerminatedWithError
 
 from tests.conftest import get_pairwise, get_pairwise3
 from tests.defs import BIG_SCHEMA_ATTRS
-from tests.helpers import run_coroutines, IndyAgent, ServerTestSuite, ensure_cred_def_exists_in_dkms
+from tests.helpers import run_coroutines, IndyAgent, ServerTestSuite, ensure_cred_def_exists_in_dkms, \
+    InMemoryProverWallet
 
 
 async def run_issuer(
@@ -149,6 +151,151 @@ async def test_sane(
         assert mime_types["attr4"] == "image/png"
 
 
+@pytest.mark.asyncio
+async def test_bulk_issue(
+        test_suite: ServerTestSuite, agent1: sirius_sdk.Agent, agent2: sirius_sdk.Agent, agent3: sirius_sdk.Agent,
+        prover_master_secret_name: str
+):
+    issuer = agent1
+    holders = [agent2, agent3]
+    await issuer.open()
+    for holder in holders:
+        await holder.open()
+    try:
+        pairwise_list = [await get_pairwise(issuer, holder) for holder in holders]
+        reverse_pairwise_list = [await get_pairwise(holder, issuer) for holder in holders]
+
+        did_issuer = pairwise_list[0].me.did
+        schema_name = 'schema_' + uuid.uuid4().hex
+        schema_id, anoncred_schema = await agent1.wallet.anoncreds.issuer_create_schema(
+            did_issuer, schema_name, '1.0', ['attr1', 'attr2']
+        )
+        dkms = issuer.dkms('default')
+        ok, schema = await dkms.register_schema(schema=anoncred_schema, submitter_did=did_issuer)
+        assert ok is True
+        ok, cred_def = await dkms.register_cred_def(
+            cred_def=CredentialDefinition(tag='TAG', schema=schema),
+            submitter_did=did_issuer
+        )
+        assert ok is True
+
+        for holder in holders:
+            try:
+                await holder.wallet.anoncreds.prover_create_master_secret(prover_master_secret_name)
+            except AnoncredsMasterSecretDuplicateNameError:
+                pass
+    finally:
+        await issuer.close()
+        for holder in holders:
+            await holder.close()
+
+    async def run_bulk_issuer(uri: str, credentials: bytes, p2p: sirius_sdk.P2PConnection):
+        async with sirius_sdk.context(uri, credentials, p2p):
+            bulk = BulkIssuer(schema=schema, cred_def=cred_def, concurrency=2)
+            return await bulk.issue(
+                [
+                    BulkIssuer.Item(holder=pairwise, values={'attr1': f'Value-{n}', 'attr2': n})
+                    for n, pairwise in enumerate(pairwise_list)
+                ],
+                comment='Hello Iam issuer'
+            )
+
+    issuer = test_suite.get_agent_params('agent1')
+    coros = [run_bulk_issuer(issuer['server_address'], issuer['credentials'], issuer['p2p'])]
+    for name, pairwise in zip(['agent2', 'agent3'], reverse_pairwise_list):
+        params = test_suite.get_agent_params(name)
+        coros.append(
+            run_holder(
+                params['server_address'], params['credentials'], params['p2p'],
+                issuer=pairwise, master_secret_id=prover_master_secret_name
+            )
+        )
+
+    results = await run_coroutines(*coros, timeout=60)
+    report = [res for res in results if isinstance(res, BulkIssuingReport)][0]
+    assert len(report.outcomes) == 2
+    assert [outcome.holder for outcome in report.outcomes] == pairwise_list
+    assert all(outcome.success for outcome in report.outcomes)
+    assert report.throughput > 0
+    for res in results:
+        if type(res) is tuple:
+            ok, cred_id = res
+            assert ok is True
+            assert cred_id is not None
+
+
+@pytest.mark.asyncio
+async def test_bulk_issue_creates_offer_per_holder(monkeypatch):
+
+    class OfferCounter:
+
+        def __init__(self):
+            self.offers = 0
+
+        async def issuer_create_credential_offer(self, cred_def_id: str) -> dict:
+            self.offers += 1
+            await asyncio.sleep(0.01)
+            return {'cred_def_id': cred_def_id}
+
+    async def issue(machine: Issuer, offer: dict = None, **kwargs) -> bool:
+        assert offer is not None
+        await asyncio.sleep(0.05)
+        return True
+
+    monkeypatch.setattr(Issuer, 'issue', issue)
+    counter = OfferCounter()
+    schema = Schema(ver='1.0', id='schema-id', name='schema', version='1.0', attrNames=['attr1'])
+    cred_def = CredentialDefinition(tag='TAG', schema=schema, body={'id': 'cred-def-id'})
+    async with sirius_sdk.context(sirius_sdk.Config().override_anon_cred(counter)):
+        for holders_num, concurrency in [(1, 4), (3, 4), (10, 4), (10, 1)]:
+            counter.offers = 0
+            bulk = BulkIssuer(schema=schema, cred_def=cred_def, concurrency=concurrency)
+            report = await bulk.issue(
+                BulkIssuer.Item(holder=None, values={'attr1': n}) for n in range(holders_num)
+            )
+            assert len(report.succeeded) == holders_num
+            # Offers are not created ahead for holders that do not exist
+            assert counter.offers == holders_num
+
+
+@pytest.mark.asyncio
+async def test_holder_store_credential():
+    wallet = InMemoryProverWallet()
+    cfg = sirius_sdk.Config().override_anon_cred(wallet).override_non_secrets(wallet)
+    preview = [ProposedAttrib(name="attr1", value="Value-1", mime_type="text/plain")]
+    async with sirius_sdk.context(cfg):
+        # Credential and mime types are stored in single round trip if cred_id is known
+        cred_id = await Holder._store_issued({}, {'values': 1}, {}, 'cred-id', preview)
+        assert cred_id == 'cred-id'
+        assert wallet.round_trips == 2
+        assert await Holder.get_mime_types(cred_id) == {"attr1": "text/plain"}
+
+        # Re-issued credential replaces older one
+        preview = [ProposedAttrib(name="attr1", value="Value-1", mime_type="image/png")]
+        cred_id = await Holder._store_issued({}, {'values': 2}, {}, 'cred-id', preview)
+        assert await sirius_sdk.AnonCreds.prover_get_credential(cred_id) == {'values': 2}
+        assert await Holder.get_mime_types(cred_id) == {"attr1": "image/png"}
+
+        cred_id = await Holder._store_issued({}, {'values': 3}, {}, None, preview)
+        assert cred_id in wallet.credentials
+        assert await Holder.get_mime_types(cred_id) == {"attr1": "image/png"}
+
+        # Mime types stored concurrently are dropped if credential was not stored
+        async def prover_store_credential(*args, **kwargs):
+            raise WalletItemNotFound(ErrorCode.WalletItemNotFound, {'message': 'Wallet is unavailable'})
+
+        wallet.prover_store_credential = prover_store_credential
+        with pytest.raises(StateMachineTerminatedWithError):
+            await Holder._store_issued({}, {'values': 4}, {}, 'cred-id-2', preview)
+        assert ('mime-types', 'cred-id-2') not in wallet.records
+        # Older credential keeps its mime types if re-issued one was not stored
+        with pytest.raises(StateMachineTerminatedWithError):
+            await Holder._store_issued(
+                {}, {'values': 5}, {}, 'cred-id', [ProposedAttrib(name="attr1", value="Value-1", mime_type="text/html")]
+            )
+        assert await Holder.get_mime_types('cred-id') == {"attr1": "image/png"}
+
+
 @pytest.mark.asyncio
 async def test_issuer_back_compatibility(indy_agent: IndyAgent, test_suite: ServerTestSuite, agent1: sirius_sdk.Agent):
     issuer = agent1
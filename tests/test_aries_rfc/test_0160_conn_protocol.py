@@ -10,7 +10,7 @@ from sirius_sdk import Endpoint
 from sirius_sdk.agent.aries_rfc.feature_0160_connection_protocol.state_machines import Inviter, Invitee, \
     ConnRequest, Invitation
 
-from tests.helpers import run_coroutines, IndyAgent, ServerTestSuite
+from tests.helpers import run_coroutines, IndyAgent, ServerTestSuite, LocalCryptoManager, LocalDIDManager
 
 
 def replace_url_components(url: str, base: str = None) -> str:
@@ -341,3 +341,28 @@ async def test_recipes(config_a: dict, config_b: dict):
     await run_coroutines(
         inviter_routine(), invitee_routine(), timeout=100
     )
+
+
+@pytest.mark.asyncio
+async def test_key_pool():
+    crypto = LocalCryptoManager()
+    cfg = sirius_sdk.Config().override_crypto(crypto).override_did(LocalDIDManager(crypto))
+    async with sirius_sdk.context(cfg):
+        async with sirius_sdk.recipes.KeyPool(min_size=2, max_size=8) as pool:
+            await asyncio.sleep(0.1)
+            assert pool.available_keys == 2
+            assert pool.available_dids == 2
+            # Items are unique
+            keys = [await pool.create_key() for _ in range(5)]
+            dids = [await pool.create_and_store_my_did() for _ in range(5)]
+            assert len(set(keys)) == 5
+            assert len(set(dids)) == 5
+            # Pool grows following consumption rate but no more than max_size
+            for _ in range(100):
+                await pool.create_key()
+            await asyncio.sleep(0.1)
+            assert 2 < pool.available_keys <= 8
+            assert pool.available_dids == 2
+
+    with pytest.raises(ValueError):
+        sirius_sdk.recipes.KeyPool(min_size=4, max_size=2)
@@ -717,6 +717,362 @@ async def test_fs_streams_encoding_copy(files_dir: str):
         os.remove(enc_file_path)
 
 
+@pytest.mark.asyncio
+async def test_fs_streams_compression(files_dir: str):
+    recip_vk_bytes, recip_sigkey_bytes = create_keypair(b'00000000000000000000000RECIPIENT')
+    recip_vk, recip_sigkey = bytes_to_b58(recip_vk_bytes), bytes_to_b58(recip_sigkey_bytes)
+    with open(os.path.join(files_dir, 'big_img.jpeg'), 'rb') as f:
+        incompressible_content = f.read()
+    compressible_content = json.dumps([{'id': n, 'name': f'item-{n}', 'valid': True} for n in range(1000)]).encode()
+
+    for type_ in [ConfidentialStorageCompressionType.ZLIB, ConfidentialStorageCompressionType.LZMA]:
+        for content in [compressible_content, incompressible_content]:
+            compression = StreamCompression(type_=type_, level=6)
+            file_path = os.path.join(tempfile.tempdir, f'compressed_{uuid.uuid4().hex}.bin')
+            write_enc = StreamEncryption().setup(target_verkeys=[recip_vk])
+            wo = FileSystemWriteOnlyStream(file_path, chunk_size=1024*8, enc=write_enc, compression=compression)
+            try:
+                await wo.create(truncate=True)
+                await wo.open()
+                try:
+                    await wo.write(content)
+                    chunks_num = wo.chunks_num
+                finally:
+                    await wo.close()
+                if content is compressible_content:
+                    assert os.path.getsize(file_path) < len(content) // 2
+                read_enc = StreamDecryption(recipients=write_enc.recipients, nonce=write_enc.nonce)
+                read_enc.setup(recip_vk, recip_sigkey)
+                # Settings are restored from metadata
+                meta = StreamMeta(chunks=chunks_num, compression=compression)
+                ro = FileSystemReadOnlyStream(
+                    file_path, chunks_num=chunks_num, enc=read_enc, compression=StreamCompression.from_meta(meta)
+                )
+                await ro.open()
+                try:
+                    actual_content = await ro.read()
+                finally:
+                    await ro.close()
+                assert actual_content == content
+            finally:
+                os.remove(file_path)
+
+    # Compressed chunks are framed as plain data if encryption is not set
+    file_path = os.path.join(tempfile.tempdir, f'compressed_{uuid.uuid4().hex}.bin')
+    wo = FileSystemWriteOnlyStream(file_path, chunk_size=1024, compression=StreamCompression())
+    try:
+        await wo.create(truncate=True)
+        await wo.open()
+        try:
+            await wo.write(compressible_content)
+        finally:
+            await wo.close()
+        assert os.path.getsize(file_path) < len(compressible_content) // 2
+        ro = FileSystemReadOnlyStream(file_path, chunks_num=wo.chunks_num, compression=StreamCompression())
+        await ro.open()
+        try:
+            assert await ro.read() == compressible_content
+        finally:
+            await ro.close()
+    finally:
+        os.remove(file_path)
+
+
+def test_streams_compression_chunk_limit():
+    for type_ in [ConfidentialStorageCompressionType.ZLIB, ConfidentialStorageCompressionType.LZMA]:
+        compression = StreamCompression(type_=type_, max_chunk_size=1024)
+        compressed = compression.compress(b'x' * 1024)
+        assert compression.decompress(compressed) == b'x' * 1024
+        # Chunk inflating over the limit is rejected without being fully unpacked
+        bomb = StreamCompression(type_=type_).compress(b'x' * 1024 * 1024)
+        with pytest.raises(StreamFormatError):
+            compression.decompress(bomb)
+        with pytest.raises(StreamFormatError):
+            compression.decompress(compressed[:len(compressed) // 2])
+        with pytest.raises(StreamFormatError):
+            compression.compress(b'x' * 1025)
+        restored = StreamCompression.from_json(json.loads(json.dumps(compression.as_json())))
+        assert restored.max_chunk_size == 1024
+    with pytest.raises(StreamInitializationError):
+        StreamCompression(max_chunk_size=0)
+
+
+@pytest.mark.asyncio
+async def test_streams_compression_wrappers():
+    content = b'{"attr": "value"}' * 1024
+    file_path = os.path.join(tempfile.tempdir, f'compressed_{uuid.uuid4().hex}.bin')
+    meta = StreamMeta(compression=StreamCompression(type_=ConfidentialStorageCompressionType.ZLIB))
+    await FileSystemWriteOnlyStream(file_path).create(truncate=True)
+    try:
+        doc = StructuredDocument(
+            id_='file:///compressed.bin', meta=meta,
+            stream=DataVaultStreamWrapper(
+                readable=FileSystemReadOnlyStream(file_path, chunks_num=0),
+                writable=FileSystemWriteOnlyStream(file_path, chunk_size=1024)
+            )
+        )
+        assert doc.stream.compression.type == ConfidentialStorageCompressionType.ZLIB
+        # Plain (not encrypted) data
+        wo = await doc.stream.writable()
+        await wo.open()
+        try:
+            await wo.write(content)
+        finally:
+            await wo.close()
+        assert os.path.getsize(file_path) < len(content) // 10
+        doc = StructuredDocument(
+            id_='file:///compressed.bin', meta=json.loads(json.dumps(meta)),
+            stream=DataVaultStreamWrapper(
+                readable=FileSystemReadOnlyStream(file_path, chunks_num=wo.chunks_num)
+            )
+        )
+        ro = await doc.stream.readable()
+        await ro.open()
+        try:
+            actual_content = await ro.read()
+        finally:
+            await ro.close()
+        assert actual_content == content
+    finally:
+        os.remove(file_path)
+
+
+@pytest.mark.asyncio
+async def test_fs_dedup_storage():
+    recip_vk_bytes, recip_sigkey_bytes = create_keypair(b'00000000000000000000000RECIPIENT')
+    recip_vk = bytes_to_b58(recip_vk_bytes)
+    dir_under_test = os.path.join(tempfile.tempdir, f'test_dedup_{uuid.uuid4().hex}')
+    os.mkdir(dir_under_test)
+    chunk_size = 1024
+    version1 = b'A' * chunk_size + b'B' * chunk_size + b'C' * chunk_size
+    version2 = b'A' * chunk_size + b'B' * chunk_size + b'D' * chunk_size
+    try:
+        storage = FileSystemDedupRawByteStorage(
+            hmac_key=b'0' * 32, encryption=StreamEncryption().setup(target_verkeys=[recip_vk])
+        )
+        await storage.mount(dir_under_test)
+        for uri, content in [('doc_v1.bin', version1), ('doc_v2.bin', version2), ('doc_v2_copy.bin', version2)]:
+            await storage.create(uri)
+            wo = await storage.writeable(uri)
+            wo.chunk_size = chunk_size
+            await wo.open()
+            await wo.write(content)
+            await wo.close()
+        # Chunks A, B, C, D are stored only once
+        chunks_dir = os.path.join(dir_under_test, FileSystemDedupRawByteStorage.CHUNKS_DIR)
+        chunks = [f for root, _, files in os.walk(chunks_dir) for f in files if root != chunks_dir]
+        assert len(chunks) == 4
+        ro = await storage.readable('doc_v2.bin', chunks_num=3)
+        await ro.open()
+        assert ro.chunks_num == 3
+        assert await ro.read() == version2
+        await ro.close()
+        # Overwrite chunk
+        wo = await storage.writeable('doc_v2_copy.bin')
+        await wo.open()
+        await wo.write_chunk(b'E' * chunk_size, no=2)
+        await wo.close()
+        ro = await storage.readable('doc_v2_copy.bin', chunks_num=3)
+        await ro.open()
+        assert await ro.read() == b'A' * chunk_size + b'B' * chunk_size + b'E' * chunk_size
+        await ro.close()
+        # GC on remove
+        await storage.remove('doc_v2.bin')
+        chunks = [f for root, _, files in os.walk(chunks_dir) for f in files if root != chunks_dir]
+        assert len(chunks) == 4  # A, B, C, E
+        # Reference counters are persistent
+        storage = FileSystemDedupRawByteStorage(hmac_key=b'0' * 32, encryption=storage.encryption)
+        await storage.mount(dir_under_test)
+        await storage.remove('doc_v1.bin')
+        await storage.remove('doc_v2_copy.bin')
+        chunks = [f for root, _, files in os.walk(chunks_dir) for f in files if root != chunks_dir]
+        assert len(chunks) == 0
+        assert await storage.store.gc() == 0
+    finally:
+        shutil.rmtree(dir_under_test)
+
+
+@pytest.mark.asyncio
+async def test_fs_dedup_shared_chunks():
+    dir_under_test = os.path.join(tempfile.tempdir, f'test_dedup_{uuid.uuid4().hex}')
+    os.mkdir(dir_under_test)
+    chunk_size = 1024
+    try:
+        storage1 = FileSystemDedupRawByteStorage(hmac_key=b'0' * 32)
+        storage2 = FileSystemDedupRawByteStorage(hmac_key=b'0' * 32)
+        await storage1.mount(dir_under_test)
+        await storage2.mount(dir_under_test)
+        # Concurrent writers of the same chunk
+        store = storage1.store
+        digest = store.digest(b'A' * chunk_size)
+        await asyncio.gather(*[store.put(digest, b'A' * chunk_size) for _ in range(10)])
+        assert await store.get(digest) == b'A' * chunk_size
+
+        await storage1.create('doc.bin')
+        wo = await storage1.writeable('doc.bin')
+        wo.chunk_size = chunk_size
+        await wo.open()
+        await wo.write(b'A' * chunk_size + b'B' * chunk_size)
+        await wo.close()
+        # Reference counters are shared by storages mounted to the same dir
+        assert await storage2.store.refs(digest) == 1
+        await storage2.create('copy.bin')
+        wo = await storage2.writeable('copy.bin')
+        wo.chunk_size = chunk_size
+        await wo.open()
+        await wo.write(b'A' * chunk_size)
+        await wo.close()
+        assert await storage1.store.refs(digest) == 2
+        # Create without truncate keeps manifest
+        wo = await storage1.writeable('doc.bin')
+        await wo.create()
+        await wo.open()
+        assert wo.chunks_num == 2
+        await wo.close()
+        # Truncate releases chunks of the manifest
+        await wo.create(truncate=True)
+        await wo.open()
+        assert wo.chunks_num == 0
+        await wo.close()
+        assert await storage2.store.refs(digest) == 1
+        assert await storage2.store.refs(storage2.store.digest(b'B' * chunk_size)) == 0
+        await storage2.remove('copy.bin')
+        assert await storage1.store.refs(digest) == 0
+        assert not await storage1.store.exists(digest)
+    finally:
+        shutil.rmtree(dir_under_test)
+
+
+@pytest.mark.asyncio
+async def test_fs_dedup_journal_compaction(monkeypatch):
+    monkeypatch.setattr(FileSystemChunkStore, 'JOURNAL_LIMIT', FileSystemChunkStore.JOURNAL_RECORD.size * 10)
+    dir_under_test = os.path.join(tempfile.tempdir, f'test_dedup_{uuid.uuid4().hex}')
+    os.mkdir(dir_under_test)
+    try:
+        store1 = FileSystemChunkStore(dir_under_test, hmac_key=b'0' * 32)
+        store2 = FileSystemChunkStore(dir_under_test, hmac_key=b'0' * 32)
+        digest1, digest2 = store1.digest(b'A'), store1.digest(b'B')
+        # Stores append to the journal in turn, it is compacted when it grows over limit
+        for _ in range(50):
+            await store1.incref(digest1)
+            await store2.incref(digest2)
+        journal_path = os.path.join(dir_under_test, FileSystemChunkStore.JOURNAL_FILE)
+        assert os.path.getsize(journal_path) <= FileSystemChunkStore.JOURNAL_LIMIT
+        assert await store1.refs(digest1) == await store2.refs(digest1) == 50
+        assert await store1.refs(digest2) == await store2.refs(digest2) == 50
+        # GC keeps referenced chunks, fresh tmp files and not chunk files
+        await store1.put(digest1, b'A')
+        await store1.put(store1.digest(b'C'), b'C')
+        foreign_path = os.path.join(dir_under_test, digest1.hex()[:2], 'readme.txt')
+        with open(foreign_path, 'w') as f:
+            f.write('not a chunk')
+        tmp_path = os.path.join(dir_under_test, digest1.hex()[:2], f'{digest1.hex()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(b'A')
+        assert await store2.gc() == 1
+        assert await store2.exists(digest1)
+        assert os.path.isfile(foreign_path) and os.path.isfile(tmp_path)
+        assert await store1.refs(digest1) == 50
+        await store1.close()
+        await store2.close()
+    finally:
+        shutil.rmtree(dir_under_test)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('storage_class', [InMemoryRawByteStorage, SQLiteRawByteStorage])
+async def test_raw_byte_storage_backends(storage_class):
+    recip_vk_bytes, recip_sigkey_bytes = create_keypair(b'00000000000000000000000RECIPIENT')
+    recip_vk = bytes_to_b58(recip_vk_bytes)
+    recip_sigkey = bytes_to_b58(recip_sigkey_bytes)
+    dir_under_test = os.path.join(tempfile.tempdir, f'test_backend_{uuid.uuid4().hex}')
+    os.mkdir(dir_under_test)
+    chunk_size = 1024
+    content = os.urandom(chunk_size * 3) + b'tail'
+    enc = StreamEncryption().setup(target_verkeys=[recip_vk])
+    try:
+        for encryption, compression in [
+            (None, None), (None, StreamCompression()), (enc, None), (enc, StreamCompression())
+        ]:
+            storage = storage_class(encryption=encryption, compression=compression)
+            await storage.mount(dir_under_test)
+            uri = f'file:///docs/{uuid.uuid4().hex}.bin'
+            assert await storage.exists(uri) is False
+            await storage.create(uri)
+            assert await storage.exists(uri) is True
+            with pytest.raises(StreamInitializationError):
+                await storage.create(uri)
+            wo = await storage.writeable(uri)
+            wo.chunk_size = chunk_size
+            await wo.open()
+            await wo.write(content)
+            assert wo.chunks_num == 4
+            await wo.close()
+            # Overwrite and truncate
+            wo = await storage.writeable(uri)
+            await wo.open()
+            assert wo.chunks_num == 4
+            await wo.write_chunk(b'X' * chunk_size, no=1)
+            await wo.truncate(3)
+            assert wo.chunks_num == 3
+            await wo.close()
+            expected = content[:chunk_size] + b'X' * chunk_size + content[chunk_size*2:chunk_size*3]
+            ro = await storage.readable(uri, chunks_num=3)
+            if encryption is not None:
+                ro.enc = StreamDecryption(recipients=enc.recipients, nonce=enc.nonce).setup(recip_vk, recip_sigkey)
+            await ro.open()
+            assert await ro.read() == expected
+            no, chunk = await ro.read_chunk(1)
+            assert no == 2 and chunk == b'X' * chunk_size
+            assert await ro.eof() is False
+            await ro.read_chunk()
+            assert await ro.eof() is True
+            with pytest.raises(StreamEOF):
+                await ro.read_chunk()
+            await ro.close()
+            # Callback is awaited once, stream may be reopened and closed again
+            closed = []
+
+            async def on_closed():
+                closed.append(uri)
+
+            ro.on_closed = on_closed()
+            for _ in range(2):
+                await ro.open()
+                await ro.close()
+            assert closed == [uri]
+            # Storage mounted to the same path share streams
+            storage2 = storage_class(encryption=encryption, compression=compression)
+            await storage2.mount(dir_under_test)
+            assert await storage2.exists(uri) is True
+            await storage2.remove(uri)
+            assert await storage.exists(uri) is False
+            with pytest.raises(StreamInitializationError):
+                await storage.readable(uri, chunks_num=3)
+        # Layer B encoding over raw storage
+        storage = storage_class()
+        await storage.mount(dir_under_test)
+        await storage.create('encoded.bin')
+        wrapper = DataVaultStreamWrapper(
+            readable=await storage.readable('encoded.bin', chunks_num=0),
+            writable=await storage.writeable('encoded.bin')
+        )
+        wo = await wrapper.writable(jwe=enc.jwe, cek=enc.cek)
+        await wo.open()
+        await wo.write(content)
+        await wo.close()
+        ro = await storage.readable('encoded.bin', chunks_num=wo.chunks_num)
+        wrapper = DataVaultStreamWrapper(readable=ro)
+        ro = await wrapper.readable(jwe=enc.jwe, keys=KeyPair(pk=recip_vk, sk=recip_sigkey))
+        await ro.open()
+        assert await ro.read() == content
+        await ro.close()
+    finally:
+        if storage_class is InMemoryRawByteStorage:
+            InMemoryRawByteStorage.release(dir_under_test)
+        shutil.rmtree(dir_under_test)
+
+
 @pytest.mark.asyncio
 async def test_streams_encoding_decoding_wrappers(files_dir: str, config_a: dict):
     # Layer-2
@@ -1839,6 +2195,86 @@ async def test_simple_datavault_reopen(config_a: dict, config_b: dict):
         shutil.rmtree(dir_under_test)
 
 
+@pytest.mark.asyncio
+async def test_simple_datavault_dedupe(config_a: dict, config_b: dict):
+    p2p = await get_pairwise3(me=config_a, their=config_b)
+    dir_under_test = os.path.join(tempfile.tempdir, f'test_vaults_{uuid.uuid4().hex}')
+    os.mkdir(dir_under_test)
+    content = b'x' * 1024 * 10
+    try:
+        async with sirius_sdk.context(**config_a):
+            auth = ConfidentialStorageAuthProvider()
+            await auth.authorize(p2p)
+            vault = SimpleDataVault(mounted_dir=dir_under_test, auth=auth, dedupe=True)
+            await vault.open()
+            assert vault.cfg.hmac is not None
+            uris = []
+            for n in range(3):
+                sd = await vault.create_stream(f'stream_{n}.bin', chunk_size=1024)
+                wo = await sd.stream.writable()
+                await wo.open()
+                await wo.write(content)
+                await wo.close()
+                uris.append(sd.id)
+            chunks_dir = os.path.join(vault.mounted_dir, FileSystemDedupRawByteStorage.CHUNKS_DIR)
+            chunks = [f for root, _, files in os.walk(chunks_dir) for f in files if root != chunks_dir]
+            assert len(chunks) == 1
+            # Reopen: HMAC key is persistent
+            await vault.close()
+            await vault.open()
+            loaded = await vault.load(uris[0])
+            ro = await loaded.stream.readable()
+            await ro.open()
+            assert await ro.read() == content
+            await ro.close()
+            for uri in uris:
+                await vault.remove(uri)
+            chunks = [f for root, _, files in os.walk(chunks_dir) for f in files if root != chunks_dir]
+            assert len(chunks) == 0
+    finally:
+        shutil.rmtree(dir_under_test)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('backend', [SimpleDataVault.BACKEND_MEMORY, SimpleDataVault.BACKEND_SQLITE])
+async def test_simple_datavault_backends(config_a: dict, config_b: dict, backend: str):
+    p2p = await get_pairwise3(me=config_a, their=config_b)
+    dir_under_test = os.path.join(tempfile.tempdir, f'test_vaults_{uuid.uuid4().hex}')
+    os.mkdir(dir_under_test)
+    content = os.urandom(1024 * 10)
+    try:
+        async with sirius_sdk.context(**config_a):
+            auth = ConfidentialStorageAuthProvider()
+            await auth.authorize(p2p)
+            vault = SimpleDataVault(mounted_dir=dir_under_test, auth=auth, backend=backend)
+            await vault.open()
+            sd = await vault.create_stream('stream.bin', chunk_size=1024)
+            wo = await sd.stream.writable()
+            await wo.open()
+            await wo.write(content)
+            await wo.close()
+            doc = await vault.create_document('document.json')
+            await vault.save_document(doc.id, EncryptedDocument(content=b'{"key": "value"}'))
+            # Reopen
+            await vault.close()
+            await vault.open()
+            loaded = await vault.load(sd.id)
+            assert loaded.meta['chunks'] == 10
+            ro = await loaded.stream.readable()
+            await ro.open()
+            assert await ro.read() == content
+            await ro.close()
+            loaded = await vault.load(doc.id)
+            assert loaded.doc.content == b'{"key": "value"}'
+            await vault.remove(sd.id)
+            with pytest.raises(DataVaultResourceMissing):
+                await vault.load(sd.id)
+            await vault.close()
+    finally:
+        InMemoryRawByteStorage.release(os.path.join(dir_under_test, f'vault_{p2p.their.did}'))
+        shutil.rmtree(dir_under_test)
+
+
 @pytest.mark.asyncio
 async def test_simple_datavault_multiple_contexts(config_a: dict, config_b: dict):
     p2pa = await get_pairwise3(me=config_a, their=config_b)
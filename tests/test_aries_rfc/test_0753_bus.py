@@ -1,13 +1,18 @@
+import json
+import time
 import uuid
+import asyncio
 
 import pytest
 
-from sirius_sdk.errors.exceptions import BaseSiriusException
+from sirius_sdk.errors.exceptions import BaseSiriusException, SiriusTimeoutIO
 from sirius_sdk import Agent, Pairwise
-from sirius_sdk.messaging import restore_message_instance
+from sirius_sdk.messaging import Message, restore_message_instance
 from sirius_sdk.agent.aries_rfc.feature_0753_bus import *
 
-from tests.helpers import run_coroutines, IndyAgent
+from sirius_sdk.agent.bus import RpcBus, PickUpPrefetch
+from sirius_sdk.hub.mediator import MediatorBus, MediatorCoProtocol, MediatorDispatcher, MediatorListener
+from tests.helpers import run_coroutines, IndyAgent, PickUpServerChannel
 
 
 @pytest.mark.asyncio
@@ -51,3 +56,266 @@ async def test_messages():
     op_unsubscr_client_id = BusUnsubscribeRequest(client_id='client-id', aborted=True)
     assert op_unsubscr_client_id.client_id == 'client-id'
     assert op_unsubscr_client_id.aborted is True
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('batching', [True, False])
+async def test_rpc_bus_pickup_batches(batching: bool):
+    channel = PickUpServerChannel(batching=batching)
+    bus = RpcBus(connector=channel, p2p=None, max_batch_size=16)
+    await bus.subscribe('thread-1')
+    await bus.subscribe('thread-2')
+    for n in range(100):
+        channel.put_events('thread-1', [f'event-{n}'.encode()])
+        if n % 10 == 0:
+            channel.put_events('thread-2', [b'thread-2'])
+    round_trips = channel.round_trips
+
+    for n in range(30):
+        event = await bus.get_event(timeout=5)
+        while event.thread_id == 'thread-2':
+            event = await bus.get_event(timeout=5)
+        assert event.payload == f'event-{n}'.encode()
+    # Prefetched events of unsubscribed thread are dropped
+    await bus.unsubscribe('thread-2')
+    for n in range(30, 100):
+        event = await bus.get_event(timeout=5)
+        assert event.thread_id == 'thread-1'
+        assert event.payload == f'event-{n}'.encode()
+    with pytest.raises(BaseSiriusException):
+        await bus.get_event(timeout=1)
+
+    if batching:
+        # 1 + 2 + 4 + 8 + 16 + 16... events per round trip
+        assert channel.round_trips - round_trips < 20
+    else:
+        # Rejected batch request and then one noop per event
+        assert channel.round_trips - round_trips > 100
+
+
+@pytest.mark.asyncio
+async def test_rpc_bus_repoll_empty_batches():
+    channel = PickUpServerChannel(ignore_delay=True)
+    bus = RpcBus(connector=channel, p2p=None)
+    stamp = time.monotonic()
+    with pytest.raises(SiriusTimeoutIO):
+        await bus.get_event(timeout=1)
+    elapsed = time.monotonic() - stamp
+    # Deadline is kept across re-requests and empty batches are not polled in tight loop
+    assert 0.9 < elapsed < 1.5
+    assert channel.round_trips <= 1 / PickUpPrefetch.REPOLL_PAUSE + 2
+    # Events are awaited with long polling if timeout is not set
+    listening = asyncio.ensure_future(bus.get_event())
+    await asyncio.sleep(0.5)
+    channel.put_events('thread-1', [b'event'])
+    event = await asyncio.wait_for(listening, timeout=5)
+    assert event.payload == b'event'
+
+
+@pytest.mark.asyncio
+async def test_rpc_bus_wait_infinitely(monkeypatch):
+    monkeypatch.setattr(PickUpPrefetch, 'DEF_POLL_DELAY', 0.2)
+    channel = PickUpServerChannel()
+    bus = RpcBus(connector=channel, p2p=None)
+    # Server reports timeout of every poll, events are awaited further
+    listening = asyncio.ensure_future(bus.get_event())
+    await asyncio.sleep(1)
+    assert not listening.done()
+    channel.put_events('thread-1', [b'event'])
+    event = await asyncio.wait_for(listening, timeout=5)
+    assert event.payload == b'event'
+
+
+class PlainMediatorBus(MediatorBus):
+    """Sends requests without encryption, so bus may be tested without hub context"""
+
+    async def pack(self, message) -> bytes:
+        return json.dumps(message).encode()
+
+
+@pytest.mark.asyncio
+async def test_mediator_bus_subscribe_ext_pipelined():
+    channel = PickUpServerChannel(round_trip_delay=0.1)
+    bus = PlainMediatorBus(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK')
+    stamp = time.monotonic()
+    ok, binding_ids = await bus.subscribe_ext(
+        sender_vk=['VK1', 'VK2', 'VK2'], recipient_vk=['VK3', 'VK4'], protocols=['p1', 'p2']
+    )
+    elapsed = time.monotonic() - stamp
+    assert ok is True
+    # Duplicated combinations are subscribed once
+    assert len(binding_ids) == 2*2*2
+    assert channel.round_trips == len(binding_ids)
+    # Requests are pipelined: all 8 responses take single round trip
+    assert elapsed < 0.5
+
+    channel.put_events(binding_ids[0], [b'event'])
+    event = await bus.get_event(timeout=5)
+    assert event.thread_id == binding_ids[0]
+
+    channel.put_events(binding_ids[1], [b'event'])
+    await bus.unsubscribe_ext(binding_ids)
+    with pytest.raises(BaseSiriusException):
+        await bus.get_event(timeout=1)
+    await bus.dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_mediator_bus_subscribe_out_of_order():
+    channel = PickUpServerChannel(round_trip_delay=0.01, jitter=0.05)
+    bus = PlainMediatorBus(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK')
+    try:
+        thids = [f'thread-{n}' for n in range(16)]
+        ok, binding_ids = await bus.subscribe_ext(sender_vk=['VK1'], recipient_vk=['VK2'], protocols=thids)
+        assert ok is True
+        # Responses are matched by thread id, so no binding id was mixed up
+        for binding_id in binding_ids:
+            assert await bus.publish(binding_id, b'payload') == 1
+            event = await bus.get_event(timeout=5)
+            assert event.thread_id == binding_id
+    finally:
+        await bus.dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_mediator_bus_subscribe_renamed_binding():
+    channel = PickUpServerChannel(rename_bindings=True)
+    bus = PlainMediatorBus(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK')
+    try:
+        # Single request: response is bound to it unambiguously
+        await bus.subscribe('thread-1')
+        assert await bus.publish('thread-1', b'payload') == 1
+        event = await bus.get_event(timeout=5)
+        assert event.payload == b'payload'
+        # Several requests: renamed bindings are paired with requests in order
+        ok, thids = await bus.subscribe_ext(sender_vk=['VK1'], recipient_vk=['VK2'], protocols=['p1', 'p2'])
+        assert ok and len(thids) == 2
+        for n, thid in enumerate(thids):
+            assert await bus.publish(thid, f'payload-{n}'.encode()) == 1
+            event = await bus.get_event(timeout=5)
+            assert event.payload == f'payload-{n}'.encode()
+    finally:
+        await bus.dispatcher.close()
+
+
+class PlainMediatorCoProtocol(MediatorCoProtocol):
+
+    async def pack(self, message) -> bytes:
+        return json.dumps(message).encode()
+
+
+@pytest.mark.asyncio
+async def test_mediator_dispatcher_concurrent_operations():
+    channel = PickUpServerChannel(round_trip_delay=0.05)
+    dispatcher = MediatorDispatcher(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK')
+    bus1 = PlainMediatorBus(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK', dispatcher=dispatcher)
+    bus2 = PlainMediatorBus(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK', dispatcher=dispatcher)
+    co = PlainMediatorCoProtocol(
+        connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK', dispatcher=dispatcher
+    )
+    try:
+        await bus1.subscribe('thread-1')
+        # bus1 is waiting for events while bus2 and co-protocol use the same connection
+        listening = asyncio.ensure_future(bus1.get_event(timeout=5))
+        await asyncio.sleep(0.1)
+        assert not listening.done()
+        await bus2.subscribe('thread-2')
+        ok, echo = await co.switch(Message({'@id': 'msg-id', '@type': 'https://didcomm.org/test_protocol/1.0/request'}))
+        assert ok is True
+        assert echo.id == 'msg-id'
+        recipients_num = await bus2.publish('thread-1', b'payload-1')
+        assert recipients_num == 1
+        event = await listening
+        assert event.thread_id == 'thread-1'
+        assert event.payload == b'payload-1'
+
+        channel.put_events('thread-2', [b'payload-2'])
+        event = await bus2.get_event(timeout=5)
+        assert event.thread_id == 'thread-2'
+        assert event.payload == b'payload-2'
+    finally:
+        await dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_mediator_bus_repoll_empty_batches():
+    channel = PickUpServerChannel(ignore_delay=True)
+    bus = PlainMediatorBus(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK')
+    try:
+        stamp = time.monotonic()
+        with pytest.raises(SiriusTimeoutIO):
+            await bus.get_event(timeout=1)
+        assert 0.9 < time.monotonic() - stamp < 1.5
+        assert channel.round_trips <= 1 / PickUpPrefetch.REPOLL_PAUSE + 2
+    finally:
+        await bus.dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_mediator_dispatcher_replies_out_of_order():
+    channel = PickUpServerChannel(round_trip_delay=0.01, jitter=0.05)
+    dispatcher = MediatorDispatcher(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK')
+    bus1 = PlainMediatorBus(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK', dispatcher=dispatcher)
+    bus2 = PlainMediatorBus(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK', dispatcher=dispatcher)
+    try:
+        await bus1.subscribe('thread-1')
+        # Replies are matched to requests by thread id, not by order
+        results = await asyncio.gather(
+            *[bus1.publish('thread-1', b'payload') for _ in range(10)],
+            *[bus2.publish('thread-2', b'payload') for _ in range(10)]
+        )
+        assert results == [1] * 10 + [0] * 10
+    finally:
+        await dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_mediator_listener_shares_dispatcher():
+    channel = PickUpServerChannel(round_trip_delay=0.01)
+    dispatcher = MediatorDispatcher(connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK')
+    co = PlainMediatorCoProtocol(
+        connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK', dispatcher=dispatcher
+    )
+    listener = MediatorListener(connector=channel, my_verkey=None, mediator_verkey=None, dispatcher=dispatcher)
+    try:
+        listening = asyncio.ensure_future(listener.get_one(timeout=5))
+        # Reply of co-protocol is not taken by listener
+        ok, echo = await co.switch(Message({'@id': 'request-id', '@type': 'https://didcomm.org/test_protocol/1.0/request'}))
+        assert ok is True
+        assert echo.id == 'request-id'
+        assert not listening.done()
+        # Downstream message goes to listener
+        await co.send(Message({'@id': 'downstream-id', '@type': 'https://didcomm.org/test_protocol/1.0/request'}))
+        event = await listening
+        assert event.message.id == 'downstream-id'
+    finally:
+        await dispatcher.close()
+
+
+@pytest.mark.asyncio
+async def test_mediator_dispatcher_inbox_consumers():
+    channel = PickUpServerChannel()
+    dispatcher = MediatorDispatcher(
+        connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK', inbox_size=2
+    )
+    co = PlainMediatorCoProtocol(
+        connector=channel, my_verkey='MY-VK', mediator_verkey='MEDIATOR-VK', dispatcher=dispatcher
+    )
+    listener = MediatorListener(connector=channel, my_verkey=None, mediator_verkey=None, dispatcher=dispatcher)
+    try:
+        # Listener does not read: connection is not read while its inbox is full, messages are not dropped
+        ids = [f'downstream-{n}' for n in range(5)]
+        for msg_id in ids:
+            await co.send(Message({'@id': msg_id, '@type': 'https://didcomm.org/test_protocol/1.0/request'}))
+        await asyncio.sleep(0.1)
+        received = [(await listener.get_one(timeout=5)).message.id for _ in ids]
+        assert received == ids
+        # Every consumer gets own copy of downstream message
+        co_reading = asyncio.ensure_future(co.get_one(timeout=5))
+        await asyncio.sleep(0.1)
+        await co.send(Message({'@id': 'downstream-id', '@type': 'https://didcomm.org/test_protocol/1.0/request'}))
+        event = await listener.get_one(timeout=5)
+        message, _, _ = await co_reading
+        assert event.message.id == message.id == 'downstream-id'
+    finally:
+        await dispatcher.close()
@@ -1,7 +1,12 @@
-import datetime
+import io
+import json
 import uuid
+import base64
+import hashlib
+import datetime
 
 from sirius_sdk.agent.aries_rfc.mixins import *
+from sirius_sdk.agent.aries_rfc.feature_0048_trust_ping.messages import Ping
 
 
 def test_feature_0032_timing_decorator():
@@ -66,3 +71,73 @@ def test_feature_0032_timing_message():
     assert TIMING_DECORATOR not in msg
     timing = TimingMixin.get_timing(msg)
     assert timing is None
+
+
+def test_feature_0032_timing_fast_parse():
+    # Strict ISO-8601 formats are parsed with fast path, results are the same as of flexible parser
+    utc = datetime.timezone.utc
+    expected = {
+        '2019-01-23T18:03:27.123Z': datetime.datetime(2019, 1, 23, 18, 3, 27, 123000, tzinfo=utc),
+        '2019-01-23 18:03:27.123Z': datetime.datetime(2019, 1, 23, 18, 3, 27, 123000),
+        '2019-01-24 00:00Z': datetime.datetime(2019, 1, 24),
+        '2019-01-23T18:03:27+03:00': datetime.datetime(
+            2019, 1, 23, 18, 3, 27, tzinfo=datetime.timezone(datetime.timedelta(hours=3))
+        ),
+        '2019-01-23T18:03:27.123456': datetime.datetime(2019, 1, 23, 18, 3, 27, 123456),
+        # Flexible parser
+        '20190123T180327Z': datetime.datetime(2019, 1, 23, 18, 3, 27, tzinfo=utc),
+    }
+    for val, dt in expected.items():
+        assert parse_datetime(val) == dt
+        assert parse_datetime(val).tzinfo == dt.tzinfo
+    assert parse_datetime('2019-01-23') == datetime.date(2019, 1, 23)
+    assert parse_datetime('2019-13-45T18:03:27Z') is None
+    assert parse_datetime('') is None
+
+    # Parsed timing is memoized per message until ~timing is changed
+    msg = Ping(**{'~timing': {"in_time": "2019-01-23 18:03:27.123Z", "expires_time": "2019-01-25 18:25Z"}})
+    timing1 = msg.timing
+    timing2 = msg.timing
+    assert timing1 == timing2 and timing1 is not timing2
+    assert timing1.expires_time == parse_datetime("2019-01-25 18:25Z")
+    msg['~timing']['expires_time'] = '2019-01-26 18:25Z'
+    assert msg.timing.expires_time == parse_datetime("2019-01-26 18:25Z")
+    timing1.delay_milli = 100
+    msg.timing = timing1
+    assert msg.timing.delay_milli == 100
+    assert msg.timing.expires_time == parse_datetime("2019-01-25 18:25Z")
+
+
+class AttachesMessage(AttachesMixin, Message):
+    pass
+
+
+def test_feature_0017_attach():
+    raw = bytes(range(256)) * 1000 + b'tail'
+    att = Attach(id='1', mime_type='application/octet-stream', data=raw)
+    assert att.data is raw
+    assert bytes(att.data_view[:4]) == raw[:4]
+
+    # Streaming encode/decode in chunks, chunk size is not aligned to base64 blocks
+    streamed = Attach.from_stream(io.BytesIO(raw), chunk_size=1000, id='1', mime_type='application/octet-stream')
+    assert streamed['data']['base64'] == att['data']['base64']
+    assert streamed.byte_count == len(raw)
+    out = io.BytesIO()
+    assert streamed.write_to(out, chunk_size=1000) == len(raw)
+    assert out.getvalue() == raw
+
+    # Received descriptors are replaced with Attach, decoded data is cached
+    msg = Message.deserialize(json.dumps({'@type': 'https://didcomm.org/protocol/1.0/message-x', '~attach': [att]}))
+    received = AttachesMessage(msg)
+    first = received.attaches[0]
+    assert isinstance(first, Attach) and first.data == raw
+    assert received.attaches[0].data is first.data
+    first['data']['base64'] = base64.b64encode(b'updated').decode()
+    assert first.data == b'updated'
+
+    # External data referenced by links
+    linked = Attach(id='2', links=['https://example.com/blob'], sha256=hashlib.sha256(raw).hexdigest())
+    assert linked.links == ['https://example.com/blob']
+    assert linked.data is None
+    assert linked.check_sha256(raw)
+    assert not linked.check_sha256(raw[1:])
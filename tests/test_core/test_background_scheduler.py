@@ -80,3 +80,66 @@ async def test_unschedule():
     count3 = task_queue.qsize()
     assert count3 == count2
 
+
+
+@pytest.mark.asyncio
+async def test_stats_and_shutdown():
+    task_hash = 'Hash-Value-' + uuid.uuid4().hex
+    failed_hash = 'Hash-Value-' + uuid.uuid4().hex
+
+    async def __forever__():
+        while True:
+            await asyncio.sleep(0.1)
+
+    async def __fail__():
+        raise RuntimeError('Expected')
+
+    BackgroundScheduler.schedule(coro=__forever__(), task_hash=task_hash)
+    BackgroundScheduler.schedule(coro=__forever__(), task_hash=task_hash)
+    BackgroundScheduler.schedule(coro=__fail__(), task_hash=failed_hash)
+    await asyncio.sleep(0.5)
+    stat = BackgroundScheduler.stats(task_hash)
+    assert stat.counter == 2
+    assert stat.finished is None
+    assert stat.runtime > 0
+    failed = BackgroundScheduler.stats(failed_hash)
+    assert failed.finished is not None
+    assert isinstance(failed.exception, RuntimeError)
+
+    BackgroundScheduler.shutdown(timeout=0.1)
+    assert BackgroundScheduler.active_count() == 0
+    stat = BackgroundScheduler.stats(task_hash)
+    assert stat.cancelled is True
+
+    # Scheduler is restarted on demand
+    done = asyncio.Event()
+    loop = asyncio.get_event_loop()
+
+    async def __task__():
+        loop.call_soon_threadsafe(done.set)
+
+    BackgroundScheduler.schedule(coro=__task__())
+    await asyncio.wait_for(done.wait(), timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_max_concurrency():
+    running = []
+    max_running = 0
+
+    async def __task__():
+        nonlocal max_running
+        running.append(None)
+        max_running = max(max_running, len(running))
+        await asyncio.sleep(0.1)
+        running.pop()
+
+    BackgroundScheduler.configure(max_concurrency=2)
+    try:
+        for n in range(6):
+            BackgroundScheduler.schedule(coro=__task__())
+        await asyncio.sleep(1)
+        assert max_running == 2
+        assert not running
+    finally:
+        BackgroundScheduler.configure(max_concurrency=None)
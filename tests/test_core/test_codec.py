@@ -0,0 +1,80 @@
+import json
+import importlib.util
+
+import pytest
+
+from sirius_sdk import codec
+from sirius_sdk.encryption import create_keypair, bytes_to_b58, pack_message, unpack_message, P2PConnection
+from sirius_sdk.messaging import Message, LazyMessage
+
+
+BACKENDS = [name for name in codec.BACKENDS if name == 'json' or importlib.util.find_spec(name) is not None]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    prev = codec.get_codec()
+    codec.set_codec(request.param)
+    yield request.param
+    codec.set_codec(prev)
+
+
+def test_roundtrip(backend: str):
+    assert codec.get_codec().name == backend
+    value = {'str': 'Test строка', 'int': 1, 'float': 1.5, 'list': [1, None, True], 'nested': {'a': {}}}
+    assert codec.loads(codec.dumps(value)) == value
+    assert codec.loads(codec.dumpb(value)) == value
+    assert json.loads(codec.dumpb(value).decode('utf-8')) == value
+    # Integers over 64 bit
+    big = {'value': 2 ** 70}
+    assert codec.loads(codec.dumpb(big)) == big
+    assert codec.loads(json.dumps(big)) == big
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads(b'{"a": ')
+
+
+def test_messages(backend: str):
+    msg = Message({'@type': 'https://didcomm.org/basicmessage/1.0/message', 'content': 'Hello'})
+    assert Message.deserialize(msg.serialize()) == msg
+    assert Message.deserialize(msg.serialize_bytes()) == msg
+    # Message nested into other object
+    assert codec.loads(codec.dumps({'msg': msg}))['msg'] == dict(msg)
+
+    raw = json.dumps({'@type': 'https://didcomm.org/basicmessage/1.0/message', '@id': '1', 'content': 'Hello'})
+    lazy = LazyMessage(raw)
+    assert codec.loads(lazy.serialize_bytes()) == json.loads(raw)
+    if backend != 'ujson':
+        assert codec.loads(codec.dumps({'msg': LazyMessage(raw)}))['msg'] == json.loads(raw)
+
+
+def test_pack_unpack_across_backends(backend: str):
+    keys1 = create_keypair(b'000000000000000000000000000SEED1')
+    keys2 = create_keypair(b'000000000000000000000000000SEED2')
+    p2p1 = P2PConnection((bytes_to_b58(keys1[0]), bytes_to_b58(keys1[1])), bytes_to_b58(keys2[0]))
+    p2p2 = P2PConnection((bytes_to_b58(keys2[0]), bytes_to_b58(keys2[1])), bytes_to_b58(keys1[0]))
+    message = {'@type': 'https://didcomm.org/basicmessage/1.0/message', 'content': 'Test строка'}
+    packed = p2p1.pack(message)
+    # Packed with selected backend, unpacked with stdlib one and vice versa
+    prev = codec.set_codec('json')
+    try:
+        assert p2p2.unpack(packed) == message
+        packed_stdlib = pack_message(json.dumps(message), [keys1[0]], keys2[0], keys2[1])
+    finally:
+        codec.set_codec(prev)
+    assert p2p1.unpack(packed_stdlib) == message
+    unpacked, sender_vk, recip_vk = unpack_message(packed, keys2[0], keys2[1])
+    assert json.loads(unpacked) == message
+    assert sender_vk == bytes_to_b58(keys1[0])
+
+
+def test_select_codec():
+    prev = codec.get_codec()
+    try:
+        assert codec.set_codec('auto').name in BACKENDS
+        with pytest.raises(ValueError):
+            codec.set_codec('unknown')
+        custom = codec.JSONCodec()
+        assert codec.set_codec(custom) is custom
+        assert codec.get_codec() is custom
+    finally:
+        codec.set_codec(prev)
@@ -1,3 +1,5 @@
+import gc
+import hashlib
 from typing import Any, Optional, List
 
 import pytest
@@ -6,6 +8,8 @@ import sirius_sdk
 from sirius_sdk.abstract.bus import AbstractBus
 from sirius_sdk.abstract.api import APICoProtocols
 from sirius_sdk import APICrypto
+from sirius_sdk.encryption import create_keypair, bytes_to_b58
+from sirius_sdk.hub.core import Hub, _current_hub
 
 from tests.helpers import ServerTestSuite
 
@@ -104,3 +108,48 @@ async def test_override_coprotocols():
         bus = await sirius_sdk.spawn_coprotocol()
         with pytest.raises(OverriddenMethodCalled):
             await bus.subscribe('thid')
+
+
+
+@pytest.mark.asyncio
+async def test_resolved_services_invalidated_on_config_change():
+    cfg = sirius_sdk.Config()
+    async with sirius_sdk.context(cfg):
+        hub = _current_hub()
+        coprotocols = await hub.get_coprotocols()
+        assert await hub.get_coprotocols() is coprotocols
+        assert await hub.get_non_secrets() is await hub.get_non_secrets()
+        cfg.override_coprotocols(dependency=OverriddenCoprotocols())
+        assert isinstance(await hub.get_coprotocols(), OverriddenCoprotocols)
+        bus = await sirius_sdk.spawn_coprotocol()
+        with pytest.raises(OverriddenMethodCalled):
+            await bus.subscribe('thid')
+        # in-place mutation of overrides is honored as well
+        cfg.overrides.coprotocols = None
+        assert hub.lookup('coprotocols') is None
+        assert not isinstance(await hub.get_coprotocols(), OverriddenCoprotocols)
+        assert hub.lookup('coprotocols') is await hub.get_coprotocols()
+
+
+def test_config_drops_listeners_of_dead_hubs():
+    cfg = sirius_sdk.Config()
+    hub = Hub(cfg)
+    for _ in range(100):
+        hub.copy()
+    gc.collect()
+    Hub(cfg)
+    assert len(cfg._Config__listeners) <= 2
+
+
+@pytest.mark.asyncio
+async def test_hub_global_id():
+    my_vk = bytes_to_b58(create_keypair(b'000000000000000000000000000MY_VK')[0])
+    my_vk2 = bytes_to_b58(create_keypair(b'00000000000000000000000000MY_VK2')[0])
+    mediator_vk = bytes_to_b58(create_keypair(b'000000000000000000000MEDIATOR_VK')[0])
+    cfg = sirius_sdk.Config().setup_mediator(uri='ws://mediator', my_verkey=my_vk, mediator_verkey=mediator_vk)
+    hub = Hub(cfg)
+    global_id = hub.global_id
+    assert global_id == hashlib.md5(f'{my_vk}:{mediator_vk}'.encode()).hexdigest()
+    assert hub.global_id is global_id
+    cfg.setup_mediator(uri='ws://mediator', my_verkey=my_vk2, mediator_verkey=mediator_vk)
+    assert hub.global_id == hashlib.md5(f'{my_vk2}:{mediator_vk}'.encode()).hexdigest()
@@ -4,6 +4,7 @@ import pytest
 
 import sirius_sdk
 from sirius_sdk.hub import _current_hub
+from sirius_sdk.hub.context import get as context_get, set as context_set, run_in_executor
 
 from tests.helpers import ServerTestSuite
 
@@ -89,6 +90,31 @@ async def test_spawn_child_routines(test_suite: ServerTestSuite):
     async with sirius_sdk.context(params['server_address'], params['credentials'], params['p2p']):
         await parent()
 
+    # Spawned tasks inherit hub of the parent context
     assert id(hub_parent) == id(hub_child1)
-    assert id(hub_parent) != id(hub_child2)
-    assert id(hub_child1) != id(hub_child2)
+    assert id(hub_parent) == id(hub_child2)
+
+
+@pytest.mark.asyncio
+async def test_context_propagation():
+    async with sirius_sdk.context(sirius_sdk.Config()):
+        hub = _current_hub()
+
+        async def child():
+            inherited = _current_hub()
+            context_set('child-key', 'value')
+            return inherited
+
+        children = await asyncio.gather(child(), asyncio.create_task(child()))
+        assert all(id(inst) == id(hub) for inst in children)
+        # Changes made by child tasks are not visible to parent
+        assert context_get('child-key') is None
+        # Executor threads served by the same hub
+        in_thread = await run_in_executor(_current_hub)
+        assert id(in_thread) == id(hub)
+
+        async with sirius_sdk.context(sirius_sdk.Config()):
+            nested = _current_hub()
+            assert id(nested) != id(hub)
+        assert id(_current_hub()) == id(hub)
+    assert context_get('hub') is None
@@ -0,0 +1,55 @@
+import os
+import sys
+import subprocess
+
+import sirius_sdk
+from sirius_sdk.messaging import restore_message_instance
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(sirius_sdk.__file__)))
+
+
+def _modules_after(statement: str) -> set:
+    code = f'import sys; {statement}; print("\\n".join(sys.modules.keys()))'
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT_DIR)
+    return set(output.decode().split())
+
+
+def test_import_is_lazy():
+    modules = _modules_after('import sirius_sdk')
+    assert 'aiohttp' not in modules
+    assert 'sirius_sdk.hub' not in modules
+    assert not any(name.startswith('sirius_sdk.agent.aries_rfc') for name in modules)
+
+    modules = _modules_after('import sirius_sdk.agent.aries_rfc.feature_0048_trust_ping')
+    assert 'sirius_sdk.agent.aries_rfc.feature_0750_storage' not in modules
+    assert 'sirius_sdk.agent.aries_rfc.feature_0037_present_proof' not in modules
+
+
+def test_lazy_names():
+    assert sirius_sdk.Config is sirius_sdk.hub.Config
+    assert sirius_sdk.aries_rfc.Ping is sirius_sdk.aries_rfc.feature_0048_trust_ping.Ping
+    # Star-imports resolved ambiguous names to the last feature
+    assert sirius_sdk.aries_rfc.ProposedAttrib is sirius_sdk.aries_rfc.feature_0037_present_proof.ProposedAttrib
+    assert 'Config' in dir(sirius_sdk)
+
+
+def test_subpackages():
+    names = ['abstract', 'agent', 'base', 'codec', 'encryption', 'errors', 'hub', 'messaging', 'rpc']
+    code = 'import sirius_sdk; ' + '; '.join(f'sirius_sdk.{name}' for name in names) + \
+           '; sirius_sdk.messaging.Message; sirius_sdk.encryption.P2PConnection; print("ok")'
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT_DIR)
+    assert output.decode().strip() == 'ok'
+    for name in names:
+        assert getattr(sirius_sdk, name).__name__ == f'sirius_sdk.{name}'
+
+
+def test_restore_message_of_not_loaded_feature():
+    code = 'from sirius_sdk.messaging import restore_message_instance; ' \
+           'ok, msg = restore_message_instance({"@type": "https://didcomm.org/questionanswer/1.0/question"}); ' \
+           'print(ok, type(msg).__name__)'
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT_DIR)
+    assert output.decode().strip() == 'True Question'
+
+    ok, msg = restore_message_instance({'@type': 'https://didcomm.org/unknown-protocol/1.0/message'})
+    assert ok is False
@@ -1,7 +1,12 @@
+import json
+
+import pytest
+
 from sirius_sdk.messaging import *
 from sirius_sdk.agent.aries_rfc.feature_0048_trust_ping.messages import Ping, Pong
 from sirius_sdk.agent.aries_rfc.feature_0015_acks.messages import Ack, Status as AckStatus
 from sirius_sdk import aries_rfc
+from sirius_sdk.errors.exceptions import SiriusInvalidMessage, SiriusValidationError
 import sirius_sdk.agent.aries_rfc.feature_0095_basic_message.messages as msg0095
 
 
@@ -159,3 +164,110 @@ def test_attaches_mixin():
     assert msg.attaches[0].data == "eW91ciB0ZXh0".encode()
 
 
+def test_lazy_message():
+    attach = 'x' * 1024
+    raw = json.dumps(
+        {
+            '@type': 'https://didcomm.org/basicmessage/1.0/message',
+            '@id': 'msg-id',
+            'content': 'Hello',
+            '~attach': [{'data': {'base64': attach, 'json': {'@id': 'nested', 'list': ['}', ']', '"']}}}],
+            '~thread': {'thid': 'thread-id'},
+            'counter': -1.5e3,
+            'flag': None
+        }
+    )
+    msg = LazyMessage(raw)
+    # Envelope is available without body decoding
+    assert msg.id == 'msg-id'
+    assert msg.protocol == 'basicmessage'
+    assert msg.get('~thread') == {'thid': 'thread-id'}
+    assert '@type' in msg
+    assert not msg.is_materialized
+    assert msg.serialize() == raw
+    # Body is decoded on first access
+    assert msg['content'] == 'Hello'
+    assert msg.is_materialized
+    assert msg['~attach'][0]['data']['base64'] == attach
+    assert dict(msg) == json.loads(raw)
+    assert json.loads(json.dumps(LazyMessage(raw))) == json.loads(raw)
+    assert LazyMessage(raw.encode()) == Message(json.loads(raw))
+
+    ok, restored = restore_message_instance(LazyMessage(raw))
+    assert ok is True
+    assert isinstance(restored, msg0095.Message)
+    assert restored.content == 'Hello'
+
+    assert scan_envelope(raw, ['counter', 'flag', 'missing']) == {'counter': -1500.0, 'flag': None}
+
+    # Generated @id survives body decoding
+    msg = LazyMessage('{"@type": "https://didcomm.org/basicmessage/1.0/message", "content": "Hello"}')
+    msg_id = msg.id
+    assert msg['content'] == 'Hello'
+    assert msg.id == msg_id
+    assert json.loads(msg.serialize())['@id'] == msg_id
+
+    with pytest.raises(SiriusInvalidMessage):
+        LazyMessage('{"content": "Hello"}')
+    msg = LazyMessage('{"@type": "https://didcomm.org/basicmessage/1.0/message", "@id": "1", "~thread": {}, "x": [1,')
+    assert msg.id == '1'
+    with pytest.raises(SiriusInvalidMessage):
+        _ = msg['x']
+
+
+@pytest.mark.asyncio
+async def test_lazy_tunnel_receive(p2p: dict):
+    agent_to_sdk = p2p['agent']['tunnel']
+    sdk_to_agent = p2p['sdk']['tunnel']
+    msg = Message({'@type': 'https://didcomm.org/basicmessage/1.0/message', 'content': 'Hello'})
+    for encrypt in [True, False]:
+        await agent_to_sdk.post(msg, encrypt=encrypt)
+        received = await sdk_to_agent.receive(timeout=1, lazy=True)
+        assert isinstance(received, LazyMessage)
+        assert sdk_to_agent.context.encrypted is encrypt
+        assert received.id == msg.id
+        assert not received.is_materialized
+        assert received['content'] == 'Hello'
+
+
+
+def test_compiled_validators():
+    assert compiled_validator(Ack) is compiled_validator(Ack)
+    assert compiled_validator(Ping) is validate_common_blocks
+    Ack(thread_id='thread-id').validate()
+    with pytest.raises(SiriusValidationError) as e:
+        Ack().validate()
+    assert 'Attribute "~thread" is missing from message' in str(e.value)
+    with pytest.raises(SiriusValidationError) as e:
+        Ack(**{'~thread': {'pthid': 'parent-id'}}).validate()
+    assert 'Attribute "thid" is missing from message' in str(e.value)
+    with pytest.raises(SiriusValidationError) as e:
+        Ack(thread_id='thread-id', id_='thread-id').validate()
+    assert str(e.value) == 'Thread id thread-id cannot be equal to outer id thread-id'
+
+    request = aries_rfc.ConnRequest(label='Label', did='did', verkey='verkey', endpoint='http://endpoint')
+    request.validate()
+    del request['label']
+    with pytest.raises(SiriusValidationError) as e:
+        request.validate()
+    assert 'Attribute "label" is missing from message' in str(e.value)
+
+    validator = MessageValidator(['a', ('b', 1), {'c': ['d']}])
+    validator({'a': 1, 'b': 1, 'c': {'d': 1}})
+    with pytest.raises(SiriusValidationError) as e:
+        validator({'a': 1, 'b': 2, 'c': {'d': 1}})
+    assert str(e.value) == 'Message.b: 2 != 1'
+    with pytest.raises(SiriusValidationError) as e:
+        validator({'a': 1, 'b': 1, 'c': {}})
+    assert 'Attribute "d" is missing from message' in str(e.value)
+    with pytest.raises(SiriusValidationError) as e:
+        validator({'a': 1, 'b': 1, 'c': {'d': 1}, '~timing': {'in_time': '2022', 'out_time': '2021'}})
+    assert str(e.value) == 'in_time cannot be greater than out_time'
+    with pytest.raises(ValueError) as e:
+        validator(
+            {
+                'a': 1, 'b': 1, 'c': {'d': 1},
+                '~thread': {'thid': 'thread-id', 'sender_order': 1, 'received_orders': {'did:sov:0OI': 1}}
+            }
+        )
+    assert str(e.value) == 'Invalid DID did:sov:0OI'
@@ -0,0 +1,190 @@
+import os
+import time
+import socket
+import asyncio
+import tempfile
+
+import pytest
+
+import sirius_sdk
+from sirius_sdk.hub.defaults.default_apis import APIDefault
+from sirius_sdk.messaging.spool import OutboundSpool, CircuitBreaker
+from sirius_sdk.messaging.transport import EndpointTransport
+
+from .test_transport import EndpointServer
+
+
+def unused_endpoint() -> str:
+    # Port is released, so connection is refused
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/http'
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.State.CLOSED
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.State.OPEN
+    assert not breaker.allow()
+    assert 0 < breaker.retry_after <= 0.1
+    time.sleep(0.1)
+    # Single trial in half-open state
+    assert breaker.state == CircuitBreaker.State.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert breaker.retry_after is None
+    breaker.failure()
+    assert breaker.state == CircuitBreaker.State.OPEN
+    time.sleep(0.1)
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == CircuitBreaker.State.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_dead_endpoint_does_not_affect_healthy():
+    server = EndpointServer()
+    await server.start()
+    healthy = f'http://127.0.0.1:{server.port}/http'
+    dead = unused_endpoint()
+    spool = OutboundSpool(
+        transport=EndpointTransport(), max_attempts=2, backoff_base=0.05, failure_threshold=2, reset_timeout=0.05,
+        concurrency_per_endpoint=4
+    )
+    try:
+        for n in range(20):
+            await spool.put(f'dead-{n}'.encode(), dead)
+            await spool.put(f'healthy-{n}'.encode(), healthy)
+        assert spool.pending == 40
+        # Fire and forget: healthy endpoint gets all messages while dead one is retried
+        for _ in range(100):
+            if len(server.http_messages) == 20:
+                break
+            await asyncio.sleep(0.05)
+        assert len(server.http_messages) == 20
+        assert spool.stats(healthy)[healthy].delivered == 20
+        assert spool.stats(healthy)[healthy].breaker == CircuitBreaker.State.CLOSED
+        assert spool.stats(dead)[dead].breaker != CircuitBreaker.State.CLOSED
+        assert spool.stats(dead)[dead].dead < 20
+        assert await spool.join(timeout=30)
+        stats = spool.stats(dead)[dead]
+        assert stats.dead == 20
+        assert stats.failed == 20 * 2
+        dead_letters = spool.dead_letters()
+        assert len(dead_letters) == 20
+        assert all(item.endpoint == dead and item.attempts == 2 for item in dead_letters)
+        spool.purge_dead()
+        assert spool.dead_letters() == []
+    finally:
+        await spool.close()
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_retry_and_priority():
+    server = EndpointServer()
+    await server.start()
+    endpoint = f'http://127.0.0.1:{server.port}/http'
+    spool = OutboundSpool(backoff_base=0.05, backoff_max=0.1, failure_threshold=100, concurrency_per_endpoint=1)
+    try:
+        # Single delivery in flight, others are queued
+        await spool.put(b'first', endpoint)
+        await spool.put(b'low-1', endpoint)
+        await spool.put(b'low-2', endpoint)
+        await spool.put(b'high', endpoint, priority=10)
+        assert await spool.join(timeout=5)
+        assert server.http_messages == [b'first', b'high', b'low-1', b'low-2']
+
+        # Failed deliveries are retried until endpoint recovers
+        server.fail_http = True
+        server.http_messages.clear()
+        await spool.put(b'retried', endpoint)
+        await asyncio.sleep(0.3)
+        assert spool.stats(endpoint)[endpoint].failed > 1
+        assert spool.pending == 1
+        server.fail_http = False
+        assert await spool.join(timeout=5)
+        assert server.http_messages[-1] == b'retried'
+        assert spool.stats(endpoint)[endpoint].delivered == 5
+        assert spool.dead_letters() == []
+    finally:
+        await spool.close()
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_spool_file_survives_restart():
+    server = EndpointServer()
+    await server.start()
+    endpoint = f'http://127.0.0.1:{server.port}/http'
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'outbound.db')
+        spool = OutboundSpool(path=path, backoff_base=10, failure_threshold=100)
+        server.fail_http = True
+        for n in range(5):
+            await spool.put(f'msg-{n}'.encode(), endpoint)
+        await asyncio.sleep(0.3)
+        assert spool.pending == 5
+        await spool.close()
+
+        server.fail_http = False
+        server.http_messages.clear()
+        spool = OutboundSpool(path=path)
+        try:
+            assert spool.pending == 5
+            assert await spool.join(timeout=5)
+            assert sorted(server.http_messages) == [f'msg-{n}'.encode() for n in range(5)]
+        finally:
+            await spool.close()
+        # Delivered messages are removed from spool file
+        spool = OutboundSpool(path=path)
+        try:
+            assert spool.pending == 0
+        finally:
+            await spool.close()
+    await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_hub_starts_and_closes_spool():
+    server = EndpointServer()
+    await server.start()
+    endpoint = f'http://127.0.0.1:{server.port}/http'
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'outbound.db')
+        spool = OutboundSpool(path=path, backoff_base=10, failure_threshold=100)
+        server.fail_http = True
+        await spool.put(b'msg-0', endpoint)
+        await asyncio.sleep(0.3)
+        await spool.close()
+
+        server.fail_http = False
+        server.http_messages.clear()
+        spool = OutboundSpool(path=path)
+        cfg = sirius_sdk.Config().override_transport(APIDefault(spool=spool))
+        async with sirius_sdk.context(cfg):
+            # Restored messages are delivered without waiting for new ones
+            for _ in range(100):
+                if server.http_messages:
+                    break
+                await asyncio.sleep(0.05)
+            assert server.http_messages == [b'msg-0']
+            server.fail_http = True
+            await sirius_sdk.send(
+                sirius_sdk.messaging.Message({'@type': 'https://didcomm.org/test/1.0/msg'}),
+                their_vk=None, endpoint=endpoint, my_vk=None
+            )
+            await asyncio.sleep(0.3)
+        # Hub closed spool, not delivered message stays in spool file and spool is reopened on next use
+        assert spool.pending == 0
+        server.fail_http = False
+        server.http_messages.clear()
+        assert await spool.join(timeout=5)
+        assert len(server.http_messages) == 1
+        await spool.close()
+    await server.stop()
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from aiohttp import web, WSMsgType
+
+from sirius_sdk.messaging.transport import EndpointTransport
+
+
+class EndpointServer:
+    """Local HTTP + WebSocket endpoint, counts connections"""
+
+    def __init__(self):
+        self.http_messages = []
+        self.http_peers = set()
+        self.ws_messages = []
+        self.ws_connections = 0
+        self.ws_closed = 0
+        self.fail_http = False
+        self.runner = None
+        self.port = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post('/http', self.on_http)
+        app.router.add_get('/ws', self.on_ws)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    async def on_http(self, request: web.Request):
+        self.http_messages.append(await request.read())
+        self.http_peers.add(request.transport.get_extra_info('peername'))
+        if self.fail_http or request.headers.get('content-type') == 'application/fail':
+            return web.Response(status=500, body=b'error')
+        return web.Response(status=202, body=b'ok')
+
+    async def on_ws(self, request: web.Request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.ws_connections += 1
+        async for msg in ws:
+            if msg.type == WSMsgType.BINARY:
+                self.ws_messages.append(msg.data)
+        self.ws_closed += 1
+        return ws
+
+
+@pytest.mark.asyncio
+async def test_ws_shared_connection():
+    server = EndpointServer()
+    await server.start()
+    transport = EndpointTransport(ws_idle_timeout=0.5)
+    endpoint = f'ws://127.0.0.1:{server.port}/ws'
+    try:
+        # Concurrent senders share single connection
+        results = await asyncio.gather(
+            *[transport.send(f'message-{n}'.encode(), endpoint, timeout=5) for n in range(50)]
+        )
+        assert all(ok for ok, _ in results)
+        await asyncio.sleep(0.1)
+        assert server.ws_connections == 1
+        assert sorted(server.ws_messages) == sorted(f'message-{n}'.encode() for n in range(50))
+        # Idle connection is closed and re-opened on demand
+        await asyncio.sleep(1)
+        assert server.ws_closed == 1
+        await transport.send(b'message', endpoint, timeout=5)
+        await asyncio.sleep(0.1)
+        assert server.ws_connections == 2
+
+        stats = transport.stats(endpoint)[endpoint]
+        assert stats.requests == 51
+        assert stats.errors == 0
+        assert stats.avg_latency is not None
+    finally:
+        await transport.close()
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_http_keep_alive_and_stats():
+    server = EndpointServer()
+    await server.start()
+    transport = EndpointTransport(limit_per_host=2)
+    endpoint = f'http://127.0.0.1:{server.port}/http'
+    try:
+        results = await asyncio.gather(*[transport.send(b'message', endpoint, timeout=5) for _ in range(20)])
+        assert all(ok for ok, _ in results)
+        assert len(server.http_messages) == 20
+        # Connections are limited per host and reused
+        assert len(server.http_peers) <= 2
+
+        ok, body = await transport.send(b'message', endpoint, timeout=5, content_type='application/fail')
+        assert ok is False
+        assert body == 'error'
+        stats = transport.stats()[endpoint]
+        assert stats.requests == 21
+        assert stats.errors == 1
+        assert stats.last_error == 'HTTP status 500'
+    finally:
+        await transport.close()
+        await server.stop()
@@ -1,9 +1,17 @@
+import asyncio
+import os
+import json
+import sqlite3
+import tempfile
+import threading
 import uuid
 
 import pytest
 
 import sirius_sdk
-from sirius_sdk.hub.defaults.default_storage import InMemoryImmutableCollection, InMemoryKeyValueStorage
+from sirius_sdk.hub.defaults.default_storage import InMemoryImmutableCollection, InMemoryKeyValueStorage, \
+    _KeyValueShard
+from sirius_sdk.hub.defaults.sqlite_storage import SQLiteKeyValueStorage
 from sirius_sdk.errors.indy_exceptions import WalletItemNotFound
 
 
@@ -45,6 +53,191 @@ async def test_inmemory_kv_storage_iteration():
     assert loaded_data == data_under_test
 
 
+@pytest.mark.asyncio
+async def test_inmemory_kv_storage_snapshots():
+    kv = InMemoryKeyValueStorage()
+    await kv.select_db('db-' + uuid.uuid4().hex)
+    await kv.set('key1', 'value1')
+
+    snapshot1 = await kv.items()
+    assert await kv.items() is snapshot1
+    with pytest.raises(TypeError):
+        snapshot1['key2'] = 'value2'
+
+    await kv.set('key2', 'value2')
+    snapshot2 = await kv.items()
+    assert snapshot1 == {'key1': 'value1'}
+    assert snapshot2 == {'key1': 'value1', 'key2': 'value2'}
+
+    await kv.delete('key1')
+    assert await kv.items() == {'key2': 'value2'}
+
+
+def test_inmemory_kv_storage_threads():
+    db_name = 'db-' + uuid.uuid4().hex
+    keys_per_thread = 1000
+
+    async def routine(n: int):
+        kv = InMemoryKeyValueStorage()
+        await kv.select_db(db_name)
+        for i in range(keys_per_thread):
+            await kv.set(f'{n}:{i}', i)
+            assert await kv.get(f'{n}:{i}') == i
+            await kv.items()
+
+    def thread_routine(n: int):
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(routine(n))
+        finally:
+            loop.close()
+
+    threads = [threading.Thread(target=thread_routine, args=(n,)) for n in range(4)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+
+    async def check():
+        kv = InMemoryKeyValueStorage()
+        await kv.select_db(db_name)
+        return await kv.items()
+
+    loop = asyncio.new_event_loop()
+    try:
+        items = loop.run_until_complete(check())
+    finally:
+        loop.close()
+    assert len(items) == 4 * keys_per_thread
+
+
+def test_inmemory_kv_shard_drops_stale_snapshot():
+    shard = _KeyValueShard()
+    shard.set('key1', 1)
+
+    class RacyDict(dict):
+        """Emulates owner thread write while other thread copies data"""
+
+        write = True
+
+        def copy(self):
+            copied = dict(self)
+            if RacyDict.write:
+                RacyDict.write = False
+                shard.set('key2', 2)
+            return copied
+
+    shard._KeyValueShard__data = RacyDict(shard._KeyValueShard__data)
+    assert dict(shard.snapshot()) == {'key1': 1}
+    # Snapshot taken concurrently with write is not reused
+    assert dict(shard.snapshot()) == {'key1': 1, 'key2': 2}
+    assert shard.snapshot() is shard.snapshot()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_kv_storage():
+    path = os.path.join(tempfile.gettempdir(), f'kv_{uuid.uuid4().hex}.db')
+    try:
+        kv = SQLiteKeyValueStorage(path)
+        await kv.select_db('db1')
+        await kv.set('key1', 'value1')
+        await kv.set('key2', {'bytes': b'\x00\x01', 'list': [1, 2]})
+        assert await kv.get('key1') == 'value1'
+        await kv.select_db('db2')
+        await kv.set('key1', 1000)
+        assert await kv.get('key1') == 1000
+        assert await kv.items() == {'key1': 1000}
+        await kv.select_db('db1')
+        await kv.delete('key1')
+        assert await kv.get('key1') is None
+        await kv.delete('unknown-key')
+        kv.close()
+
+        # Reopen
+        kv = SQLiteKeyValueStorage(path)
+        await kv.select_db('db1')
+        assert await kv.items() == {'key2': {'bytes': b'\x00\x01', 'list': [1, 2]}}
+        await kv.select_db('db2')
+        assert await kv.get('key1') == 1000
+        await kv.set('key2', b'\x80\x04secret')
+        kv.close()
+        # Closed storage is reopened on next call
+        assert await kv.get('key2') == b'\x80\x04secret'
+        kv.close()
+        # Values are stored as JSON or raw bytes, not pickle
+        conn = sqlite3.connect(path)
+        try:
+            rows = dict(conn.execute('SELECT key, value FROM kv WHERE db LIKE ?', ('%/db1',)).fetchall())
+        finally:
+            conn.close()
+        assert json.loads(rows['key2']) == {'bytes': {'$b64': 'AAE='}, 'list': [1, 2]}
+    finally:
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.isfile(path + suffix):
+                os.remove(path + suffix)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_kv_storage_batched_commits():
+    path = os.path.join(tempfile.gettempdir(), f'kv_{uuid.uuid4().hex}.db')
+    try:
+        kv = SQLiteKeyValueStorage(path, commit_every=10, commit_interval=0.1)
+        await kv.select_db('db')
+        for n in range(15):
+            await kv.set(f'key{n}', n)
+        # Other connection see committed writes only
+        conn = sqlite3.connect(path)
+        try:
+            assert conn.execute('SELECT COUNT(*) FROM kv').fetchone()[0] == 10
+            await asyncio.sleep(0.3)
+            assert conn.execute('SELECT COUNT(*) FROM kv').fetchone()[0] == 15
+            # Commit timer does not depend on event loop of the writer: loop is closed before timer fires
+            async def write_in_other_loop():
+                await kv.select_db('db')
+                await kv.set('key-other-loop', 1)
+
+            thread = threading.Thread(target=asyncio.run, args=(write_in_other_loop(),))
+            thread.start()
+            thread.join()
+            await asyncio.sleep(0.3)
+            assert conn.execute('SELECT COUNT(*) FROM kv').fetchone()[0] == 16
+            await kv.set('key-next', 1)
+            await asyncio.sleep(0.3)
+            assert conn.execute('SELECT COUNT(*) FROM kv').fetchone()[0] == 17
+        finally:
+            conn.close()
+        kv.close()
+    finally:
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.isfile(path + suffix):
+                os.remove(path + suffix)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_kv_storage_hub_override():
+    path = os.path.join(tempfile.gettempdir(), f'kv_{uuid.uuid4().hex}.db')
+    try:
+        storage = SQLiteKeyValueStorage(path)
+        async with sirius_sdk.context(sirius_sdk.Config().override_storage(storage)):
+            verkey = await sirius_sdk.Crypto.create_key()
+            await sirius_sdk.NonSecrets.add_wallet_record(type_='type', id_='id', value='value')
+        storage.close()
+        # Keys and records survive restart
+        storage = SQLiteKeyValueStorage(path)
+        async with sirius_sdk.context(sirius_sdk.Config().override_storage(storage)):
+            signature = await sirius_sdk.Crypto.crypto_sign(verkey, b'message')
+            assert await sirius_sdk.Crypto.crypto_verify(verkey, b'message', signature) is True
+            rec = await sirius_sdk.NonSecrets.get_wallet_record(
+                type_='type', id_='id', options=sirius_sdk.NonSecretsRetrieveRecordOptions().check_all()
+            )
+            assert rec['value'] == 'value'
+        storage.close()
+    finally:
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.isfile(path + suffix):
+                os.remove(path + suffix)
+
+
 @pytest.mark.asyncio
 async def test_inmemory_immutable_collection():
     collection = InMemoryImmutableCollection()
@@ -53,16 +246,59 @@ async def test_inmemory_immutable_collection():
     await collection.add('Value1', {'tag1': 'tag-val-1', 'tag2': 'tag-val-2'})
     await collection.add('Value2', {'tag1': 'tag-val-1', 'tag2': 'tag-val-3'})
 
-    fetched1 = await collection.fetch({'tag1': 'tag-val-1'})
+    fetched1, count = await collection.fetch({'tag1': 'tag-val-1'})
     assert len(fetched1) == 2
+    assert count == 2
 
-    fetched1 = await collection.fetch({'tag2': 'tag-val-2'})
+    fetched1, count = await collection.fetch({'tag2': 'tag-val-2'})
     assert len(fetched1) == 1
     assert fetched1[0] == 'Value1'
 
     await collection.select_db('db2')
-    fetched3 = await collection.fetch({})
+    fetched3, count = await collection.fetch({})
     assert len(fetched3) == 0
+    assert count == 0
+
+
+@pytest.mark.asyncio
+async def test_inmemory_immutable_collection_limits_and_pages():
+    collection = InMemoryImmutableCollection()
+    await collection.select_db('db-' + uuid.uuid4().hex)
+    for n in range(100):
+        await collection.add(n, {'parity': str(n % 2), 'decade': str(n // 10), 'any': {'unhashable': n}})
+
+    fetched, count = await collection.fetch({'parity': '0'}, limit=5)
+    assert fetched == [0, 2, 4, 6, 8]
+    assert count == 50
+
+    fetched, count = await collection.fetch({'parity': '1', 'decade': '3'}, limit=2)
+    assert fetched == [31, 33]
+    assert count == 5
+
+    fetched, count = await collection.fetch({'any': {'unhashable': 7}})
+    assert fetched == [7]
+    assert count == 1
+
+    fetched, count = await collection.fetch({'parity': '1', 'decade': 'unknown'})
+    assert fetched == []
+    assert count == 0
+
+    fetched, count = await collection.fetch({}, limit=3)
+    assert fetched == [0, 1, 2]
+    assert count == 100
+
+    # Pagination
+    for query, expected in [
+        ({'parity': '0'}, list(range(0, 100, 2))),
+        ({'parity': '0', 'decade': '5'}, [50, 52, 54, 56, 58])
+    ]:
+        pages = []
+        values, cursor = await collection.fetch_page(query, limit=3)
+        pages.extend(values)
+        while cursor is not None:
+            values, cursor = await collection.fetch_page(query, limit=3, cursor=cursor)
+            pages.extend(values)
+        assert pages == expected
 
 
 @pytest.mark.asyncio
@@ -1,3 +1,4 @@
+import gc
 import asyncio
 import uuid
 
@@ -5,7 +6,7 @@ import pytest
 
 from sirius_sdk.errors.exceptions import OperationAbortedManually
 from sirius_sdk.errors.exceptions import SiriusTimeoutIO
-from sirius_sdk.hub.defaults.inmemory_bus import InMemoryBus
+from sirius_sdk.hub.defaults.inmemory_bus import InMemoryBus, Observer
 
 
 @pytest.mark.asyncio
@@ -57,3 +58,67 @@ async def test_abort(mediator_invitation: dict):
     asyncio.ensure_future(__abort())
     with pytest.raises(OperationAbortedManually):
         await session.get_event()
+
+
+@pytest.mark.asyncio
+async def test_overflow():
+    publisher = InMemoryBus()
+    thid = 'thread-' + uuid.uuid4().hex
+    drop_oldest = InMemoryBus(max_queue_size=2)
+    drop_newest = InMemoryBus(max_queue_size=2, overflow=Observer.Overflow.DROP_NEWEST)
+    for session in [drop_oldest, drop_newest]:
+        await session.subscribe(thid)
+    for n in range(3):
+        num = await publisher.publish(thid, f'Message-{n}'.encode())
+        assert num == 2
+
+    assert (await drop_oldest.get_event(timeout=1)).payload == b'Message-1'
+    assert (await drop_oldest.get_event(timeout=1)).payload == b'Message-2'
+    assert (await drop_newest.get_event(timeout=1)).payload == b'Message-0'
+    assert (await drop_newest.get_event(timeout=1)).payload == b'Message-1'
+    # Abort is delivered to full queue
+    await publisher.publish(thid, b'Message-3')
+    await publisher.publish(thid, b'Message-4')
+    await drop_newest.abort()
+    assert (await drop_newest.get_event(timeout=1)).payload == b'Message-4'
+    with pytest.raises(OperationAbortedManually):
+        await drop_newest.get_event(timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_publish_from_other_thread():
+    session = InMemoryBus()
+    thid = 'thread-' + uuid.uuid4().hex
+    await session.subscribe(thid)
+
+    def publish_in_thread():
+        loop = asyncio.new_event_loop()
+        try:
+            publisher = InMemoryBus(loop=loop)
+            for n in range(100):
+                num = loop.run_until_complete(publisher.publish(thid, f'Message-{n}'.encode()))
+                assert num == 1
+        finally:
+            loop.close()
+
+    await asyncio.get_event_loop().run_in_executor(None, publish_in_thread)
+    for n in range(100):
+        event = await session.get_event(timeout=3)
+        assert event.payload == f'Message-{n}'.encode()
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe():
+    publisher = InMemoryBus()
+    session = InMemoryBus()
+    thids = ['thread-' + uuid.uuid4().hex for _ in range(10)]
+    for thid in thids:
+        await session.subscribe(thid)
+    await session.unsubscribe_ext(thids[:5])
+    assert await publisher.publish(thids[0], b'Message') == 0
+    assert await publisher.publish(thids[5], b'Message') == 1
+    # Subscriptions are dropped with collected bus
+    del session
+    gc.collect()
+    for thid in thids:
+        assert await publisher.publish(thid, b'Message') == 0
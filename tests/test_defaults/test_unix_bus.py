@@ -0,0 +1,137 @@
+import gc
+import os
+import sys
+import uuid
+import socket
+import asyncio
+import tempfile
+import warnings
+
+import pytest
+
+from sirius_sdk.errors.exceptions import OperationAbortedManually, SiriusTimeoutIO
+from sirius_sdk.hub.defaults.unix_bus import UnixSocketBroker, UnixSocketBus
+
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix domain sockets are not supported')
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def socket_path() -> str:
+    return os.path.join(tempfile.gettempdir(), f'bus_{uuid.uuid4().hex[:8]}.sock')
+
+
+@pytest.mark.asyncio
+async def test_sane():
+    broker = UnixSocketBroker(socket_path())
+    await broker.start()
+    session1 = UnixSocketBus(broker.path)
+    session2 = UnixSocketBus(broker.path)
+    try:
+        thid1 = 'thread-' + uuid.uuid4().hex
+        thid2 = 'thread-' + uuid.uuid4().hex
+        for thid in [thid1, thid2]:
+            ok = await session2.subscribe(thid)
+            assert ok is True
+        for thid, content in [(thid1, b'Message-1'), (thid2, b'Message-2')]:
+            num = await session1.publish(thid, content)
+            assert num == 1
+        for thid, content in [(thid1, b'Message-1'), (thid2, b'Message-2')]:
+            event = await session2.get_event(timeout=3)
+            assert event.thread_id == thid
+            assert event.payload == content
+        await session2.unsubscribe(thid1)
+        assert await session1.publish(thid1, b'Message') == 0
+        with pytest.raises(SiriusTimeoutIO):
+            await session2.get_event(timeout=1)
+
+        ok, binding_ids = await session2.subscribe_ext(['VK1', 'VK2'], ['VK3'], ['protocol'])
+        assert ok is True
+        assert len(binding_ids) == 2
+        assert await session1.publish(binding_ids[1], b'Message-3') == 1
+        event = await session2.get_event(timeout=3)
+        assert event.thread_id == binding_ids[1]
+        await session2.unsubscribe_ext(binding_ids)
+        assert await session1.publish(binding_ids[1], b'Message') == 0
+
+        async def __abort():
+            await asyncio.sleep(0.5)
+            await session2.abort()
+
+        asyncio.ensure_future(__abort())
+        with pytest.raises(OperationAbortedManually):
+            await session2.get_event()
+        # Abort interrupts single awaiting
+        await session2.subscribe(thid2)
+        assert await session1.publish(thid2, b'After abort') == 1
+        event = await session2.get_event(timeout=3)
+        assert event.payload == b'After abort'
+    finally:
+        await session1.close()
+        await session2.close()
+        await broker.stop()
+
+
+@pytest.mark.asyncio
+async def test_shared_connection():
+    broker = UnixSocketBroker(socket_path())
+    await broker.start()
+    publisher = UnixSocketBus(broker.path)
+    try:
+        thid = 'thread-' + uuid.uuid4().hex
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            for _ in range(50):
+                bus = UnixSocketBus(broker.path)
+                await bus.subscribe(thid)
+                await bus.abort()
+                with pytest.raises(OperationAbortedManually):
+                    await bus.get_event(timeout=1)
+                # Subscriptions of collected bus are released
+                del bus
+                gc.collect()
+            assert await publisher.publish(thid, b'Message') == 0
+        assert not caught
+        # Every subscribed bus receives event
+        buses = [UnixSocketBus(broker.path) for _ in range(3)]
+        for bus in buses:
+            await bus.subscribe(thid)
+        assert await publisher.publish(thid, b'Message') == 3
+        for bus in buses:
+            event = await bus.get_event(timeout=3)
+            assert event.payload == b'Message'
+        await buses[0].close()
+        assert await publisher.publish(thid, b'Message') == 2
+        for bus in buses[1:]:
+            await bus.close()
+        assert await publisher.publish(thid, b'Message') == 0
+    finally:
+        await publisher.close()
+        await broker.stop()
+
+
+@pytest.mark.asyncio
+async def test_cross_process():
+    path = socket_path()
+    broker = UnixSocketBroker.spawn(path)
+    session = UnixSocketBus(path)
+    try:
+        thid = 'thread-' + uuid.uuid4().hex
+        await session.subscribe(thid)
+        # Publisher runs in other process
+        code = 'import asyncio, sys\n' \
+               'from sirius_sdk.hub.defaults.unix_bus import UnixSocketBus\n' \
+               'bus = UnixSocketBus(sys.argv[1])\n' \
+               'num = asyncio.get_event_loop().run_until_complete(bus.publish(sys.argv[2], b"payload"))\n' \
+               'assert num == 1\n'
+        proc = await asyncio.create_subprocess_exec(sys.executable, '-c', code, path, thid, cwd=ROOT_DIR)
+        assert await proc.wait() == 0
+        event = await session.get_event(timeout=5)
+        assert event.thread_id == thid
+        assert event.payload == b'payload'
+    finally:
+        await session.close()
+        broker.terminate()
+        broker.join()
+    assert not os.path.exists(path)